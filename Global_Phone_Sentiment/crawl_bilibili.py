@@ -4,10 +4,11 @@ import random
 import re
 from datetime import datetime
 
-import requests
 import pandas as pd
 
 import config
+from crawl_http import CrawlerClient
+from csv_sink import get_sink
 
 # =========================
 # 基本配置
@@ -57,6 +58,14 @@ SEARCH_API = "https://api.bilibili.com/x/web-interface/search/type"
 VIEW_API = "https://api.bilibili.com/x/web-interface/view"
 REPLY_API = "https://api.bilibili.com/x/v2/reply/main"
 
+# 共用连接池 + 限速：B 站 API 平均每秒 2 个请求（原来每个请求后歇 0.3~0.8 秒），
+# 同一页搜索结果里的视频最多 4 个同时拉评论
+HTTP = CrawlerClient(
+    headers=HEADERS,
+    rate_limits={"api.bilibili.com": (2.0, 2)},
+    max_workers=4,
+)
+
 # BV 号正则
 BVID_RE = re.compile(r"BV[0-9A-Za-z]{10}")
 
@@ -66,32 +75,13 @@ BVID_RE = re.compile(r"BV[0-9A-Za-z]{10}")
 # =========================
 
 def append_row_to_csv(row: dict):
-    """把一条记录实时追加写入 CSV，文件不存在时自动写表头"""
-    df = pd.DataFrame([row])
-    file_exists = os.path.exists(CSV_FILENAME)
-    df.to_csv(
-        CSV_FILENAME,
-        mode="a",
-        index=False,
-        encoding="utf-8-sig",
-        header=not file_exists,
-    )
-
-
-def get_json(url: str, params: dict = None, sleep_range=(0.3, 0.8)):
-    """简易 GET JSON（用于 B 站 API）"""
-    for i in range(3):
-        try:
-            resp = requests.get(url, headers=HEADERS, params=params, timeout=15)
-            if resp.status_code == 200:
-                time.sleep(random.uniform(*sleep_range))
-                return resp.json()
-            else:
-                print(f"   ⚠️ API {url} 返回 {resp.status_code}")
-        except Exception as e:
-            print(f"   ⚠️ API {url} 出错: {e}")
-        time.sleep(1.0 + i)
-    return None
+    """把一条记录追加写入 CSV，文件不存在时自动写表头（攒批写出，每个视频写完时落盘）"""
+    get_sink(CSV_FILENAME).write(row)
+
+
+def get_json(url: str, params: dict = None):
+    """GET JSON（用于 B 站 API）；限速、重试、缓存都在 HTTP 里"""
+    return HTTP.get_json(url, params=params, timeout=15)
 
 
 # =========================
@@ -283,7 +273,7 @@ def fetch_comments_by_api(bvid: str, max_comments: int = 30):
             "pn": page_no,
         }
         print(f"      💬 拉取评论第 {page_no} 页，当前已有 {len(comments)} 条...")
-        data = get_json(REPLY_API, params=params, sleep_range=(0.3, 0.7))
+        data = get_json(REPLY_API, params=params)
         if not data or data.get("code") != 0:
             print(f"      ⚠️ 评论 API 返回异常，code={data.get('code') if data else 'N/A'}")
             break
@@ -385,18 +375,29 @@ def crawl_bilibili_by_model():
 
             print(f"   ✅ 第 {page_no} 页共 {len(videos)} 条搜索结果。")
 
+            # 先挑出本页要抓的新视频（断点续爬：已经抓过的视频直接跳过）
+            chosen = []
             for vid in videos:
-                if videos_this_model >= MAX_VIDEOS_PER_MODEL:
+                if videos_this_model + len(chosen) >= MAX_VIDEOS_PER_MODEL:
                     break
+                if vid["url"] in SEEN_VIDEO_URLS:
+                    continue
+                SEEN_VIDEO_URLS.add(vid["url"])
+                chosen.append(vid)
 
+            # ---- 评论：用 API 抓前 30 条，几个视频并发拉 ----
+            def fetch_video_comments(vid):
+                bvid = vid.get("bvid") or extract_bvid(vid["url"])
+                if not bvid:
+                    return None
+                return fetch_comments_by_api(bvid, MAX_COMMENTS_PER_VIDEO)
+
+            all_comments = HTTP.map(fetch_video_comments, chosen)
+
+            for vid, comments in zip(chosen, all_comments):
                 url = vid["url"]
                 title = vid["title"]
 
-                # 断点续爬：已经抓过的视频直接跳过
-                if url in SEEN_VIDEO_URLS:
-                    continue
-                SEEN_VIDEO_URLS.add(url)
-
                 play_count = parse_play_count(vid["play_str"])
 
                 source_id = f"bilibili_{int(time.time() * 1000)}_{random.randint(1000, 9999)}"
@@ -422,11 +423,8 @@ def crawl_bilibili_by_model():
                     f"   🎬 视频: {title[:50]}... | UP: {vid['up_name'] or '未知'} | 播放: {vid['play_str'] or '无'}"
                 )
 
-                # ---- 评论：用 API 抓前 30 条 ----
-                bvid = vid.get("bvid") or extract_bvid(url)
                 comment_rows = []
-                if bvid:
-                    comments = fetch_comments_by_api(bvid, MAX_COMMENTS_PER_VIDEO)
+                if comments is not None:
                     for c_idx, c in enumerate(comments):
                         row = {
                             **base_row,
@@ -454,17 +452,15 @@ def crawl_bilibili_by_model():
                     total_comments += 1
                     total_rows += 1
 
+                # 续跑按 CSV 里已有的视频 URL 跳过，视频和它的评论一起落盘
+                get_sink(CSV_FILENAME).checkpoint()
+
                 print(
                     f"      ✅ 已写入视频 1 条，本视频评论 {len(comment_rows)} 条，"
                     f"本机型累计视频 {videos_this_model} 条，所有机型总评论 {total_comments} 条。"
                 )
 
-                # 视频之间休息一下，别把接口打爆
-                time.sleep(random.uniform(0.5, 1.0))
-
             page_no += 1
-            # 翻页之间也歇一下
-            time.sleep(random.uniform(0.8, 1.5))
 
         print(
             f"   📊 机型 {model_key} 完成累计：视频 {videos_this_model} 条，"
@@ -478,6 +474,7 @@ def crawl_bilibili_by_model():
         )
     else:
         print("\n⚠️ 没有抓到任何数据，请检查网络或选择器。")
+    print(f"📶 请求统计: {HTTP.stats()}")
 
 
 if __name__ == "__main__":
@@ -1,14 +1,13 @@
 import os
-import time
-import random
 import urllib.parse
 from datetime import datetime
 
-import requests
 from bs4 import BeautifulSoup
 import pandas as pd
 
 import config
+from crawl_http import CrawlerClient
+from csv_sink import get_sink
 
 # -------- 基本设置 --------
 CSV_FILENAME = "data_gsmarena_notebookcheck.csv"
@@ -35,6 +34,14 @@ NB_SEARCH_URL_TEMPLATE = (
     "&cof=FORID%3A10&ie=UTF-8&q={q}&search="
 )
 
+# 共用连接池 + 按站点限速（原来每个请求后歇 0.5~1.2 秒）；
+# 互不依赖的页面（各机型的搜索页、评测页）先并发预取进缓存，解析仍按原来的顺序
+HTTP = CrawlerClient(
+    headers=HEADERS,
+    rate_limits={"www.gsmarena.com": (1.2, 1), "www.notebookcheck.net": (1.2, 2)},
+    max_workers=4,
+)
+
 # -------- 断点续跑用的集合 / 统计 --------
 SEEN_GS_OPINION_KEYS = set()    # (phone_model_id, device_name, raw_text[:80])
 GS_OPINION_COUNT = {}           # (phone_model_id, device_name) -> 历史 opinion 数
@@ -44,32 +51,16 @@ SEEN_NB_COMMENT_KEYS = set()    # (url, raw_text[:80])
 
 
 def append_row_to_csv(row: dict):
-    """实时将一条记录追加写入 CSV，文件不存在时自动写表头"""
-    df = pd.DataFrame([row])
-    file_exists = os.path.exists(CSV_FILENAME)
-    df.to_csv(
-        CSV_FILENAME,
-        mode="a",
-        index=False,
-        encoding="utf-8-sig",
-        header=not file_exists,
-    )
+    """将一条记录追加写入 CSV，文件不存在时自动写表头（攒批写出，每页 / 每篇评测结束时落盘）"""
+    get_sink(CSV_FILENAME).write(row)
 
 
-def get_soup(url: str, sleep_range=(0.5, 1.2)):
-    """带 headers + 简单重试的 GET，然后返回 BeautifulSoup"""
-    for i in range(3):
-        try:
-            resp = requests.get(url, headers=HEADERS, timeout=15)
-            if resp.status_code == 200:
-                time.sleep(random.uniform(*sleep_range))
-                return BeautifulSoup(resp.text, "lxml")
-            else:
-                print(f"   ⚠️ 请求 {url} 返回 {resp.status_code}")
-        except Exception as e:
-            print(f"   ⚠️ 请求 {url} 出错: {e}")
-        time.sleep(1.0 + i)
-    return None
+def get_soup(url: str):
+    """GET 网页（限速、重试、缓存都在 HTTP 里），然后返回 BeautifulSoup"""
+    html = HTTP.get_text(url, timeout=15)
+    if html is None:
+        return None
+    return BeautifulSoup(html, "lxml")
 
 
 def load_existing_progress():
@@ -279,6 +270,8 @@ def crawl_gsmarena_opinions(device_name: str, device_url: str,
             append_row_to_csv(row)
             opinions_total += 1
 
+        # 续跑按 CSV 里已有的 opinion 计数，所以每页结束时落盘
+        get_sink(CSV_FILENAME).checkpoint()
         print(f"         ✅ 本页新增 {opinions_total} 条，本设备历史+本次共 {already + opinions_total} 条。")
 
     GS_OPINION_COUNT[base_key] = already + opinions_total
@@ -430,6 +423,7 @@ def crawl_notebookcheck_review(title: str, url: str,
         append_row_to_csv(row)
         written += 1
 
+    get_sink(CSV_FILENAME).checkpoint()
     print(f"         ✅ Notebookcheck 评论本轮写入 {written} 条（去重后）")
 
 
@@ -443,6 +437,13 @@ def crawl_notebookcheck_only():
 
     load_existing_progress()
 
+    # 各机型的搜索和评测页互不依赖：先并发搜索，再并发把评测页预取进 HTTP 的缓存，
+    # 下面按机型顺序解析、写 CSV 时直接命中缓存
+    search_kws = [keywords[0] for keywords in config.TARGET_MODELS.values() if keywords]
+    found = dict(zip(search_kws, HTTP.map(lambda kw: search_notebookcheck_reviews(kw, max_results=1), search_kws)))
+    review_urls = [url for reviews in found.values() for _, url in reviews]
+    HTTP.map(lambda url: HTTP.get_text(url, timeout=15), review_urls)
+
     for idx, (model_key, keywords) in enumerate(config.TARGET_MODELS.items(), start=1):
         if not keywords:
             continue
@@ -450,7 +451,7 @@ def crawl_notebookcheck_only():
         search_kw = keywords[0]
         print(f"\n================ 机型 {idx}: {model_key} ({search_kw}) ================")
 
-        reviews = search_notebookcheck_reviews(search_kw, max_results=1)
+        reviews = found[search_kw]
         if not reviews:
             print("   ⚠️ Notebookcheck 未找到评测。")
         else:
@@ -463,6 +464,7 @@ def crawl_notebookcheck_only():
                 )
 
     print("\n✅ Notebookcheck 抓取结束。")
+    print(f"📶 请求统计: {HTTP.stats()}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,290 @@
+"""
+crawl_http.py
+
+各个爬虫共用的 HTTP 客户端（CrawlerClient）：
+
+- 连接复用：一个 requests.Session + HTTPAdapter 连接池，同一主机的请求走 keep-alive，
+  不再每次都重新做 TCP / TLS（经代理时还要多一次 CONNECT）握手；
+- 按主机限速：每个主机一个令牌桶（每秒 rate 个请求，最多攒 burst 个），
+  代替原来每次请求后固定的 random sleep；并发时各线程按到达顺序排队取令牌；
+- 有界并发：map() 用固定大小的线程池并发执行互不依赖的抓取，结果按输入顺序返回；
+- 重试：连接出错和 429 / 5xx 按指数退避（带随机抖动）重试，有 Retry-After 时按它等待；
+- 缓存：幂等的 GET 按完整 URL 缓存 200 响应（LRU + 过期时间），同一次运行里重复的请求不再发出。
+
+URL 都由调用方传入，所以可以直接指向本地的桩服务器测试（见 benchmarks/bench_crawl_http.py）。
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    attempts: int = 3  # 总共最多请求几次（含第一次）
+    backoff: float = 1.0  # 第 n 次重试前等待 backoff * 2^(n-1) 秒，再加至多 50% 的随机抖动
+    max_backoff: float = 30.0
+    statuses: Tuple[int, ...] = (429, 500, 502, 503, 504)
+
+    def delay(self, retry: int, retry_after: Optional[str] = None) -> float:
+        """第 retry 次重试（从 1 开始）前等待的秒数；Retry-After 是秒数时优先用它"""
+        if retry_after:
+            try:
+                return min(max(float(retry_after), 0.0), self.max_backoff)
+            except ValueError:
+                pass
+        base = min(self.backoff * 2 ** (retry - 1), self.max_backoff)
+        return base * (1 + random.random() * 0.5)
+
+
+class TokenBucket:
+    """
+    线程安全的令牌桶：平均每秒 rate 个请求，空闲时最多攒 burst 个。
+    acquire() 先在锁内预定一个令牌（令牌可以欠成负数，欠多少就排多久），再在锁外等待，
+    所以多个线程同时取令牌时按到达顺序依次放行。
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if rate <= 0:
+            raise ValueError("rate 必须大于 0")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """预定一个令牌，返回还要等多少秒才轮到（不等待；asyncio 里用 await asyncio.sleep(...)）"""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def acquire(self) -> float:
+        """取一个令牌，返回等待的秒数"""
+        wait = self.reserve()
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+
+class ResponseCache:
+    """GET 响应的 LRU 缓存，key 是带查询参数的完整 URL；只缓存 200"""
+
+    def __init__(self, max_entries: int = 256, ttl: float = 600.0) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, requests.Response]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[requests.Response]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, resp = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return resp
+
+    def put(self, key: str, resp: requests.Response) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), resp)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CrawlerClient:
+    """
+    用法：
+        client = CrawlerClient(headers=HEADERS, rate_limits={"api.bilibili.com": (2.0, 2)})
+        resp = client.get(url, params=...)          # 与 requests.get 一样返回 Response
+        data = client.get_json(url, params=...)     # 200 且是合法 JSON 时返回解析结果，否则 None
+        pages = client.map(fetch_one, items)        # 有界并发，结果按 items 的顺序
+
+    rate_limits: 主机名 -> (每秒请求数, burst)；没列出的主机用 default_rate（None 表示不限速）。
+    get() 在重试用完后返回最后一次的响应（可能不是 200），连接错误重试用完后抛出最后一次的异常，
+    与原来直接调用 requests.get 的处理方式保持一致。
+    """
+
+    def __init__(
+        self,
+        headers: Optional[Dict[str, str]] = None,
+        proxies: Optional[Dict[str, str]] = None,
+        rate_limits: Optional[Dict[str, Tuple[float, int]]] = None,
+        default_rate: Optional[Tuple[float, int]] = None,
+        max_workers: int = 4,
+        retry: RetryPolicy = RetryPolicy(),
+        cache_size: int = 256,
+        cache_ttl: float = 600.0,
+        timeout: float = 15.0,
+    ) -> None:
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=max(max_workers, 1) * 2)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if headers:
+            self.session.headers.update(headers)
+        if proxies:
+            self.session.proxies.update(proxies)
+
+        self.max_workers = max(1, max_workers)
+        self.retry = retry
+        self.timeout = timeout
+        self.cache = ResponseCache(cache_size, cache_ttl)
+        self._rate_limits = dict(rate_limits or {})
+        self._default_rate = default_rate
+        self._buckets: Dict[str, Optional[TokenBucket]] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stats = {"requests": 0, "cache_hits": 0, "retries": 0, "errors": 0, "throttled_s": 0.0}
+
+    # ---------- 限速 ----------
+
+    def _bucket(self, url: str) -> Optional[TokenBucket]:
+        host = urlsplit(url).hostname or ""
+        with self._lock:
+            if host not in self._buckets:
+                limit = self._rate_limits.get(host, self._default_rate)
+                self._buckets[host] = TokenBucket(*limit) if limit else None
+            return self._buckets[host]
+
+    def _count(self, key: str, value: float = 1) -> None:
+        with self._lock:
+            self._stats[key] += value
+
+    # ---------- 请求 ----------
+
+    def get(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        use_cache: bool = True,
+        **kwargs: Any,
+    ) -> requests.Response:
+        key = requests.Request("GET", url, params=params).prepare().url or url
+        if use_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self._count("cache_hits")
+                return cached
+
+        bucket = self._bucket(url)
+        for attempt in range(1, self.retry.attempts + 1):
+            last = attempt == self.retry.attempts
+            if bucket is not None:
+                self._count("throttled_s", bucket.acquire())
+            self._count("requests")
+            try:
+                resp = self.session.get(url, params=params, timeout=timeout or self.timeout, **kwargs)
+            except requests.RequestException as e:
+                self._count("errors")
+                if last:
+                    raise
+                print(f"   ⚠️ 请求 {url} 出错，第 {attempt} 次重试: {e}")
+                self._count("retries")
+                time.sleep(self.retry.delay(attempt))
+                continue
+
+            if resp.status_code in self.retry.statuses and not last:
+                print(f"   ⚠️ 请求 {url} 返回 {resp.status_code}，第 {attempt} 次重试")
+                self._count("retries")
+                time.sleep(self.retry.delay(attempt, resp.headers.get("Retry-After")))
+                continue
+
+            if resp.status_code == 200 and use_cache:
+                self.cache.put(key, resp)
+            return resp
+        raise AssertionError("unreachable")
+
+    def get_json(self, url: str, params: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Optional[Any]:
+        """GET 并解析 JSON；请求失败、非 200 或不是合法 JSON 时打印原因并返回 None"""
+        try:
+            resp = self.get(url, params=params, **kwargs)
+        except requests.RequestException as e:
+            print(f"   ⚠️ API {url} 出错: {e}")
+            return None
+        if resp.status_code != 200:
+            print(f"   ⚠️ API {url} 返回 {resp.status_code}")
+            return None
+        try:
+            return resp.json()
+        except ValueError as e:
+            print(f"   ⚠️ API {url} 返回的不是 JSON: {e}")
+            return None
+
+    def get_text(self, url: str, params: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Optional[str]:
+        """GET 网页；请求失败或非 200 时打印原因并返回 None"""
+        try:
+            resp = self.get(url, params=params, **kwargs)
+        except requests.RequestException as e:
+            print(f"   ⚠️ 请求 {url} 出错: {e}")
+            return None
+        if resp.status_code != 200:
+            print(f"   ⚠️ 请求 {url} 返回 {resp.status_code}")
+            return None
+        return resp.text
+
+    # ---------- 并发 ----------
+
+    def map(self, fn: Callable[[T], R], items: Iterable[T]) -> List[R]:
+        """用至多 max_workers 个线程并发执行 fn，结果按 items 的顺序返回（fn 抛出的异常原样抛出）"""
+        items = list(items)
+        if self.max_workers == 1 or len(items) <= 1:
+            return [fn(item) for item in items]
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="crawl")
+            executor = self._executor
+        return list(executor.map(fn, items))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["throttled_s"] = round(stats["throttled_s"], 3)
+        stats["cached"] = len(self.cache)
+        return stats
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.session.close()
+
+    def __enter__(self) -> "CrawlerClient":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
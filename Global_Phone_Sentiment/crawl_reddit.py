@@ -1,12 +1,12 @@
-import requests
 import pandas as pd
-import time
-import random
 from datetime import datetime
 import os
 import json
 
 import config
+from crawl_http import CrawlerClient
+from csv_sink import get_sink
+from model_catalog import get_model_catalog
 
 # 代理设置
 PROXIES = {
@@ -14,6 +14,29 @@ PROXIES = {
     "https": "http://127.0.0.1:7890",
 }
 
+# 模拟更真实的浏览器头
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/123.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,"
+              "image/avif,image/webp,*/*;q=0.8"
+}
+
+SEARCH_API = "https://www.reddit.com/search.json"
+
+# --- 翻页配置 ---
+MAX_PAGES = 5  # 每个型号最多抓几页（防止死循环）
+
+# 共用连接池；Reddit 容易 429 Too Many Requests，平均每 3 秒一个请求（原来翻页之间歇 2~4 秒）
+HTTP = CrawlerClient(
+    headers=HEADERS,
+    proxies=PROXIES,
+    rate_limits={"www.reddit.com": (1 / 3, 1)},
+)
+
 # 进度文件
 PROGRESS_FILENAME = "reddit_progress.json"
 
@@ -22,8 +45,10 @@ CSV_FILENAME = None
 
 
 def save_progress(progress: dict):
-    """把进度写入到本地 JSON 文件"""
+    """把进度写入到本地 JSON 文件（先把已抓到的行落盘，进度不会超前于 CSV）"""
     try:
+        if CSV_FILENAME:
+            get_sink(CSV_FILENAME).checkpoint()
         with open(PROGRESS_FILENAME, "w", encoding="utf-8") as f:
             json.dump(progress, f, ensure_ascii=False, indent=2)
     except Exception as e:
@@ -78,19 +103,11 @@ def init_run():
 
 
 def append_row_to_csv(row: dict):
-    """把一条记录追加写入到 CSV，文件不存在时写表头（实时写盘）"""
+    """把一条记录追加写入到 CSV，文件不存在时写表头（攒批写出，save_progress 时落盘）"""
     if CSV_FILENAME is None:
         raise RuntimeError("CSV_FILENAME 尚未初始化，请先调用 init_run()")
 
-    df = pd.DataFrame([row])
-    file_exists = os.path.exists(CSV_FILENAME)
-    df.to_csv(
-        CSV_FILENAME,
-        mode="a",                # 追加写入
-        index=False,
-        encoding="utf-8-sig",
-        header=not file_exists,  # 只有第一次写入才写表头
-    )
+    get_sink(CSV_FILENAME).write(row)
 
 
 def load_seen_ids_from_csv() -> set:
@@ -106,6 +123,70 @@ def load_seen_ids_from_csv() -> set:
     return seen_ids
 
 
+def brand_name_of(model_key: str) -> str:
+    """匹配品牌（与后端清洗用同一个解析器）"""
+    brand = get_model_catalog().resolver.resolve(model_key)
+    return brand.brand_name if brand is not None else "Other"
+
+
+def search_params(search_term: str, after_token) -> dict:
+    """构造参数：limit=100 (最大值), after=翻页标记"""
+    return {
+        "q": search_term,
+        "limit": 100,        # 每页最多 100 条
+        "sort": "new",
+        "type": "link",
+        "after": after_token  # 告诉 Reddit 我要看下一页
+    }
+
+
+def post_to_row(p: dict, keywords: list, brand_name: str, model_key: str, seen_ids: set):
+    """
+    把搜索结果里的一条帖子转成 CSV 行；
+    不含关键词、没有 ID 或已经抓过（seen_ids，跨多次运行去重）时返回 None
+    """
+    title = p.get("title", "") or ""
+    selftext = p.get("selftext", "") or ""
+    full_text = f"{title} {selftext}"
+
+    # 匹配关键词
+    if not any(kw.lower() in full_text.lower() for kw in keywords):
+        return None
+
+    # 组装唯一 ID
+    post_id = p.get("id")
+    if not post_id:
+        return None
+    source_id = f"reddit_{post_id}"
+
+    # 去重（跨多次运行）
+    if source_id in seen_ids:
+        return None
+    seen_ids.add(source_id)
+
+    # 时间戳转时间
+    created_ts = p.get("created_utc")
+    if created_ts:
+        published_str = datetime.fromtimestamp(
+            created_ts
+        ).strftime("%Y-%m-%d %H:%M:%S")
+    else:
+        published_str = ""
+
+    return {
+        "platform": "reddit",
+        "source_id": source_id,
+        "source_type": "post",
+        "url": f"https://www.reddit.com{p.get('permalink', '')}",
+        "brand_id": brand_name,
+        "phone_model_id": model_key,
+        "lang": "en",
+        "published_at": published_str,
+        "raw_text": f"{title}\n{selftext[:500]}",
+        "cleaned_text": title,
+    }
+
+
 def crawl_reddit_by_model():
     # 初始化本次运行（决定是否续跑 & CSV 文件名）
     progress = init_run()
@@ -115,17 +196,6 @@ def crawl_reddit_by_model():
     # 读取历史 CSV 中的 source_id，跨多次运行去重
     seen_ids = load_seen_ids_from_csv()
 
-    # 模拟更真实的浏览器头
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/123.0.0.0 Safari/537.36"
-        ),
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,"
-                  "image/avif,image/webp,*/*;q=0.8"
-    }
-
     print(f"🚀 开始抓取 Reddit，共 {len(config.TARGET_MODELS)} 个具体机型...")
     print(f"📁 数据将实时写入: {CSV_FILENAME}")
 
@@ -143,33 +213,22 @@ def crawl_reddit_by_model():
         current_page = state.get("current_page", 0)
         search_term = keywords[0]
 
+        brand_name = brand_name_of(model_key)
+
         if current_page > 0:
             print(f"\n--- 继续型号: {model_key} ({search_term}) "
                   f"从第 {current_page + 1} 页开始 ---")
         else:
             print(f"\n--- 正在搜索型号: {model_key} ({search_term}) ---")
 
-        # --- 翻页配置 ---
-        max_pages = 5  # 每个型号最多抓几页（防止死循环）
+        max_pages = MAX_PAGES
 
         while current_page < max_pages:
             try:
-                # 构造参数：limit=100 (最大值), after=翻页标记
-                params = {
-                    "q": search_term,
-                    "limit": 100,        # 每页最多 100 条
-                    "sort": "new",
-                    "type": "link",
-                    "after": after_token  # 告诉 Reddit 我要看下一页
-                }
+                params = search_params(search_term, after_token)
 
-                resp = requests.get(
-                    "https://www.reddit.com/search.json",
-                    headers=headers,
-                    params=params,
-                    timeout=15,
-                    proxies=PROXIES,
-                )
+                # 限速和 429 / 5xx 退避重试都在 HTTP 里
+                resp = HTTP.get(SEARCH_API, params=params, timeout=15)
 
                 if resp.status_code != 200:
                     print(
@@ -197,55 +256,10 @@ def crawl_reddit_by_model():
 
                 # 处理数据
                 for post in children:
-                    p = post.get("data", {})
-                    title = p.get("title", "") or ""
-                    selftext = p.get("selftext", "") or ""
-                    full_text = f"{title} {selftext}"
-
-                    # 匹配关键词
-                    if not any(kw.lower() in full_text.lower() for kw in keywords):
+                    row = post_to_row(post.get("data", {}), keywords, brand_name, model_key, seen_ids)
+                    if row is None:
                         continue
 
-                    # 组装唯一 ID
-                    post_id = p.get("id")
-                    if not post_id:
-                        continue
-                    source_id = f"reddit_{post_id}"
-
-                    # 去重（跨多次运行）
-                    if source_id in seen_ids:
-                        continue
-                    seen_ids.add(source_id)
-
-                    # 匹配品牌
-                    brand_name = "Other"
-                    for b_code, b_name in config.BRANDS.items():
-                        if b_code in model_key:
-                            brand_name = b_name
-                            break
-
-                    # 时间戳转时间
-                    created_ts = p.get("created_utc")
-                    if created_ts:
-                        published_str = datetime.fromtimestamp(
-                            created_ts
-                        ).strftime("%Y-%m-%d %H:%M:%S")
-                    else:
-                        published_str = ""
-
-                    row = {
-                        "platform": "reddit",
-                        "source_id": source_id,
-                        "source_type": "post",
-                        "url": f"https://www.reddit.com{p.get('permalink', '')}",
-                        "brand_id": brand_name,
-                        "phone_model_id": model_key,
-                        "lang": "en",
-                        "published_at": published_str,
-                        "raw_text": f"{title}\n{selftext[:500]}",
-                        "cleaned_text": title,
-                    }
-
                     # 内存里存一份，方便统计
                     all_data.append(row)
                     # 立刻写入 CSV（实时存）
@@ -270,9 +284,6 @@ def crawl_reddit_by_model():
                     print("   没有更多页面了。")
                     break
 
-                # 翻页之间必须休息，Reddit 容易 429 Too Many Requests
-                time.sleep(random.uniform(2, 4))
-
             except Exception as e:
                 print(f"❌ 抓取出错: {e}")
                 # 出错时也保存当前的进度（已在上一次成功页保存过）
@@ -286,6 +297,7 @@ def crawl_reddit_by_model():
         )
     else:
         print("⚠️ 本次运行未抓取到新数据（可能是全部都已经在历史 CSV 中）。")
+    print(f"📶 请求统计: {HTTP.stats()}")
 
 
 if __name__ == "__main__":
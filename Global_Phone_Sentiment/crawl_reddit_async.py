@@ -0,0 +1,254 @@
+"""
+crawl_reddit_async.py
+
+Reddit 帖子搜索 + 评论抓取的 asyncio 版本（依赖 httpx）。
+
+原来的 crawl_reddit / crawl_reddit_comments 一个型号一页页翻、一个帖子一个帖子抓，
+每次请求后还要固定歇几秒，大部分时间都在空等。这里：
+
+- 帖子：各型号的翻页同时进行（同一型号内部仍按 after 标记顺序翻页），至多 --concurrency 个型号同时在抓；
+- 评论：各帖子的评论同时请求，至多 --concurrency 个同时在路上；
+- 全局限速：所有请求共用一个令牌桶（crawl_http.TokenBucket），总速率不超过 RATE_BUDGET，
+  429 / 5xx 按 crawl_http.RetryPolicy 退避重试；
+- 续跑和去重与原脚本完全相同：帖子沿用 reddit_progress.json（每个型号的 after / 页码 / 是否完成）
+  和历史 CSV 里的 source_id；评论沿用 reddit_comments_progress.json 的 last_index，
+  并发完成的顺序是乱的，last_index 只推进到「之前的帖子全部处理完」的位置，
+  中断后重跑时多出来的那几个帖子会被 seen_comment_ids 去重。
+- 行的格式、CSV / 进度文件的读写都直接复用原脚本的函数。
+
+运行方式（在 Global_Phone_Sentiment 目录）：
+    python crawl_reddit_async.py posts | comments | all [--concurrency 8]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from typing import Any, Dict, Optional
+
+import httpx
+import pandas as pd
+
+import config
+import crawl_reddit
+import crawl_reddit_comments
+from crawl_http import RetryPolicy, TokenBucket
+
+REDDIT_BASE = "https://www.reddit.com"
+
+# 全局请求速率：平均每秒 0.6 个，最多攒 3 个（原来串行时约为每 2~3 秒一个请求，再加上请求本身的耗时）
+RATE_BUDGET = (0.6, 3)
+
+
+class AsyncRedditClient:
+    """共用一个 httpx.AsyncClient（连接池）和一个令牌桶的 JSON 客户端"""
+
+    def __init__(
+        self,
+        base: str = REDDIT_BASE,
+        rate: Optional[tuple] = RATE_BUDGET,
+        max_in_flight: int = 8,
+        retry: RetryPolicy = RetryPolicy(),
+        proxy: Optional[str] = crawl_reddit.PROXIES["https"] if crawl_reddit.PROXIES else None,
+        timeout: float = 20.0,
+    ) -> None:
+        self.base = base.rstrip("/")
+        self.bucket = TokenBucket(*rate) if rate else None
+        self.retry = retry
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._client = httpx.AsyncClient(
+            headers=crawl_reddit.HEADERS,
+            proxy=proxy,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight),
+        )
+        self.stats: Dict[str, Any] = {"requests": 0, "retries": 0, "errors": 0}
+
+    async def get_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Optional[Any]:
+        """GET base + path，200 时返回解析后的 JSON；重试用完仍失败时打印原因并返回 None"""
+        url = self.base + path
+        # requests 会丢掉值为 None 的参数（比如第一页的 after），httpx 不会，这里保持一致
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        for attempt in range(1, self.retry.attempts + 1):
+            last = attempt == self.retry.attempts
+            if self.bucket is not None:
+                wait = self.bucket.reserve()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            self.stats["requests"] += 1
+            try:
+                async with self._in_flight:
+                    resp = await self._client.get(url, params=params)
+            except httpx.HTTPError as e:
+                self.stats["errors"] += 1
+                if last:
+                    print(f"   ⚠️ 请求 {url} 出错: {e}")
+                    return None
+                self.stats["retries"] += 1
+                await asyncio.sleep(self.retry.delay(attempt))
+                continue
+
+            if resp.status_code in self.retry.statuses and not last:
+                self.stats["retries"] += 1
+                await asyncio.sleep(self.retry.delay(attempt, resp.headers.get("Retry-After")))
+                continue
+            if resp.status_code != 200:
+                print(f"   ⚠️ 请求 {url} 返回 {resp.status_code}")
+                return None
+            try:
+                return resp.json()
+            except ValueError as e:
+                print(f"   ⚠️ 解析 {url} 的 JSON 失败: {e}")
+                return None
+        return None
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+# =========================
+# 帖子：各型号并发翻页
+# =========================
+
+async def crawl_posts(client: AsyncRedditClient, concurrency: int = 8) -> int:
+    """与 crawl_reddit.crawl_reddit_by_model 相同的续跑 / 去重 / 写盘逻辑，返回本次新增的帖子数"""
+    progress = crawl_reddit.init_run()
+    models_state = progress.setdefault("models", {})
+    seen_ids = crawl_reddit.load_seen_ids_from_csv()
+    models = [(key, kws) for key, kws in config.TARGET_MODELS.items() if kws]
+    slots = asyncio.Semaphore(concurrency)
+
+    print(f"🚀 开始抓取 Reddit（asyncio，{concurrency} 个型号并发），共 {len(models)} 个具体机型...")
+    print(f"📁 数据将实时写入: {crawl_reddit.CSV_FILENAME}")
+
+    def save_state(model_key: str, after_token, current_page: int, completed: bool) -> None:
+        models_state[model_key] = {
+            "after_token": after_token,
+            "current_page": current_page,
+            "completed": completed,
+        }
+        crawl_reddit.save_progress(progress)
+
+    async def crawl_model(model_key: str, keywords: list) -> int:
+        state = models_state.get(model_key, {})
+        if state.get("completed"):
+            return 0
+        after_token = state.get("after_token")
+        current_page = state.get("current_page", 0)
+        brand_name = crawl_reddit.brand_name_of(model_key)
+        added = 0
+
+        async with slots:
+            while current_page < crawl_reddit.MAX_PAGES:
+                data = await client.get_json(
+                    "/search.json", crawl_reddit.search_params(keywords[0], after_token)
+                )
+                if data is None:
+                    print(f"⚠️ {model_key} 第 {current_page + 1} 页请求失败，跳过该型号剩余页...")
+                    break
+
+                children = data.get("data", {}).get("children", [])
+                if not children:
+                    save_state(model_key, None, current_page, True)
+                    break
+
+                # 事件循环是单线程的，这里到写盘之间没有 await，seen_ids 的检查和写入不会交错
+                for post in children:
+                    row = crawl_reddit.post_to_row(post.get("data", {}), keywords, brand_name, model_key, seen_ids)
+                    if row is not None:
+                        crawl_reddit.append_row_to_csv(row)
+                        added += 1
+
+                after_token = data.get("data", {}).get("after")
+                current_page += 1
+                save_state(model_key, after_token, current_page, not after_token or current_page >= crawl_reddit.MAX_PAGES)
+                if not after_token:
+                    break
+
+        print(f"   ✅ {model_key}: 新增 {added} 条（已翻 {current_page} 页）")
+        return added
+
+    counts = await asyncio.gather(*(crawl_model(key, kws) for key, kws in models))
+    total = sum(counts)
+    print(f"\n✅ Reddit 帖子抓取结束，本次新增 {total} 条，已追加保存到 {crawl_reddit.CSV_FILENAME}")
+    return total
+
+
+# =========================
+# 评论：各帖子并发抓取
+# =========================
+
+async def crawl_comments(client: AsyncRedditClient, concurrency: int = 8, max_comments: int = 50) -> int:
+    """与 crawl_reddit_comments.main 相同的续跑 / 去重 / 写盘逻辑，返回本次新增的评论数"""
+    df_posts = pd.read_csv(crawl_reddit_comments.POSTS_CSV)
+    seen_comment_ids = crawl_reddit_comments.load_seen_comment_ids()
+    progress = crawl_reddit_comments.load_progress(len(df_posts))
+    last_index = progress["last_index"]
+    print(f"📄 帖子 {len(df_posts)} 个，从第 {last_index + 1} 个开始抓评论（{concurrency} 个并发）")
+
+    slots = asyncio.Semaphore(concurrency)
+    done = set()
+    next_index = last_index + 1
+    total = 0
+
+    async def fetch_one(idx: int, row) -> None:
+        nonlocal next_index, total
+        post_source_id = getattr(row, "source_id")
+        # 帖子里是 reddit_{id} 这种形式
+        post_id = str(post_source_id).replace("reddit_", "", 1)
+        async with slots:
+            data = await client.get_json(f"/comments/{post_id}.json", {"limit": max_comments, "sort": "top"})
+
+        post_url = getattr(row, "url", "")
+        total += crawl_reddit_comments.save_comments_for_post(
+            crawl_reddit_comments.comments_of(data),
+            post_permalink=post_url.replace("https://www.reddit.com", ""),
+            brand_id=getattr(row, "brand_id", "Other"),
+            phone_model_id=getattr(row, "phone_model_id", ""),
+            post_source_id=post_source_id,
+            seen_comment_ids=seen_comment_ids,
+            max_comments=max_comments,
+        )
+
+        # last_index 只推进到连续处理完的位置
+        done.add(idx)
+        advanced = False
+        while next_index in done:
+            done.discard(next_index)
+            progress["last_index"] = next_index
+            next_index += 1
+            advanced = True
+        if advanced:
+            crawl_reddit_comments.save_progress(progress)
+
+    await asyncio.gather(
+        *(fetch_one(idx, row) for idx, row in enumerate(df_posts.itertuples()) if idx > last_index)
+    )
+    print(f"\n🎉 完成！本次共新增评论 {total} 条，已写入 {crawl_reddit_comments.COMMENTS_CSV}")
+    return total
+
+
+async def run(mode: str, concurrency: int, base: str = REDDIT_BASE, rate: Optional[tuple] = RATE_BUDGET) -> None:
+    client = AsyncRedditClient(base=base, rate=rate, max_in_flight=concurrency)
+    try:
+        if mode in ("posts", "all"):
+            await crawl_posts(client, concurrency)
+        if mode == "all":
+            # 接着抓刚写好的帖子 CSV 的评论
+            crawl_reddit_comments.POSTS_CSV = crawl_reddit.CSV_FILENAME
+        if mode in ("comments", "all"):
+            await crawl_comments(client, concurrency)
+    finally:
+        await client.aclose()
+    print(f"📶 请求统计: {client.stats}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reddit 帖子 / 评论异步抓取")
+    parser.add_argument("mode", choices=["posts", "comments", "all"])
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    try:
+        asyncio.run(run(args.mode, args.concurrency))
+    except KeyboardInterrupt:
+        print("\n🛑 手动中止抓取，进度和已抓取数据已经保存（可下次继续运行续爬）。")
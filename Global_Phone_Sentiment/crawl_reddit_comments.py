@@ -1,10 +1,13 @@
-import requests
 import pandas as pd
-import time
-import random
 from datetime import datetime
 import os
 import json
+from typing import List, Optional
+
+import requests
+
+from crawl_http import CrawlerClient
+from csv_sink import get_sink
 
 # ========= 配置区 =========
 
@@ -24,6 +27,17 @@ HEADERS = {
               "image/avif,image/webp,*/*;q=0.8"
 }
 
+# 共用连接池 + 限速：平均每秒 0.57 个请求（原来每个帖子之间歇 1~2.5 秒），
+# 同时最多 4 个帖子的评论在路上，网络往返互相重叠
+HTTP = CrawlerClient(
+    headers=HEADERS,
+    proxies=PROXIES,
+    rate_limits={"www.reddit.com": (0.57, 1)},
+    max_workers=4,
+)
+
+COMMENTS_API = "https://www.reddit.com/comments/{post_id}.json"
+
 # ✅ 这里已经帮你改成当前帖子 CSV 的名字
 # 注意：我们会让你在 “ZDM+Reddit” 根目录下运行脚本，这样路径就是对的
 POSTS_CSV = "data_reddit_20251206_103022.csv"
@@ -38,16 +52,8 @@ COMMENTS_PROGRESS = "reddit_comments_progress.json"
 # ========= 工具函数 =========
 
 def append_comment_row(row: dict):
-    """把一条评论写入到评论 CSV（实时追加）"""
-    df = pd.DataFrame([row])
-    file_exists = os.path.exists(COMMENTS_CSV)
-    df.to_csv(
-        COMMENTS_CSV,
-        mode="a",
-        index=False,
-        encoding="utf-8-sig",
-        header=not file_exists,
-    )
+    """把一条评论写入到评论 CSV（攒批写出，save_progress 时落盘）"""
+    get_sink(COMMENTS_CSV).write(row)
 
 
 def load_progress(num_posts: int) -> dict:
@@ -73,7 +79,8 @@ def load_progress(num_posts: int) -> dict:
 
 
 def save_progress(progress: dict):
-    """保存进度"""
+    """保存进度（先把已写的评论落盘，进度不会超前于 CSV）"""
+    get_sink(COMMENTS_CSV).checkpoint()
     with open(COMMENTS_PROGRESS, "w", encoding="utf-8") as f:
         json.dump(progress, f, ensure_ascii=False, indent=2)
 
@@ -90,46 +97,51 @@ def load_seen_comment_ids() -> set:
     return seen
 
 
-def fetch_comments_for_post(
-    post_id: str,
-    post_permalink: str,
-    brand_id: str,
-    phone_model_id: str,
-    post_source_id: str,
-    seen_comment_ids: set,
-    max_comments: int = 50,
-) -> int:
-    """抓取某一个帖子下面的评论，返回本次新抓到的评论数量"""
+def fetch_comments_listing(post_id: str, max_comments: int = 50) -> Optional[List[dict]]:
+    """请求某一个帖子的评论树（只有网络请求，可以并发调用），失败时返回 None"""
 
-    url = f"https://www.reddit.com/comments/{post_id}.json"
+    url = COMMENTS_API.format(post_id=post_id)
 
     try:
-        resp = requests.get(
-            url,
-            headers=HEADERS,
-            timeout=20,
-            proxies=PROXIES,
-            params={"limit": max_comments, "sort": "top"},
-        )
-    except Exception as e:
+        resp = HTTP.get(url, timeout=20, params={"limit": max_comments, "sort": "top"})
+    except requests.RequestException as e:
         print(f"      ⚠️ 请求评论失败: {e}")
-        return 0
+        return None
 
     if resp.status_code != 200:
         print(f"      ⚠️ 请求评论失败 status={resp.status_code}")
-        return 0
+        return None
 
     try:
         data = resp.json()
     except Exception as e:
         print(f"      ⚠️ 解析评论 JSON 失败: {e}")
-        return 0
+        return None
+
+    return comments_of(data)
 
-    # comments 接口是一个 list，第 2 个元素才是评论树
+
+def comments_of(data) -> Optional[List[dict]]:
+    """comments 接口是一个 list，第 2 个元素才是评论树；格式不对时返回 None"""
     if not isinstance(data, list) or len(data) < 2:
+        return None
+
+    return data[1].get("data", {}).get("children", [])
+
+
+def save_comments_for_post(
+    comments_listing: Optional[List[dict]],
+    post_permalink: str,
+    brand_id: str,
+    phone_model_id: str,
+    post_source_id: str,
+    seen_comment_ids: set,
+    max_comments: int = 50,
+) -> int:
+    """把某一个帖子的评论去重后写入 CSV，返回本次新抓到的评论数量"""
+    if not comments_listing:
         return 0
 
-    comments_listing = data[1].get("data", {}).get("children", [])
     count_new = 0
 
     for item in comments_listing:
@@ -206,44 +218,48 @@ def main():
     print(f"⏩ 将从第 {last_index + 1} 行帖子开始抓评论")
 
     total_new_comments = 0
+    max_comments = 50  # 每个帖子最多抓 50 条评论，需要的话可以改
 
-    for idx, row in enumerate(df_posts.itertuples()):
-        if idx <= last_index:
-            continue
+    # 一次并发请求 HTTP.max_workers 个帖子的评论，再按原顺序写 CSV、更新进度
+    pending = [(idx, row) for idx, row in enumerate(df_posts.itertuples()) if idx > last_index]
+    chunk_size = HTTP.max_workers
 
-        post_source_id = getattr(row, "source_id")
+    for start in range(0, len(pending), chunk_size):
+        chunk = pending[start:start + chunk_size]
         # 帖子里是 reddit_{id} 这种形式
-        post_id = str(post_source_id).replace("reddit_", "", 1)
-
-        brand_id = getattr(row, "brand_id", "Other")
-        phone_model_id = getattr(row, "phone_model_id", "")
-        post_url = getattr(row, "url", "")
-        post_permalink = post_url.replace("https://www.reddit.com", "")
-
-        print(f"\n--- [{idx + 1}/{len(df_posts)}] 帖子 {post_source_id} ---")
-
-        n = fetch_comments_for_post(
-            post_id=post_id,
-            post_permalink=post_permalink,
-            brand_id=brand_id,
-            phone_model_id=phone_model_id,
-            post_source_id=post_source_id,
-            seen_comment_ids=seen_comment_ids,
-            max_comments=50,   # 每个帖子最多抓 50 条评论，需要的话可以改
-        )
-
-        print(f"      ✅ 新抓到评论 {n} 条")
+        post_ids = [str(getattr(row, "source_id")).replace("reddit_", "", 1) for _, row in chunk]
+        listings = HTTP.map(lambda post_id: fetch_comments_listing(post_id, max_comments), post_ids)
+
+        for (idx, row), listing in zip(chunk, listings):
+            post_source_id = getattr(row, "source_id")
+
+            brand_id = getattr(row, "brand_id", "Other")
+            phone_model_id = getattr(row, "phone_model_id", "")
+            post_url = getattr(row, "url", "")
+            post_permalink = post_url.replace("https://www.reddit.com", "")
+
+            print(f"\n--- [{idx + 1}/{len(df_posts)}] 帖子 {post_source_id} ---")
+
+            n = save_comments_for_post(
+                listing,
+                post_permalink=post_permalink,
+                brand_id=brand_id,
+                phone_model_id=phone_model_id,
+                post_source_id=post_source_id,
+                seen_comment_ids=seen_comment_ids,
+                max_comments=max_comments,
+            )
 
-        total_new_comments += n
+            print(f"      ✅ 新抓到评论 {n} 条")
 
-        # 更新进度
-        progress["last_index"] = idx
-        save_progress(progress)
+            total_new_comments += n
 
-        # 歇一会儿，防止 429
-        time.sleep(random.uniform(1, 2.5))
+            # 更新进度
+            progress["last_index"] = idx
+            save_progress(progress)
 
     print(f"\n🎉 完成！本次共新增评论 {total_new_comments} 条，已写入 {COMMENTS_CSV}")
+    print(f"📶 请求统计: {HTTP.stats()}")
 
 
 if __name__ == "__main__":
@@ -8,6 +8,7 @@ import re
 import os
 
 import config
+from csv_sink import get_sink
 
 # 每个机型最多翻多少页
 MAX_PAGES_PER_MODEL = 5
@@ -23,16 +24,8 @@ CSV_FILENAME = "data_smzdm.csv"
 
 
 def append_row_to_csv(row: dict):
-    """把一条记录追加写入到 CSV，文件不存在时写表头"""
-    df = pd.DataFrame([row])
-    file_exists = os.path.exists(CSV_FILENAME)
-    df.to_csv(
-        CSV_FILENAME,
-        mode="a",                # 追加写入
-        index=False,
-        encoding="utf-8-sig",
-        header=not file_exists,  # 只有第一次写入才写表头
-    )
+    """把一条记录追加写入到 CSV，文件不存在时写表头（攒批写出，每篇帖子写完时落盘）"""
+    get_sink(CSV_FILENAME).write(row)
 
 
 def _extract_first_int(text: str, keyword: str):
@@ -163,7 +156,7 @@ def crawl_post_detail(page: ChromiumPage, post_url: str, base_row: dict):
 def crawl_smzdm_by_model():
     """
     支持：
-      1. 实时存：每抓完一条就 append_row_to_csv()
+      1. 实时存：每抓完一条就 append_row_to_csv()，每篇帖子写完 checkpoint 落盘
       2. 断点续爬：如果已存在 data_smzdm.csv，则：
          - 跳过其中已经出现过的 url
          - 按每个机型已经抓过的帖子数继续往后抓
@@ -373,6 +366,9 @@ def crawl_smzdm_by_model():
                             total_comments += 1
                             total_rows += 1
 
+                        # 续跑按 CSV 里已有的帖子 URL 跳过，帖子和它的评论一起落盘
+                        get_sink(CSV_FILENAME).checkpoint()
+
                         posts_this_model += 1
 
                         print(
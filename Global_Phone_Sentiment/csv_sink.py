@@ -0,0 +1,164 @@
+"""
+csv_sink.py
+
+爬虫共用的 CSV 追加写入器（CsvSink），代替原来每条记录都
+pd.DataFrame([row]).to_csv(mode="a") 的写法：后者每一行都要建一个 DataFrame、
+stat 一次文件、重新打开文件再关掉。
+
+- 文件句柄一直开着，行先攒在内存里，攒够 max_rows 行或距第一条未写出的行超过 max_delay 秒时
+  一次写出（只在 write() 时检查，没有后台线程）；
+- checkpoint()：把缓冲写出并 fsync，保证之前的行已经落盘。爬虫在写进度 JSON（或者一个
+  续跑单位：一个视频 / 帖子连同它的评论）之前调用，进度永远不会超前于磁盘上的数据，
+  崩溃时丢掉的只是最后一个检查点之后、续跑时会重新抓的那部分；
+- 输出与原写法逐字节一致：表头只在文件不存在或为空时按第一行的键写一次，
+  每行按它自己的键顺序写值（与单行 DataFrame 一样），None / NaN 写成空串，utf-8-sig 的 BOM 只在文件开头；
+- 环境变量 CRAWL_SEGMENTS=1（且装了 pyarrow）时，每个检查点之后顺便把新落盘的行写成一个
+  Arrow 段文件（见 segment_store），后端可以直接映射读取，不用再解析 CSV。
+
+用法：
+    append_row = lambda row: get_sink(CSV_FILENAME).write(row)
+    ...
+    get_sink(CSV_FILENAME).checkpoint()   # 写进度 JSON 之前
+程序退出时（atexit）所有 sink 会自动 checkpoint 并关闭。
+"""
+
+from __future__ import annotations
+
+import atexit
+import csv
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, TextIO
+
+import segment_store
+
+# 检查点之后同步写 Arrow 段文件（需要 pyarrow）
+WRITE_SEGMENTS = os.environ.get("CRAWL_SEGMENTS", "").strip().lower() in {"1", "true", "yes", "on"}
+if WRITE_SEGMENTS and not segment_store.AVAILABLE:
+    print("⚠️ CRAWL_SEGMENTS 已开启，但没有安装 pyarrow，只写 CSV")
+    WRITE_SEGMENTS = False
+
+
+def _cell(value: Any) -> Any:
+    """与 DataFrame.to_csv 的默认格式一致：缺失值写空串"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ""
+    return value
+
+
+class CsvSink:
+    def __init__(
+        self,
+        path: str,
+        encoding: str = "utf-8-sig",
+        max_rows: int = 200,
+        max_delay: float = 2.0,
+        fsync: bool = True,
+        segments: Optional[bool] = None,
+    ) -> None:
+        self.path = path
+        self.encoding = encoding
+        self.max_rows = max(1, max_rows)
+        self.max_delay = max_delay
+        self.fsync = fsync
+        self.segments = WRITE_SEGMENTS if segments is None else segments and segment_store.AVAILABLE
+        self._unsynced = False  # 上次同步段文件之后有没有写出过新行
+        self._file: Optional[TextIO] = None
+        self._writer = None
+        self._header_pending = False
+        self._buffer: List[Dict[str, Any]] = []
+        self._oldest = 0.0
+        self._lock = threading.Lock()
+        self.rows_written = 0
+
+    def _open(self) -> None:
+        # 与原写法相同：文件不存在时才写表头（这里空文件也算不存在）
+        self._header_pending = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        # newline="" 交给 csv 模块处理换行（DataFrame.to_csv 也是这样），行尾用 os.linesep
+        self._file = open(self.path, "a", encoding=self.encoding, newline="")
+        self._writer = csv.writer(self._file, lineterminator=os.linesep)
+
+    def _write_buffer(self) -> None:
+        if not self._buffer:
+            return
+        if self._file is None:
+            self._open()
+        writer = self._writer
+        if self._header_pending:
+            writer.writerow(list(self._buffer[0].keys()))
+            self._header_pending = False
+        writer.writerows([_cell(v) for v in row.values()] for row in self._buffer)
+        self.rows_written += len(self._buffer)
+        self._unsynced = True
+        self._buffer.clear()
+        self._file.flush()
+
+    def write(self, row: Dict[str, Any]) -> None:
+        """追加一行（先进缓冲）"""
+        with self._lock:
+            if not self._buffer:
+                self._oldest = time.monotonic()
+            self._buffer.append(dict(row))
+            if len(self._buffer) >= self.max_rows or time.monotonic() - self._oldest >= self.max_delay:
+                self._write_buffer()
+
+    def flush(self) -> None:
+        """缓冲写进操作系统（不 fsync）"""
+        with self._lock:
+            self._write_buffer()
+
+    def checkpoint(self) -> None:
+        """缓冲写出并 fsync：之后再写进度文件"""
+        with self._lock:
+            self._write_buffer()
+            if self._file is not None and self.fsync:
+                os.fsync(self._file.fileno())
+            if self.segments and self._unsynced:
+                self._unsynced = False
+                try:
+                    segment_store.sync(Path(self.path))
+                except Exception as e:  # 段文件只是 CSV 的副本，失败了不影响抓取，下次 sync 会补上
+                    print(f"⚠️ 写段文件失败（CSV 不受影响）: {e}")
+
+    def close(self) -> None:
+        self.checkpoint()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                self._writer = None
+
+    def __enter__(self) -> "CsvSink":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+_SINKS: Dict[str, CsvSink] = {}
+_SINKS_LOCK = threading.Lock()
+
+
+def get_sink(path: str, **kwargs: Any) -> CsvSink:
+    """同一个文件（按绝对路径）共用一个 CsvSink；kwargs 只在第一次创建时生效"""
+    key = os.path.abspath(path)
+    with _SINKS_LOCK:
+        sink = _SINKS.get(key)
+        if sink is None:
+            sink = _SINKS[key] = CsvSink(key, **kwargs)
+        return sink
+
+
+def close_sinks() -> None:
+    """checkpoint 并关闭所有 sink（退出时自动调用）"""
+    with _SINKS_LOCK:
+        sinks = list(_SINKS.values())
+        _SINKS.clear()
+    for sink in sinks:
+        sink.close()
+
+
+atexit.register(close_sinks)
@@ -0,0 +1,414 @@
+"""
+csv_source.py
+
+源 CSV 的读取与「尾部增量读取」：
+- CsvStream：启动时逐批流式读取（每批 BATCH_ROWS 行），内存里只有当前这一批，
+  读完后记下读到的字节偏移、编码和表头；编码按文件开头的样本判断（sniff_encoding）；
+- read_csv_full：整文件读成记录列表（CsvStream 的全部批次拼起来）；
+- read_csv_tail：爬虫只会往 CSV 末尾追加行，之后只需从上次的偏移开始解析新追加的字节；
+- read_csv_frame：向量化清洗用，整文件读成全是字符串列的 DataFrame，
+  解析结果（列名、取值、行数）与 read_csv_full 一致。
+
+注意：
+- 爬虫可能正写到一半，只解析到最后一条「完整记录」为止（引号外的换行），剩下的半行留到下一轮，
+  启动时的整文件读取也一样，游标停在最后一条完整记录之后；
+- 文件末尾没有换行、但引号是配对的最后一条记录，启动时照样读出来（与整文件解析的结果一致），
+  游标仍停在它前面并记下 pending=1，之后续读时跳过这一条，不会重复；
+- 文件变小（被重写 / 截断）或表头变了，read_csv_tail 返回 None，调用方应整体重建。
+"""
+
+from __future__ import annotations
+
+import codecs
+import csv
+import io
+import logging
+import os
+import re
+from dataclasses import dataclass, field, replace
+from itertools import islice
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger("phone_feedback")
+
+_QUOTE_OR_NEWLINE_RE = re.compile(rb'["\n]')
+
+# 判断编码用的文件开头样本大小（字节）
+SNIFF_BYTES = 64 << 10
+
+# CsvStream 每批的行数
+BATCH_ROWS = 4096
+
+# 找最后一条完整记录时每次读的块大小（字节）
+SCAN_BYTES = 1 << 20
+
+
+@dataclass(frozen=True)
+class CsvCursor:
+    """某个源 CSV 已经读到的位置"""
+
+    path: Path
+    encoding: str = "utf-8"
+    fieldnames: Tuple[str, ...] = ()
+    offset: int = 0  # 已解析的字节数（下一次从这里继续）
+    rows: int = 0  # 已解析的数据行数（不含表头）
+    header_bytes: bytes = field(default=b"", repr=False)  # 文件开头的原始字节，用来判断文件是否被重写
+    pending: int = 0  # offset 之后已经读出的记录数（文件末尾没有换行的最后一条，0 或 1）
+
+    def to_dict(self) -> Dict:
+        return {
+            "path": str(self.path),
+            "encoding": self.encoding,
+            "fieldnames": list(self.fieldnames),
+            "offset": self.offset,
+            "rows": self.rows,
+            "header_bytes": self.header_bytes.hex(),
+            "pending": self.pending,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "CsvCursor":
+        return cls(
+            path=Path(data["path"]),
+            encoding=data["encoding"],
+            fieldnames=tuple(data["fieldnames"]),
+            offset=int(data["offset"]),
+            rows=int(data["rows"]),
+            header_bytes=bytes.fromhex(data["header_bytes"]),
+            pending=int(data.get("pending", 0)),
+        )
+
+
+def complete_prefix_length(data: bytes) -> int:
+    """
+    data 中最后一条完整记录的结束位置（该换行符之后的下标）。
+    只认引号外的换行：CSV 里转义的 "" 成对出现，不改变引号内外的状态。
+    """
+    in_quotes = False
+    end = 0
+    for m in _QUOTE_OR_NEWLINE_RE.finditer(data):
+        if m.group() == b'"':
+            in_quotes = not in_quotes
+        elif not in_quotes:
+            end = m.end()
+    return end
+
+
+def first_record_length(data: bytes) -> int:
+    """data 中第一条完整记录的结束位置（引号外的第一个换行之后），没有完整记录时为 0"""
+    in_quotes = False
+    for m in _QUOTE_OR_NEWLINE_RE.finditer(data):
+        if m.group() == b'"':
+            in_quotes = not in_quotes
+        elif not in_quotes:
+            return m.end()
+    return 0
+
+
+def record_boundary(f: BinaryIO, size: int) -> Tuple[int, bool]:
+    """
+    文件前 size 字节里最后一条完整记录的结束位置（规则同 complete_prefix_length），
+    以及之后剩下的部分是不是一条可以读的记录：引号配对、不全是空白，只是文件末尾还没有换行。
+    先数出整个文件的引号个数，再从末尾往前找引号外的换行，不用逐个匹配换行
+    """
+    f.seek(0)
+    quotes = 0
+    remaining = size
+    while remaining > 0:
+        chunk = f.read(min(SCAN_BYTES, remaining))
+        if not chunk:
+            break
+        quotes += chunk.count(b'"')
+        remaining -= len(chunk)
+
+    end, after = size, 0  # after：当前位置之后的引号个数
+    boundary = 0
+    while end > 0 and not boundary:
+        start = max(0, end - SCAN_BYTES)
+        f.seek(start)
+        block = f.read(end - start)
+        pos = len(block)
+        while True:
+            nl = block.rfind(b"\n", 0, pos)
+            if nl < 0:
+                after += block.count(b'"', 0, pos)
+                break
+            after += block.count(b'"', nl + 1, pos)
+            if (quotes - after) % 2 == 0:
+                boundary = start + nl + 1
+                break
+            pos = nl
+        end = start
+
+    if boundary == size or after % 2:
+        return boundary, False
+    f.seek(boundary)
+    return boundary, bool(f.read(size - boundary).strip())
+
+
+def _full_read_cursor(
+    path: Path,
+    encoding: str,
+    fieldnames: Tuple[str, ...],
+    size: int,
+    end: int,
+    pending: bool,
+    rows: int,
+    header_bytes: bytes,
+) -> CsvCursor:
+    """整文件读取之后的游标：停在最后一条完整记录之后"""
+    if not end:
+        # 连表头都还没有以换行结尾：没有可以续读的位置，文件再有变化就整体重建（见 read_csv_tail）
+        return CsvCursor(path=path, encoding=encoding, offset=size, rows=rows, header_bytes=header_bytes)
+    return CsvCursor(
+        path=path,
+        encoding=encoding,
+        fieldnames=fieldnames,
+        offset=end,
+        rows=rows,
+        header_bytes=header_bytes,
+        pending=int(pending),
+    )
+
+
+def _decode_rows(
+    data: bytes,
+    encoding: str,
+    fieldnames: Optional[Tuple[str, ...]] = None,
+) -> Tuple[List[Dict], Tuple[str, ...]]:
+    """按文本模式（通用换行）解析 CSV 字节，与 open(path, "r") 读出来的结果一致"""
+    errors = "ignore" if encoding == "gbk" else "strict"
+    text = io.TextIOWrapper(io.BytesIO(data), encoding=encoding, errors=errors)
+    reader = csv.DictReader(text, fieldnames=list(fieldnames) if fieldnames else None)
+    rows = list(reader)
+    return rows, tuple(reader.fieldnames or ())
+
+
+def sniff_encoding(sample: bytes) -> str:
+    """
+    按文件开头的样本判断编码：有 UTF-8 BOM、或样本是合法的 UTF-8（末尾被截断的半个字符不算错）
+    就是 utf-8，否则是 gbk。
+    样本全是 ASCII、后面才出现 GBK 字节的文件会被判成 utf-8，读到那里时抛 UnicodeDecodeError，
+    由调用方按 gbk 重读（见 read_csv_full）
+    """
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8"
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+    except UnicodeDecodeError:
+        return "gbk"
+    return "utf-8"
+
+
+class CsvReadError(Exception):
+    """CSV 解析失败（编码错误除外：UnicodeDecodeError 原样抛出，调用方可以换编码重读）"""
+
+
+class _BoundedReader(io.RawIOBase):
+    """只读前 size 个字节：爬虫同时在追加，之后写进来的字节（包括写了一半的记录）留给 read_csv_tail"""
+
+    def __init__(self, f, size: int) -> None:
+        self._f = f
+        self._remaining = size
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        n = self._f.readinto(memoryview(buffer)[: min(len(buffer), self._remaining)])
+        self._remaining -= n
+        return n
+
+
+class CsvStream:
+    """
+    逐批读取一个源 CSV：for batch in CsvStream(path) 每次得到最多 batch_rows 条记录，
+    拼起来与 csv.DictReader 整文件读出的结果一致。
+    读完之后 cursor 是文件的游标（文件不存在 / 读取失败时为 None）。
+    encoding 不传时按文件开头的样本判断（sniff_encoding）。
+    """
+
+    def __init__(self, path: Path, batch_rows: int = BATCH_ROWS, encoding: Optional[str] = None) -> None:
+        self.path = path
+        self.batch_rows = max(1, batch_rows)
+        self.encoding = encoding
+        self.rows = 0
+        self.cursor: Optional[CsvCursor] = None
+
+    def __iter__(self) -> Iterator[List[Dict]]:
+        path = self.path
+        if not path.exists():
+            logger.warning("数据文件不存在: %s", path)
+            return
+        try:
+            f = path.open("rb")
+        except OSError as e:
+            raise CsvReadError(f"{path}: {e}") from e
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            sample = f.read(SNIFF_BYTES)
+            encoding = self.encoding or sniff_encoding(sample)
+            header_bytes = sample[: sample.find(b"\n") + 1 or len(sample)]
+            end, pending = record_boundary(f, size)
+            f.seek(0)
+
+            # 与 _decode_rows 相同：文本模式（通用换行），GBK 忽略坏字节
+            text = io.TextIOWrapper(
+                io.BufferedReader(_BoundedReader(f, size if pending else end)),
+                encoding=encoding,
+                errors="ignore" if encoding == "gbk" else "strict",
+            )
+            reader = csv.DictReader(text)
+            self.rows = 0
+            while True:
+                try:
+                    batch = list(islice(reader, self.batch_rows))
+                    # 空文件在这里才读表头（结果为 None），要在文件关闭之前
+                    fieldnames = tuple(reader.fieldnames or ())
+                except UnicodeDecodeError:
+                    raise
+                except Exception as e:
+                    raise CsvReadError(f"{path}: {e}") from e
+                if not batch:
+                    break
+                self.rows += len(batch)
+                yield batch
+
+        label = "" if encoding == "utf-8" else "(GBK)"
+        logger.info("读取 CSV%s 成功: %s，%d 行", label, path.name, self.rows)
+        self.cursor = _full_read_cursor(path, encoding, fieldnames, size, end, pending, self.rows, header_bytes)
+
+
+def read_csv_full(path: Path) -> Tuple[List[Dict], Optional[CsvCursor]]:
+    """
+    整文件读取，返回 (记录, 游标)。编码先按开头的样本判断，读到后面才发现不是 UTF-8 时按 GBK 重读。
+    文件不存在或读取失败时返回 ([], None)。
+    """
+    stream = CsvStream(path)
+    try:
+        try:
+            rows = [row for batch in stream for row in batch]
+        except UnicodeDecodeError:
+            stream = CsvStream(path, encoding="gbk")
+            rows = [row for batch in stream for row in batch]
+    except CsvReadError as e:
+        logger.error("读取 CSV 失败: %s", e)
+        return [], None
+    return rows, stream.cursor
+
+
+def read_csv_frame(path: Path) -> Tuple[Optional["pd.DataFrame"], Optional[CsvCursor]]:
+    """
+    用 pandas 的 C 解析器整文件读取，返回 (DataFrame, 游标)。
+    为了与 csv.DictReader 的结果逐格一致：
+    - 换行先统一成 \n（等价于文本模式的通用换行）；
+    - 所有列按字符串读取，缺失的格子是空串；
+    - 只取表头对应的列：字段比表头多的行，多出来的部分丢掉（DictReader 放进 None 键，清洗时用不到）；
+    - 文件带 BOM 时第一列列名保留 BOM（DictReader 就是这样读出来的）。
+    pandas 解析不了，或者列名有重复 / 为空（pandas 会改名）时返回 (None, None)，调用方退回逐行读取。
+    """
+    import pandas as pd
+
+    if not path.exists():
+        logger.warning("数据文件不存在: %s", path)
+        return None, None
+    try:
+        data = path.read_bytes()
+    except OSError as e:
+        logger.error("读取 CSV 失败: %s: %s", path, e)
+        return None, None
+
+    end, pending = record_boundary(io.BytesIO(data), len(data))
+    body = data if pending else data[:end]
+    normalized = body.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+    has_bom = normalized.startswith(b"\xef\xbb\xbf")
+    for encoding in ("utf-8", "gbk"):
+        body = normalized[3:] if has_bom and encoding == "utf-8" else normalized
+        errors = "ignore" if encoding == "gbk" else "strict"
+        try:
+            header = next(csv.reader(io.TextIOWrapper(io.BytesIO(body), encoding=encoding, errors=errors)), [])
+            frame = pd.read_csv(
+                io.BytesIO(body),
+                usecols=range(len(header)) if header else None,
+                dtype=str,
+                keep_default_na=False,
+                na_filter=False,
+                encoding=encoding,
+                encoding_errors=errors,
+                engine="c",
+            )
+        except UnicodeDecodeError:
+            continue
+        except pd.errors.EmptyDataError:
+            frame = pd.DataFrame()
+        except (pd.errors.ParserError, ValueError) as e:
+            logger.info("pandas 无法解析 %s（%s），改用逐行读取", path.name, e)
+            return None, None
+
+        if has_bom and encoding == "utf-8" and len(frame.columns):
+            frame = frame.rename(columns={frame.columns[0]: "\ufeff" + frame.columns[0]})
+        if frame.columns.duplicated().any() or any(
+            str(col).startswith("Unnamed: ") for col in frame.columns
+        ):
+            # 重复 / 空列名时 pandas 会改名，与 DictReader 的行为不同
+            return None, None
+        frame = frame.fillna("")
+
+        label = "" if encoding == "utf-8" else "(GBK)"
+        logger.info("读取 CSV%s 成功: %s，%d 行", label, path.name, len(frame))
+        header_end = data.find(b"\n") + 1 or len(data)
+        return frame, _full_read_cursor(
+            path, encoding, tuple(frame.columns), len(data), end, pending, len(frame), data[:header_end]
+        )
+    return None, None
+
+
+def read_csv_tail(cursor: CsvCursor, final: bool = False) -> Optional[Tuple[List[Dict], CsvCursor]]:
+    """
+    从 cursor.offset 开始解析新追加的完整记录，返回 (新记录, 新游标)。
+    cursor.pending 那条（上次已经读出、当时文件末尾没有换行）跳过；
+    final=True 时末尾没有换行、但引号配对的最后一条也读出来（与整文件读取的结果一致，见 segment_store.read），
+    新游标停在它前面，pending=1。
+    没有新数据时返回 ([], cursor)；文件被截断 / 重写时返回 None。
+    """
+    try:
+        size = cursor.path.stat().st_size
+        if size < cursor.offset:
+            return None
+        if size == cursor.offset:
+            return [], cursor
+        if not cursor.fieldnames:
+            # 启动时还是空文件，表头是后写进来的：整文件重读更简单
+            return None
+        with cursor.path.open("rb") as f:
+            if f.read(len(cursor.header_bytes)) != cursor.header_bytes:
+                return None
+            f.seek(cursor.offset)
+            data = f.read(size - cursor.offset)
+    except OSError as e:
+        logger.warning("读取 CSV 尾部失败: %s: %s", cursor.path, e)
+        return [], cursor
+
+    skip = first_record_length(data) if cursor.pending else 0
+    if cursor.pending and not skip:
+        # 上次读出的末尾记录还没写完换行，之后也就没有新的记录
+        return [], cursor
+    end = complete_prefix_length(data)
+    pending = final and bool(data[end:].strip()) and data.count(b'"', end) % 2 == 0
+    limit = len(data) if pending else end
+    if limit <= skip:
+        # 只有上次读出的那条补上了换行：游标越过它
+        return [], replace(cursor, offset=cursor.offset + end, pending=0) if end else cursor
+
+    try:
+        rows, _ = _decode_rows(data[skip:limit], cursor.encoding, cursor.fieldnames)
+    except UnicodeDecodeError:
+        # 追加的内容编码和原文件不一致：交给整体重建去判断编码
+        return None
+    return rows, replace(
+        cursor, offset=cursor.offset + end, rows=cursor.rows + len(rows), pending=int(pending)
+    )
@@ -0,0 +1,217 @@
+"""
+date_normalizer.py
+
+源 CSV 的日期列 -> 天数（1970-01-01 起，与 opinion_store 的 day 列同一口径）。
+
+原来每一行都按 8 种 strptime 格式挨个试，靠异常跳到下一种；
+实际上每个源文件的日期列（published_at / pubtime_str / time_str / created_at ...）
+基本只有一种写法，所以这里：
+- 按 (来源文件, 列名) 取前若干个非空值做样本，嗅探出这一列的格式并缓存；
+- 之后每个值先走该格式的快速路径（预编译正则 + 按固定位置取年月日）；
+- 不匹配的值才回退到原来的多格式搜索（parse_date_text），回退结果按取值缓存；
+- 命中 / 回退次数记在计数器里，/admin/index 可以看到。
+
+快速路径只接受「结果一定与 parse_date_text 相同」的写法，其余一律回退，
+所以嗅探错了只影响速度，不影响结果。
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Pattern, Sequence, Tuple
+
+import numpy as np
+
+from opinion_store import NO_DATE, date_to_day, ymd_to_day
+
+# 每列嗅探格式用的样本数
+SNIFF_SAMPLE_SIZE = 64
+
+# 回退路径按取值缓存的条数
+FALLBACK_CACHE_SIZE = 65536
+
+# 原来的多格式搜索顺序（对前 19 个字符整体匹配）
+_STRPTIME_FORMATS = [
+    "%Y-%m-%d",
+    "%Y/%m/%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y/%m/%d %H:%M:%S",
+    "%Y-%m-%d %H:%M",
+    "%Y/%m/%d %H:%M",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%dT%H:%M:%SZ",
+]
+
+
+def parse_date_text(value: str) -> str:
+    """单个日期字符串 -> YYYY-MM-DD；解析不了时长度够 10 就截前 10 位，否则返回空串"""
+    if not value:
+        return ""
+
+    txt = str(value).strip()
+
+    for fmt in _STRPTIME_FORMATS:
+        try:
+            dt = datetime.strptime(txt[:19], fmt)
+            return dt.strftime("%Y-%m-%d")
+        except Exception:
+            continue
+
+    if len(txt) >= 10:
+        try:
+            test_str = txt[:10]
+            datetime.strptime(test_str, "%Y-%m-%d")
+            return test_str
+        except Exception:
+            pass
+
+    return txt[:10] if len(txt) >= 10 else ""
+
+
+@lru_cache(maxsize=FALLBACK_CACHE_SIZE)
+def _fallback_day(value: str) -> int:
+    return date_to_day(parse_date_text(value))
+
+
+@dataclass(frozen=True)
+class DateFormat:
+    """
+    一种快速路径：pattern 的第 1~3 组是年、月、日。
+    whole_prefix=0 时只要求开头匹配；否则要求前 whole_prefix 个字符整体匹配
+    （与 strptime(txt[:19], fmt) 的口径一致）。
+    """
+
+    name: str
+    pattern: Pattern[str]
+    whole_prefix: int = 0
+
+    def match(self, value: str) -> Optional[re.Match]:
+        if self.whole_prefix:
+            return self.pattern.fullmatch(value[: self.whole_prefix])
+        return self.pattern.match(value)
+
+
+# 以 YYYY-MM-DD 开头的值，原实现的结果总是这 10 个字符表示的日期（不合法则为空）：
+# 后面跟时间、T...Z 还是别的内容都不影响；斜杠写法则要求整串是 strptime 认得的格式。
+# 年份限定 1000~9999：更小的年份 strftime("%Y") 不补零，原实现最后得到的是空日期
+DATE_FORMATS: Tuple[DateFormat, ...] = (
+    DateFormat("YYYY-MM-DD…", re.compile(r"([1-9][0-9]{3})-([0-9]{2})-([0-9]{2})")),
+    DateFormat(
+        "YYYY/MM/DD[ HH:MM[:SS]]",
+        re.compile(
+            r"([1-9][0-9]{3})/([0-9]{2})/([0-9]{2})"
+            r"(?: (?:[01][0-9]|2[0-3]):[0-5][0-9](?::[0-5][0-9])?)?"
+        ),
+        whole_prefix=19,
+    ),
+)
+_FORMATS_BY_NAME = {fmt.name: fmt for fmt in DATE_FORMATS}
+
+# 格式缓存的键：(来源文件, 列名)
+ColumnKey = Tuple[str, str]
+
+
+@dataclass
+class DateStats:
+    """计数器和各列嗅探出的格式（None = 没有可用的快速路径，整列走回退）"""
+
+    hits: int = 0  # 快速路径命中
+    misses: int = 0  # 回退到多格式搜索
+    formats: Dict[ColumnKey, Optional[str]] = field(default_factory=dict)
+
+
+class DateNormalizer:
+    """按列嗅探格式的日期解析器，整个进程共用一个（见 main.DATE_NORMALIZER）"""
+
+    def __init__(self, sample_size: int = SNIFF_SAMPLE_SIZE) -> None:
+        self.sample_size = sample_size
+        self.hits = 0
+        self.misses = 0
+        self._formats: Dict[ColumnKey, Optional[DateFormat]] = {}
+        self._lock = threading.Lock()
+
+    def sniff(self, values: Sequence[str]) -> Optional[DateFormat]:
+        """样本里匹配数最多、且覆盖至少一半样本的格式"""
+        sample: List[str] = []
+        for value in values:
+            if value:
+                sample.append(value)
+                if len(sample) >= self.sample_size:
+                    break
+        best, best_hits = None, 0
+        for fmt in DATE_FORMATS:
+            hits = sum(1 for value in sample if fmt.match(value))
+            if hits > best_hits:
+                best, best_hits = fmt, hits
+        return best if best_hits * 2 >= len(sample) and best_hits else None
+
+    def format_for(self, key: ColumnKey, values: Sequence[str]) -> Optional[DateFormat]:
+        """该列缓存的格式；第一次见到这一列时用 values 嗅探"""
+        if key not in self._formats:
+            fmt = self.sniff(values)
+            with self._lock:
+                self._formats.setdefault(key, fmt)
+        return self._formats[key]
+
+    def days(self, values: Sequence[str], key: ColumnKey) -> np.ndarray:
+        """同一列的一批日期字符串 -> int32 天数数组（空值 / 解析不了为 NO_DATE）"""
+        fmt = self.format_for(key, values)
+        match = fmt.match if fmt is not None else None
+        out = np.full(len(values), NO_DATE, dtype=np.int32)
+        hits = misses = 0
+        for i, value in enumerate(values):
+            if not value:
+                continue
+            m = match(value) if match is not None else None
+            if m is not None:
+                out[i] = ymd_to_day(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+                hits += 1
+            else:
+                out[i] = _fallback_day(value)
+                misses += 1
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+        return out
+
+    def forget(self) -> None:
+        """清空格式缓存（源文件整体重建时重新嗅探），计数器保留"""
+        with self._lock:
+            self._formats.clear()
+
+    def export(self, source: Optional[str] = None) -> DateStats:
+        """当前计数器和格式缓存；传入 source 时只导出该文件的列"""
+        with self._lock:
+            return DateStats(
+                hits=self.hits,
+                misses=self.misses,
+                formats={
+                    key: fmt.name if fmt is not None else None
+                    for key, fmt in self._formats.items()
+                    if source is None or key[0] == source
+                },
+            )
+
+    def merge(self, stats: DateStats) -> None:
+        """并入子进程里的计数器增量和嗅探结果"""
+        with self._lock:
+            self.hits += stats.hits
+            self.misses += stats.misses
+            for key, name in stats.formats.items():
+                self._formats.setdefault(key, _FORMATS_BY_NAME.get(name) if name else None)
+
+    def stats(self) -> Dict:
+        snapshot = self.export()
+        cache = _fallback_day.cache_info()
+        total = snapshot.hits + snapshot.misses
+        return {
+            "hits": snapshot.hits,
+            "misses": snapshot.misses,
+            "hit_rate": round(snapshot.hits / total, 4) if total else None,
+            "fallback_cache": {"hits": cache.hits, "misses": cache.misses, "size": cache.currsize},
+            "formats": {f"{source}:{column}": name for (source, column), name in snapshot.formats.items()},
+        }
@@ -0,0 +1,189 @@
+"""
+incremental_tfidf.py
+
+phone_index 的增量 TF-IDF：新爬到的行直接追加，不用对整个语料重新 fit。
+
+- 分词与 TfidfVectorizer 默认设置相同（HashingVectorizer 的 token_pattern / lowercase 一致），
+  词项哈希成整数，不需要预先 fit 词表，所以新行可以随时追加；
+- 哈希空间取 HashingVectorizer 允许的最大值（2^31 - 1），几万个词项几乎不会冲突；
+  只给出现过的哈希值按首次出现的先后分配紧凑的列号，数组大小随实际词项数增长，与哈希空间无关；
+- 在线维护每一列的文档频率 df、总词频（max_features 选列用）和文档数；
+- 只保存原始词频矩阵，IDF（平滑公式与 sklearn 相同）、min_df / max_df / max_features 的列筛选
+  和行 L2 归一化都在取 matrix / transform 时按当前的 df 重新计算（O(非零元)，没有分词开销），
+  追加后旧行的权重自动跟着新的 IDF 变化；
+- check_against_batch 用同样的文本重新做一次批量 TfidfVectorizer.fit_transform，
+  把批量词表映射到对应的列后逐元素比较，报告最大误差和哈希冲突数。
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer, TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+# 哈希空间大小（HashingVectorizer 的上限）
+DEFAULT_N_FEATURES = (1 << 31) - 1
+
+
+class IncrementalTfidf:
+    """
+    参数含义与 TfidfVectorizer 相同（min_df / max_df 可以是比例或绝对数）。
+    对外提供 partial_fit（追加文档）、matrix（全部文档的 TF-IDF 矩阵）和 transform（查询向量化）。
+    """
+
+    def __init__(
+        self,
+        n_features: int = DEFAULT_N_FEATURES,
+        min_df: Union[int, float] = 1,
+        max_df: Union[int, float] = 1.0,
+        max_features: Optional[int] = None,
+    ) -> None:
+        self.n_features = n_features
+        self.min_df = min_df
+        self.max_df = max_df
+        self.max_features = max_features
+        self.hasher = HashingVectorizer(
+            n_features=n_features, alternate_sign=False, norm=None, dtype=np.float64
+        )
+
+        self.n_docs = 0
+        # 出现过的哈希值（升序）及其紧凑列号；已分配的列号不再变化，新列号接在后面
+        self._hashes = np.empty(0, dtype=np.int64)
+        self._hash_columns = np.empty(0, dtype=np.int64)
+        self.df = np.empty(0, dtype=np.int64)
+        self.term_counts = np.empty(0, dtype=np.float64)
+        self._blocks: List[sparse.csr_matrix] = []  # 每次 partial_fit 追加的原始词频（紧凑列号）
+        self._weights: Optional[np.ndarray] = None
+        self._matrix: Optional[sparse.csr_matrix] = None
+
+    @property
+    def n_columns(self) -> int:
+        return len(self.df)
+
+    def columns_of(self, hashes: np.ndarray) -> np.ndarray:
+        """哈希值 -> 紧凑列号，没出现过的为 -1"""
+        if not len(self._hashes):
+            return np.full(len(hashes), -1, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self._hashes, hashes), len(self._hashes) - 1)
+        return np.where(self._hashes[pos] == hashes, self._hash_columns[pos], -1)
+
+    def _compact(self, counts: sparse.csr_matrix, grow: bool) -> sparse.csr_matrix:
+        """哈希列 -> 紧凑列；grow=True 时给新出现的哈希值分配列号，否则丢掉这些列"""
+        hashes = counts.indices.astype(np.int64)
+        if grow:
+            fresh = np.setdiff1d(np.unique(hashes), self._hashes, assume_unique=True)
+            if len(fresh):
+                columns = np.arange(self.n_columns, self.n_columns + len(fresh), dtype=np.int64)
+                merged = np.concatenate([self._hashes, fresh])
+                order = np.argsort(merged, kind="stable")
+                self._hashes = merged[order]
+                self._hash_columns = np.concatenate([self._hash_columns, columns])[order]
+                self.df = np.concatenate([self.df, np.zeros(len(fresh), dtype=np.int64)])
+                self.term_counts = np.concatenate([self.term_counts, np.zeros(len(fresh))])
+        columns = self.columns_of(hashes)
+        keep = columns >= 0
+        rows = np.repeat(np.arange(counts.shape[0]), np.diff(counts.indptr))
+        return sparse.csr_matrix(
+            (counts.data[keep], (rows[keep], columns[keep])),
+            shape=(counts.shape[0], self.n_columns),
+        )
+
+    def partial_fit(self, texts: Sequence[str]) -> "IncrementalTfidf":
+        """追加一批文档：更新 df / 词频，之前算好的权重和矩阵作废"""
+        counts = self._compact(self.hasher.transform(texts).tocsr(), grow=True)
+        self.df += np.bincount(counts.indices, minlength=self.n_columns)
+        self.term_counts += np.bincount(counts.indices, weights=counts.data, minlength=self.n_columns)
+        self.n_docs += counts.shape[0]
+        self._blocks.append(counts)
+        self._weights = None
+        self._matrix = None
+        return self
+
+    @property
+    def weights(self) -> np.ndarray:
+        """每一列（紧凑列号）的 IDF；被 min_df / max_df / max_features 筛掉的列为 0"""
+        if self._weights is None:
+            n = self.n_docs
+            low = self.min_df if isinstance(self.min_df, int) else self.min_df * n
+            high = self.max_df if isinstance(self.max_df, int) else self.max_df * n
+            keep = (self.df >= max(low, 1)) & (self.df <= high)
+            if self.max_features is not None and keep.sum() > self.max_features:
+                kept = np.flatnonzero(keep)
+                top = kept[np.argsort(-self.term_counts[kept], kind="stable")[: self.max_features]]
+                keep = np.zeros_like(keep)
+                keep[top] = True
+            idf = np.log((1 + n) / (1 + self.df)) + 1
+            self._weights = np.where(keep, idf, 0.0)
+        return self._weights
+
+    def _weighted(self, counts: sparse.csr_matrix) -> sparse.csr_matrix:
+        weighted = (counts @ sparse.diags(self.weights)).tocsr()
+        weighted.eliminate_zeros()
+        return normalize(weighted)
+
+    @property
+    def matrix(self) -> sparse.csr_matrix:
+        """全部文档（按追加顺序）的 TF-IDF 矩阵，按当前的 df 加权"""
+        if self._matrix is None:
+            # 早先批次的列数少，补齐到当前列数（新列都在右边，已有的列号不变）
+            blocks = []
+            for block in self._blocks:
+                if block.shape[1] < self.n_columns:
+                    block = block.copy()
+                    block.resize((block.shape[0], self.n_columns))
+                blocks.append(block)
+            counts = (
+                sparse.vstack(blocks, format="csr") if blocks else sparse.csr_matrix((0, self.n_columns))
+            )
+            self._blocks = [counts] if blocks else []
+            self._matrix = self._weighted(counts)
+        return self._matrix
+
+    def transform(self, texts: Sequence[str]) -> sparse.csr_matrix:
+        """查询向量化（不更新 df），与 TfidfVectorizer.transform 的口径相同"""
+        return self._weighted(self._compact(self.hasher.transform(texts).tocsr(), grow=False))
+
+
+def check_against_batch(
+    incremental: IncrementalTfidf,
+    texts: Sequence[str],
+    atol: float = 1e-9,
+) -> Dict:
+    """
+    一致性校验：texts 是 incremental 里全部文档（按追加顺序），
+    用相同参数批量 fit 一个 TfidfVectorizer，把它的每一列换成对应词项的紧凑列号后与 incremental.matrix 比较。
+    有哈希冲突（两个词落到同一个哈希值）时，冲突列的 df 会合并，结果只能近似一致。
+    """
+    batch = TfidfVectorizer(
+        min_df=incremental.min_df, max_df=incremental.max_df, max_features=incremental.max_features
+    )
+    expected = batch.fit_transform(texts).tocsr()
+
+    def columns(terms: List[str]) -> np.ndarray:
+        # 每个词项单独当成一篇文档哈希，得到它的哈希值，再换成紧凑列号
+        hashes = incremental.hasher.transform(terms).tocsr().indices.astype(np.int64)
+        return incremental.columns_of(hashes)
+
+    terms = sorted(batch.vocabulary_, key=batch.vocabulary_.get)
+    column_of = columns(terms)
+    all_terms = list(CountVectorizer().fit(texts).vocabulary_)
+    collisions = len(all_terms) - len(np.unique(columns(all_terms)))
+
+    remapped = sparse.csr_matrix(
+        (expected.data, column_of[expected.indices], expected.indptr),
+        shape=(expected.shape[0], incremental.n_columns),
+    )
+    actual = incremental.matrix
+    max_diff = float(abs(remapped - actual).max()) if actual.shape == remapped.shape else float("inf")
+    same_columns = set(column_of.tolist()) == set(np.flatnonzero(incremental.weights).tolist())
+    return {
+        "docs": int(actual.shape[0]),
+        "terms_batch": len(terms),
+        "terms_incremental": int(np.count_nonzero(incremental.weights)),
+        "hash_collisions": collisions,
+        "max_abs_diff": max_diff,
+        "consistent": bool(same_columns and max_diff <= atol),
+    }
@@ -0,0 +1,187 @@
+"""
+index_snapshot.py
+
+索引的二进制快照：build_index 建好索引后整体写成一个文件，
+下次启动（或每个 uvicorn worker）直接 mmap 进来，不用再重新读、重新清洗所有 CSV。
+
+文件格式（小端）：
+    MAGIC(8 字节) | 版本号 u32 | 头部长度 u32 | JSON 头部 | 对齐填充 | 数组块 ...
+- JSON 头部：快照版本、源文件指纹、索引的标量/字典字段、每个数组的 dtype / shape / 偏移；
+- 数组块：按 64 字节对齐，读取时用 np.frombuffer 直接指向 mmap，零拷贝、只读。
+
+源文件指纹 = 每个文件的 (大小, mtime, SHA-1)：
+- 大小不同 -> 快照失效；
+- 大小相同且 mtime 相同 -> 直接认为有效（不用读文件内容）；
+- 大小相同但 mtime 变了（比如重新 checkout）-> 再比对内容哈希。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger("phone_feedback")
+
+MAGIC = b"PFIDXSNP"
+# 快照格式或索引结构有变化时加 1，旧快照会自动失效
+SNAPSHOT_VERSION = 5
+
+_PREAMBLE = struct.Struct("<8sII")
+_ALIGN = 64
+
+
+class Snapshot(NamedTuple):
+    meta: Dict
+    arrays: Dict[str, np.ndarray]
+
+
+def _sha1(path: Path) -> str:
+    h = hashlib.sha1()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def file_fingerprint(paths: Sequence[Path]) -> List[Dict]:
+    """计算一组源文件的指纹（大小 / mtime / SHA-1），顺序与传入顺序一致"""
+    result: List[Dict] = []
+    for path in paths:
+        st = path.stat()
+        result.append(
+            {
+                "path": str(path),
+                "size": st.st_size,
+                "mtime_ns": st.st_mtime_ns,
+                "sha1": _sha1(path),
+            }
+        )
+    return result
+
+
+def fingerprint_matches(saved: Sequence[Dict], paths: Sequence[Path]) -> bool:
+    """判断快照里的指纹是否仍然对应当前这组源文件"""
+    if len(saved) != len(paths):
+        return False
+    for entry, path in zip(saved, paths):
+        if entry.get("path") != str(path):
+            return False
+        try:
+            st = path.stat()
+        except OSError:
+            return False
+        if st.st_size != entry.get("size"):
+            return False
+        if st.st_mtime_ns == entry.get("mtime_ns"):
+            continue
+        if _sha1(path) != entry.get("sha1"):
+            return False
+    return True
+
+
+def _padding(offset: int) -> int:
+    return (-offset) % _ALIGN
+
+
+def write_snapshot(
+    path: Path,
+    meta: Dict,
+    arrays: Dict[str, np.ndarray],
+    fingerprint: Sequence[Dict],
+) -> int:
+    """
+    写快照文件（先写临时文件再原子替换，避免 worker 读到写了一半的文件）。
+    返回写入的字节数。
+    """
+    arrays = {name: np.ascontiguousarray(arr) for name, arr in arrays.items()}
+
+    # 先算好每个数组的相对偏移，再把「头部 + 填充」的长度补进去
+    layout: Dict[str, Dict] = {}
+    cursor = 0
+    for name, arr in arrays.items():
+        cursor += _padding(cursor)
+        layout[name] = {
+            "dtype": arr.dtype.str,
+            "shape": list(arr.shape),
+            "offset": cursor,
+            "nbytes": int(arr.nbytes),
+        }
+        cursor += arr.nbytes
+
+    header = json.dumps(
+        {
+            "version": SNAPSHOT_VERSION,
+            "fingerprint": list(fingerprint),
+            "meta": meta,
+            "arrays": layout,
+        },
+        ensure_ascii=False,
+    ).encode("utf-8")
+    data_start = _PREAMBLE.size + len(header)
+    data_start += _padding(data_start)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with tmp_path.open("wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, SNAPSHOT_VERSION, len(header)))
+        f.write(header)
+        f.write(b"\0" * (data_start - f.tell()))
+        for name, arr in arrays.items():
+            f.write(b"\0" * (data_start + layout[name]["offset"] - f.tell()))
+            f.write(arr.tobytes())
+        size = f.tell()
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return size
+
+
+def read_snapshot(path: Path) -> Optional[Snapshot]:
+    """
+    mmap 读取快照，数组直接指向映射内存（只读）。
+    文件不存在、MAGIC / 版本不符或文件损坏时返回 None。
+    """
+    if not path.exists():
+        return None
+    try:
+        with path.open("rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as e:
+        logger.warning("无法映射索引快照 %s: %s", path, e)
+        return None
+
+    try:
+        magic, version, header_len = _PREAMBLE.unpack_from(mm, 0)
+        if magic != MAGIC or version != SNAPSHOT_VERSION:
+            logger.info("索引快照版本不匹配（%s v%d），忽略", magic, version)
+            return None
+        header = json.loads(bytes(mm[_PREAMBLE.size:_PREAMBLE.size + header_len]))
+        data_start = _PREAMBLE.size + header_len
+        data_start += _padding(data_start)
+
+        arrays: Dict[str, np.ndarray] = {}
+        for name, spec in header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = spec["nbytes"] // dtype.itemsize
+            if count:
+                arr = np.frombuffer(
+                    mm, dtype=dtype, count=count, offset=data_start + spec["offset"]
+                )
+            else:
+                arr = np.empty(0, dtype=dtype)
+            arrays[name] = arr.reshape(spec["shape"])
+    except (struct.error, ValueError, KeyError, TypeError) as e:
+        logger.warning("索引快照损坏 %s: %s", path, e)
+        return None
+
+    meta = dict(header["meta"])
+    meta["fingerprint"] = header["fingerprint"]
+    return Snapshot(meta=meta, arrays=arrays)
@@ -1,18 +1,30 @@
 from __future__ import annotations
 
-import csv
+import base64
+import hashlib
+import hmac
+import json
 import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
 from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
 
-from fastapi import FastAPI, HTTPException, Query
+import numpy as np
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 # ========================
 # 路径 & 日志
@@ -32,24 +44,50 @@ logging.basicConfig(
 )
 logger = logging.getLogger("phone_feedback")
 
+# 把 Global_Phone_Sentiment 目录加到 sys.path，方便导入同目录下的子模块
+if str(CURRENT_DIR) not in sys.path:
+    sys.path.insert(0, str(CURRENT_DIR))
+
+from csv_source import (  # noqa: E402
+    BATCH_ROWS,
+    CsvCursor,
+    CsvReadError,
+    CsvStream,
+    read_csv_frame,
+    read_csv_tail,
+)
+from date_normalizer import DateNormalizer, DateStats  # noqa: E402
+from index_snapshot import (  # noqa: E402
+    Snapshot,
+    file_fingerprint,
+    fingerprint_matches,
+    read_snapshot,
+    write_snapshot,
+)
+from model_catalog import BrandMatch, get_model_catalog, load_model_catalog  # noqa: E402
+from opinion_db import OpinionDB, fts_available  # noqa: E402
+from opinion_store import (  # noqa: E402
+    NO_DATE,
+    SENTIMENTS,
+    ColumnChunk,
+    ColumnChunkBuilder,
+    OpinionStore,
+    OpinionStoreBuilder,
+    Vocab,
+    day_to_date,
+    query_terms,
+)
+import segment_store  # noqa: E402
+import shared_index  # noqa: E402
+from sentiment_lexicon import SentimentLexicon  # noqa: E402
+from text_search import SearchIndex, snippet  # noqa: E402
+
 
 # ========================
 # 数据结构
 # ========================
 
 
-@dataclass
-class OpinionRow:
-    platform: str
-    brand_id: str
-    brand_name: str
-    model: str
-    sentiment: str  # 'pos' | 'neg' | 'neu'
-    published_at: str  # YYYY-MM-DD
-    raw_text: str
-    is_original: bool = False
-
-
 @dataclass
 class BrandInsight:
     """品牌维度聚合，用于 /insights"""
@@ -81,9 +119,19 @@ class BrandInsight:
         }
 
 
+class EncodedPayload(NamedTuple):
+    """预先编码好的 JSON 响应体 + 强 ETag"""
+
+    body: bytes
+    etag: str
+
+
 @dataclass
 class PhoneFeedbackIndex:
-    """全局索引，启动时加载一次"""
+    """
+    全局索引，启动时加载一次；源 CSV 有新追加的数据时，
+    后台线程会构建新一代索引整体替换（已建好的索引本身不再修改）
+    """
 
     platforms: Dict[str, str] = field(default_factory=dict)  # id -> name
     brands: List[str] = field(default_factory=list)
@@ -96,8 +144,25 @@ class PhoneFeedbackIndex:
     crawl_time: str = ""
 
     brand_insights: Dict[str, BrandInsight] = field(default_factory=dict)
-    opinions_by_brand: Dict[str, List[OpinionRow]] = field(
-        default_factory=lambda: defaultdict(list)
+    opinions: OpinionStore = field(default_factory=lambda: OpinionStoreBuilder().build())
+    # /copilot 的 BM25 检索索引，文档编号与 opinions 的行号一致
+    search: SearchIndex = field(default_factory=lambda: SearchIndex.build(OpinionStoreBuilder().build()))
+
+    # 热更新状态：第几代索引、何时建好、每个源 CSV 读到的位置、config.py 的 (大小, mtime)
+    generation: int = 1
+    loaded_at: str = field(default_factory=lambda: datetime.now().isoformat(timespec="seconds"))
+    sources: List[CsvCursor] = field(default_factory=list)
+    config_stamp: Tuple[int, int] = (0, 0)
+
+    # 本代索引怎么建出来的：来源（csv / snapshot / tail）、进程数、每个文件和总的耗时
+    load_report: Dict[str, Any] = field(default_factory=dict)
+
+    # OPINION_ENGINE=sqlite 时这一代评论的 SQLite 库（见 _attach_opinion_db），否则为 None
+    opinion_db: Optional[OpinionDB] = field(default=None, repr=False, compare=False)
+
+    # 各统计接口序列化好的响应体（索引建好后不再变化，按需生成一次）
+    encoded_payloads: Dict[str, "EncodedPayload"] = field(
+        default_factory=dict, repr=False, compare=False
     )
 
     @property
@@ -136,12 +201,17 @@ class PhoneFeedbackIndex:
 
 def _first_non_empty(row: Dict, keys: List[str]) -> str:
     """获取第一个非空字段值"""
+    return _first_non_empty_item(row, keys)[1]
+
+
+def _first_non_empty_item(row: Dict, keys: List[str]) -> Tuple[str, str]:
+    """第一个非空字段的 (列名, 值)；都为空时返回 ("", "")"""
     for k in keys:
         if k in row and row[k]:
             val = str(row[k]).strip()
             if val:
-                return val
-    return ""
+                return k, val
+    return "", ""
 
 
 def _is_url(s: str) -> bool:
@@ -157,199 +227,136 @@ def _is_url(s: str) -> bool:
     )
 
 
-def _extract_brand_from_model_id(model_id: str) -> Optional[str]:
+def _resolve_brand(phone_model_id: str, device_name: str, brand_field: str) -> BrandMatch:
     """
-    从 phone_model_id 中提取品牌，例如: iphone_16_pro -> Apple
+    品牌提取（严格过滤 URL）：phone_model_id -> device_name -> 品牌字段 -> Other，
+    规则统一在 model_catalog.BrandResolver 里
     """
-    if not model_id or _is_url(model_id):
-        return None
-
-    model_lower = model_id.lower().strip()
-
-    if model_lower.startswith("iphone") or "apple" in model_lower:
-        return "Apple"
-    if model_lower.startswith("xiaomi") or model_lower.startswith("redmi") or model_lower.startswith("mi"):
-        return "Xiaomi"
-    if model_lower.startswith("huawei") or model_lower.startswith("mate") or model_lower.startswith("pura"):
-        return "Huawei"
-    if model_lower.startswith("samsung") or "galaxy" in model_lower:
-        return "Samsung"
-    if model_lower.startswith("vivo") or model_lower.startswith("iqoo"):
-        return "Vivo"
-    if model_lower.startswith("oppo"):
-        return "OPPO"
-    if model_lower.startswith("honor"):
-        return "Honor"
-
-    # 下划线分割再试一次
-    parts = model_lower.split("_")
-    if parts:
-        first_part = parts[0]
-        if first_part in ["iphone", "apple"]:
-            return "Apple"
-        if first_part in ["xiaomi", "redmi", "mi"]:
-            return "Xiaomi"
-        if first_part in ["huawei", "mate", "pura"]:
-            return "Huawei"
-        if first_part in ["samsung", "galaxy"]:
-            return "Samsung"
-        if first_part in ["vivo", "iqoo"]:
-            return "Vivo"
-        if first_part == "oppo":
-            return "OPPO"
-        if first_part == "honor":
-            return "Honor"
-
-    return None
-
-
-def _normalize_brand_id(brand_raw: str) -> str:
-    """
-    统一品牌 ID：小写 + 去空格 + 别名映射
-    """
-    if not brand_raw:
-        return "other"
-
-    b = str(brand_raw).strip()
-    low = b.lower().replace(" ", "").replace("_", "")
-
-    mapping = {
-        "apple": "apple",
-        "iphone": "apple",
-        "xiaomi": "xiaomi",
-        "mi": "xiaomi",
-        "redmi": "xiaomi",
-        "华为": "huawei",
-        "huawei": "huawei",
-        "honor": "honor",
-        "荣耀": "honor",
-        "samsung": "samsung",
-        "vivo": "vivo",
-        "iqoo": "vivo",
-        "oppo": "oppo",
-        "oneplus": "oneplus",
-        "一加": "oneplus",
-        "realme": "realme",
-    }
-
-    for k, v in mapping.items():
-        if low == k or low.startswith(k):
-            return v
-
-    return low if low else "other"
-
-
-def _normalize_brand_name(brand_raw: str) -> str:
-    """
-    统一品牌显示名称：返回首字母大写的品牌名
-    """
-    if not brand_raw:
-        return "Other"
-
-    b = str(brand_raw).strip()
-    low = b.lower()
-
-    mapping = {
-        "apple": "Apple",
-        "iphone": "Apple",
-        "xiaomi": "Xiaomi",
-        "mi": "Xiaomi",
-        "redmi": "Xiaomi",
-        "华为": "Huawei",
-        "huawei": "Huawei",
-        "honor": "Honor",
-        "荣耀": "Honor",
-        "samsung": "Samsung",
-        "vivo": "Vivo",
-        "iqoo": "Vivo",
-        "oppo": "OPPO",
-        "oneplus": "OnePlus",
-        "一加": "OnePlus",
-        "realme": "Realme",
-    }
-
-    for k, v in mapping.items():
-        if low == k or low.startswith(k + " ") or low.startswith(k):
-            return v
-
-    return b.capitalize() if b else "Other"
-
-
-def _parse_date(row: Dict) -> str:
-    """
-    解析日期字段，统一返回 YYYY-MM-DD 格式
-    """
-    value = _first_non_empty(
-        row,
-        [
-            "published_at",
-            "pubtime_str",
-            "time_str",
-            "date",
-            "created_at",
-            "time",
-            "timestamp",
-        ],
-    )
-    if not value:
-        return ""
-
-    txt = str(value).strip()
-
-    formats = [
-        "%Y-%m-%d",
-        "%Y/%m/%d",
-        "%Y-%m-%d %H:%M:%S",
-        "%Y/%m/%d %H:%M:%S",
-        "%Y-%m-%d %H:%M",
-        "%Y/%m/%d %H:%M",
-        "%Y-%m-%dT%H:%M:%S",
-        "%Y-%m-%dT%H:%M:%SZ",
-    ]
-
-    for fmt in formats:
-        try:
-            dt = datetime.strptime(txt[:19], fmt)
-            return dt.strftime("%Y-%m-%d")
-        except Exception:
-            continue
-
-    if len(txt) >= 10:
-        try:
-            test_str = txt[:10]
-            datetime.strptime(test_str, "%Y-%m-%d")
-            return test_str
-        except Exception:
-            pass
-
-    return txt[:10] if len(txt) >= 10 else ""
+    resolver = get_model_catalog().resolver
+    for raw in (phone_model_id, device_name):
+        if raw and not _is_url(raw):
+            match = resolver.resolve(raw)
+            if match is not None:
+                return match
+    if brand_field and not _is_url(brand_field):
+        return resolver.normalize(brand_field)
+    return resolver.normalize("Other")
+
+
+# 各类字段的候选列名（按优先级）
+_DATE_FIELDS = [
+    "published_at",
+    "pubtime_str",
+    "time_str",
+    "date",
+    "created_at",
+    "time",
+    "timestamp",
+]
+_TEXT_FIELDS = [
+    "raw_text",
+    "cleaned_text",
+    "comment",
+    "content",
+    "text",
+    "body",
+    "review",
+    "title",
+    "评论内容",
+    "评论",
+]
+_LABEL_FIELDS = ["sentiment", "label", "sentiment_label", "情感", "情感标签"]
+_SCORE_FIELDS = ["rating", "score", "stars", "评分", "星级"]
+_BRAND_FIELDS = ["brand", "brand_name", "phone_brand"]
+_MODEL_FIELDS = ["model", "phone_model", "model_name"]
+_URL_FIELDS = ["url", "link", "page_url", "video_url", "链接"]
+
+
+# 日期列 -> 天数：按 (文件, 列) 嗅探格式后走快速路径，见 date_normalizer.py
+DATE_NORMALIZER = DateNormalizer()
 
 
 def _parse_text(row: Dict) -> str:
     """解析文本内容字段"""
-    return _first_non_empty(
-        row,
-        [
-            "raw_text",
-            "cleaned_text",
-            "comment",
-            "content",
-            "text",
-            "body",
-            "review",
-            "title",
-            "评论内容",
-            "评论",
-        ],
+    return _first_non_empty(row, _TEXT_FIELDS)
+
+
+# 文本关键词打标用的词表（编译成一个自动机，见 sentiment_lexicon.py）
+POSITIVE_KEYWORDS = [
+    "good",
+    "great",
+    "excellent",
+    "amazing",
+    "fantastic",
+    "wonderful",
+    "love",
+    "best",
+    "perfect",
+    "awesome",
+    "brilliant",
+    "outstanding",
+    "推荐",
+    "好评",
+    "很好",
+    "不错",
+    "满意",
+    "喜欢",
+    "赞",
+    "棒",
+    "优秀",
+    "recommend",
+    "highly recommend",
+    "worth it",
+    "worth buying",
+]
+
+NEGATIVE_KEYWORDS = [
+    "bad",
+    "terrible",
+    "awful",
+    "horrible",
+    "worst",
+    "disappointed",
+    "hate",
+    "poor",
+    "garbage",
+    "trash",
+    "junk",
+    "useless",
+    "broken",
+    "差评",
+    "不好",
+    "垃圾",
+    "失望",
+    "问题",
+    "故障",
+    "坏",
+    "差",
+    "烂",
+    "not worth",
+    "don't buy",
+    "avoid",
+    "problem",
+    "issue",
+    "bug",
+]
+
+SENTIMENT_LEXICON = SentimentLexicon(POSITIVE_KEYWORDS, NEGATIVE_KEYWORDS)
+
+
+def _explicit_sentiment(row: Dict) -> Optional[str]:
+    """
+    从显式标签 / 评分推断情感，两者都没有时返回 None。
+    优先级：显式标签 > 评分推断 > 文本关键词（清洗时对剩下的行批量调 SENTIMENT_LEXICON.labels_many）
+    """
+    return _sentiment_from_fields(
+        _first_non_empty(row, _LABEL_FIELDS),
+        _first_non_empty(row, _SCORE_FIELDS),
     )
 
 
-def _parse_sentiment(row: Dict) -> str:
-    """
-    解析情感标签，返回 "pos" | "neg" | "neu"
-    优先级：显式标签 > 评分推断 > 文本关键词 > 默认中性
-    """
-    label = _first_non_empty(row, ["sentiment", "label", "sentiment_label", "情感", "情感标签"])
+def _sentiment_from_fields(label: str, score_text: str) -> Optional[str]:
+    """标签字段 / 评分字段的取值 -> 情感；都推断不出时返回 None"""
     if label:
         l = str(label).strip().lower()
         if l in {"pos", "positive", "好评", "正向", "正面", "积极"}:
@@ -359,7 +366,6 @@ def _parse_sentiment(row: Dict) -> str:
         if l in {"neu", "neutral", "中性", "中"}:
             return "neu"
 
-    score_text = _first_non_empty(row, ["rating", "score", "stars", "评分", "星级"])
     if score_text:
         try:
             score = float(str(score_text).strip())
@@ -384,79 +390,7 @@ def _parse_sentiment(row: Dict) -> str:
         except Exception:
             pass
 
-    text = _parse_text(row)
-    if text:
-        text_lower = str(text).lower()
-
-        positive_keywords = [
-            "good",
-            "great",
-            "excellent",
-            "amazing",
-            "fantastic",
-            "wonderful",
-            "love",
-            "best",
-            "perfect",
-            "awesome",
-            "brilliant",
-            "outstanding",
-            "推荐",
-            "好评",
-            "很好",
-            "不错",
-            "满意",
-            "喜欢",
-            "赞",
-            "棒",
-            "优秀",
-            "recommend",
-            "highly recommend",
-            "worth it",
-            "worth buying",
-        ]
-
-        negative_keywords = [
-            "bad",
-            "terrible",
-            "awful",
-            "horrible",
-            "worst",
-            "disappointed",
-            "hate",
-            "poor",
-            "garbage",
-            "trash",
-            "junk",
-            "useless",
-            "broken",
-            "差评",
-            "不好",
-            "垃圾",
-            "失望",
-            "问题",
-            "故障",
-            "坏",
-            "差",
-            "烂",
-            "not worth",
-            "don't buy",
-            "avoid",
-            "problem",
-            "issue",
-            "bug",
-        ]
-
-        pos_count = sum(1 for kw in positive_keywords if kw in text_lower)
-        neg_count = sum(1 for kw in negative_keywords if kw in text_lower)
-
-        if pos_count > neg_count and pos_count > 0:
-            return "pos"
-        if neg_count > pos_count and neg_count > 0:
-            return "neg"
-        return "neu"
-
-    return "neu"
+    return None
 
 
 def _parse_is_comment(row: Dict, platform: str) -> bool:
@@ -496,104 +430,46 @@ def _parse_is_comment(row: Dict, platform: str) -> bool:
     return True  # 默认视为评论
 
 
-def _safe_read_csv(path: Path) -> List[Dict]:
-    if not path.exists():
-        logger.warning("数据文件不存在: %s", path)
-        return []
-    rows: List[Dict] = []
-    try:
-        with path.open("r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for r in reader:
-                rows.append(r)
-        logger.info("读取 CSV 成功: %s，%d 行", path.name, len(rows))
-    except UnicodeDecodeError:
-        with path.open("r", encoding="gbk", errors="ignore") as f:
-            reader = csv.DictReader(f)
-            for r in reader:
-                rows.append(r)
-        logger.info("读取 CSV(GBK) 成功: %s，%d 行", path.name, len(rows))
-    except Exception as e:
-        logger.error("读取 CSV 失败: %s: %s", path, e)
-    return rows
-
-
-def _load_single_csv(
-    path: Path,
+def _clean_csv_rows(
+    rows: List[Dict],
     platform: str,
     force_is_comment: Optional[bool] = None,
+    source: str = "",
 ) -> List[Dict]:
     """
-    加载单个 CSV 文件并统一清洗字段
+    统一清洗单个 CSV 读出来的记录（整文件读取和热更新的尾部读取共用）
+    source 是文件名，日期格式按 (source, 列名) 嗅探并缓存
     """
-    rows = _safe_read_csv(path)
     if not rows:
         return []
 
     result: List[Dict] = []
+    pending_sentiment: List[int] = []
+    pending_dates: Dict[str, List[Tuple[int, str]]] = defaultdict(list)
+    catalog = get_model_catalog()
 
     for row in rows:
         # ===== 品牌提取（严格过滤 URL） =====
-        brand_raw = None
-
         phone_model_id = _first_non_empty(row, ["phone_model_id"])
-        if phone_model_id and not _is_url(phone_model_id):
-            brand_raw = _extract_brand_from_model_id(phone_model_id)
-
-        if not brand_raw:
-            device_name = _first_non_empty(row, ["device_name"])
-            if device_name and not _is_url(device_name):
-                device_lower = device_name.lower()
-                if "iphone" in device_lower or "apple" in device_lower:
-                    brand_raw = "Apple"
-                elif "samsung" in device_lower or "galaxy" in device_lower:
-                    brand_raw = "Samsung"
-                elif "xiaomi" in device_lower or "redmi" in device_lower:
-                    brand_raw = "Xiaomi"
-                elif "huawei" in device_lower or "mate" in device_lower or "pura" in device_lower:
-                    brand_raw = "Huawei"
-                elif "vivo" in device_lower or "iqoo" in device_lower:
-                    brand_raw = "Vivo"
-                elif "oppo" in device_lower:
-                    brand_raw = "OPPO"
-
-        if not brand_raw:
-            brand_field = _first_non_empty(row, ["brand", "brand_name", "phone_brand"])
-            if brand_field and not _is_url(brand_field):
-                brand_raw = brand_field
-
-        if not brand_raw:
-            brand_raw = "Other"
-
-        brand_id = _normalize_brand_id(brand_raw)
-        brand_name = _normalize_brand_name(brand_raw)
+        device_name = _first_non_empty(row, ["device_name"])
+        brand_id, brand_name, _ = _resolve_brand(
+            phone_model_id, device_name, _first_non_empty(row, _BRAND_FIELDS)
+        )
 
         # ===== 机型提取（严格过滤 URL） =====
         model = None
 
         if phone_model_id and not _is_url(phone_model_id):
             model_id_lower = phone_model_id.lower().strip()
-            try:
-                import importlib.util
-
-                config_path = GLOBAL_SENTIMENT_DIR / "config.py"
-                if config_path.exists():
-                    spec = importlib.util.spec_from_file_location("config", config_path)
-                    config_module = importlib.util.module_from_spec(spec)
-                    spec.loader.exec_module(config_module)
-                    TARGET_MODELS = config_module.TARGET_MODELS
-                    if model_id_lower in TARGET_MODELS:
-                        model = phone_model_id
-            except Exception:
-                pass
+            if catalog.is_target_key(model_id_lower):
+                model = phone_model_id
 
         if not model:
-            device_name = _first_non_empty(row, ["device_name"])
             if device_name and not _is_url(device_name):
                 model = device_name
 
         if not model:
-            model_field = _first_non_empty(row, ["model", "phone_model", "model_name"])
+            model_field = _first_non_empty(row, _MODEL_FIELDS)
             if model_field and not _is_url(model_field):
                 model = model_field
 
@@ -607,10 +483,16 @@ def _load_single_csv(
             is_comment_val = 1 if _parse_is_comment(row, platform) else 0
 
         # ===== 时间 / 文本 / 情感 / URL =====
-        published_at = _parse_date(row)
+        date_field, date_value = _first_non_empty_item(row, _DATE_FIELDS)
+        if date_value:
+            # 同一列的日期最后整批转成天数
+            pending_dates[date_field].append((len(result), date_value))
         text = _parse_text(row)
-        sentiment = _parse_sentiment(row)
-        url = _first_non_empty(row, ["url", "link", "page_url", "video_url", "链接"])
+        sentiment = _explicit_sentiment(row)
+        if sentiment is None:
+            # 没有标签 / 评分的行先记下来，最后整批按文本关键词打标
+            pending_sentiment.append(len(result))
+        url = _first_non_empty(row, _URL_FIELDS)
 
         result.append(
             {
@@ -619,34 +501,219 @@ def _load_single_csv(
                 "brand_id": brand_id,
                 "model": model,
                 "is_comment": is_comment_val,
-                "published_at": published_at,
+                "day": NO_DATE,
                 "text": text,
                 "sentiment": sentiment,
                 "url": url,
             }
         )
 
+    if pending_sentiment:
+        labels = SENTIMENT_LEXICON.labels_many([result[i]["text"] for i in pending_sentiment])
+        for i, label in zip(pending_sentiment, labels):
+            result[i]["sentiment"] = label
+
+    for date_field, items in pending_dates.items():
+        days = DATE_NORMALIZER.days([value for _, value in items], key=(source, date_field))
+        for (i, _), day in zip(items, days.tolist()):
+            result[i]["day"] = day
+
     return result
 
 
 # ========================
-# 构建索引
+# 向量化清洗（可选）
 # ========================
+#
+# 与 _clean_csv_rows 的规则逐条对应，但按列处理整个 DataFrame：
+# - 候选列名每个文件只解析一次，字段取值用 pandas 的字符串列运算；
+# - 品牌 / 型号这类分支很多的规则，只对列里「不同的取值」各算一次再映射回去；
+# - 日期按列交给 DATE_NORMALIZER，与逐行清洗用同一份格式缓存。
+# 结果与逐行清洗完全一致（列名与 _clean_csv_rows 返回的字典键相同）。
+
+def _frame_first_non_empty(df: "pd.DataFrame", keys: List[str]) -> "pd.Series":
+    """_first_non_empty 的列版本：逐个候选列，取第一个去空白后非空的值"""
+    import pandas as pd
+
+    result = pd.Series("", index=df.index, dtype=object)
+    for key in keys:
+        if key not in df.columns:
+            continue
+        values = df[key].astype(str).str.strip()
+        result = result.where(result != "", values)
+    return result
 
 
-def build_index() -> PhoneFeedbackIndex:
+def _frame_is_url(values: "pd.Series") -> "pd.Series":
+    """_is_url 的列版本"""
+    lowered = values.str.lower().str.strip()
+    return lowered.str.contains("://", regex=False) | lowered.str.startswith("www.")
+
+
+def _map_unique(values: "pd.Series", fn: Callable[[Any], Any]) -> "pd.Series":
+    """对列里每个不同的取值只调用一次 fn，再按位置映射回整列"""
+    import pandas as pd
+
+    codes, uniques = pd.factorize(values, sort=False)
+    mapped = np.empty(len(uniques), dtype=object)
+    mapped[:] = [fn(u) for u in uniques]
+    return pd.Series(mapped[codes], index=values.index)
+
+
+def _frame_is_comment(df: "pd.DataFrame", platform: str) -> np.ndarray:
+    """_parse_is_comment 的列版本，返回 0/1 数组"""
+    if platform == "bilibili":
+        kind = _frame_first_non_empty(df, ["data_type", "type"]).str.lower()
+        is_comment = kind.str.contains("comment", regex=False) | kind.str.contains("评论", regex=False)
+        is_original = ~is_comment & kind.str.contains("video", regex=False)
+    elif platform == "reddit":
+        kind = _frame_first_non_empty(df, ["source_type", "type"]).str.lower()
+        is_comment = kind.str.contains("comment", regex=False) | kind.str.contains("reply", regex=False)
+        is_original = ~is_comment & kind.str.contains("post", regex=False)
+    elif platform == "gsmarena":
+        kind = _frame_first_non_empty(df, ["data_type", "type"]).str.lower()
+        is_comment = (
+            kind.str.contains("opinion", regex=False)
+            | kind.str.contains("comment", regex=False)
+            | kind.str.contains("评论", regex=False)
+        )
+        is_original = ~is_comment & (
+            kind.str.contains("review", regex=False) | kind.str.contains("article", regex=False)
+        )
+    else:
+        return np.ones(len(df), dtype=np.int8)
+    return np.where(is_original.to_numpy(), 0, 1).astype(np.int8)
+
+
+def _clean_csv_frame(
+    df: "pd.DataFrame",
+    platform: str,
+    force_is_comment: Optional[bool] = None,
+    source: str = "",
+) -> "pd.DataFrame":
     """
-    构建全局索引，统一加载和清洗所有平台的 CSV 数据
-    只使用 bilibili/gsmarena/reddit 三个平台，排除 smzdm
+    _clean_csv_rows 的向量化版本：输入 read_csv_frame 读出的字符串 DataFrame，
+    返回与 _clean_csv_rows 同样字段的 DataFrame（每行对应一条清洗后的记录）
     """
-    index = PhoneFeedbackIndex()
+    import pandas as pd
+
+    catalog = get_model_catalog()
+
+    # ===== 品牌提取（严格过滤 URL） =====
+    phone_model_id = _frame_first_non_empty(df, ["phone_model_id"])
+    model_id_ok = (phone_model_id != "") & ~_frame_is_url(phone_model_id)
+    device_name = _frame_first_non_empty(df, ["device_name"])
+    device_ok = (device_name != "") & ~_frame_is_url(device_name)
+    brand = _map_unique(
+        pd.Series(
+            list(zip(phone_model_id, device_name, _frame_first_non_empty(df, _BRAND_FIELDS))),
+            index=df.index,
+            dtype=object,
+        ),
+        lambda key: _resolve_brand(*key),
+    )
+    brand_id = brand.map(lambda m: m.brand_id)
+    brand_name = brand.map(lambda m: m.brand_name)
+
+    # ===== 机型提取（严格过滤 URL） =====
+    is_target = _map_unique(
+        phone_model_id.str.lower().str.strip(), catalog.is_target_key
+    ).astype(bool)
+    model = phone_model_id.where(model_id_ok & is_target, "")
+    model = model.where(model != "", device_name.where(device_ok, ""))
+    model_field = _frame_first_non_empty(df, _MODEL_FIELDS)
+    model_field_ok = (model_field != "") & ~_frame_is_url(model_field)
+    model = model.where(model != "", model_field.where(model_field_ok, ""))
+    model = model.where(model != "", None)
+
+    # ===== 是否为评论 =====
+    if force_is_comment is not None:
+        is_comment = np.full(len(df), 1 if force_is_comment else 0, dtype=np.int8)
+    else:
+        is_comment = _frame_is_comment(df, platform)
+
+    # ===== 时间 / 文本 / 情感 / URL =====
+    # 每行取第一个非空的日期列，按列整批转成天数
+    day = np.full(len(df), NO_DATE, dtype=np.int32)
+    taken = np.zeros(len(df), dtype=bool)
+    for date_field in _DATE_FIELDS:
+        if date_field not in df.columns:
+            continue
+        values = df[date_field].astype(str).str.strip()
+        mask = ~taken & (values != "").to_numpy()
+        if mask.any():
+            day[mask] = DATE_NORMALIZER.days(values[mask].tolist(), key=(source, date_field))
+            taken |= mask
+
+    text = _frame_first_non_empty(df, _TEXT_FIELDS)
+
+    label = _frame_first_non_empty(df, _LABEL_FIELDS)
+    score_text = _frame_first_non_empty(df, _SCORE_FIELDS)
+    explicit = pd.Series(None, index=df.index, dtype=object)
+    has_fields = (label != "") | (score_text != "")
+    if has_fields.any():
+        explicit[has_fields] = [
+            _sentiment_from_fields(lab, score)
+            for lab, score in zip(label[has_fields], score_text[has_fields])
+        ]
+    pending = explicit.isna().to_numpy()
+    sentiment = explicit.to_numpy(dtype=object, copy=True)
+    if pending.any():
+        sentiment[pending] = SENTIMENT_LEXICON.labels_many(text[pending].tolist())
+
+    url = _frame_first_non_empty(df, _URL_FIELDS)
+
+    return pd.DataFrame(
+        {
+            "platform": platform,
+            "brand": brand_name,
+            "brand_id": brand_id,
+            "model": model,
+            "is_comment": is_comment,
+            "day": day,
+            "text": text,
+            "sentiment": sentiment,
+            "url": url,
+        },
+        index=df.index,
+    )
 
-    PLATFORM_NAME = {
-        "bilibili": "Bilibili",
-        "gsmarena": "Gsmarena",
-        "reddit": "Reddit",
-    }
 
+# ========================
+# 构建索引
+# ========================
+
+
+PLATFORM_NAME = {
+    "bilibili": "Bilibili",
+    "gsmarena": "Gsmarena",
+    "reddit": "Reddit",
+}
+
+# 索引快照位置，可用环境变量 PHONE_INDEX_SNAPSHOT 覆盖；设为 off 则不读不写快照
+_snapshot_env = os.environ.get("PHONE_INDEX_SNAPSHOT", "").strip()
+SNAPSHOT_PATH: Optional[Path] = (
+    None
+    if _snapshot_env.lower() in {"off", "0", "false", "none"}
+    else Path(_snapshot_env) if _snapshot_env
+    else GLOBAL_SENTIMENT_DIR / ".index_cache" / "phone_feedback_index.snap"
+)
+
+
+# 向量化清洗开关（PHONE_INDEX_VECTORIZED=1 开启）：结果与逐行清洗一致，默认仍走逐行路径
+VECTORIZED_INGEST = os.environ.get("PHONE_INDEX_VECTORIZED", "").strip().lower() in {
+    "1",
+    "true",
+    "yes",
+    "on",
+}
+
+
+def _collect_source_files() -> List[Tuple[Path, str, Optional[bool]]]:
+    """
+    列出要加载的 CSV：(路径, 平台, 是否强制视为评论)
+    只使用 bilibili/gsmarena/reddit 三个平台，排除 smzdm
+    """
     source_files = []
 
     # Bilibili
@@ -673,111 +740,427 @@ def build_index() -> PhoneFeedbackIndex:
         if path.exists():
             source_files.append((path, platform, force_comment))
 
+    return source_files
+
+
+def _snapshot_inputs(source_files: List[Tuple[Path, str, Optional[bool]]]) -> List[Path]:
+    """快照指纹覆盖的文件：所有源 CSV + config.py（目标型号会影响清洗结果）"""
+    paths = [path for path, _, _ in source_files]
+    config_path = GLOBAL_SENTIMENT_DIR / "config.py"
+    if config_path.exists():
+        paths.append(config_path)
+    return paths
+
+
+def _row_seq(file_idx: int, row: int) -> int:
+    """
+    加载顺序编号：高 32 位是源文件序号，低 32 位是文件内行号（row 也可以是整数数组）。
+    热更新追加的行排在同一文件老数据之后、后面文件之前，统计的先后顺序与整体重建一致
+    """
+    return (file_idx << 32) | row
+
+
+def _config_stamp() -> Tuple[int, int]:
+    """config.py 的 (大小, mtime)，用来判断目标型号配置是否改过"""
+    try:
+        st = (GLOBAL_SENTIMENT_DIR / "config.py").stat()
+    except OSError:
+        return (0, 0)
+    return (st.st_size, st.st_mtime_ns)
+
+
+def _add_rows(
+    builder: OpinionStoreBuilder,
+    rows: List[Dict],
+    file_idx: int,
+    first_row: int,
+    bilibili_urls: List[str],
+) -> None:
+    """清洗后的记录写入 builder，顺便收集前 3 个 B 站原文链接"""
+    for i, row in enumerate(rows):
+        builder.add(row, seq=_row_seq(file_idx, first_row + i))
+    if len(bilibili_urls) < 3:
+        bilibili_urls.extend(_bilibili_urls(rows, 3 - len(bilibili_urls)))
+
+
+def _bilibili_urls(rows: List[Dict], limit: int) -> List[str]:
+    """清洗后的记录里前 limit 个 B 站原文链接"""
+    urls: List[str] = []
+    for row in rows:
+        if len(urls) >= limit:
+            break
+        if row["is_comment"] == 0 and row["platform"] == "bilibili" and row.get("url"):
+            url_val = str(row["url"]).strip()
+            if url_val.startswith("http"):
+                urls.append(url_val)
+    return urls
+
+
+def _frame_bilibili_urls(frame: "pd.DataFrame", limit: int) -> List[str]:
+    """_bilibili_urls 的列版本"""
+    if not len(frame):
+        return []
+    url = frame["url"].astype(str).str.strip()
+    hits = url[
+        (frame["is_comment"] == 0)
+        & (frame["platform"] == "bilibili")
+        & url.str.startswith("http")
+    ]
+    return hits.iloc[:limit].tolist()
+
+
+# 源 CSV 有 Arrow 段文件（segment_store，爬虫 CRAWL_SEGMENTS=1 时写）就从段文件映射读取，
+# 解析结果与读 CSV 逐格一致；PHONE_INDEX_SEGMENTS=off 关闭，没装 pyarrow 时总是读 CSV
+READ_SEGMENTS = segment_store.AVAILABLE and os.environ.get("PHONE_INDEX_SEGMENTS", "").strip().lower() not in {
+    "off",
+    "0",
+    "false",
+    "no",
+}
+
+
+# /opinions 的存储引擎（PHONE_INDEX_OPINION_ENGINE）：memory = 列式存储 + 倒排表（默认）；
+# sqlite = 每代索引再建一个 SQLite 库（见 opinion_db），筛选 / 计数 / q= 全文检索交给 SQLite，
+# 当前 sqlite3 不带 FTS5 trigram 分词时退回 memory
+OPINION_ENGINE = os.environ.get("PHONE_INDEX_OPINION_ENGINE", "memory").strip().lower()
+if OPINION_ENGINE == "sqlite" and not fts_available():
+    logger.warning("PHONE_INDEX_OPINION_ENGINE=sqlite 需要 SQLite 3.34+ 的 FTS5 trigram 分词，改用内存引擎")
+    OPINION_ENGINE = "memory"
+
+
+def _attach_opinion_db(index: PhoneFeedbackIndex) -> None:
+    """OPINION_ENGINE=sqlite 时给这一代索引建 SQLite 评论库；建库失败时 /opinions 仍走内存引擎"""
+    if OPINION_ENGINE != "sqlite" or not len(index.opinions):
+        return
+    try:
+        index.opinion_db = OpinionDB.build(index.opinions)
+    except Exception as e:
+        logger.warning("建 SQLite 评论库失败，/opinions 使用内存引擎: %s", e)
+        return
+    logger.info(
+        "SQLite 评论库就绪：%d 条评论，耗时 %.0f ms（%s）",
+        index.comment_count,
+        index.opinion_db.build_ms,
+        index.opinion_db.path,
+    )
+
+
+# 清洗结果里写进列式存储的字段
+_CHUNK_COLUMNS = ("platform", "brand", "brand_id", "model", "is_comment", "day", "text", "sentiment")
+
+
+@dataclass
+class LoadedSource:
+    """一个源 CSV 读取 + 清洗后的结果（并行加载时由子进程返回）"""
+
+    cursor: Optional[CsvCursor]
+    chunk: ColumnChunk
+    bilibili_urls: List[str]  # 该文件里前 3 个 B 站原文链接
+    elapsed_ms: float
+    date_stats: DateStats  # 本文件日期解析的命中 / 回退次数和嗅探出的格式
+
+
+def _clean_batches(
+    batches: Iterable[List[Dict]],
+    platform: str,
+    force_is_comment: Optional[bool],
+    source: str,
+) -> Tuple[ColumnChunk, List[str]]:
+    """
+    逐批清洗并压进 ColumnChunkBuilder：同一时刻只有一批原始记录和清洗后的字典，
+    结果与整文件一次清洗完全一致（日期格式按列缓存、情感按条打标，都与分批无关）
+    """
+    builder = ColumnChunkBuilder()
+    urls: List[str] = []
+    for raw_rows in batches:
+        rows = _clean_csv_rows(raw_rows, platform, force_is_comment, source=source)
+        builder.extend({col: [row.get(col) for row in rows] for col in _CHUNK_COLUMNS})
+        if len(urls) < 3:
+            urls.extend(_bilibili_urls(rows, 3 - len(urls)))
+    return builder.build(), urls
+
+
+def _stream_csv(
+    path: Path, platform: str, force_is_comment: Optional[bool]
+) -> Tuple[ColumnChunk, List[str], Optional[CsvCursor]]:
+    """
+    CsvStream 流式读取 + 逐批清洗，返回 (ColumnChunk, B 站原文链接, 游标)。
+    开头的样本判断成 UTF-8、读到后面才解不了时，丢掉这个文件已有的结果按 GBK 从头再读
+    （与 read_csv_full 一致）；读取失败时返回空结果。
+    """
+    stream = CsvStream(path)
+    try:
+        try:
+            chunk, urls = _clean_batches(stream, platform, force_is_comment, path.name)
+        except UnicodeDecodeError:
+            logger.info("%s 开头是 UTF-8、后面不是，改用 GBK 重新读取", path.name)
+            stream = CsvStream(path, encoding="gbk")
+            chunk, urls = _clean_batches(stream, platform, force_is_comment, path.name)
+    except CsvReadError as e:
+        logger.error("读取 CSV 失败: %s", e)
+        return ColumnChunkBuilder().build(), [], None
+    return chunk, urls, stream.cursor
+
+
+def _load_source(path: Path, platform: str, force_is_comment: Optional[bool]) -> LoadedSource:
+    """读取并清洗一个源 CSV，结果压成 ColumnChunk（只依赖文件本身，可以放进子进程）"""
+    started = time.perf_counter()
+    date_before = DATE_NORMALIZER.export()
+    frame, cursor = None, None
+    if VECTORIZED_INGEST:
+        frame, cursor = (READ_SEGMENTS and segment_store.read_frame(path)) or read_csv_frame(path)
+    if frame is not None:
+        cleaned = _clean_csv_frame(frame, platform, force_is_comment, source=path.name)
+        chunk = ColumnChunk.from_columns({col: cleaned[col].tolist() for col in _CHUNK_COLUMNS})
+        urls = _frame_bilibili_urls(cleaned, 3)
+    else:
+        found = READ_SEGMENTS and segment_store.read_rows(path)
+        if found:
+            raw_rows, cursor = found
+            batches = (raw_rows[i:i + BATCH_ROWS] for i in range(0, len(raw_rows), BATCH_ROWS))
+            chunk, urls = _clean_batches(batches, platform, force_is_comment, path.name)
+        else:
+            chunk, urls, cursor = _stream_csv(path, platform, force_is_comment)
+    date_after = DATE_NORMALIZER.export(source=path.name)
+    return LoadedSource(
+        cursor=cursor,
+        chunk=chunk,
+        bilibili_urls=urls,
+        elapsed_ms=(time.perf_counter() - started) * 1000,
+        date_stats=DateStats(
+            hits=date_after.hits - date_before.hits,
+            misses=date_after.misses - date_before.misses,
+            formats=date_after.formats,
+        ),
+    )
+
+
+# 并行加载源 CSV 的进程数（PHONE_INDEX_WORKERS）：默认 1 = 不用进程池，逐个加载；
+# 0 = 自动（CPU 核数，不超过文件数），N = 最多 N 个进程。
+# 默认不开：导入 main 时就会建索引，uvicorn --workers N 下每个 worker 都会各起一个进程池
+LOAD_WORKERS = int(os.environ.get("PHONE_INDEX_WORKERS", "1") or 1)
+
+
+def _load_sources(
+    source_files: List[Tuple[Path, str, Optional[bool]]],
+) -> Tuple[List[LoadedSource], int]:
+    """
+    读取并清洗全部源文件，返回 (按 source_files 顺序排列的结果, 实际进程数)。
+    进程池只在支持 fork、且由主线程调用时使用：子进程直接继承已导入的模块，
+    不会重新执行 main.py（spawn 会重新导入、再建一遍索引）；
+    热更新线程触发的整体重建在当前进程里逐个加载，避免在多线程进程里 fork。
+    """
+    workers = LOAD_WORKERS if LOAD_WORKERS > 0 else (os.cpu_count() or 1)
+    workers = min(workers, len(source_files))
+    if (
+        workers > 1
+        and "fork" in multiprocessing.get_all_start_methods()
+        and threading.current_thread() is threading.main_thread()
+    ):
+        get_model_catalog()  # 父进程先加载好型号目录，子进程直接继承
+        # 大文件先提交，最慢的任务最早开始；结果仍按 source_files 的顺序放回
+        by_size = sorted(
+            range(len(source_files)),
+            key=lambda i: -(source_files[i][0].stat().st_size if source_files[i][0].exists() else 0),
+        )
+        try:
+            with ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("fork")
+            ) as pool:
+                futures = {i: pool.submit(_load_source, *source_files[i]) for i in by_size}
+                loaded = [futures[i].result() for i in range(len(source_files))]
+            # 子进程里的日期计数器和嗅探结果并回当前进程
+            for source in loaded:
+                DATE_NORMALIZER.merge(source.date_stats)
+            return loaded, workers
+        except (OSError, BrokenProcessPool) as e:
+            logger.warning("进程池加载失败，改为逐个加载: %s", e)
+    return [_load_source(*spec) for spec in source_files], 1
+
+
+def build_index(
+    source_files: Optional[List[Tuple[Path, str, Optional[bool]]]] = None,
+    snapshot_path: Optional[Path] = None,
+) -> PhoneFeedbackIndex:
+    """
+    构建全局索引，统一加载和清洗所有平台的 CSV 数据
+    只使用 bilibili/gsmarena/reddit 三个平台，排除 smzdm
+    各文件的读取 + 清洗互不依赖，放进进程池并行（见 _load_sources），
+    合并时按文件顺序写入列式存储，结果与逐个加载完全一致
+    传入 snapshot_path 时，建好后把索引写成二进制快照，供下次启动直接加载
+    """
+    started = time.perf_counter()
+    index = PhoneFeedbackIndex(config_stamp=_config_stamp())
+
+    if source_files is None:
+        source_files = _collect_source_files()
+
     logger.info("准备加载 %d 个 CSV 文件", len(source_files))
 
-    all_rows: List[Dict] = []
+    load_started = time.perf_counter()
+    DATE_NORMALIZER.forget()  # 整体重建时重新嗅探各列的日期格式
+    loaded, workers = _load_sources(source_files)
+    load_ms = (time.perf_counter() - load_started) * 1000
 
-    for path, platform, force_is_comment in source_files:
-        logger.info("正在加载: %s (平台: %s)", path.name, platform)
-        rows = _load_single_csv(path, platform, force_is_comment)
+    # 所有记录（原文 + 评论）写入列式存储，后面的统计全部基于 store 的数组
+    builder = OpinionStoreBuilder()
+    bilibili_urls: List[str] = []
+    file_reports: List[Dict] = []
+
+    for file_idx, ((path, platform, _), source) in enumerate(zip(source_files, loaded)):
+        chunk = source.chunk
+        builder.extend_chunk(chunk, seq=_row_seq(file_idx, np.arange(len(chunk), dtype=np.int64)))
+        bilibili_urls.extend(source.bilibili_urls[: 3 - len(bilibili_urls)])
+        index.sources.append(source.cursor or CsvCursor(path=path))
 
         if platform not in index.platforms:
             index.platforms[platform] = PLATFORM_NAME.get(platform, platform)
 
-        all_rows.extend(rows)
-        logger.info("  加载了 %d 条记录", len(rows))
+        logger.info(
+            "  %s (平台: %s): 加载了 %d 条记录，耗时 %.0f ms",
+            path.name,
+            platform,
+            len(chunk),
+            source.elapsed_ms,
+        )
+        file_reports.append(
+            {"file": path.name, "rows": len(chunk), "ms": round(source.elapsed_ms, 1)}
+        )
+
+    logger.info(
+        "[STARTUP] 读取 + 清洗 %d 个文件：%d 个进程，墙钟 %.0f ms（逐文件合计 %.0f ms）",
+        len(source_files),
+        workers,
+        load_ms,
+        sum(source.elapsed_ms for source in loaded),
+    )
+    index.load_report = {
+        "source": "csv",
+        "workers": workers,
+        "load_ms": round(load_ms, 1),
+        "files": file_reports,
+    }
 
-    if not all_rows:
+    if not len(builder):
         logger.error("没有加载到任何数据，请检查 CSV 文件是否存在")
         return index
 
-    df_original = [r for r in all_rows if r["is_comment"] == 0]
-    df_comments = [r for r in all_rows if r["is_comment"] == 1]
+    _finalize_index(index, builder.build(), source_files, bilibili_urls)
+    _attach_opinion_db(index)
 
-    logger.info("数据分离完成：原文 %d 条，评论 %d 条", len(df_original), len(df_comments))
+    logger.info(
+        "[STARTUP] PhoneFeedbackIndex 就绪 ✅ | 总记录 %d, 原始内容 %d, 评论 %d, 耗时 %.2f s",
+        len(index.opinions),
+        index.original_count,
+        index.comment_count,
+        time.perf_counter() - started,
+    )
+    index.load_report["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
 
-    all_brands_set = set()
-    all_models_set = set()
-    bilibili_urls: List[str] = []
-    original_by_platform = Counter()
-    comment_by_platform = Counter()
+    if snapshot_path is not None:
+        _save_snapshot(index, source_files, snapshot_path)
 
-    # 原文
-    for row in df_original:
-        platform = row["platform"]
-        brand_name = row["brand"]
-        model = row["model"]
+    return index
 
-        if brand_name and not _is_url(brand_name) and brand_name not in ["Other", "other", ""]:
-            all_brands_set.add(brand_name)
-        if model and not _is_url(model):
-            all_models_set.add(model)
 
-        original_by_platform[platform] += 1
+def _finalize_index(
+    index: PhoneFeedbackIndex,
+    store: OpinionStore,
+    source_files: List[Tuple[Path, str, Optional[bool]]],
+    bilibili_urls: List[str],
+    previous: Optional[PhoneFeedbackIndex] = None,
+) -> None:
+    """
+    基于列式存储计算索引的全部统计字段（整体构建和热更新共用）
+    传入 previous（热更新前的索引）时，检索索引在它的基础上增量扩展
+    """
+    catalog = get_model_catalog()
+    index.opinions = store
+    if previous is not None:
+        index.search = previous.search.extended(previous.opinions, store)
+    else:
+        index.search = SearchIndex.build(store)
+    logger.info(
+        "检索索引就绪：%d 个词项，%d 条倒排记录，耗时 %.0f ms",
+        len(index.search.terms),
+        len(index.search.doc_ids),
+        index.search.build_ms,
+    )
 
-        if platform == "bilibili" and row.get("url") and len(bilibili_urls) < 3:
-            url_val = str(row["url"]).strip()
-            if url_val.startswith("http"):
-                bilibili_urls.append(url_val)
+    comment_mask = store.is_comment
+    original_mask = ~comment_mask
+    original_count = int(original_mask.sum())
+    comment_count = int(comment_mask.sum())
 
-    # 评论
-    for row in df_comments:
-        platform = row["platform"]
-        brand_id = row["brand_id"]
-        brand_name = row["brand"]
-        model = row["model"]
+    logger.info("数据分离完成：原文 %d 条，评论 %d 条", original_count, comment_count)
 
+    all_brands_set = set()
+    for code in np.unique(store.brand_name):
+        brand_name = store.brand_names[code]
         if brand_name and not _is_url(brand_name) and brand_name not in ["Other", "other", ""]:
             all_brands_set.add(brand_name)
+
+    all_models_set = set()
+    for code in np.unique(store.model):
+        model = store.models[code]
         if model and not _is_url(model):
             all_models_set.add(model)
 
-        comment_by_platform[platform] += 1
+    original_by_platform = {
+        store.platforms[code]: count
+        for code, count, _ in store.group_counts(store.platform, original_mask)
+    }
+    comment_by_platform = {
+        store.platforms[code]: count
+        for code, count, _ in store.group_counts(store.platform, comment_mask)
+    }
 
-        op = OpinionRow(
-            platform=platform,
+    # 品牌聚合（评论）：品牌顺序 = 首次出现顺序，品牌名取该品牌第一条评论
+    n_sentiments = len(SENTIMENTS)
+    sentiment_counts = np.bincount(
+        store.brand.astype(np.int64)[comment_mask] * n_sentiments
+        + store.sentiment[comment_mask],
+        minlength=len(store.brand_ids) * n_sentiments,
+    ).reshape(-1, n_sentiments)
+
+    for brand_code, total, first_row in store.group_counts(store.brand, comment_mask):
+        brand_id = store.brand_ids[brand_code]
+        pos, neg, neu = (int(c) for c in sentiment_counts[brand_code])
+        index.brand_insights[brand_id] = BrandInsight(
             brand_id=brand_id,
-            brand_name=brand_name,
-            model=model,
-            sentiment=row["sentiment"],
-            published_at=row["published_at"],
-            raw_text=row["text"],
-            is_original=False,
+            brand_name=store.brand_names[store.brand_name[first_row]],
+            total=total,
+            pos=pos,
+            neg=neg,
+            neu=neu,
         )
-        index.opinions_by_brand[brand_id].append(op)
 
-    # 品牌聚合
-    brand_comment_counter: Dict[str, Counter] = defaultdict(Counter)
     brand_platforms: Dict[str, set] = defaultdict(set)
-
-    for row in df_comments:
-        brand_id = row["brand_id"]
-        brand_name = row["brand"]
-        platform = row["platform"]
-        model = row["model"]
-        sentiment = row["sentiment"]
-
-        if brand_id not in index.brand_insights:
-            index.brand_insights[brand_id] = BrandInsight(
-                brand_id=brand_id,
-                brand_name=brand_name,
-            )
-
-        ins = index.brand_insights[brand_id]
-        brand_platforms[brand_id].add(platform)
-
-        ins.total += 1
-        if sentiment == "pos":
-            ins.pos += 1
-        elif sentiment == "neg":
-            ins.neg += 1
-        else:
-            ins.neu += 1
-
+    n_platforms = len(store.platforms)
+    for key, _, _ in store.group_counts(
+        store.brand.astype(np.int64) * n_platforms + store.platform, comment_mask
+    ):
+        brand_platforms[store.brand_ids[key // n_platforms]].add(store.platforms[key % n_platforms])
+
+    # 机型计数：同一机型（去首尾空格后）合并，URL / 空值不计
+    model_keys = Vocab()
+    model_key_of_code = np.full(len(store.models), -1, dtype=np.int64)
+    for code, model in enumerate(store.models.values):
         if model and not _is_url(str(model)) and str(model).strip():
             model_str = str(model).strip()
             if not model_str.startswith("http") and "://" not in model_str:
-                brand_comment_counter[brand_id][model_str] += 1
+                model_key_of_code[code] = model_keys.encode(model_str)
+
+    brand_comment_counter: Dict[str, Counter] = defaultdict(Counter)
+    row_model_keys = model_key_of_code[store.model]
+    n_model_keys = max(len(model_keys), 1)
+    for key, count, _ in store.group_counts(
+        store.brand.astype(np.int64) * n_model_keys + row_model_keys,
+        comment_mask & (row_model_keys >= 0),
+    ):
+        brand_comment_counter[store.brand_ids[key // n_model_keys]][
+            model_keys[key % n_model_keys]
+        ] = count
 
     # 设置平台列表 & 热门机型
     for brand_id, ins in index.brand_insights.items():
@@ -786,31 +1169,17 @@ def build_index() -> PhoneFeedbackIndex:
         counter = brand_comment_counter.get(brand_id)
         if counter:
             top_models_list: List[str] = []
-            try:
-                import importlib.util
-
-                config_path = GLOBAL_SENTIMENT_DIR / "config.py"
-                if config_path.exists():
-                    spec = importlib.util.spec_from_file_location("config", config_path)
-                    config_module = importlib.util.module_from_spec(spec)
-                    spec.loader.exec_module(config_module)
-                    TARGET_MODELS = config_module.TARGET_MODELS
-                    for m, _ in counter.most_common(10):
-                        if not m or _is_url(str(m)):
-                            continue
-                        model_str = str(m).strip()
-                        model_lower = model_str.lower()
-                        is_target_model = any(
-                            target_key in model_lower or model_lower in target_key
-                            for target_key in TARGET_MODELS.keys()
-                        )
-                        if is_target_model or len(top_models_list) < 3:
-                            top_models_list.append(model_str)
-                            if len(top_models_list) >= 3:
-                                break
-                else:
-                    raise ImportError
-            except Exception:
+            if catalog.available:
+                for m, _ in counter.most_common(10):
+                    if not m or _is_url(str(m)):
+                        continue
+                    model_str = str(m).strip()
+                    is_target_model = catalog.matches_target(model_str.lower())
+                    if is_target_model or len(top_models_list) < 3:
+                        top_models_list.append(model_str)
+                        if len(top_models_list) >= 3:
+                            break
+            else:
                 for m, _ in counter.most_common(3):
                     if not m or _is_url(str(m)):
                         continue
@@ -839,19 +1208,9 @@ def build_index() -> PhoneFeedbackIndex:
     index.brands = sorted(list(set(filtered_brands)))
 
     # 型号列表：只保留 config.TARGET_MODELS
-    try:
-        import importlib.util
-
-        config_path = GLOBAL_SENTIMENT_DIR / "config.py"
-        if config_path.exists():
-            spec = importlib.util.spec_from_file_location("config", config_path)
-            config_module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(config_module)
-            TARGET_MODELS = config_module.TARGET_MODELS
-            target_model_keys = set(TARGET_MODELS.keys())
-            logger.info("加载目标型号配置成功，共 %d 个目标型号", len(target_model_keys))
-        else:
-            raise ImportError(f"config.py not found at {config_path}")
+    if catalog.available:
+        target_model_keys = catalog.target_keys
+        logger.info("加载目标型号配置成功，共 %d 个目标型号", len(target_model_keys))
 
         filtered_models: List[str] = []
         for m in all_models_set:
@@ -863,16 +1222,8 @@ def build_index() -> PhoneFeedbackIndex:
                 for x in ["http://", "https://", "www.", ".com", ".net"]
             ):
                 continue
-            model_lower = model_str.lower()
-            for target_key in target_model_keys:
-                if (
-                    target_key == model_lower
-                    or target_key in model_lower
-                    or model_lower in target_key
-                ):
-                    if model_str not in filtered_models:
-                        filtered_models.append(model_str)
-                    break
+            if catalog.matches_target(model_str.lower()):
+                filtered_models.append(model_str)
 
         if not filtered_models:
             filtered_models = sorted(list(target_model_keys))
@@ -881,30 +1232,20 @@ def build_index() -> PhoneFeedbackIndex:
 
         index.models = filtered_models
         logger.info("型号统计：总型号 %d 个，过滤后目标型号 %d 个", len(all_models_set), len(filtered_models))
-    except Exception as e:
-        logger.warning("无法加载目标型号配置，使用全部型号（过滤 URL）: %s", e)
+    else:
+        logger.warning("无法加载目标型号配置，使用全部型号（过滤 URL）: %s", catalog.source)
         filtered_models = [m for m in all_models_set if not _is_url(str(m))]
         index.models = sorted(filtered_models)
 
     index.bilibili_sample_urls = bilibili_urls[:3]
-    index.original_by_platform = dict(original_by_platform)
-    index.comment_by_platform = dict(comment_by_platform)
-    index.original_count = len(df_original)
-    index.comment_count = len(df_comments)
+    index.original_by_platform = original_by_platform
+    index.comment_by_platform = comment_by_platform
+    index.original_count = original_count
+    index.comment_count = comment_count
 
     # 最近日期
-    max_date = ""
-    for row in all_rows:
-        date_str = str(row.get("published_at", "")).strip()
-        if date_str and len(date_str) >= 10:
-            date_part = date_str[:10]
-            if len(date_part) == 10 and date_part[4] == "-" and date_part[7] == "-":
-                try:
-                    datetime.strptime(date_part, "%Y-%m-%d")
-                    if date_part > max_date:
-                        max_date = date_part
-                except Exception:
-                    pass
+    dated = store.day[store.day != NO_DATE]
+    max_date = day_to_date(int(dated.max())) if len(dated) else ""
 
     if max_date:
         index.crawl_time = max_date
@@ -922,22 +1263,439 @@ def build_index() -> PhoneFeedbackIndex:
         except Exception:
             index.crawl_time = datetime.now().strftime("%Y-%m-%d")
 
-    total_records = len(all_rows)
+
+def _save_snapshot(
+    index: PhoneFeedbackIndex,
+    source_files: List[Tuple[Path, str, Optional[bool]]],
+    snapshot_path: Path,
+) -> bool:
+    """写快照，成功返回 True；失败只记日志（不影响服务）"""
+    try:
+        fingerprint = file_fingerprint(_snapshot_inputs(source_files))
+        vocabs, arrays = index.opinions.to_snapshot()
+        arrays.update(index.search.to_snapshot())
+        size = write_snapshot(
+            snapshot_path,
+            meta={"index": _index_snapshot_meta(index), "vocabs": vocabs},
+            arrays=arrays,
+            fingerprint=fingerprint,
+        )
+        logger.info("[STARTUP] 索引快照已写入: %s（%.1f MB）", snapshot_path, size / 1e6)
+    except Exception as e:
+        logger.warning("写入索引快照失败（不影响服务）: %s: %s", snapshot_path, e)
+        return False
+    return True
+
+
+def _index_snapshot_meta(index: PhoneFeedbackIndex) -> Dict:
+    """索引里除列式存储以外的字段（都是小字典/列表），写进快照的 JSON 头部"""
+    return {
+        "platforms": index.platforms,
+        "brands": index.brands,
+        "models": index.models,
+        "bilibili_sample_urls": index.bilibili_sample_urls,
+        "original_count": index.original_count,
+        "original_by_platform": index.original_by_platform,
+        "comment_count": index.comment_count,
+        "comment_by_platform": index.comment_by_platform,
+        "crawl_time": index.crawl_time,
+        "sources": [cursor.to_dict() for cursor in index.sources],
+        "config_stamp": list(index.config_stamp),
+        "brand_insights": [
+            {
+                "brand_id": ins.brand_id,
+                "brand_name": ins.brand_name,
+                "platforms": ins.platforms,
+                "top_models": ins.top_models,
+                "total": ins.total,
+                "pos": ins.pos,
+                "neg": ins.neg,
+                "neu": ins.neu,
+            }
+            for ins in index.brand_insights.values()
+        ],
+    }
+
+
+def _index_from_snapshot(snapshot: Snapshot) -> PhoneFeedbackIndex:
+    meta = snapshot.meta["index"]
+    insights = [BrandInsight(**ins) for ins in meta["brand_insights"]]
+    return PhoneFeedbackIndex(
+        platforms=meta["platforms"],
+        brands=meta["brands"],
+        models=meta["models"],
+        bilibili_sample_urls=meta["bilibili_sample_urls"],
+        original_count=meta["original_count"],
+        original_by_platform=meta["original_by_platform"],
+        comment_count=meta["comment_count"],
+        comment_by_platform=meta["comment_by_platform"],
+        crawl_time=meta["crawl_time"],
+        brand_insights={ins.brand_id: ins for ins in insights},
+        opinions=OpinionStore.from_snapshot(snapshot.meta["vocabs"], snapshot.arrays),
+        search=SearchIndex.from_snapshot(snapshot.arrays),
+        sources=[CsvCursor.from_dict(cursor) for cursor in meta["sources"]],
+        config_stamp=tuple(meta["config_stamp"]),
+    )
+
+
+def load_index(
+    snapshot_path: Optional[Path] = SNAPSHOT_PATH,
+    force_rebuild: bool = False,
+) -> PhoneFeedbackIndex:
+    """
+    启动入口：快照仍然有效时直接 mmap 加载，否则完整重建并写新快照
+    """
+    source_files = _collect_source_files()
+    if snapshot_path is not None and not force_rebuild:
+        index = _load_valid_snapshot(snapshot_path, source_files)
+        if index is not None:
+            return index
+    return build_index(source_files, snapshot_path=snapshot_path)
+
+
+def _load_valid_snapshot(
+    snapshot_path: Path,
+    source_files: List[Tuple[Path, str, Optional[bool]]],
+) -> Optional[PhoneFeedbackIndex]:
+    """快照存在且与当前源文件一致时 mmap 加载，否则返回 None"""
+    started = time.perf_counter()
+    snapshot = read_snapshot(snapshot_path)
+    if snapshot is None:
+        return None
+    if not fingerprint_matches(snapshot.meta["fingerprint"], _snapshot_inputs(source_files)):
+        logger.info("[STARTUP] 源数据已变化，索引快照失效，重新构建")
+        return None
+    try:
+        index = _index_from_snapshot(snapshot)
+    except (KeyError, TypeError) as e:
+        logger.warning("索引快照内容不完整，重新构建: %s", e)
+        return None
+    elapsed_ms = (time.perf_counter() - started) * 1000
     logger.info(
-        "[STARTUP] PhoneFeedbackIndex 就绪 ✅ | 总记录 %d, 原始内容 %d, 评论 %d",
-        total_records,
+        "[STARTUP] 从快照加载索引 ✅ | 总记录 %d, 原始内容 %d, 评论 %d, 耗时 %.1f ms",
+        len(index.opinions),
         index.original_count,
         index.comment_count,
+        elapsed_ms,
     )
+    index.load_report = {"source": "snapshot", "total_ms": round(elapsed_ms, 1)}
+    _attach_opinion_db(index)
+    return index
+
+
+# ========================
+# 多 worker 共享索引
+# ========================
+
+# PHONE_INDEX_SHARED=1：多个 worker 共用一份 mmap 的索引快照，只有一个 loader 读 CSV、建索引、
+# 做热更新（见 shared_index.py）；需要索引快照（PHONE_INDEX_SNAPSHOT 不能是 off）和 flock（Unix）
+SHARED_ENABLED = os.environ.get("PHONE_INDEX_SHARED", "").strip().lower() in {
+    "1",
+    "true",
+    "yes",
+    "on",
+}
+# follower 检查计数器的间隔（秒），每次只是读一下内存
+SHARED_POLL_INTERVAL = max(float(os.environ.get("PHONE_INDEX_SHARED_POLL", "1") or 1), 0.1)
+
+
+def _shared_index() -> Optional[shared_index.SharedIndex]:
+    if not SHARED_ENABLED:
+        return None
+    if SNAPSHOT_PATH is None:
+        logger.warning("PHONE_INDEX_SHARED=1 需要索引快照（PHONE_INDEX_SNAPSHOT=off 时不可用），每个 worker 各建一份索引")
+        return None
+    if not shared_index.AVAILABLE:
+        logger.warning("当前平台没有 flock，PHONE_INDEX_SHARED=1 不可用，每个 worker 各建一份索引")
+        return None
+    return shared_index.SharedIndex(SNAPSHOT_PATH)
+
+
+SHARED_INDEX = _shared_index()
+
+
+def _map_shared(shared: shared_index.SharedIndex) -> Optional[PhoneFeedbackIndex]:
+    """映射 loader 发布的快照（不建 SQLite 评论库）；还没有可读的快照时返回 None"""
+    snapshot = shared.attach()
+    if snapshot is None:
+        return None
+    try:
+        index = _index_from_snapshot(snapshot)
+    except (KeyError, TypeError) as e:
+        logger.warning("共享索引快照内容不完整: %s", e)
+        return None
+    index.generation = shared.attached
+    return index
+
 
+def _follow_shared(shared: shared_index.SharedIndex) -> Optional[PhoneFeedbackIndex]:
+    """follower：映射最新一代的快照"""
+    started = time.perf_counter()
+    index = _map_shared(shared)
+    if index is None:
+        return None
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    index.load_report = {"source": "shared", "total_ms": round(elapsed_ms, 1)}
+    _attach_opinion_db(index)
+    logger.info(
+        "[SHARED] 映射第 %d 代共享索引 ✅ | 总记录 %d, 耗时 %.1f ms",
+        index.generation,
+        len(index.opinions),
+        elapsed_ms,
+    )
     return index
 
 
+def _publish_shared(
+    shared: shared_index.SharedIndex,
+    index: PhoneFeedbackIndex,
+    source_files: List[Tuple[Path, str, Optional[bool]]],
+) -> PhoneFeedbackIndex:
+    """
+    loader：把刚建好的一代写成快照并发布，本进程也换成映射快照得到的那份，
+    私有的列数组随之释放，loader 和 follower 一样只占页缓存。写快照失败时不发布，继续用私有的 index
+    """
+    index.generation = shared.next_generation()
+    if not _save_snapshot(index, source_files, shared.snapshot_path):
+        return index
+    shared.publish(index.generation)
+    mapped = _map_shared(shared)
+    if mapped is None:
+        return index
+    mapped.loaded_at = index.loaded_at
+    mapped.load_report = dict(index.load_report, shared="loader")
+    if index.opinion_db is not None:
+        # 内容完全相同，库里的行号照用；换成映射的 store，私有的那份才能释放
+        index.opinion_db.store = mapped.opinions
+        mapped.opinion_db = index.opinion_db
+    logger.info("[SHARED] 第 %d 代共享索引已发布: %s", mapped.generation, shared.snapshot_path)
+    return mapped
+
+
+def load_shared_index(shared: shared_index.SharedIndex) -> PhoneFeedbackIndex:
+    """
+    共享模式的启动入口：抢到锁的进程是 loader，快照仍然有效就直接用，否则建索引，然后发布新一代；
+    其余进程等到有可读的快照就映射，等待期间 loader 退出了就自己接手
+    """
+    waiting = False
+    while True:
+        if shared.try_become_loader():
+            logger.info("[SHARED] 本进程（pid %d）是 loader", os.getpid())
+            source_files = _collect_source_files()
+            index = _load_valid_snapshot(shared.snapshot_path, source_files)
+            if index is None:
+                return _publish_shared(shared, build_index(source_files), source_files)
+            # 快照已经在盘上，只需发布代数
+            index.generation = shared.next_generation()
+            shared.publish(index.generation)
+            return index
+        index = _follow_shared(shared)
+        if index is not None:
+            return index
+        if not waiting:
+            logger.info("[SHARED] 等待 loader 写出索引快照: %s", shared.snapshot_path)
+            waiting = True
+        time.sleep(SHARED_POLL_INTERVAL)
+
+
+# ========================
+# 热更新
+# ========================
+
+# 检查源 CSV 是否有新数据的间隔（秒），设为 0 关闭后台热更新
+RELOAD_INTERVAL = float(os.environ.get("PHONE_INDEX_RELOAD_INTERVAL", "30") or 0)
+# POST /admin/index/reload 要求请求头 X-Admin-Token 等于这个值；不设置时该接口关闭（404）
+ADMIN_TOKEN = os.environ.get("PHONE_INDEX_ADMIN_TOKEN", "").strip()
+
+
+def refresh_index(
+    index: PhoneFeedbackIndex,
+    snapshot_path: Optional[Path] = SNAPSHOT_PATH,
+) -> Optional[PhoneFeedbackIndex]:
+    """
+    检查源 CSV 的变化，返回新一代索引（没有变化时返回 None）：
+    - 只有追加：从每个文件上次读到的字节偏移开始解析新增的尾部，
+      与当前 store 合并后重新计算统计；
+    - 源文件增减 / 文件被重写 / config.py 改过：整体重建。
+    传入的 index 不会被修改（读请求可能正在用它），由调用方发布新索引。
+    """
+    source_files = _collect_source_files()
+    generation = index.generation + 1
+
+    rebuild_reason = None
+    tails: List[Tuple[List[Dict], CsvCursor]] = []
+    if [path for path, _, _ in source_files] != [cursor.path for cursor in index.sources]:
+        rebuild_reason = "源文件列表变化"
+    elif _config_stamp() != index.config_stamp:
+        rebuild_reason = "config.py 已修改"
+        load_model_catalog.cache_clear()
+    else:
+        for cursor in index.sources:
+            tail = read_csv_tail(cursor)
+            if tail is None:
+                rebuild_reason = f"{cursor.path.name} 被重写"
+                break
+            tails.append(tail)
+
+    if rebuild_reason is not None:
+        logger.info("[RELOAD] %s，整体重建索引", rebuild_reason)
+        new_index = build_index(source_files, snapshot_path=snapshot_path)
+        new_index.generation = generation
+        return new_index
+
+    if not any(rows for rows, _ in tails):
+        return None
+
+    started = time.perf_counter()
+    builder = OpinionStoreBuilder(base=index.opinions)
+    bilibili_urls = list(index.bilibili_sample_urls)
+    added = 0
+    for file_idx, ((_, platform, force_is_comment), old_cursor, (raw_rows, _)) in enumerate(
+        zip(source_files, index.sources, tails)
+    ):
+        rows = _clean_csv_rows(raw_rows, platform, force_is_comment, source=old_cursor.path.name)
+        _add_rows(builder, rows, file_idx, old_cursor.rows, bilibili_urls)
+        added += len(rows)
+
+    new_index = PhoneFeedbackIndex(
+        platforms=dict(index.platforms),
+        generation=generation,
+        sources=[cursor for _, cursor in tails],
+        config_stamp=index.config_stamp,
+    )
+    _finalize_index(new_index, builder.build(), source_files, bilibili_urls, previous=index)
+    _attach_opinion_db(new_index)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    logger.info(
+        "[RELOAD] 第 %d 代索引就绪 ✅ | 新增 %d 条, 总记录 %d, 耗时 %.0f ms",
+        generation,
+        added,
+        len(new_index.opinions),
+        elapsed_ms,
+    )
+    new_index.load_report = {"source": "tail", "rows": added, "total_ms": round(elapsed_ms, 1)}
+
+    if snapshot_path is not None:
+        _save_snapshot(new_index, source_files, snapshot_path)
+    return new_index
+
+
+def _next_index(index: PhoneFeedbackIndex) -> Optional[PhoneFeedbackIndex]:
+    """
+    热更新检查一次，返回新一代索引（没有变化时返回 None）。
+    共享模式下只有 loader 读源 CSV（refresh_index）并发布；follower 只看计数器，
+    代数变了就映射新快照，顺便试一下锁：loader 退出了就接手，下一轮起由它负责热更新
+    """
+    shared = SHARED_INDEX
+    if shared is None:
+        return refresh_index(index)
+    if not shared.is_loader and shared.try_become_loader():
+        logger.info("[SHARED] 原 loader 已退出，本进程（pid %d）接手", os.getpid())
+    if shared.changed():
+        return _follow_shared(shared)
+    if not shared.is_loader:
+        return None
+    new_index = refresh_index(index, snapshot_path=None)
+    if new_index is None:
+        return None
+    return _publish_shared(shared, new_index, _collect_source_files())
+
+
+class IndexReloader:
+    """
+    后台线程定期调用 refresh_index，有新一代索引时整体替换全局 INDEX。
+    读请求只在开头取一次 INDEX 的引用，替换是一次赋值，不需要加锁、不会被阻塞；
+    锁只用来保证同一时刻只有一个线程在构建新索引。
+    """
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.reload_count = 0
+        self.last_check_at = ""
+        self.last_reload_at = ""
+        self.last_reload_ms = 0.0
+        self.last_error = ""
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def check(self) -> bool:
+        """检查一次，发布了新索引返回 True"""
+        global INDEX
+        with self._lock:
+            started = time.perf_counter()
+            self.last_check_at = datetime.now().isoformat(timespec="seconds")
+            try:
+                new_index = _next_index(INDEX)
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                logger.exception("[RELOAD] 热更新失败，继续使用第 %d 代索引", INDEX.generation)
+                return False
+            if new_index is None:
+                return False
+            INDEX = new_index
+            self.reload_count += 1
+            self.last_reload_at = new_index.loaded_at
+            self.last_reload_ms = (time.perf_counter() - started) * 1000
+            self.last_error = ""
+            return True
+
+    def _interval(self) -> float:
+        """共享模式的 follower 只检查计数器，按 SHARED_POLL_INTERVAL 轮询；其余情况按 interval"""
+        if SHARED_INDEX is not None and not SHARED_INDEX.is_loader:
+            return SHARED_POLL_INTERVAL
+        return self.interval
+
+    def _run(self) -> None:
+        while True:
+            interval = self._interval()
+            if interval <= 0 or self._stop.wait(interval):
+                return
+            self.check()
+
+    def start(self) -> None:
+        if self._interval() <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="index-reloader", daemon=True)
+        self._thread.start()
+        logger.info("[RELOAD] 源数据热更新已开启，每 %g 秒检查一次", self._interval())
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def status(self) -> Dict:
+        return {
+            "enabled": self._thread is not None,
+            "interval_s": self.interval,
+            "reload_count": self.reload_count,
+            "last_check_at": self.last_check_at,
+            "last_reload_at": self.last_reload_at,
+            "last_reload_ms": round(self.last_reload_ms, 1),
+            "last_error": self.last_error,
+        }
+
+
 # ========================
 # FastAPI
 # ========================
 
-app = FastAPI(title="Phone & Robot Sentiment API", version="3.0")
+RELOADER = IndexReloader(RELOAD_INTERVAL)
+
+
+@asynccontextmanager
+async def _lifespan(_app: FastAPI):
+    RELOADER.start()
+    try:
+        yield
+    finally:
+        RELOADER.stop()
+
+
+app = FastAPI(title="Phone & Robot Sentiment API", version="3.0", lifespan=_lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -945,6 +1703,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Total-Count", "X-Next-Cursor"],
 )
 
 # 挂载静态文件目录（前端文件）
@@ -953,7 +1712,7 @@ FRONTEND_DIR = ROOT_DIR / "netlify-deploy"
 if FRONTEND_DIR.exists():
     app.mount("/static", StaticFiles(directory=str(FRONTEND_DIR)), name="static")
 
-INDEX = build_index()
+INDEX = load_index() if SHARED_INDEX is None else load_shared_index(SHARED_INDEX)
 
 
 # 首页：返回静态 index.html（如果存在）
@@ -976,10 +1735,27 @@ async def read_frontend():
 
 class CopilotQuery(BaseModel):
     question: str
+    top_k: int = Field(5, ge=1, le=50, description="返回的相关评论条数")
+
+
+class CopilotHit(BaseModel):
+    """检索命中的一条评论 / 原文"""
+    score: float
+    published_at: str
+    platform: str
+    brand_id: str
+    model: str
+    sentiment: str
+    snippet: str
 
 
 class CopilotResponse(BaseModel):
     answer: str
+    hits: List[CopilotHit] = []
+    # 所有命中行按品牌 / 平台 / 情感的计数，按条数降序
+    facets: Dict[str, Dict[str, int]] = {}
+    matched: int = 0
+    took_ms: float = 0.0
 
 
 # ========================
@@ -1023,23 +1799,131 @@ class BrandsOnlyResponse(BaseModel):
     brands: List[BrandOverviewRow]
 
 
+@app.get("/admin/index")
+def get_index_status():
+    """
+    索引热更新状态：当前第几代、行数、各源文件读到的位置、最近一次热更新的时间和耗时
+    """
+    index = INDEX
+    return {
+        "generation": index.generation,
+        "loaded_at": index.loaded_at,
+        "rows": {
+            "total": len(index.opinions),
+            "original": index.original_count,
+            "comment": index.comment_count,
+        },
+        "sources": [
+            {"file": cursor.path.name, "rows": cursor.rows, "offset": cursor.offset}
+            for cursor in index.sources
+        ],
+        "load": index.load_report,
+        "dates": DATE_NORMALIZER.stats(),
+        "search": index.search.stats(),
+        "opinions": index.opinion_db.stats() if index.opinion_db is not None else {"engine": "memory"},
+        "reloader": RELOADER.status(),
+        "shared": SHARED_INDEX.status() if SHARED_INDEX is not None else {"enabled": False},
+    }
+
+
+@app.post("/admin/index/reload")
+def reload_index(x_admin_token: Optional[str] = Header(None)):
+    """
+    立即检查一次源数据（不等后台线程的下一轮）。
+    会触发重建索引，只在设置了 PHONE_INDEX_ADMIN_TOKEN 时开放，且请求头 X-Admin-Token 必须与之一致
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="管理口令无效")
+    reloaded = RELOADER.check()
+    return {"reloaded": reloaded, "generation": INDEX.generation}
+
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
 
+def _encode_json(content: Any) -> bytes:
+    """与 FastAPI 默认 JSONResponse 相同的编码方式"""
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 比较（弱比较：忽略 W/ 前缀），支持逗号分隔的多个值和 *"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def _cached_json_response(
+    request: Request,
+    index: PhoneFeedbackIndex,
+    key: str,
+    build: Callable[[PhoneFeedbackIndex], Any],
+) -> Response:
+    """
+    统计类接口的响应缓存：每个索引只序列化一次，之后直接返回编码好的字节；
+    客户端带 If-None-Match 且 ETag 未变时返回 304
+    """
+    payload = index.encoded_payloads.get(key)
+    if payload is None:
+        body = _encode_json(build(index))
+        payload = EncodedPayload(body=body, etag=f'"{hashlib.sha1(body).hexdigest()}"')
+        index.encoded_payloads[key] = payload
+
+    headers = {"ETag": payload.etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), payload.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
+
 @app.get("/stats")
-def get_stats():
-    return INDEX.stats_payload
+def get_stats(request: Request):
+    return _cached_json_response(request, INDEX, "stats", lambda idx: idx.stats_payload)
 
 
 @app.get("/insights")
-def get_insights():
-    return INDEX.insights_payload
+def get_insights(request: Request):
+    return _cached_json_response(request, INDEX, "insights", lambda idx: idx.insights_payload)
+
+
+def _encode_cursor(key: Tuple[int, int]) -> str:
+    """(day, seq) -> 不透明的游标字符串"""
+    raw = f"{key[0]}:{key[1]}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[int, int]:
+    """游标字符串 -> (day, seq)；不是 _encode_cursor 产生的（解不开、或取值超出 int32 天数 / 非负 int64 序号）返回 400"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("ascii")
+        day, seq = (int(part) for part in raw.split(":"))
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="cursor 无效")
+    if not (-(1 << 31) <= day < (1 << 31) and 0 <= seq < (1 << 63)):
+        raise HTTPException(status_code=400, detail="cursor 无效")
+    return day, seq
 
 
 @app.get("/opinions")
 def get_opinions(
+    response: Response,
     brand_id: str = Query(..., description="品牌 ID，与 /insights 中的 brand_id 一致"),
     platform: Optional[str] = Query(
         None, description="可选平台过滤：bilibili / gsmarena / reddit / all（all 或 None 表示不过滤）"
@@ -1050,121 +1934,109 @@ def get_opinions(
     year: Optional[int] = Query(None, description="年份过滤（如 2025），需要同时提供月份才生效"),
     month: Optional[int] = Query(None, ge=1, le=12, description="月份过滤（1-12），需要同时提供年份才生效"),
     limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(
+        None, description="翻页游标：上一页响应头 X-Next-Cursor 的值，不传表示第一页"
+    ),
+    q: Optional[str] = Query(
+        None, description="全文检索：空格分隔的多个词，评论原文全部包含（子串匹配，忽略大小写）才返回"
+    ),
 ):
     """
-    获取品牌评论明细，支持平台、型号和年月筛选
+    获取品牌评论明细，支持平台、型号、年月筛选和全文检索（q）
+    翻页：响应头 X-Total-Count 为该筛选条件下的总条数，
+    X-Next-Cursor 为下一页游标（没有下一页时不返回）
     """
-    rows = INDEX.opinions_by_brand.get(brand_id, [])
-
-    if platform and platform.lower() != "all":
-        rows = [r for r in rows if r.platform == platform.lower()]
-
-    if model and model.strip():
-        model_lower = model.lower().strip()
-        filtered = []
-        for r in rows:
-            row_model = r.model
-            if row_model:
-                row_model_lower = str(row_model).lower().strip()
-                if (
-                    row_model_lower == model_lower
-                    or model_lower in row_model_lower
-                    or row_model_lower in model_lower
-                ):
-                    filtered.append(r)
-        rows = filtered
-
-    if year is not None and month is not None:
-        filtered = []
-        for r in rows:
-            date_str = r.published_at
-            if date_str and len(date_str) >= 7:
-                try:
-                    date_parts = date_str.split("-")
-                    if len(date_parts) >= 2:
-                        row_year = int(date_parts[0])
-                        row_month = int(date_parts[1])
-                        if row_year == year and row_month == month:
-                            filtered.append(r)
-                except (ValueError, IndexError):
-                    continue
-        rows = filtered
-    elif year is not None:
-        filtered = []
-        for r in rows:
-            date_str = r.published_at
-            if date_str and len(date_str) >= 4:
-                try:
-                    row_year = int(date_str[:4])
-                    if row_year == year:
-                        filtered.append(r)
-                except (ValueError, IndexError):
-                    continue
-        rows = filtered
-
-    def get_sort_key(r: OpinionRow) -> str:
-        date_str = r.published_at or ""
-        if len(date_str) >= 10:
-            return date_str[:10]
-        return "0000-01-01"
-
-    rows.sort(key=get_sort_key, reverse=True)
-
-    sliced = rows[:limit]
-
-    return [
-        {
-            "published_at": (
-                r.published_at[:10]
-                if r.published_at and len(r.published_at) >= 10
-                else r.published_at
-            ),
-            "platform": r.platform,
-            "brand_id": r.brand_id,
-            "model": r.model or "",
-            "sentiment": r.sentiment,
-            "raw_text": r.raw_text,
+    if platform and platform.lower() == "all":
+        platform = None
+    if year is None:
+        month = None
+
+    index = INDEX
+    filters = dict(
+        platform=platform.lower() if platform else None,
+        model=model if model and model.strip() else None,
+        year=year,
+        month=month,
+        terms=query_terms(q),
+    )
+    after = _decode_cursor(cursor) if cursor else None
+    if index.opinion_db is not None:
+        records, total, next_key = index.opinion_db.query(brand_id, after=after, limit=limit, **filters)
+    else:
+        store = index.opinions
+        rows = store.select(brand_id, **filters)
+        page_rows, next_key = store.page(rows, after, limit)
+        records, total = store.records(page_rows), len(rows)
+
+    response.headers["X-Total-Count"] = str(total)
+    if next_key is not None:
+        response.headers["X-Next-Cursor"] = _encode_cursor(next_key)
+    return records
+
+
+def _search_facets(store: OpinionStore, rows: np.ndarray) -> Dict[str, Dict[str, int]]:
+    """命中行按品牌 / 平台 / 情感计数"""
+    facets: Dict[str, Dict[str, int]] = {}
+    for name, codes, vocab in (
+        ("brand", store.brand, store.brand_ids.values),
+        ("platform", store.platform, store.platforms.values),
+        ("sentiment", store.sentiment, SENTIMENTS),
+    ):
+        counts = np.bincount(codes[rows].astype(np.int64), minlength=len(vocab))
+        facets[name] = {
+            vocab[code]: int(counts[code])
+            for code in np.argsort(-counts, kind="stable")
+            if counts[code]
         }
-        for r in sliced
-    ]
+    return facets
 
 
 @app.post("/copilot", response_model=CopilotResponse)
 def copilot(query: CopilotQuery):
     """
-    智能分析助手（占位实现）
-    暂时不调用外部大模型，基于规则返回统计信息
+    智能分析助手：对全部已索引的评论 / 原文做 BM25 检索，
+    返回最相关的 top_k 条摘要 + 命中结果的品牌 / 平台 / 情感分面
+    问题里提到了品牌时只在这些品牌的数据里检索（没有命中再放宽到全部品牌）
+    暂时不调用外部大模型
     """
     q = query.question.strip()
     if not q:
         raise HTTPException(status_code=400, detail="问题不能为空")
 
+    started = time.perf_counter()
     q_lower = q.lower()
+    index = INDEX  # 整个请求使用同一代索引
+    store = index.opinions
 
-    detected_brands = []
-    brand_keywords = {
-        "apple": ["apple", "iphone", "苹果"],
-        "xiaomi": ["xiaomi", "小米", "redmi", "红米"],
-        "huawei": ["huawei", "华为", "honor", "荣耀"],
-        "samsung": ["samsung", "三星", "galaxy"],
-        "vivo": ["vivo"],
-        "oppo": ["oppo"],
-    }
+    detected_brands = list(dict.fromkeys(get_model_catalog().resolver.mentions(q_lower)))
 
-    for brand_id, keywords in brand_keywords.items():
-        for keyword in keywords:
-            if keyword in q_lower:
-                detected_brands.append(brand_id)
-                break
+    allowed = None
+    brand_codes = [
+        code for code in (store.brand_ids.lookup(b) for b in detected_brands) if code is not None
+    ]
+    if brand_codes:
+        allowed = np.isin(store.brand, brand_codes)
+    result = index.search.search(q, top_k=query.top_k, allowed=allowed)
+    if allowed is not None and not len(result.matched):
+        result = index.search.search(q, top_k=query.top_k)
+
+    hits: List[CopilotHit] = []
+    for score, record in zip(result.scores, store.records(result.rows)):
+        text = record.pop("raw_text")
+        hits.append(
+            CopilotHit(score=round(float(score), 4), snippet=snippet(text, result.terms), **record)
+        )
 
     answer_parts: List[str] = []
-    answer_parts.append("【规则分析结果】当前为占位实现，不调用外部大模型。\n")
+    answer_parts.append(
+        f"【检索结果】基于 BM25 检索 {len(store)} 条已索引的评论 / 原文，不调用外部大模型。\n"
+    )
 
     if detected_brands:
-        answer_parts.append(f"\n检测到品牌：{', '.join(set(detected_brands))}\n")
+        answer_parts.append(f"\n检测到品牌：{', '.join(detected_brands)}\n")
 
-        for brand_id in set(detected_brands):
-            insight = INDEX.brand_insights.get(brand_id)
+        for brand_id in detected_brands:
+            insight = index.brand_insights.get(brand_id)
             if insight:
                 answer_parts.append(
                     f"\n**{insight.brand_name}**：\n"
@@ -1175,21 +2047,36 @@ def copilot(query: CopilotQuery):
                 )
     else:
         answer_parts.append("\n当前已抓取数据概览：\n")
-        answer_parts.append(f"- 品牌数量：{len(INDEX.brands)}\n")
-        answer_parts.append(f"- 评论总数：{INDEX.comment_count}\n")
-        answer_parts.append(f"- 原始内容：{INDEX.original_count}\n")
+        answer_parts.append(f"- 品牌数量：{len(index.brands)}\n")
+        answer_parts.append(f"- 评论总数：{index.comment_count}\n")
+        answer_parts.append(f"- 原始内容：{index.original_count}\n")
         answer_parts.append(
             "- 覆盖平台："
-            + ", ".join([p["name"] for p in INDEX.stats_payload["platforms"]])
+            + ", ".join([p["name"] for p in index.stats_payload["platforms"]])
             + "\n"
         )
 
+    if hits:
+        answer_parts.append(f"\n相关内容（共命中 {len(result.matched)} 条，按相关度取前 {len(hits)} 条）：\n")
+        for i, hit in enumerate(hits, 1):
+            answer_parts.append(
+                f"{i}. [{hit.platform} / {hit.brand_id} / {hit.sentiment}] {hit.snippet}\n"
+            )
+    else:
+        answer_parts.append("\n没有检索到与问题相关的评论。\n")
+
     answer_parts.append(
         "\n---\n"
-        "提示：基础链路已就绪，等数据验证通过后，可在此接口中接入真实的大模型调用逻辑。"
+        "提示：检索链路已就绪，可在此接口中把命中的评论作为上下文接入真实的大模型调用逻辑。"
     )
 
-    return CopilotResponse(answer="\n".join(answer_parts))
+    return CopilotResponse(
+        answer="\n".join(answer_parts),
+        hits=hits,
+        facets=_search_facets(store, result.matched),
+        matched=len(result.matched),
+        took_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
 
 
 # ========================
@@ -1235,32 +2122,28 @@ def _build_brand_overview_rows(index: PhoneFeedbackIndex) -> List[BrandOverviewR
     return brand_rows
 
 
-@app.get("/api/v1/metrics/overview", response_model=BrandOverviewResponse)
-def get_metrics_overview():
-    """
-    获取完整的概览统计和品牌列表
-    """
+def _build_metrics_overview(index: PhoneFeedbackIndex) -> BrandOverviewResponse:
     # 构建概览指标
     # 过滤掉 "other" 和 "unknown" 品牌
     valid_brand_count = len([
-        bid for bid in INDEX.brand_insights.keys()
+        bid for bid in index.brand_insights.keys()
         if bid not in ["other", "unknown", ""]
-        and INDEX.brand_insights[bid].brand_name not in ["Other", "other", "未知", "unknown"]
+        and index.brand_insights[bid].brand_name not in ["Other", "other", "未知", "unknown"]
     ])
     
     overview = OverviewMetrics(
-        platform_count=len(INDEX.platforms),
+        platform_count=len(index.platforms),
         brand_count=valid_brand_count,
-        model_count=len(INDEX.models),
-        original_count=INDEX.original_count,
-        comment_count=INDEX.comment_count,
-        original_by_platform=INDEX.original_by_platform,
-        comment_by_platform=INDEX.comment_by_platform,
-        crawl_time=INDEX.crawl_time,
+        model_count=len(index.models),
+        original_count=index.original_count,
+        comment_count=index.comment_count,
+        original_by_platform=index.original_by_platform,
+        comment_by_platform=index.comment_by_platform,
+        crawl_time=index.crawl_time,
     )
     
     # 构建品牌列表
-    brands = _build_brand_overview_rows(INDEX)
+    brands = _build_brand_overview_rows(index)
     
     return BrandOverviewResponse(
         overview=overview,
@@ -1268,18 +2151,57 @@ def get_metrics_overview():
     )
 
 
+@app.get("/api/v1/metrics/overview", response_model=BrandOverviewResponse)
+def get_metrics_overview(request: Request):
+    """
+    获取完整的概览统计和品牌列表
+    """
+    return _cached_json_response(
+        request,
+        INDEX,
+        "metrics_overview",
+        lambda idx: _build_metrics_overview(idx).model_dump(mode="json"),
+    )
+
+
 @app.get("/api/v1/metrics/brands", response_model=BrandsOnlyResponse)
-def get_metrics_brands():
+def get_metrics_brands(request: Request):
     """
     仅获取品牌列表（不包含概览统计）
     """
-    brands = _build_brand_overview_rows(INDEX)
-    return BrandsOnlyResponse(brands=brands)
+    return _cached_json_response(
+        request,
+        INDEX,
+        "metrics_brands",
+        lambda idx: BrandsOnlyResponse(brands=_build_brand_overview_rows(idx)).model_dump(mode="json"),
+    )
 
 
 # 本地调试用：在 Global_Phone_Sentiment 目录下运行：
 #   python main.py
+# 构建阶段预生成索引快照（render.yaml 的 buildCommand 里调用）：
+#   python Global_Phone_Sentiment/main.py --build-snapshot
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Phone & Robot Sentiment API")
+    parser.add_argument(
+        "--build-snapshot",
+        action="store_true",
+        help="确保索引快照已生成且与当前数据一致，然后退出（不启动服务）",
+    )
+    args = parser.parse_args()
+
+    if args.build_snapshot:
+        # 模块导入时 load_index() 已经在快照缺失 / 过期时重建并写盘，这里只确认结果
+        if SNAPSHOT_PATH is None:
+            parser.error("PHONE_INDEX_SNAPSHOT=off，快照已禁用")
+        if not SNAPSHOT_PATH.exists():
+            logger.error("索引快照生成失败: %s", SNAPSHOT_PATH)
+            sys.exit(1)
+        logger.info("索引快照就绪: %s", SNAPSHOT_PATH)
+        sys.exit(0)
+
     import uvicorn
 
     uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,409 @@
+"""
+model_catalog.py
+
+目标型号目录：把 config.py 里的 TARGET_MODELS / BRANDS 只解析一次，
+编译成只读的查找结构，供 main.py 里所有「是不是目标型号」的判断共用。
+
+提供三类索引：
+- 精确键索引：iphone_16_pro 这类标准化型号 ID；
+- 子串索引：兼容 "iphone_16" 与 "iphone_16_pro" 这种互相包含的模糊匹配；
+- 别名索引：TARGET_MODELS 里的搜索关键词（"iPhone 16 Pro"、"小米15"）-> 型号 ID，
+  由 BrandResolver 使用：机型名里认不出品牌时按型号反查（"K70 Pro" -> redmi_k70_pro -> xiaomi）。
+
+以及品牌解析器 BrandResolver（catalog.resolver）：任意原始写法
+（型号 ID、device_name、品牌字段、机型名）一次调用得到 (brand_id, brand_name, model_id)，
+main 的清洗、问答里的品牌识别和爬虫都用它，不再各自维护一套 if 链。
+（phone_index.extract_brand 只做分组展示，保留自己的显示名和 a35 / s23 这类粗规则，不走这里。）
+
+注意：
+- 以前每处理一行 CSV 都要 exec 一遍 config.py，冷启动大部分时间耗在这里；
+- 现在整个进程只加载一次（按 config.py 路径缓存），config.py 缺失时返回空目录，
+  调用方用 catalog.available 判断是否走兜底逻辑。
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
+from typing import Callable, Dict, FrozenSet, List, Mapping, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger("phone_feedback")
+
+# 默认的 config.py 位置（与本文件同目录）
+DEFAULT_CONFIG_PATH = Path(__file__).resolve().parent / "config.py"
+
+_SPACES_RE = re.compile(r"\s+")
+_COMPACT_RE = re.compile(r"[\s_\-]+")
+
+
+def normalize_alias(text: str) -> str:
+    """别名归一：小写 + 去首尾空格 + 连续空白压成一个空格"""
+    return _SPACES_RE.sub(" ", str(text or "").strip().lower())
+
+
+def compact_alias(text: str) -> str:
+    """紧凑形式：再去掉空格 / 下划线 / 连字符，"iPhone16 Pro" 与 "iphone_16_pro" 归为同一个"""
+    return _COMPACT_RE.sub("", str(text or "").lower())
+
+
+def _lookup_model(
+    text: str, target_keys: FrozenSet[str], aliases: Mapping[str, str]
+) -> Optional[str]:
+    """型号写法 -> 型号 ID：先看是不是型号 ID 本身，再查完整别名和紧凑别名"""
+    if not text:
+        return None
+    norm = normalize_alias(text)
+    if norm in target_keys:
+        return norm
+    return aliases.get(norm) or aliases.get(compact_alias(norm))
+
+
+# ========================
+# 品牌解析
+# ========================
+
+# 品牌 ID -> 显示名（/insights 等接口里的品牌名以这里为准）
+BRAND_NAMES: Mapping[str, str] = MappingProxyType(
+    {
+        "apple": "Apple",
+        "xiaomi": "Xiaomi",
+        "huawei": "Huawei",
+        "honor": "Honor",
+        "samsung": "Samsung",
+        "vivo": "Vivo",
+        "oppo": "OPPO",
+        "oneplus": "OnePlus",
+        "realme": "Realme",
+        "google": "Google",
+    }
+)
+
+# 内置别名：(别名, 品牌 ID, 是否允许出现在字符串中间)。
+# 只认开头的都是容易误伤的短词："mi" / "mate" / "pura" / "oppo"（"ultimate"、"opportunity"）
+BUILTIN_BRAND_ALIASES: Tuple[Tuple[str, str, bool], ...] = (
+    ("apple", "apple", True),
+    ("iphone", "apple", True),
+    ("苹果", "apple", True),
+    ("xiaomi", "xiaomi", True),
+    ("redmi", "xiaomi", True),
+    ("mi", "xiaomi", False),
+    ("小米", "xiaomi", True),
+    ("红米", "xiaomi", True),
+    ("huawei", "huawei", True),
+    ("mate", "huawei", False),
+    ("pura", "huawei", False),
+    ("华为", "huawei", True),
+    ("honor", "honor", True),
+    ("荣耀", "honor", True),
+    ("samsung", "samsung", True),
+    ("galaxy", "samsung", True),
+    ("三星", "samsung", True),
+    ("vivo", "vivo", True),
+    ("iqoo", "vivo", True),
+    ("oppo", "oppo", False),
+    ("oneplus", "oneplus", True),
+    ("一加", "oneplus", True),
+    ("realme", "realme", True),
+    ("pixel", "google", True),
+    ("google", "google", True),
+)
+
+# 解析结果缓存的条数（按原始字符串缓存，超过后整体清空）
+RESOLVER_MEMO_SIZE = 65536
+# ModelCatalog.matches_target 的 LRU 缓存条数
+MATCH_MEMO_SIZE = 65536
+
+
+class BrandMatch(NamedTuple):
+    brand_id: str
+    brand_name: str
+    model_id: Optional[str] = None  # 能对应到 TARGET_MODELS 里的型号时给出型号 ID
+
+
+class _PrefixTrie:
+    """别名前缀树：从某个位置开始，找最长的别名"""
+
+    def __init__(self) -> None:
+        self._children: List[Dict[str, int]] = [{}]
+        self._values: List[Optional[str]] = [None]
+
+    def insert(self, word: str, value: str) -> None:
+        """同一个别名登记多次时以第一次为准"""
+        node = 0
+        for ch in word:
+            nxt = self._children[node].get(ch)
+            if nxt is None:
+                nxt = len(self._children)
+                self._children[node][ch] = nxt
+                self._children.append({})
+                self._values.append(None)
+            node = nxt
+        if self._values[node] is None:
+            self._values[node] = value
+
+    def longest(self, text: str, start: int = 0, whole_word: bool = False) -> Optional[str]:
+        """whole_word=True 时别名后面不能紧跟英文字母（"oppo 12" 算，"opportunity" 不算）"""
+        children, values = self._children, self._values
+        node, found = 0, None
+        for i in range(start, len(text)):
+            node = children[node].get(text[i])
+            if node is None:
+                break
+            if values[node] is not None and (
+                not whole_word or i + 1 == len(text) or not _is_ascii_letter(text[i + 1])
+            ):
+                found = values[node]
+        return found
+
+
+def _is_ascii_letter(ch: str) -> bool:
+    return "a" <= ch <= "z" or "A" <= ch <= "Z"
+
+
+class BrandResolver:
+    """
+    品牌 / 型号解析，别名来自 BUILTIN_BRAND_ALIASES + config.BRANDS + TARGET_MODELS。
+    对原始字符串的小写紧凑形式（去掉空格 / 下划线 / 连字符）依次尝试：
+    1. 前缀树上最长的前缀别名（"iphone_16"、"Redmi K70"、"vivoiQOO 12"）；
+    2. 最早出现在字符串中间的别名（"AppleiPhone 16"、"SamsungGalaxy A55"），只认允许出现在中间的别名；
+    3. 按目标型号别名反查（"K70 Pro" -> redmi_k70_pro -> xiaomi）。
+    结果按原始字符串缓存。
+    """
+
+    def __init__(
+        self,
+        brands: Mapping[str, str] = MappingProxyType({}),
+        target_keys: FrozenSet[str] = frozenset(),
+        aliases: Mapping[str, str] = MappingProxyType({}),
+    ) -> None:
+        self.names: Dict[str, str] = dict(BRAND_NAMES)
+        self._target_keys = target_keys
+        self._aliases = aliases
+        self._prefix = _PrefixTrie()
+        self._anywhere = _PrefixTrie()
+
+        entries: List[Tuple[str, str, bool]] = list(BUILTIN_BRAND_ALIASES)
+        known = {compact_alias(alias) for alias, _, _ in entries}
+        # config.BRANDS：{"redmi": "Xiaomi", "iqoo": "vivo"}，显示名对应到已有品牌时沿用内置显示名；
+        # 内置表里已有的别名以内置表为准
+        for code, name in brands.items():
+            if compact_alias(code) in known:
+                continue
+            brand_id = compact_alias(name)
+            if brand_id not in self.names:
+                self.names[brand_id] = str(name)
+            entries.append((str(code), brand_id, len(code) >= 4))
+        self.aliases: Tuple[Tuple[str, str, bool], ...] = tuple(entries)
+        for alias, brand_id, anywhere in entries:
+            word = compact_alias(alias)
+            self._prefix.insert(word, brand_id)
+            if anywhere:
+                self._anywhere.insert(word, brand_id)
+
+        # 型号 ID -> 品牌（型号 ID 本身按前两步解析，如 mate_60 -> huawei）
+        self._model_brands: Dict[str, str] = {}
+        for key in target_keys:
+            brand_id = self._brand_of(compact_alias(key))
+            if brand_id is not None:
+                self._model_brands[key] = brand_id
+
+        self._memo: Dict[str, Optional[BrandMatch]] = {}
+
+    def _brand_of(self, compact: str) -> Optional[str]:
+        brand_id = self._prefix.longest(compact)
+        if brand_id is not None:
+            return brand_id
+        for start in range(1, len(compact)):
+            brand_id = self._anywhere.longest(compact, start)
+            if brand_id is not None:
+                return brand_id
+        return None
+
+    def resolve(self, raw: str) -> Optional[BrandMatch]:
+        """识别不出品牌时返回 None"""
+        if not raw:
+            return None
+        if raw in self._memo:
+            return self._memo[raw]
+
+        text = str(raw).strip()
+        model_id = _lookup_model(text, self._target_keys, self._aliases)
+        brand_id = self._brand_of(compact_alias(text))
+        if brand_id is None and model_id is not None:
+            brand_id = self._model_brands.get(model_id)
+        match = (
+            BrandMatch(brand_id, self.names.get(brand_id, brand_id), model_id)
+            if brand_id is not None
+            else None
+        )
+
+        if len(self._memo) >= RESOLVER_MEMO_SIZE:
+            self._memo.clear()
+        self._memo[raw] = match
+        return match
+
+    def normalize(self, raw: str) -> BrandMatch:
+        """
+        品牌字段的归一：识别得出就用解析结果，
+        识别不出时 ID 取小写去空格 / 下划线、显示名首字母大写（空值为 other / Other）
+        """
+        match = self.resolve(raw)
+        if match is not None:
+            return match
+        text = str(raw or "").strip()
+        brand_id = text.lower().replace(" ", "").replace("_", "")
+        return BrandMatch(brand_id or "other", text.capitalize() if text else "Other", None)
+
+    def mentions(self, text: str) -> List[str]:
+        """
+        文本（如用户提问）里提到的全部品牌，按别名表的顺序返回。
+        完整的英文单词可以匹配所有别名（"oppo"、"mi 14"），其余位置只认允许出现在中间的别名
+        """
+        lowered = str(text or "").lower()
+        found = set()
+        for start in range(len(lowered)):
+            brand_id = None
+            if start == 0 or not _is_ascii_letter(lowered[start - 1]):
+                brand_id = self._prefix.longest(lowered, start, whole_word=True)
+            if brand_id is None:
+                brand_id = self._anywhere.longest(lowered, start)
+            if brand_id is not None:
+                found.add(brand_id)
+        order: Dict[str, int] = {}
+        for _, brand_id, _ in self.aliases:
+            order.setdefault(brand_id, len(order))
+        return sorted(found, key=lambda b: order.get(b, len(order)))
+
+
+@dataclass(frozen=True)
+class ModelCatalog:
+    """只读的目标型号目录，构建后不再修改（匹配结果的 LRU 缓存除外）"""
+
+    target_keys: FrozenSet[str] = frozenset()
+    # 品牌前缀 -> 品牌显示名，保持 config.BRANDS 的定义顺序
+    brands: Mapping[str, str] = field(default_factory=lambda: MappingProxyType({}))
+    # 型号 ID -> 搜索关键词
+    keywords: Mapping[str, Tuple[str, ...]] = field(default_factory=lambda: MappingProxyType({}))
+    # 归一化别名（含紧凑形式）-> 型号 ID
+    aliases: Mapping[str, str] = field(default_factory=lambda: MappingProxyType({}))
+    # 所有型号 ID 的全部子串，用来 O(1) 判断 "model in target_key"
+    key_substrings: FrozenSet[str] = frozenset()
+    source: str = ""
+    # 品牌解析器（config 缺失时只有内置别名）
+    resolver: BrandResolver = field(default_factory=BrandResolver, compare=False, repr=False)
+
+    # matches_target 的 LRU 缓存，__post_init__ 里绑定
+    _match: Callable[[str], bool] = field(init=False, compare=False, repr=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_match", lru_cache(maxsize=MATCH_MEMO_SIZE)(self._matches_target))
+
+    @property
+    def available(self) -> bool:
+        """config.py 是否加载成功（空目录时调用方应走兜底逻辑）"""
+        return bool(self.target_keys)
+
+    def is_target_key(self, model_lower: str) -> bool:
+        """精确匹配：已经小写化的型号 ID 是否就是某个目标型号"""
+        return model_lower in self.target_keys
+
+    def matches_target(self, model_lower: str) -> bool:
+        """
+        模糊匹配，与原先的判断完全一致：
+            target_key == model or target_key in model or model in target_key
+        """
+        return self._match(model_lower)
+
+    def _matches_target(self, model_lower: str) -> bool:
+        return model_lower in self.key_substrings or any(key in model_lower for key in self.target_keys)
+
+
+def compile_catalog(
+    target_models: Mapping[str, object],
+    brands: Mapping[str, str],
+    source: str = "",
+) -> ModelCatalog:
+    """把 TARGET_MODELS / BRANDS 编译成 ModelCatalog"""
+    target_keys = frozenset(str(k).strip().lower() for k in target_models.keys() if k)
+
+    keywords: Dict[str, Tuple[str, ...]] = {}
+    aliases: Dict[str, str] = {}
+    for key, words in target_models.items():
+        key_lower = str(key).strip().lower()
+        if not key_lower:
+            continue
+        if isinstance(words, str):
+            words = [words]
+        keywords[key_lower] = tuple(str(w) for w in (words or []))
+        aliases.setdefault(compact_alias(key_lower), key_lower)
+        # 先登记完整别名，同名冲突时以 config 里先出现的型号为准
+        for w in keywords[key_lower]:
+            aliases.setdefault(normalize_alias(w), key_lower)
+            aliases.setdefault(compact_alias(w), key_lower)
+    aliases.pop("", None)
+
+    key_substrings = frozenset(
+        key[i:j]
+        for key in target_keys
+        for i in range(len(key))
+        for j in range(i + 1, len(key) + 1)
+    ) | {""}
+
+    brand_map = MappingProxyType({str(k).lower(): str(v) for k, v in brands.items()})
+    alias_map = MappingProxyType(aliases)
+    return ModelCatalog(
+        target_keys=target_keys,
+        brands=brand_map,
+        keywords=MappingProxyType(keywords),
+        aliases=alias_map,
+        key_substrings=key_substrings,
+        source=source,
+        resolver=BrandResolver(brand_map, target_keys, alias_map),
+    )
+
+
+@lru_cache(maxsize=None)
+def load_model_catalog(config_path: Path = DEFAULT_CONFIG_PATH) -> ModelCatalog:
+    """
+    执行一次 config.py 并编译目录，同一路径在进程内只加载一次。
+    config.py 不存在或执行失败时返回空目录。
+    """
+    started = time.perf_counter()
+    path = Path(config_path)
+    if not path.exists():
+        logger.warning("目标型号配置不存在: %s，使用空目录", path)
+        return ModelCatalog(source=str(path))
+
+    try:
+        spec = importlib.util.spec_from_file_location("config", path)
+        if spec is None or spec.loader is None:
+            raise ImportError(f"无法从 {path} 创建模块加载 spec")
+        config_module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(config_module)
+        catalog = compile_catalog(
+            getattr(config_module, "TARGET_MODELS", {}),
+            getattr(config_module, "BRANDS", {}),
+            source=str(path),
+        )
+    except Exception as e:
+        logger.warning("加载目标型号配置失败: %s: %s", path, e)
+        return ModelCatalog(source=str(path))
+
+    logger.info(
+        "[STARTUP] 目标型号目录编译完成：%d 个型号，%d 个别名，耗时 %.1f ms",
+        len(catalog.target_keys),
+        len(catalog.aliases),
+        (time.perf_counter() - started) * 1000,
+    )
+    return catalog
+
+
+def get_model_catalog() -> ModelCatalog:
+    """返回默认 config.py 对应的目录（进程内共享）"""
+    return load_model_catalog(DEFAULT_CONFIG_PATH)
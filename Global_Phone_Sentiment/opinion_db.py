@@ -0,0 +1,315 @@
+"""
+opinion_db.py
+
+/opinions 可选的 SQLite 存储引擎（main.py 里 PHONE_INDEX_OPINION_ENGINE=sqlite 开启）：
+每一代索引建好后，把 OpinionStore 里的评论行写进一个本地 SQLite 文件，
+筛选、计数、全文检索和取页都交给 SQLite：
+- 表 opinions 的主键 row 就是 store 的行号（已按「日期倒序，同一天按 seq」排好），
+  ORDER BY row 即展示顺序，keyset 翻页的游标 (day, seq) 与内存引擎通用；
+- (brand_id, published_at) / (brand_id, platform) / (brand_id, model) 三个索引，
+  加上索引里隐含的 rowid，筛选和计数只读索引、不回表；
+- FTS5 外部内容表 opinions_fts 建在 raw_text 上，trigram 分词：中英文都按子串匹配，
+  不需要分词词典；不足 3 个字的检索词 trigram 查不了，改成逐行比较；
+- 连接按线程复用（ConnectionPool）：FastAPI 的同步接口跑在线程池里，每个线程一个只读连接，
+  sqlite3 执行 SQL 时释放 GIL，并发查询互不阻塞。
+
+库文件写在系统临时目录，对应的 OpinionDB 被回收（索引被新一代替换、不再有请求引用）或进程退出时删除。
+型号模糊匹配和游标定位仍然用 store（规则与内存引擎完全一致），所以 OpinionDB 持有建库用的 store。
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import weakref
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from opinion_store import SELECT_CACHE_SIZE, SENTIMENTS, OpinionStore, day_to_date
+
+# trigram 分词能查的最短检索词（字符数）
+FTS_MIN_TERM = 3
+
+# 每个连接的 mmap 大小：库文件直接映射进内存，读页不经过 read() 拷贝
+MMAP_SIZE = 256 << 20
+
+SCHEMA = """
+CREATE TABLE opinions (
+    row INTEGER PRIMARY KEY,
+    brand_id TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    model TEXT NOT NULL,
+    published_at TEXT NOT NULL,
+    sentiment TEXT NOT NULL,
+    raw_text TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    seq INTEGER NOT NULL
+);
+CREATE VIRTUAL TABLE opinions_fts USING fts5(
+    raw_text, content='opinions', content_rowid='row', tokenize='trigram'
+);
+"""
+
+INDEXES = """
+CREATE INDEX opinions_brand_date ON opinions(brand_id, published_at);
+CREATE INDEX opinions_brand_platform ON opinions(brand_id, platform);
+CREATE INDEX opinions_brand_model ON opinions(brand_id, model);
+"""
+
+# 取页时查的列：前 6 列就是 /opinions 返回的字段，day / seq 用来生成下一页游标
+_RECORD_KEYS = ("published_at", "platform", "brand_id", "model", "sentiment", "raw_text")
+_COLUMNS = ", ".join(_RECORD_KEYS + ("day", "seq"))
+
+
+class _Slot:
+    """线程局部变量里放的是它而不是连接本身：sqlite3.Connection 不支持弱引用"""
+
+    __slots__ = ("conn", "__weakref__")
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self.conn = conn
+
+
+class ConnectionPool:
+    """
+    每个线程一个只读连接，第一次在该线程上查询时创建，之后一直复用；
+    线程结束时它的连接随线程局部变量一起释放。
+    close() 关闭所有线程的连接，只在没有查询在跑时调用（见 OpinionDB 的回收）。
+    """
+
+    def __init__(self, path: str) -> None:
+        self.uri = Path(path).resolve().as_uri() + "?mode=ro"
+        self._local = threading.local()
+        self._slots: "weakref.WeakSet[_Slot]" = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def connection(self) -> sqlite3.Connection:
+        slot = getattr(self._local, "slot", None)
+        if slot is None:
+            # check_same_thread=False 只是为了能在别的线程里 close()，查询仍然只在本线程
+            conn = sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+            conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+            # 短检索词逐行比较时用 Python 的 lower()，与内存引擎的大小写规则一致
+            conn.create_function("py_lower", 1, str.lower, deterministic=True)
+            slot = self._local.slot = _Slot(conn)
+            with self._lock:
+                self._slots.add(slot)
+        return slot.conn
+
+    def close(self) -> None:
+        with self._lock:
+            slots = list(self._slots)
+            self._slots.clear()
+        for slot in slots:
+            slot.conn.close()
+
+
+def _release(pool: ConnectionPool, path: str) -> None:
+    pool.close()
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def _match_phrase(term: str) -> str:
+    """检索词 -> FTS5 短语（双引号转义）；trigram 下短语即子串"""
+    return '"' + term.replace('"', '""') + '"'
+
+
+class OpinionDB:
+    """某一代索引的 SQLite 评论库，用 OpinionDB.build(store) 创建，建好后只读"""
+
+    def __init__(self, path: str, store: OpinionStore, build_ms: float = 0.0) -> None:
+        self.path = path
+        self.store = store
+        self.build_ms = build_ms
+        self.pool = ConnectionPool(path)
+        # 同一筛选组合的总条数缓存起来：翻页时每页都要返回 X-Total-Count
+        self.count = lru_cache(maxsize=SELECT_CACHE_SIZE)(self._count)
+        self._finalizer = weakref.finalize(self, _release, self.pool, path)
+
+    @classmethod
+    def build(cls, store: OpinionStore, directory: Optional[str] = None) -> "OpinionDB":
+        """把 store 里的评论行（is_comment）写进一个新的临时库文件"""
+        started = time.perf_counter()
+        fd, path = tempfile.mkstemp(prefix="opinions-", suffix=".sqlite", dir=directory)
+        os.close(fd)
+        try:
+            conn = sqlite3.connect(path)
+            try:
+                # 库文件是一次性的，坏了重建即可，不需要日志和 fsync
+                conn.execute("PRAGMA journal_mode = OFF")
+                conn.execute("PRAGMA synchronous = OFF")
+                conn.executescript(SCHEMA)
+                conn.executemany(
+                    "INSERT INTO opinions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", _comment_rows(store)
+                )
+                conn.execute("INSERT INTO opinions_fts(opinions_fts) VALUES ('rebuild')")
+                conn.executescript(INDEXES)
+                conn.execute("ANALYZE")
+                conn.commit()
+            finally:
+                conn.close()
+        except BaseException:
+            os.unlink(path)
+            raise
+        return cls(path, store, build_ms=(time.perf_counter() - started) * 1000)
+
+    def close(self) -> None:
+        """关闭连接并删除库文件（不调用也会在回收 / 退出时自动执行）"""
+        self._finalizer()
+
+    # ---------- 查询 ----------
+
+    def _where(
+        self,
+        brand_id: str,
+        platform: Optional[str],
+        model: Optional[str],
+        year: Optional[int],
+        month: Optional[int],
+        terms: Tuple[str, ...],
+    ) -> Optional[Tuple[str, List]]:
+        """筛选条件 -> (WHERE 子句, 参数)；确定没有结果时返回 None"""
+        clauses = ["brand_id = ?"]
+        params: List = [brand_id]
+
+        if platform:
+            clauses.append("platform = ?")
+            params.append(platform)
+
+        if model:
+            codes = self.store.models_matching(model)
+            if not len(codes):
+                return None
+            clauses.append(f"model IN ({', '.join('?' * len(codes))})")
+            params.extend(self.store.models[int(code)] for code in codes)
+
+        if year is not None:
+            # published_at 是 'YYYY-MM-DD'（没有日期的行是空串），按字符串比较即按日期比较
+            if month is not None:
+                end_year, end_month = (year + 1, 1) if month == 12 else (year, month + 1)
+                start, end = f"{year:04d}-{month:02d}-01", f"{end_year:04d}-{end_month:02d}-01"
+            else:
+                start, end = f"{year:04d}-01-01", f"{year + 1:04d}-01-01"
+            clauses.append("published_at >= ? AND published_at < ?")
+            params.extend((start, end))
+
+        long_terms = [term for term in terms if len(term) >= FTS_MIN_TERM]
+        if long_terms:
+            clauses.append("row IN (SELECT rowid FROM opinions_fts WHERE opinions_fts MATCH ?)")
+            params.append(" ".join(_match_phrase(term) for term in long_terms))
+        for term in terms:
+            if len(term) < FTS_MIN_TERM:
+                clauses.append("instr(py_lower(raw_text), ?) > 0")
+                params.append(term)
+
+        return " AND ".join(clauses), params
+
+    def _count(
+        self,
+        brand_id: str,
+        platform: Optional[str] = None,
+        model: Optional[str] = None,
+        year: Optional[int] = None,
+        month: Optional[int] = None,
+        terms: Tuple[str, ...] = (),
+    ) -> int:
+        where = self._where(brand_id, platform, model, year, month, terms)
+        if where is None:
+            return 0
+        sql, params = where
+        return self.pool.connection().execute(f"SELECT count(*) FROM opinions WHERE {sql}", params).fetchone()[0]
+
+    def query(
+        self,
+        brand_id: str,
+        platform: Optional[str] = None,
+        model: Optional[str] = None,
+        year: Optional[int] = None,
+        month: Optional[int] = None,
+        terms: Tuple[str, ...] = (),
+        after: Optional[Tuple[int, int]] = None,
+        limit: int = 50,
+    ) -> Tuple[List[Dict], int, Optional[Tuple[int, int]]]:
+        """
+        与内存引擎 select() + page() + records() 的结果一致：
+        返回 (本页记录, 总条数, 下一页游标)，没有下一页时游标为 None
+        """
+        where = self._where(brand_id, platform, model, year, month, terms)
+        if where is None:
+            return [], 0, None
+        sql, params = where
+        start = self.store.seek(after) if after is not None else 0
+        cursor = self.pool.connection().execute(
+            f"SELECT {_COLUMNS} FROM opinions WHERE {sql} AND row >= ? ORDER BY row LIMIT ?",
+            params + [start, limit + 1],
+        )
+        rows = cursor.fetchall()
+        next_key = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_key = (rows[-1][6], rows[-1][7])
+        records = [dict(zip(_RECORD_KEYS, row)) for row in rows]
+        return records, self.count(brand_id, platform, model, year, month, terms), next_key
+
+    def stats(self) -> Dict:
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            size = 0
+        return {
+            "engine": "sqlite",
+            "path": os.path.basename(self.path),  # 只给文件名，不暴露服务器上的目录
+            "rows": int(np.count_nonzero(self.store.is_comment)),
+            "bytes": size,
+            "build_ms": round(self.build_ms, 1),
+            "connections": len(self.pool),
+        }
+
+
+def _comment_rows(store: OpinionStore):
+    """store 里的评论行 -> opinions 表的行（按行号顺序）"""
+    platforms = store.platforms.values
+    brand_ids = store.brand_ids.values
+    models = store.models.values
+    dates: Dict[int, str] = {}
+    for row in np.flatnonzero(store.is_comment).tolist():
+        day = int(store.day[row])
+        published_at = dates.get(day)
+        if published_at is None:
+            published_at = dates[day] = day_to_date(day)
+        yield (
+            row,
+            brand_ids[store.brand[row]],
+            platforms[store.platform[row]],
+            models[store.model[row]],
+            published_at,
+            SENTIMENTS[store.sentiment[row]],
+            store.text(row),
+            day,
+            int(store.seq[row]),
+        )
+
+
+def fts_available() -> bool:
+    """当前 sqlite3 是否带 FTS5 和 trigram 分词（SQLite 3.34+）"""
+    try:
+        conn = sqlite3.connect(":memory:")
+        try:
+            conn.execute("CREATE VIRTUAL TABLE t USING fts5(x, tokenize='trigram')")
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return False
+    return True
@@ -0,0 +1,686 @@
+"""
+opinion_store.py
+
+列式的评论存储，替代原来「每个品牌一个 OpinionRow 列表」的做法：
+- platform / brand_id / brand_name / model / sentiment 做字典编码，存成小整数数组；
+- 日期存成 int32 天数（1970-01-01 起），没有日期的行记为 NO_DATE；
+- 文本统一拼进一个 UTF-8 字节缓冲区，用 offsets 数组按行切片，取出时再解码；
+- 原文和评论都放在同一个 store 里，用 is_comment 区分，全局统计也直接从这里算。
+
+筛选（品牌 / 平台 / 型号 / 年月）全部是 numpy 的向量化掩码运算，
+不再逐行遍历 Python 对象。
+"""
+
+from __future__ import annotations
+
+from array import array
+from dataclasses import dataclass
+from datetime import date
+from functools import lru_cache
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 没有有效日期的行
+NO_DATE = -(1 << 30)
+
+# 1970-01-01 的 proleptic ordinal
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# 情感固定编码：pos=0 / neg=1 / neu=2
+SENTIMENTS: Tuple[str, ...] = ("pos", "neg", "neu")
+_SENTIMENT_CODES: Dict[str, int] = {s: i for i, s in enumerate(SENTIMENTS)}
+
+# 年 / 月分桶的偏移，保证组合键的低 32 位非负
+_YEAR_BIAS = 0
+_MONTH_BIAS = 1 << 20
+
+# select() 结果缓存的筛选组合数
+SELECT_CACHE_SIZE = 512
+
+# build() 重排文本时每块的字节数
+REORDER_BLOCK_BYTES = 4 << 20
+
+_EMPTY_ROWS = np.empty(0, dtype=np.int32)
+_EMPTY_ROWS.setflags(write=False)
+
+
+def date_to_day(value: str) -> int:
+    """'YYYY-MM-DD' -> 天数；解析不了返回 NO_DATE"""
+    if not value or len(value) != 10:
+        return NO_DATE
+    try:
+        return date.fromisoformat(value).toordinal() - _EPOCH_ORDINAL
+    except ValueError:
+        return NO_DATE
+
+
+def ymd_to_day(year: int, month: int, day: int) -> int:
+    """(年, 月, 日) -> 天数；不是合法日期返回 NO_DATE"""
+    try:
+        return date(year, month, day).toordinal() - _EPOCH_ORDINAL
+    except ValueError:
+        return NO_DATE
+
+
+def day_to_date(day: int) -> str:
+    """天数 -> 'YYYY-MM-DD'；NO_DATE 返回空字符串"""
+    if day == NO_DATE:
+        return ""
+    return date.fromordinal(int(day) + _EPOCH_ORDINAL).isoformat()
+
+
+def query_terms(q: Optional[str]) -> Tuple[str, ...]:
+    """
+    /opinions 的 q 参数 -> 检索词：按空白切开、转小写、去重。
+    评论文本包含全部检索词（子串匹配，忽略大小写）才算命中
+    """
+    return tuple(dict.fromkeys((q or "").lower().split()))
+
+
+def _month_bucket(year: int, month: int) -> int:
+    """(年, 月) -> 自 1970-01 起的月序号 + 偏移"""
+    return (year - 1970) * 12 + (month - 1) + _MONTH_BIAS
+
+
+def _pair(high, low):
+    """两个非负整数拼成一个 int64 组合键（高 32 位 / 低 32 位），支持标量和数组"""
+    if isinstance(high, np.ndarray):
+        return (high.astype(np.int64) << 32) | low.astype(np.int64)
+    return (int(high) << 32) | int(low)
+
+
+def _append(target: array, values: np.ndarray) -> None:
+    """numpy 数组整段追加到同类型的 array.array"""
+    target.frombytes(np.ascontiguousarray(values, dtype=target.typecode).tobytes())
+
+
+def _code_dtype(size: int) -> np.dtype:
+    if size <= 0xFF:
+        return np.dtype(np.uint8)
+    if size <= 0xFFFF:
+        return np.dtype(np.uint16)
+    return np.dtype(np.int32)
+
+
+class Vocab:
+    """字典编码：字符串 <-> 连续的小整数，编码按首次出现顺序分配"""
+
+    def __init__(self, values: Iterable[str] = ()) -> None:
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+        for v in values:
+            self.encode(v)
+
+    def encode(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self._codes[value] = code
+            self.values.append(value)
+        return code
+
+    def lookup(self, value: str) -> Optional[int]:
+        return self._codes.get(value)
+
+    def __getitem__(self, code: int) -> str:
+        return self.values[code]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class Postings:
+    """
+    CSR 形式的倒排表：key -> 升序行号数组。
+    OpinionStore 的行号已经按「日期倒序 + 加载顺序」排好，
+    所以每个倒排表天然就是按展示顺序排好的。
+    """
+
+    def __init__(self, keys: np.ndarray, mask: np.ndarray) -> None:
+        rows = np.flatnonzero(mask)
+        row_keys = keys[rows]
+        order = np.argsort(row_keys, kind="stable")
+        self.ids = rows[order].astype(np.int32)
+        self.ids.setflags(write=False)
+        self.keys, starts = np.unique(row_keys[order], return_index=True)
+        self.starts = np.append(starts, len(self.ids))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def get(self, key: int) -> np.ndarray:
+        i = int(np.searchsorted(self.keys, key))
+        if i < len(self.keys) and self.keys[i] == key:
+            return self.ids[self.starts[i]:self.starts[i + 1]]
+        return _EMPTY_ROWS
+
+
+class OpinionStore:
+    """
+    只读的列式存储，由 OpinionStoreBuilder 构建。
+    行按「日期倒序，同一天按加载顺序（seq）」排列，/opinions 的顺序即行号顺序。
+    """
+
+    def __init__(
+        self,
+        platforms: Vocab,
+        brand_ids: Vocab,
+        brand_names: Vocab,
+        models: Vocab,
+        platform: np.ndarray,
+        brand: np.ndarray,
+        brand_name: np.ndarray,
+        model: np.ndarray,
+        sentiment: np.ndarray,
+        is_comment: np.ndarray,
+        day: np.ndarray,
+        seq: np.ndarray,
+        text_offsets: np.ndarray,
+        text_buffer: bytes,
+    ) -> None:
+        self.platforms = platforms
+        self.brand_ids = brand_ids
+        self.brand_names = brand_names
+        self.models = models
+
+        self.platform = platform
+        self.brand = brand
+        self.brand_name = brand_name
+        self.model = model
+        self.sentiment = sentiment
+        self.is_comment = is_comment
+        self.day = day
+        self.seq = seq
+        self.text_offsets = text_offsets
+        self.text_buffer = text_buffer
+
+        self._build_postings()
+
+        # 同一筛选组合的结果缓存起来：翻页时 total 和 seek 都直接复用
+        self.select = lru_cache(maxsize=SELECT_CACHE_SIZE)(self._select)
+        # 型号模糊匹配的结果也按查询串缓存，与 select 一样限定条数（查询串来自客户端）
+        self._models_matching = lru_cache(maxsize=SELECT_CACHE_SIZE)(self._match_models)
+        # 用于按 (日期, seq) 二分定位游标；行是按 (-day, seq) 升序排好的
+        self._neg_day = -self.day.astype(np.int64)
+
+    def _build_postings(self) -> None:
+        """/opinions 用的二级索引：品牌 / 品牌+平台 / 品牌+型号 / 品牌+年 / 品牌+年月"""
+        comments = self.is_comment
+        dated = comments & (self.day != NO_DATE)
+        months = (
+            self.day.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+        )
+        # NO_DATE 换算出来的月份没有意义，这些行已经被 dated 掩码排除
+        self._by_brand = Postings(self.brand.astype(np.int64), comments)
+        self._by_brand_platform = Postings(_pair(self.brand, self.platform), comments)
+        self._by_brand_model = Postings(_pair(self.brand, self.model), comments)
+        self._by_brand_year = Postings(
+            _pair(self.brand, months // 12 + 1970 + _YEAR_BIAS), dated
+        )
+        self._by_brand_month = Postings(
+            _pair(self.brand, months + _MONTH_BIAS), dated
+        )
+
+    def __len__(self) -> int:
+        return len(self.day)
+
+    @property
+    def nbytes(self) -> int:
+        """列数组 + 文本缓冲区占用的字节数（不含字典）"""
+        arrays = (
+            self.platform,
+            self.brand,
+            self.brand_name,
+            self.model,
+            self.sentiment,
+            self.is_comment,
+            self.day,
+            self.seq,
+            self.text_offsets,
+        )
+        return sum(a.nbytes for a in arrays) + len(self.text_buffer)
+
+    # ---------- 快照 ----------
+
+    _ARRAY_FIELDS = (
+        "platform",
+        "brand",
+        "brand_name",
+        "model",
+        "sentiment",
+        "is_comment",
+        "day",
+        "seq",
+        "text_offsets",
+    )
+
+    def to_snapshot(self) -> Tuple[Dict[str, List[str]], Dict[str, np.ndarray]]:
+        """拆成 (字典, 数组) 两部分，供 index_snapshot 写盘"""
+        vocabs = {
+            "platforms": self.platforms.values,
+            "brand_ids": self.brand_ids.values,
+            "brand_names": self.brand_names.values,
+            "models": self.models.values,
+        }
+        arrays = {name: getattr(self, name) for name in self._ARRAY_FIELDS}
+        arrays["text_buffer"] = np.frombuffer(self.text_buffer, dtype=np.uint8)
+        return vocabs, arrays
+
+    @classmethod
+    def from_snapshot(
+        cls, vocabs: Dict[str, List[str]], arrays: Dict[str, np.ndarray]
+    ) -> "OpinionStore":
+        """从快照还原；数组保持 mmap 视图，不做拷贝"""
+        return cls(
+            platforms=Vocab(vocabs["platforms"]),
+            brand_ids=Vocab(vocabs["brand_ids"]),
+            brand_names=Vocab(vocabs["brand_names"]),
+            models=Vocab(vocabs["models"]),
+            text_buffer=memoryview(arrays["text_buffer"]),
+            **{name: arrays[name] for name in cls._ARRAY_FIELDS},
+        )
+
+    # ---------- 单行访问 ----------
+
+    def text(self, row: int) -> str:
+        start, end = self.text_offsets[row], self.text_offsets[row + 1]
+        return bytes(self.text_buffer[start:end]).decode("utf-8")
+
+    def date_str(self, row: int) -> str:
+        return day_to_date(int(self.day[row]))
+
+    # ---------- 分组统计 ----------
+
+    def group_counts(
+        self, keys: np.ndarray, mask: np.ndarray
+    ) -> List[Tuple[int, int, int]]:
+        """
+        按 keys 分组计数，返回 [(key, count, 首行行号), ...]。
+        结果按组在原始加载顺序（seq）里首次出现的先后排列，
+        与逐行累加 Counter / dict 得到的插入顺序一致。
+        """
+        rows = np.flatnonzero(mask)
+        if not len(rows):
+            return []
+        rows = rows[np.argsort(self.seq[rows], kind="stable")]
+        uniq, first_idx, counts = np.unique(
+            keys[rows], return_index=True, return_counts=True
+        )
+        by_first = np.argsort(first_idx, kind="stable")
+        return [
+            (int(uniq[i]), int(counts[i]), int(rows[first_idx[i]]))
+            for i in by_first
+        ]
+
+    # ---------- 筛选 ----------
+
+    def models_matching(self, model: str) -> np.ndarray:
+        """
+        型号模糊匹配，返回命中的 model 编码数组。
+        规则与原来逐行判断一致：相等 / 互为子串（忽略大小写和首尾空格）。
+        """
+        return self._models_matching(model.lower().strip())
+
+    def _match_models(self, query: str) -> np.ndarray:
+        hits = []
+        for code, value in enumerate(self.models.values):
+            if not value:
+                continue
+            value_lower = value.lower().strip()
+            if value_lower == query or query in value_lower or value_lower in query:
+                hits.append(code)
+        return np.asarray(hits, dtype=self.model.dtype)
+
+    def _select(
+        self,
+        brand_id: str,
+        platform: Optional[str] = None,
+        model: Optional[str] = None,
+        year: Optional[int] = None,
+        month: Optional[int] = None,
+        terms: Tuple[str, ...] = (),
+    ) -> np.ndarray:
+        """
+        按品牌（必填）+ 平台 / 型号 / 年月筛选评论，terms（见 query_terms）非空时
+        再要求文本包含全部词，返回按日期倒序（同一天按加载顺序）排好的行号数组。
+
+        行号本身就是排好序的（见 OpinionStoreBuilder.build），
+        所以这里只做倒排表求交，不需要再排序；取前 N 条直接切片。
+        """
+        brand_code = self.brand_ids.lookup(brand_id)
+        if brand_code is None:
+            return _EMPTY_ROWS
+
+        postings: List[np.ndarray] = []
+
+        if platform:
+            platform_code = self.platforms.lookup(platform)
+            if platform_code is None:
+                return _EMPTY_ROWS
+            postings.append(self._by_brand_platform.get(_pair(brand_code, platform_code)))
+
+        if model:
+            lists = [
+                self._by_brand_model.get(_pair(brand_code, code))
+                for code in self.models_matching(model)
+            ]
+            lists = [ids for ids in lists if len(ids)]
+            if len(lists) == 1:
+                postings.append(lists[0])
+            else:
+                # 不同型号的倒排表互不相交，合并后排序的只是命中的这部分行
+                postings.append(np.sort(np.concatenate(lists)) if lists else _EMPTY_ROWS)
+
+        if year is not None:
+            if month is not None:
+                bucket = _month_bucket(year, month)
+                postings.append(self._by_brand_month.get(_pair(brand_code, bucket)))
+            else:
+                postings.append(self._by_brand_year.get(_pair(brand_code, year + _YEAR_BIAS)))
+
+        if not postings:
+            rows = self._by_brand.get(brand_code)
+        else:
+            # 从最短的表开始求交，尽早缩小结果
+            postings.sort(key=len)
+            rows = postings[0]
+            for ids in postings[1:]:
+                if not len(rows):
+                    break
+                rows = np.intersect1d(rows, ids, assume_unique=True)
+        if terms:
+            rows = self._containing(rows, terms)
+        rows.setflags(write=False)
+        return rows
+
+    def _containing(self, rows: np.ndarray, terms: Tuple[str, ...]) -> np.ndarray:
+        """rows 里文本（转小写后）包含全部 terms 的行，顺序不变；没有倒排表，逐行解码比较"""
+        hits = []
+        for row in rows.tolist():
+            text = self.text(row).lower()
+            if all(term in text for term in terms):
+                hits.append(row)
+        return np.asarray(hits, dtype=np.int32)
+
+    # ---------- 翻页 ----------
+
+    def row_key(self, row: int) -> Tuple[int, int]:
+        """行的排序键 (day, seq)，用作 keyset 翻页的游标"""
+        return int(self.day[row]), int(self.seq[row])
+
+    def seek(self, after: Tuple[int, int]) -> int:
+        """全局第一个排在游标 (day, seq) 之后的行号（行是按 (-day, seq) 升序排好的）"""
+        day, seq = after
+        lo = int(np.searchsorted(self._neg_day, -day, side="left"))
+        hi = int(np.searchsorted(self._neg_day, -day, side="right"))
+        return lo + int(np.searchsorted(self.seq[lo:hi], seq, side="right"))
+
+    def page(
+        self,
+        rows: np.ndarray,
+        after: Optional[Tuple[int, int]],
+        limit: int,
+    ) -> Tuple[np.ndarray, Optional[Tuple[int, int]]]:
+        """
+        keyset 翻页：从 select() 的结果里取排在游标 (day, seq) 之后的 limit 行。
+        两次二分定位，深页和第一页开销相同。
+        返回 (本页行号, 下一页游标)，没有下一页时游标为 None。
+        """
+        start = 0
+        if after is not None:
+            start = int(np.searchsorted(rows, self.seek(after), side="left"))
+
+        page_rows = rows[start:start + limit]
+        if start + limit < len(rows) and len(page_rows):
+            return page_rows, self.row_key(int(page_rows[-1]))
+        return page_rows, None
+
+    def records(self, rows: Sequence[int]) -> List[Dict]:
+        """把行号转成 /opinions 返回的字典"""
+        result = []
+        for row in rows:
+            row = int(row)
+            result.append(
+                {
+                    "published_at": self.date_str(row),
+                    "platform": self.platforms[self.platform[row]],
+                    "brand_id": self.brand_ids[self.brand[row]],
+                    "model": self.models[self.model[row]],
+                    "sentiment": SENTIMENTS[self.sentiment[row]],
+                    "raw_text": self.text(row),
+                }
+            )
+        return result
+
+
+@dataclass(eq=False)
+class ColumnChunk:
+    """
+    一批清洗后记录的紧凑列式表示（并行加载时每个源文件一块，由子进程 pickle 传回）：
+    字符串列用块内的局部字典编码（按首次出现顺序），文本拼成一段 UTF-8 字节，
+    合并进 OpinionStoreBuilder 时再把局部编码映射成全局编码。
+    """
+
+    platforms: List[str]
+    brand_ids: List[str]
+    brand_names: List[str]
+    models: List[str]
+    platform: np.ndarray  # int32，下标指向 platforms，下同
+    brand: np.ndarray
+    brand_name: np.ndarray
+    model: np.ndarray
+    sentiment: np.ndarray  # int8，SENTIMENTS 的编码
+    is_comment: np.ndarray  # int8
+    day: np.ndarray  # int32
+    text_lengths: np.ndarray  # int64，每行文本的字节数
+    text_buffer: bytes  # ColumnChunkBuilder 直接交出它的 bytearray，省一次整段拷贝
+
+    def __len__(self) -> int:
+        return len(self.day)
+
+    @classmethod
+    def from_columns(cls, columns: Mapping[str, Sequence]) -> "ColumnChunk":
+        """columns 的键与 OpinionStoreBuilder.add() 的 row 相同，每列一个序列"""
+        builder = ColumnChunkBuilder()
+        builder.extend(columns)
+        return builder.build()
+
+
+class ColumnChunkBuilder:
+    """
+    分批追加清洗后的列，最后得到一个 ColumnChunk（流式加载用）：
+    每批追加完只留下编码后的整数列和文本字节，原始记录 / 清洗后的字典都可以释放。
+    局部字典跨批沿用，结果与整批调用 ColumnChunk.from_columns 完全一致。
+    """
+
+    def __init__(self) -> None:
+        self.platforms = Vocab()
+        self.brand_ids = Vocab()
+        self.brand_names = Vocab()
+        self.models = Vocab()
+        self._platform = array("i")
+        self._brand = array("i")
+        self._brand_name = array("i")
+        self._model = array("i")
+        self._sentiment = array("b")
+        self._is_comment = array("b")
+        self._day = array("i")
+        self._text_lengths = array("q")
+        self._text = bytearray()
+
+    def __len__(self) -> int:
+        return len(self._day)
+
+    def extend(self, columns: Mapping[str, Sequence]) -> None:
+        """columns 的键与 OpinionStoreBuilder.add() 的 row 相同，每列一个序列"""
+        texts = [(t or "").encode("utf-8") for t in columns["text"]]
+        self._platform.extend(self.platforms.encode(v) for v in columns["platform"])
+        self._brand.extend(self.brand_ids.encode(v) for v in columns["brand_id"])
+        self._brand_name.extend(self.brand_names.encode(v) for v in columns["brand"])
+        self._model.extend(self.models.encode(m or "") for m in columns["model"])
+        self._sentiment.extend(_SENTIMENT_CODES.get(s, 2) for s in columns["sentiment"])
+        self._is_comment.extend(1 if c else 0 for c in columns["is_comment"])
+        self._day.extend(columns["day"])
+        self._text_lengths.extend(len(t) for t in texts)
+        self._text += b"".join(texts)
+
+    def build(self) -> ColumnChunk:
+        """数组和文本缓冲区直接交给 ColumnChunk（不拷贝），build 之后不要再 extend"""
+        return ColumnChunk(
+            platforms=self.platforms.values,
+            brand_ids=self.brand_ids.values,
+            brand_names=self.brand_names.values,
+            models=self.models.values,
+            platform=np.asarray(self._platform, dtype=np.int32),
+            brand=np.asarray(self._brand, dtype=np.int32),
+            brand_name=np.asarray(self._brand_name, dtype=np.int32),
+            model=np.asarray(self._model, dtype=np.int32),
+            sentiment=np.asarray(self._sentiment, dtype=np.int8),
+            is_comment=np.asarray(self._is_comment, dtype=np.int8),
+            day=np.asarray(self._day, dtype=np.int32),
+            text_lengths=np.asarray(self._text_lengths, dtype=np.int64),
+            text_buffer=self._text,
+        )
+
+
+class OpinionStoreBuilder:
+    """
+    逐行追加清洗后的记录，最后一次性冻结成 OpinionStore。
+    传入 base 时在已有 store 的基础上追加（热更新用）：字典沿用原编码，
+    build() 时把原有列和新增行拼起来重新排序。
+    """
+
+    def __init__(self, base: Optional[OpinionStore] = None) -> None:
+        self._base = base
+        self.platforms = Vocab(base.platforms.values if base is not None else ())
+        self.brand_ids = Vocab(base.brand_ids.values if base is not None else ())
+        self.brand_names = Vocab(base.brand_names.values if base is not None else ())
+        self.models = Vocab(base.models.values if base is not None else ())
+
+        self._platform = array("i")
+        self._brand = array("i")
+        self._brand_name = array("i")
+        self._model = array("i")
+        self._sentiment = array("b")
+        self._is_comment = array("b")
+        self._day = array("i")
+        self._seq = array("q")
+        self._text_parts: List[bytes] = []  # 逐行追加时每行一段，整批追加时每批一段
+        self._text_lengths = array("q")
+
+    def __len__(self) -> int:
+        return len(self._day) + (len(self._base) if self._base is not None else 0)
+
+    def add(self, row: Dict, seq: Optional[int] = None) -> None:
+        """追加一条 _clean_csv_rows 清洗后的记录"""
+        text = (row.get("text") or "").encode("utf-8")
+        self._platform.append(self.platforms.encode(row["platform"]))
+        self._brand.append(self.brand_ids.encode(row["brand_id"]))
+        self._brand_name.append(self.brand_names.encode(row["brand"]))
+        self._model.append(self.models.encode(row.get("model") or ""))
+        self._sentiment.append(_SENTIMENT_CODES.get(row["sentiment"], 2))
+        self._is_comment.append(1 if row["is_comment"] else 0)
+        self._day.append(row.get("day", NO_DATE))
+        self._seq.append(len(self) - 1 if seq is None else seq)
+        self._text_parts.append(text)
+        self._text_lengths.append(len(text))
+
+    def extend(self, columns: Mapping[str, Sequence], seq: Sequence[int]) -> None:
+        """
+        整批追加（向量化清洗的结果）：columns 的键与 add() 的 row 相同，每列一个序列。
+        字典编码按列内首次出现的顺序分配，与逐行 add() 得到的编码完全一致。
+        """
+        self.extend_chunk(ColumnChunk.from_columns(columns), seq)
+
+    def extend_chunk(self, chunk: ColumnChunk, seq: Sequence[int]) -> None:
+        """追加一个 ColumnChunk：局部编码按块内首次出现顺序并入全局字典，结果与逐行 add() 一致"""
+
+        def remap(vocab: Vocab, values: List[str], codes: np.ndarray) -> np.ndarray:
+            table = np.array([vocab.encode(v) for v in values], dtype=np.int32)
+            return table[codes]
+
+        _append(self._platform, remap(self.platforms, chunk.platforms, chunk.platform))
+        _append(self._brand, remap(self.brand_ids, chunk.brand_ids, chunk.brand))
+        _append(self._brand_name, remap(self.brand_names, chunk.brand_names, chunk.brand_name))
+        _append(self._model, remap(self.models, chunk.models, chunk.model))
+        _append(self._sentiment, chunk.sentiment)
+        _append(self._is_comment, chunk.is_comment)
+        _append(self._day, chunk.day)
+        _append(self._seq, np.asarray(seq, dtype=np.int64))
+        _append(self._text_lengths, chunk.text_lengths)
+        self._text_parts.append(chunk.text_buffer)
+
+    def build(self) -> OpinionStore:
+        """冻结成 OpinionStore，同时把行重排成「日期倒序，同一天按 seq 升序」"""
+        base = self._base
+
+        def column(values: array, dtype, name: str) -> np.ndarray:
+            arr = np.asarray(values, dtype=dtype)
+            if base is not None:
+                arr = np.concatenate([getattr(base, name).astype(dtype), arr])
+            return arr
+
+        day = column(self._day, np.int32, "day")
+        seq = column(self._seq, np.int64, "seq")
+        order = np.lexsort((seq, -day.astype(np.int64)))
+
+        new_lengths = np.asarray(self._text_lengths, dtype=np.int64)
+        if base is not None:
+            lengths = np.concatenate([np.diff(base.text_offsets), new_lengths])
+            buffer = np.concatenate([
+                np.frombuffer(base.text_buffer, dtype=np.uint8),
+                np.frombuffer(b"".join(self._text_parts), dtype=np.uint8),
+            ])
+        else:
+            lengths = new_lengths
+            buffer = np.frombuffer(b"".join(self._text_parts), dtype=np.uint8)
+        text_offsets, text_buffer = _reorder_texts(buffer, lengths, order)
+
+        return OpinionStore(
+            platforms=self.platforms,
+            brand_ids=self.brand_ids,
+            brand_names=self.brand_names,
+            models=self.models,
+            platform=column(self._platform, _code_dtype(len(self.platforms)), "platform")[order],
+            brand=column(self._brand, _code_dtype(len(self.brand_ids)), "brand")[order],
+            brand_name=column(self._brand_name, _code_dtype(len(self.brand_names)), "brand_name")[order],
+            model=column(self._model, _code_dtype(len(self.models)), "model")[order],
+            sentiment=column(self._sentiment, np.uint8, "sentiment")[order],
+            is_comment=column(self._is_comment, np.bool_, "is_comment")[order],
+            day=day[order],
+            seq=seq[order],
+            text_offsets=text_offsets,
+            text_buffer=text_buffer,
+        )
+
+
+def _reorder_texts(
+    buffer: np.ndarray, lengths: np.ndarray, order: np.ndarray
+) -> Tuple[np.ndarray, memoryview]:
+    """
+    按 order 重排变长文本：buffer 是按原顺序拼接的字节，lengths 是每行长度。
+    逐字节的下标数组按块生成（每块约 REORDER_BLOCK_BYTES 字节），不随文本总量增长
+    """
+    starts = np.zeros(len(lengths), dtype=np.int64)
+    if len(lengths) > 1:
+        np.cumsum(lengths[:-1], out=starts[1:])
+
+    new_lengths = lengths[order]
+    text_offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(new_lengths, out=text_offsets[1:])
+
+    out = np.empty(int(text_offsets[-1]), dtype=np.uint8)
+    first = 0
+    while first < len(order):
+        # 本块的行 [first, last)：至少一行，总字节数不超过 REORDER_BLOCK_BYTES（单行超长时除外）
+        limit = text_offsets[first] + REORDER_BLOCK_BYTES
+        last = max(int(np.searchsorted(text_offsets, limit, side="right")) - 1, first + 1)
+        lo, hi = int(text_offsets[first]), int(text_offsets[last])
+        # 每个输出字节对应的源下标 = 输出下标 + (该行原起点 - 该行新起点)
+        shift = np.repeat(
+            starts[order[first:last]] - text_offsets[first:last], new_lengths[first:last]
+        )
+        out[lo:hi] = buffer[np.arange(lo, hi, dtype=np.int64) + shift]
+        first = last
+    return text_offsets, memoryview(out)
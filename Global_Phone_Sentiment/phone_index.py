@@ -9,18 +9,42 @@ phone_index.py
 - 品牌评论明细（给详情表用，可按平台筛选）
 - 全局统计汇总（给头部 dashboard 用）
 
+检索（search_ids / search_many）：
+- TF-IDF 行向量已经做过 L2 归一化，余弦相似度就是点积；
+- 预先把矩阵转成「词项 -> 文档」的倒排（CSC）形式，查询向量只沿自己出现的词项的倒排表累加，
+  和查询没有任何共同词项的文档根本不会被访问；
+- 每条查询在命中的文档里用 argpartition 取 top-k，再只对这 k 个排序；
+- 返回行号 + 分数（SearchHits），需要明细时再按行号取 self.df，不复制整张表。
+PhoneFeedbackIndex(incremental=True) 时 TF-IDF 改用哈希特征 + 在线文档频率（incremental_tfidf），
+爬虫往 CSV 追加新行后调用 refresh() 只处理新行。
+mode="semantic" 时改用 semantic_index 的稠密向量 + IVF 近似检索（可选，第一次用到时加载或构建）。
+PhoneFeedbackIndex(segments=True) 时 CSV 有 Arrow 段文件（segment_store）就从段文件映射读取，
+只解析段文件之后 CSV 新追加的部分。
+
+汇总接口（get_brand_insights / get_global_stats）的结果和每个品牌的行号数组按数据代数（generation）缓存，
+refresh() 追加了新行才重新计算；get_brand_opinions 只取命中的那几行。
+
 注意：
 - 目前只接入 Reddit / B 站 / GSMArena 三个平台；
 - 什么值得买的数据暂时不计入汇总；
 - B 站只使用 data_bilibili_v2.csv，早期测试 CSV 当作「废弃」不加载。
 """
 
+import copy
+import io
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, NamedTuple, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
+from pandas.io.parsers import TextParser
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+
+from csv_source import complete_prefix_length, first_record_length, record_boundary
+from incremental_tfidf import IncrementalTfidf, check_against_batch
+import segment_store
+from semantic_index import SemanticIndex, SemanticParams
+from sentiment_lexicon import SentimentLexicon
 
 # 当前文件所在目录（Global_Phone_Sentiment）
 DATA_DIR = Path(__file__).parent
@@ -43,6 +67,15 @@ CSV_FILES: List[str] = [
     "data_bilibili_v2.csv",
 ]
 
+# TF-IDF 参数（批量和增量两种模式共用）
+TFIDF_PARAMS: Dict[str, Any] = {"max_features": 50000, "max_df": 0.9, "min_df": 3}
+
+# 语义索引的持久化文件（与 main 的索引快照放在同一个缓存目录）
+SEMANTIC_INDEX_PATH = DATA_DIR / ".index_cache" / "phone_index_semantic.snap"
+
+# search 支持的检索方式
+SEARCH_MODES = ("tfidf", "semantic")
+
 # 文本列的候选名字（按优先级从上到下）
 CANDIDATE_TEXT_COLS = [
     "cleaned_text",
@@ -80,6 +113,10 @@ CANDIDATE_TIME_COLS = [
 # 非常简陋的情感词典（demo 用）
 POS_WORDS = ["好", "喜欢", "真香", "满意", "香", "推荐", "棒", "优秀", "惊喜", "爽"]
 NEG_WORDS = ["差", "垃圾", "失望", "烂", "后悔", "坑", "生气", "气死", "不好", "一般"]
+SENTIMENT_LEXICON = SentimentLexicon(POS_WORDS, NEG_WORDS, ignore_case=False)
+
+# 取值很少、反复比较 / 分组的列存成 category（类别按首次出现的顺序）
+CATEGORICAL_COLS = ["source", "brand_id", "model_std", "sentiment"]
 
 # 平台 ID -> 展示名称
 PLATFORM_LABELS: Dict[str, str] = {
@@ -91,6 +128,22 @@ PLATFORM_LABELS: Dict[str, str] = {
 }
 
 
+class SearchHits(NamedTuple):
+    """一条查询的结果：按分数降序的行号（self.df 的位置下标）和余弦相似度"""
+
+    rows: np.ndarray
+    scores: np.ndarray
+
+
+def _top_k(rows: np.ndarray, scores: np.ndarray, k: int) -> SearchHits:
+    """在命中的文档里取分数最高的 k 个：argpartition 选出来再只排这 k 个（同分按行号升序）"""
+    if k < len(rows):
+        keep = np.argpartition(-scores, k - 1)[:k]
+        rows, scores = rows[keep], scores[keep]
+    order = np.lexsort((rows, -scores))
+    return SearchHits(rows=rows[order], scores=scores[order])
+
+
 def _guess_text_col(df: pd.DataFrame) -> str:
     """尝试在 DataFrame 里猜测哪一列是评论文本。"""
     for col in CANDIDATE_TEXT_COLS:
@@ -112,13 +165,7 @@ def simple_sentiment(text: str) -> str:
     t = str(text)
     if not t.strip():
         return "neu"
-    pos = sum(1 for w in POS_WORDS if w in t)
-    neg = sum(1 for w in NEG_WORDS if w in t)
-    if pos > neg:
-        return "pos"
-    if neg > pos:
-        return "neg"
-    return "neu"
+    return SENTIMENT_LEXICON.label(t)
 
 
 def extract_brand(model: str) -> str:
@@ -182,95 +229,308 @@ def detect_source_from_filename(name: str) -> str:
 
 
 class PhoneFeedbackIndex:
-    def __init__(self) -> None:
-        dfs: List[pd.DataFrame] = []
+    def __init__(self, incremental: bool = False, segments: bool = False) -> None:
+        """
+        incremental=True 时用 IncrementalTfidf（哈希特征 + 在线 df），
+        之后 refresh() 追加新行只对新行分词；默认仍是整体 fit 的 TfidfVectorizer。
+        segments=True 时优先从段文件读取（需要 pyarrow）。注意段文件按 csv 模块的规则解析，
+        与这里默认的 pandas python 引擎不完全相同：字段比表头多的行会保留（截掉多余字段）而不是跳过，
+        引号内的 \r\n 统一成 \n——与 main.py 的后端读取一致。
+        """
+        self.incremental = incremental
+        self.segments = segments
+        self.source_paths: List[Path] = []  # 实际加载的 CSV，语义索引的指纹用
+        self.semantic: Optional[SemanticIndex] = None
+        # 每个 CSV 的表头字节、已经读到的字节偏移、偏移之后已经读过的记录数（见 csv_source.CsvCursor.pending），
+        # refresh() 只解析偏移之后新追加的部分
+        self._source_offsets: Dict[str, Tuple[bytes, int, int]] = {}
+        # 数据代数：self.df 每变一次加 1；汇总接口的缓存 name -> (代数, 结果)
+        self.generation = 1
+        self._memo: Dict[str, Tuple[int, Any]] = {}
 
+        dfs: List[pd.DataFrame] = []
         for name in CSV_FILES:
-            path = DATA_DIR / name
-            if not path.exists():
-                print(f"[WARN] {path} 不存在，先跳过")
+            df = self._read_source(name)
+            if df is None:
                 continue
+            dfs.append(df)
+            self.source_paths.append(DATA_DIR / name)
 
-            source_id = detect_source_from_filename(name)
+        if not dfs:
+            raise RuntimeError("没有找到任何 CSV 数据，请检查 CSV_FILES 配置是否正确。")
 
-            # 目前不纳入什么值得买
-            if source_id == "smzdm":
+        # 合并所有数据
+        self.df: pd.DataFrame = self._categorize(self._label(pd.concat(dfs, ignore_index=True)))
+
+        print(f"[INDEX] 已加载评论 {len(self.df)} 条，开始构建 TF-IDF 向量……")
+
+        # 构建 TF-IDF 向量
+        if incremental:
+            self.vectorizer = IncrementalTfidf(**TFIDF_PARAMS).partial_fit(self.df["content"])
+            self._set_matrix(self.vectorizer.matrix)
+        else:
+            self.vectorizer = TfidfVectorizer(**TFIDF_PARAMS)
+            self._set_matrix(self.vectorizer.fit_transform(self.df["content"]))
+
+        print("[INDEX] 向量化完成 ✅")
+
+    def _read_source(self, name: str, verbose: bool = True) -> Optional[pd.DataFrame]:
+        """
+        读取一个 CSV 上次读到的位置之后的完整行（第一次从头读）并统一列名；
+        文件不存在 / 属于不计入的平台 / 没有新行时返回 None。
+        """
+        path = DATA_DIR / name
+        if not path.exists():
+            if verbose:
+                print(f"[WARN] {path} 不存在，先跳过")
+            return None
+
+        source_id = detect_source_from_filename(name)
+
+        # 目前不纳入什么值得买
+        if source_id == "smzdm":
+            if verbose:
                 print(f"[INFO] {name} 来自什么值得买，当前版本不计入汇总，跳过")
-                continue
+            return None
 
+        if verbose:
             print(f"[LOAD] 正在读取 {path} ...")
-            # 用更宽容的解析器，跳过坏行
+        header, offset, pending = self._source_offsets.get(name, (b"", 0, 0))
+        df = self._read_segments(name) if self.segments and not offset else None
+        if df is None:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+            # 只取到最后一条完整记录，爬虫正在写的半行留给下一次 refresh()。
+            # 第一次读时，末尾没有换行但引号配对的最后一条照样读（与整文件 pd.read_csv 一致），
+            # 偏移停在它前面，下次续读时跳过这一条
+            if not offset:
+                end, tail = record_boundary(io.BytesIO(data), len(data))
+                start, stop = 0, len(data) if tail else end
+                pending = int(tail and end > 0)
+            else:
+                start = first_record_length(data) if pending else 0
+                end = complete_prefix_length(data) if start or not pending else 0
+                stop = end
+                pending = pending if not end else 0
+            body = data[start:stop]
+            if not header:
+                header = body[: body.find(b"\n") + 1]
+                body = body[len(header):]
+            self._source_offsets[name] = (header, offset + end, pending)
+            if not body.strip():
+                if verbose:
+                    print(f"[WARN] {name} 是空的，跳过")
+                return None
+
+            # 用更宽容的解析器，跳过坏行（新追加的部分前面补上表头再解析）
             df = pd.read_csv(
-                path,
+                io.BytesIO(header + body),
                 engine="python",
                 on_bad_lines="skip",
             )
 
-            if df.empty:
+        if df.empty:
+            if verbose:
                 print(f"[WARN] {name} 是空的，跳过")
-                continue
+            return None
 
-            # 1）找出文本列，统一命名为 content
-            text_col = _guess_text_col(df)
-            df["content"] = df[text_col].astype(str).fillna("")
+        # 1）找出文本列，统一命名为 content
+        text_col = _guess_text_col(df)
+        df["content"] = df[text_col].astype(str).fillna("")
 
-            # 2）机型字段 -> model_std
-            model_col = _guess_model_col(df)
-            if model_col:
-                df["model_std"] = df[model_col].astype(str)
-            else:
-                df["model_std"] = "unknown"
+        # 2）机型字段 -> model_std
+        model_col = _guess_model_col(df)
+        if model_col:
+            df["model_std"] = df[model_col].astype(str)
+        else:
+            df["model_std"] = "unknown"
 
-            # 3）平台 / 来源（内部 ID + 展示名）
-            df["source"] = source_id
-            df["platform_std"] = PLATFORM_LABELS.get(source_id, PLATFORM_LABELS["unknown"])
+        # 3）平台 / 来源（内部 ID + 展示名）
+        df["source"] = source_id
+        df["platform_std"] = PLATFORM_LABELS.get(source_id, PLATFORM_LABELS["unknown"])
 
-            # 4）标记内容类型：原文 / 评论
-            df["content_type"] = df.apply(guess_content_type, axis=1)
+        # 4）标记内容类型：原文 / 评论
+        df["content_type"] = df.apply(guess_content_type, axis=1)
 
-            # 保留原始文件名，方便排查
-            df["source_file"] = name
+        # 保留原始文件名，方便排查
+        df["source_file"] = name
+        return df
 
-            dfs.append(df)
-
-        if not dfs:
-            raise RuntimeError("没有找到任何 CSV 数据，请检查 CSV_FILES 配置是否正确。")
-
-        # 合并所有数据
-        self.df: pd.DataFrame = pd.concat(dfs, ignore_index=True)
-        self.df["content"] = self.df["content"].fillna("")
+    def _read_segments(self, name: str) -> Optional[pd.DataFrame]:
+        """
+        从段文件读出整个 CSV（段文件之后新追加的行从 CSV 尾部补上），记下读到的偏移；
+        没有可用的段文件时返回 None。取值的类型推断 / 缺失值处理交给 pandas 的 TextParser，与 read_csv 相同
+        """
+        found = segment_store.SegmentStore(DATA_DIR / name).read()
+        if found is None:
+            return None
+        table, tail, cursor = found
+        layout = segment_store.Layout.of(cursor.fieldnames)
+        names = list(dict.fromkeys(cursor.fieldnames))
+        columns = [table.column(layout.column_of(col)).to_pylist() for col in names]
+        records = [list(values) for values in zip(*columns)]
+        records += [[row.get(col) for col in names] for row in tail]
+        self._source_offsets[name] = (cursor.header_bytes, cursor.offset, cursor.pending)
+        # read_csv 会去掉首列列名的 BOM
+        return TextParser([[col.lstrip("\ufeff") for col in names]] + records, header=0).read()
+
+    @staticmethod
+    def _label(df: pd.DataFrame) -> pd.DataFrame:
+        """情感打标 + 品牌归一"""
+        df["content"] = df["content"].fillna("")
 
         # 简单情感打标
         print("[INDEX] 开始打情感标签 …")
-        self.df["sentiment"] = self.df["content"].apply(simple_sentiment)
+        df["sentiment"] = SENTIMENT_LEXICON.labels_many(df["content"].tolist())
 
         # 粗糙品牌归一
-        self.df["brand_id"] = self.df["model_std"].apply(extract_brand)
+        df["brand_id"] = df["model_std"].apply(extract_brand)
+        return df
+
+    @staticmethod
+    def _categorize(df: pd.DataFrame) -> pd.DataFrame:
+        """CATEGORICAL_COLS 转成 category；类别按首次出现的顺序，value_counts 并列时的先后与 object 列相同"""
+        for col in CATEGORICAL_COLS:
+            values = df[col].astype(object)
+            df[col] = pd.Categorical(values, categories=pd.unique(values.dropna()))
+        return df
+
+    def _set_matrix(self, matrix) -> None:
+        self.matrix = matrix
+        # 倒排形式：第 t 行是包含词项 t 的文档及其权重（即 matrix 的 CSC 转置成 CSR）
+        self.postings = self.matrix.T.tocsr()
+
+    def _cached(self, name: str, build: Callable[[], Any]) -> Any:
+        """当前代数据上 build() 的结果，同一代只算一次（内部用，返回的是缓存对象本身）"""
+        cached = self._memo.get(name)
+        if cached is None or cached[0] != self.generation:
+            cached = (self.generation, build())
+            self._memo[name] = cached
+        return cached[1]
+
+    def _memoized(self, name: str, build: Callable[[], Any]) -> Any:
+        """同 _cached，但返回副本，调用方可以随意修改"""
+        return copy.deepcopy(self._cached(name, build))
+
+    # ---------- 增量更新 ----------
+
+    def refresh(self) -> int:
+        """
+        重新检查 CSV_FILES，把每个文件新追加的行（以及新出现的文件）并入索引，返回新增行数。
+        增量模式只对新行分词、更新 df，已有行的权重按新的 IDF 重新计算；
+        非增量模式下整体重新 fit。某个文件变短（被重写）时整体重建。
+        """
+        for name, (_, offset, _) in self._source_offsets.items():
+            path = DATA_DIR / name
+            if not path.exists() or path.stat().st_size < offset:
+                print(f"[INDEX] {name} 被删除或重写，整体重建索引")
+                self.__init__(incremental=self.incremental, segments=self.segments)
+                return len(self.df)
 
-        print(f"[INDEX] 已加载评论 {len(self.df)} 条，开始构建 TF-IDF 向量……")
+        new_frames: List[pd.DataFrame] = []
+        for name in CSV_FILES:
+            df = self._read_source(name, verbose=False)
+            if df is None:
+                continue
+            new_frames.append(df)
+            if DATA_DIR / name not in self.source_paths:
+                self.source_paths.append(DATA_DIR / name)
+
+        if not new_frames:
+            return 0
+
+        added = self._label(pd.concat(new_frames, ignore_index=True))
+        self.df = self._categorize(pd.concat([self.df, added], ignore_index=True))
+        self.generation += 1
+
+        if self.incremental:
+            self.vectorizer.partial_fit(added["content"])
+            self._set_matrix(self.vectorizer.matrix)
+        else:
+            self.vectorizer = TfidfVectorizer(**TFIDF_PARAMS)
+            self._set_matrix(self.vectorizer.fit_transform(self.df["content"]))
+        # 语义索引对应的是旧语料，下次用到时重新加载 / 构建（源文件指纹已经变了）
+        self.semantic = None
+        print(f"[INDEX] 追加 {len(added)} 条，共 {len(self.df)} 条 ✅")
+        return len(added)
+
+    def check_consistency(self) -> Dict[str, Any]:
+        """增量模式：与对当前全部文本批量 fit 的 TfidfVectorizer 逐元素比较（见 incremental_tfidf）"""
+        if not self.incremental:
+            raise RuntimeError("只有 incremental=True 的索引需要一致性校验")
+        return check_against_batch(self.vectorizer, self.df["content"].tolist())
 
-        # 构建 TF-IDF 向量
-        self.vectorizer = TfidfVectorizer(
-            max_features=50000,
-            max_df=0.9,
-            min_df=3,
-        )
-        self.matrix = self.vectorizer.fit_transform(self.df["content"])
+    # ---------- 给 Copilot 用的检索 ----------
 
-        print("[INDEX] 向量化完成 ✅")
+    def enable_semantic(
+        self,
+        path: Optional[Path] = SEMANTIC_INDEX_PATH,
+        params: SemanticParams = SemanticParams(),
+    ) -> SemanticIndex:
+        """
+        加载语义索引：path 下的文件与当前源数据、参数一致时直接 mmap 读取，
+        否则重新构建并写回（path 为 None 时只在内存里构建）。
+        """
+        semantic = SemanticIndex.load(path, self.source_paths, params) if path is not None else None
+        if semantic is None:
+            print(f"[INDEX] 构建语义索引（{params.dims} 维）……")
+            semantic = SemanticIndex.build(self.df["content"].tolist(), params)
+            if path is not None:
+                try:
+                    semantic.save(path, self.source_paths)
+                except OSError as e:
+                    print(f"[WARN] 语义索引写入失败（不影响检索）: {path}: {e}")
+        print(f"[INDEX] 语义索引就绪 ✅ {semantic.stats()}")
+        self.semantic = semantic
+        return semantic
+
+    def search_many(
+        self,
+        queries: Sequence[str],
+        k: int = 30,
+        mode: str = "tfidf",
+        nprobe: Optional[int] = None,
+    ) -> List[SearchHits]:
+        """
+        批量检索：所有查询一次向量化、一次稀疏矩阵乘法（查询 x 倒排表），
+        每条查询返回最相关的至多 k 个文档的行号和余弦相似度。
+        只返回和查询至少有一个共同词项（分数 > 0）的文档，所以可能不足 k 条。
+        mode="semantic" 时走语义索引，nprobe 为探测的簇数（越大召回越高、越慢）。
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"未知的检索方式: {mode}，可选 {SEARCH_MODES}")
+        if not len(queries):
+            return []
+        if mode == "semantic":
+            semantic = self.semantic or self.enable_semantic()
+            return [SearchHits(rows, scores) for rows, scores in semantic.search_many(queries, k, nprobe)]
+        scores = (self.vectorizer.transform(list(queries)) @ self.postings).tocsr()
+        results: List[SearchHits] = []
+        for i in range(scores.shape[0]):
+            start, end = scores.indptr[i], scores.indptr[i + 1]
+            rows = scores.indices[start:end].astype(np.int64)
+            sims = scores.data[start:end]
+            positive = sims > 0
+            results.append(_top_k(rows[positive], sims[positive], k))
+        return results
 
-    # ---------- 给 Copilot 用的检索 ----------
+    def search_ids(
+        self, query: str, k: int = 30, mode: str = "tfidf", nprobe: Optional[int] = None
+    ) -> SearchHits:
+        """单条查询，见 search_many"""
+        return self.search_many([query], k, mode, nprobe)[0]
 
-    def search(self, query: str, k: int = 30) -> pd.DataFrame:
+    def search(
+        self, query: str, k: int = 30, mode: str = "tfidf", nprobe: Optional[int] = None
+    ) -> pd.DataFrame:
         """
         用自然语言 query 搜索最相关的 k 条评论，
-        返回一个带 score 的 DataFrame。
+        返回一个带 score 的 DataFrame（只包含命中的这几行）。
         """
-        q_vec = self.vectorizer.transform([query])
-        sims = cosine_similarity(q_vec, self.matrix)[0]
-        idx = sims.argsort()[::-1][:k]
-        results = self.df.iloc[idx].copy()
-        results["score"] = sims[idx]
+        hits = self.search_ids(query, k, mode, nprobe)
+        results = self.df.iloc[hits.rows].copy()
+        results["score"] = hits.scores
         return results
 
     # ---------- 品牌概览接口，给品牌表用 ----------
@@ -288,39 +548,45 @@ class PhoneFeedbackIndex:
           ...
         ]
         """
-        df = self.df.copy()
+        return self._memoized("brand_insights", self._build_brand_insights)
+
+    def _build_brand_insights(self) -> List[Dict[str, Any]]:
+        """
+        一次 groupby 按 (品牌, 机型, 平台, 情感) 计数，之后只在这张小表上汇总，
+        不再对每个品牌重新筛一遍全表。
+        sort=False 时分组按首次出现的顺序排列，机型并列时与原来 value_counts 的先后一致。
+        """
+        counts = self.df.groupby(
+            ["brand_id", "model_std", "source", "sentiment"], sort=False, observed=True
+        ).size()
 
         # 品牌 x 情感 分布
-        grouped = df.groupby("brand_id")["sentiment"].value_counts().unstack(fill_value=0)
+        sentiments = counts.groupby(level=["brand_id", "sentiment"], observed=True).sum().unstack(fill_value=0)
+
+        # 代表机型：按出现次数排序取前 3 个（稳定排序，并列时先出现的在前）
+        model_counts = counts.groupby(level=["brand_id", "model_std"], sort=False, observed=True).sum()
+        model_counts = model_counts.sort_values(ascending=False, kind="stable")
+        top_models: Dict[Any, List[str]] = {}
+        for brand, model in model_counts.groupby(level="brand_id", sort=False, observed=True).head(3).index:
+            top_models.setdefault(brand, []).append(model)
+
+        # 覆盖平台：用展示名去重
+        platform_labels: Dict[Any, set] = {}
+        for brand, pid in counts.index.droplevel(["model_std", "sentiment"]).unique():
+            platform_labels.setdefault(brand, set()).add(
+                PLATFORM_LABELS.get(pid, PLATFORM_LABELS["unknown"])
+            )
 
         results: List[Dict[str, Any]] = []
 
-        for brand in grouped.index:
-            brand_mask = df["brand_id"] == brand
-            brand_df = df[brand_mask]
-
-            pos = int(grouped.loc[brand].get("pos", 0))
-            neg = int(grouped.loc[brand].get("neg", 0))
-            neu = int(grouped.loc[brand].get("neu", 0))
+        for brand, row in sentiments.iterrows():
+            pos = int(row.get("pos", 0))
+            neg = int(row.get("neg", 0))
+            neu = int(row.get("neu", 0))
             total = pos + neg + neu
             if total == 0:
                 continue
 
-            positive_rate = float(pos / total) if total > 0 else 0.0
-
-            # 代表机型：按出现次数排序取前 3 个
-            top_models_series = brand_df["model_std"].value_counts().head(3)
-            top_models: List[str] = top_models_series.index.tolist()
-
-            # 覆盖平台：用展示名去重
-            platform_ids = brand_df["source"].dropna().unique().tolist()
-            platform_labels = [
-                PLATFORM_LABELS.get(pid, PLATFORM_LABELS["unknown"])
-                for pid in platform_ids
-            ]
-            # 去重并稳定排序
-            platform_labels = sorted(set(platform_labels))
-
             item: Dict[str, Any] = {
                 "brand_id": brand,
                 "brand_name": brand,
@@ -328,9 +594,10 @@ class PhoneFeedbackIndex:
                 "pos": pos,
                 "neg": neg,
                 "neu": neu,
-                "positive_rate": positive_rate,
-                "top_models": top_models,
-                "platforms": platform_labels,
+                "positive_rate": float(pos / total),
+                "top_models": top_models.get(brand, []),
+                # 去重并稳定排序
+                "platforms": sorted(platform_labels.get(brand, ())),
             }
             results.append(item)
 
@@ -354,26 +621,33 @@ class PhoneFeedbackIndex:
         ]
         可以按 platform 过滤（bilibili / reddit / gsmarena），None 表示全部。
         """
-        df = self.df[self.df["brand_id"] == brand_id].copy()
-        if df.empty:
+        rows = self._cached("brand_rows", self._build_brand_rows).get(brand_id)
+        if rows is None:
             return []
 
-        # 平台过滤（按内部 ID）
+        # 平台过滤（按内部 ID，比较 category 编码）
         if platform and platform != "all":
-            df = df[df["source"] == platform]
-            if df.empty:
+            sources = self.df["source"].cat
+            if platform not in sources.categories:
+                return []
+            code = sources.categories.get_loc(platform)
+            rows = rows[sources.codes.to_numpy()[rows] == code]
+            if not len(rows):
                 return []
 
         # 找一个时间字段
         time_col: Optional[str] = None
         for col in CANDIDATE_TIME_COLS:
-            if col in df.columns:
+            if col in self.df.columns:
                 time_col = col
                 break
 
-        rows: List[Dict[str, Any]] = []
+        # 只取这几行，按列取出后再拼成字典
+        records = self.df.iloc[rows[:limit]].to_dict("records")
 
-        for _, row in df.head(limit).iterrows():
+        items: List[Dict[str, Any]] = []
+
+        for row in records:
             if time_col:
                 published_at = row.get(time_col)
             else:
@@ -394,9 +668,13 @@ class PhoneFeedbackIndex:
                 "sentiment": row.get("sentiment", "neu"),
                 "raw_text": str(raw_text),
             }
-            rows.append(item)
+            items.append(item)
+
+        return items
 
-        return rows
+    def _build_brand_rows(self) -> Dict[Any, np.ndarray]:
+        """品牌 -> 该品牌所有行的位置下标（升序）"""
+        return self.df.groupby("brand_id", observed=True).indices
 
     # ---------- 全局统计，用于头部 dashboard ----------
 
@@ -409,6 +687,9 @@ class PhoneFeedbackIndex:
         - 原文数量 / 评论数量 + 各平台分布
         - 一小批 B 站原文链接样本
         """
+        return self._memoized("global_stats", self._build_global_stats)
+
+    def _build_global_stats(self) -> Dict[str, Any]:
         df = self.df
 
         # 平台
@@ -426,28 +707,27 @@ class PhoneFeedbackIndex:
         brands = sorted(df["brand_id"].dropna().unique().tolist())
         models = sorted(df["model_std"].dropna().unique().tolist())
 
-        # 原文 / 评论统计
-        original_mask = df["content_type"] == "original"
-        comment_mask = df["content_type"] == "comment"
+        # 原文 / 评论统计：一次分组得到 (内容类型, 平台) 的条数
+        by_type = df.groupby(["content_type", "source"], observed=True).size()
+        type_totals = by_type.groupby(level="content_type").sum()
 
-        original_count = int(original_mask.sum())
-        comment_count = int(comment_mask.sum())
-
-        def _count_by_platform(mask):
-            if mask.sum() == 0:
+        def _count_by_platform(content_type: str) -> Dict[str, int]:
+            if content_type not in type_totals.index:
                 return {}
-            sub = df[mask]
-            s = sub.groupby("source")["content"].count()
+            s = by_type.loc[content_type]
             return {pid: int(s.get(pid, 0)) for pid in platform_ids}
 
-        original_by_platform = _count_by_platform(original_mask)
-        comment_by_platform = _count_by_platform(comment_mask)
+        original_count = int(type_totals.get("original", 0))
+        comment_count = int(type_totals.get("comment", 0))
+
+        original_by_platform = _count_by_platform("original")
+        comment_by_platform = _count_by_platform("comment")
 
         # 一些 B 站原文链接样本（方便在卡片里展示）
-        bilibili_mask = (df["source"] == "bilibili") & original_mask
         url_col = "url" if "url" in df.columns else None
         bilibili_urls: List[str] = []
         if url_col:
+            bilibili_mask = (df["source"] == "bilibili") & (df["content_type"] == "original")
             bilibili_urls = (
                 df.loc[bilibili_mask, url_col]
                 .dropna()
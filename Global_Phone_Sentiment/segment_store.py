@@ -0,0 +1,371 @@
+"""
+segment_store.py
+
+爬下来的 CSV 的列式副本：每个 CSV 对应一组只追加、写完不再修改的 Arrow IPC 段文件（可选依赖 pyarrow）。
+CSV 仍然是唯一的数据源，段文件只是它已解析部分的镜像，所以随时可以删掉重建：
+
+- 目录：<CSV 所在目录>/.segments/<CSV 文件名>/，里面是 seg-<首行号>-<行数>.arrow 和 manifest.json；
+- manifest 里记着段文件列表和一个 CsvCursor（段文件覆盖到 CSV 的哪个字节、表头、编码），
+  sync() 用 csv_source.read_csv_tail 从这个位置解析新追加的完整行，写成一个新段；
+  段文件只收以换行结尾的完整记录（写完不再修改），爬虫正写到一半的记录留给下一次 sync；
+  CSV 被重写 / 截断（表头字节对不上、文件变短）时整体重建；
+- 统一的列：CORE_COLUMNS 固定在最前面（platform, source_id, data_type, published_at, raw_text ...，
+  各平台 CSV 里没有的就是 null；data_type / published_at 缺失时取 ALIASES 里的同义列），
+  其余原始列原样放在 "x:<列名>" 里。schema 元数据保存 CSV 的原始表头，
+  读回来的记录与 read_csv_full / read_csv_frame 逐格一致（清洗结果不变）；
+- 读：pyarrow.memory_map + IPC 文件格式（不压缩），段文件的列缓冲区直接映射，不拷贝、不解析；
+  段文件之后 CSV 新追加的部分照常从 CSV 尾部解析，所以段文件稍微落后也能用；
+- 合并（compact）：爬虫每个检查点写一个小段，段数超过 COMPACT_THRESHOLD 时 sync() 自动把全部段
+  合成一个（先写新段、再原子替换 manifest、最后删旧文件），也可以手动运行。
+
+运行方式（在 Global_Phone_Sentiment 目录）：
+    python segment_store.py sync data_bilibili_v2.csv ../data_reddit_2111.csv ...
+    python segment_store.py compact <同上>
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import shutil
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+from csv_source import CsvCursor, read_csv_full, read_csv_tail
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:  # pyarrow 是可选依赖：没装时不写也不读段文件，一律走 CSV
+    pa = None
+    ipc = None
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger("phone_feedback")
+
+AVAILABLE = pa is not None
+
+SEGMENTS_DIRNAME = ".segments"
+MANIFEST_NAME = "manifest.json"
+# 2：第一个段不再包含文件末尾没写完的记录，旧版本的段文件可能冻结了半行，一律重建
+MANIFEST_VERSION = 2
+
+# 统一 schema 的固定列（都是可空字符串）
+CORE_COLUMNS: Tuple[str, ...] = (
+    "platform",
+    "source_id",
+    "parent_source_id",
+    "data_type",
+    "brand_id",
+    "phone_model_id",
+    "device_name",
+    "search_kw",
+    "url",
+    "author",
+    "lang",
+    "published_at",
+    "raw_text",
+    "cleaned_text",
+    "created_at",
+)
+
+# 固定列在 CSV 里没有同名列时，按顺序取第一个存在的同义列
+ALIASES: Dict[str, Tuple[str, ...]] = {
+    "data_type": ("source_type",),
+    "published_at": ("pubtime_str", "time_str", "comment_time"),
+}
+
+EXTRA_PREFIX = "x:"
+
+# 段数达到这个值时 sync() 顺便合并
+COMPACT_THRESHOLD = 32
+
+# 每个 record batch 的最大行数
+_BATCH_ROWS = 65536
+
+
+@dataclass(frozen=True)
+class Layout:
+    """一个 CSV 表头在统一 schema 里的排布"""
+
+    fieldnames: Tuple[str, ...]
+    direct: Dict[str, str]  # 原始列名 -> 存放它的固定列（同名列，首列名可能带 BOM）
+    derived: Dict[str, str]  # 固定列 -> 取值的同义原始列（该列同时也在 x: 列里）
+    extras: Tuple[str, ...]  # 放在 "x:<列名>" 里的原始列
+
+    @classmethod
+    def of(cls, fieldnames: Sequence[str]) -> "Layout":
+        names = tuple(fieldnames)
+        direct: Dict[str, str] = {}
+        extras: List[str] = []
+        for raw in dict.fromkeys(names):
+            name = raw.lstrip("\ufeff")
+            if name in CORE_COLUMNS and name not in direct.values():
+                direct[raw] = name
+            else:
+                extras.append(raw)
+        present = {raw.lstrip("\ufeff"): raw for raw in extras}
+        derived: Dict[str, str] = {}
+        for col, aliases in ALIASES.items():
+            if col in direct.values():
+                continue
+            alias = next((present[a] for a in aliases if a in present), None)
+            if alias is not None:
+                derived[col] = alias
+        return cls(fieldnames=names, direct=direct, derived=derived, extras=tuple(extras))
+
+    def schema(self) -> "pa.Schema":
+        fields = [pa.field(col, pa.string()) for col in CORE_COLUMNS]
+        fields += [pa.field(EXTRA_PREFIX + raw, pa.string()) for raw in self.extras]
+        return pa.schema(fields, metadata={"fieldnames": json.dumps(list(self.fieldnames), ensure_ascii=False)})
+
+    def column_of(self, raw: str) -> str:
+        """原始列在段文件里的列名"""
+        return self.direct[raw] if raw in self.direct else EXTRA_PREFIX + raw
+
+    def to_table(self, rows: List[Dict]) -> "pa.Table":
+        source_of = {col: raw for raw, col in self.direct.items()}
+        source_of.update(self.derived)
+        arrays = []
+        for col in CORE_COLUMNS:
+            raw = source_of.get(col)
+            values = [row.get(raw) for row in rows] if raw is not None else [None] * len(rows)
+            arrays.append(pa.array(values, type=pa.string()))
+        arrays += [pa.array([row.get(raw) for row in rows], type=pa.string()) for raw in self.extras]
+        return pa.Table.from_arrays(arrays, schema=self.schema())
+
+    def to_rows(self, table: "pa.Table") -> List[Dict]:
+        """与 csv.DictReader 读出来的记录一致（缺失的格子是 None，字段比表头多的部分不保留）"""
+        names = list(dict.fromkeys(self.fieldnames))
+        columns = [table.column(self.column_of(raw)).to_pylist() for raw in names]
+        return [dict(zip(names, values)) for values in zip(*columns)]
+
+    def to_frame(self, table: "pa.Table") -> "pd.DataFrame":
+        """与 read_csv_frame 读出来的 DataFrame 一致（全是字符串列，缺失的格子是空串）"""
+        import pandas as pd
+
+        names = list(dict.fromkeys(self.fieldnames))
+        data = {}
+        for raw in names:
+            column = table.column(self.column_of(raw))
+            if column.null_count:
+                column = column.fill_null("")
+            data[raw] = column.to_pandas()
+        return pd.DataFrame(data, columns=names)
+
+
+def segment_dir(csv_path: Path) -> Path:
+    return csv_path.parent / SEGMENTS_DIRNAME / csv_path.name
+
+
+class SegmentStore:
+    def __init__(self, csv_path: Path) -> None:
+        self.csv_path = Path(csv_path)
+        self.dir = segment_dir(self.csv_path)
+
+    # ---------- manifest ----------
+
+    def manifest(self) -> Optional[Dict]:
+        path = self.dir / MANIFEST_NAME
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("段文件 manifest 损坏，将重建: %s: %s", path, e)
+            return None
+        if data.get("version") != MANIFEST_VERSION:
+            return None
+        return data
+
+    def _cursor(self, manifest: Dict) -> CsvCursor:
+        # 路径以当前 CSV 为准（目录整体搬走后仍然可用）
+        return replace(CsvCursor.from_dict(manifest["cursor"]), path=self.csv_path)
+
+    def _write_manifest(self, cursor: CsvCursor, segments: List[str]) -> None:
+        data = {"version": MANIFEST_VERSION, "cursor": cursor.to_dict(), "segments": segments}
+        tmp = self.dir / (MANIFEST_NAME + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.dir / MANIFEST_NAME)
+
+    def _write_segment(self, layout: Layout, table: "pa.Table", first_row: int) -> str:
+        name = f"seg-{first_row:09d}-{table.num_rows}.arrow"
+        tmp = self.dir / (name + ".tmp")
+        with pa.OSFile(str(tmp), "wb") as sink:
+            with ipc.new_file(sink, layout.schema()) as writer:
+                writer.write_table(table, max_chunksize=_BATCH_ROWS)
+        with open(tmp, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp, self.dir / name)
+        return name
+
+    def _remove_unlisted(self, keep: Sequence[str]) -> None:
+        """删掉 manifest 里已经不引用的段文件（已经打开 / 映射的读者不受影响）"""
+        keep = set(keep) | {MANIFEST_NAME}
+        for path in self.dir.iterdir():
+            if path.name not in keep:
+                path.unlink()
+
+    # ---------- 写 ----------
+
+    def sync(self) -> int:
+        """把 CSV 里段文件还没覆盖的完整行写成一个新段，返回新写入的行数"""
+        if not AVAILABLE:
+            raise RuntimeError("段文件需要 pyarrow：pip install pyarrow")
+        manifest = self.manifest()
+        tail = read_csv_tail(self._cursor(manifest)) if manifest is not None else None
+        if tail is None:
+            return self._rebuild()
+
+        rows, cursor = tail
+        if not rows:
+            return 0
+        layout = Layout.of(cursor.fieldnames)
+        first_row = cursor.rows - len(rows)
+        segments = manifest["segments"] + [self._write_segment(layout, layout.to_table(rows), first_row)]
+        self._write_manifest(cursor, segments)
+        if len(segments) >= COMPACT_THRESHOLD:
+            self.compact(last=COMPACT_THRESHOLD)
+        return len(rows)
+
+    def _rebuild(self) -> int:
+        """整个 CSV 重新转成一个段（第一次同步，或者 CSV 被重写了）"""
+        rows, cursor = read_csv_full(self.csv_path)
+        if cursor is None:
+            return 0
+        if cursor.pending:
+            # 文件末尾没有换行的最后一条可能还没写完：不写进段文件，游标停在它前面
+            rows = rows[: len(rows) - cursor.pending]
+            cursor = replace(cursor, rows=cursor.rows - cursor.pending, pending=0)
+        if self.dir.exists():
+            shutil.rmtree(self.dir)
+        self.dir.mkdir(parents=True)
+        segments: List[str] = []
+        if rows:
+            layout = Layout.of(cursor.fieldnames)
+            segments.append(self._write_segment(layout, layout.to_table(rows), 0))
+        self._write_manifest(cursor, segments)
+        logger.info("段文件已重建: %s，%d 行", self.dir, len(rows))
+        return len(rows)
+
+    def compact(self, last: Optional[int] = None) -> int:
+        """
+        把最新的 last 个段（默认全部）合成一个，返回合并掉的段数。
+        sync() 自动合并时只合并最新的 COMPACT_THRESHOLD 个小段，前面已经合并过的大段不再重写
+        """
+        manifest = self.manifest()
+        if manifest is None:
+            return 0
+        segments = manifest["segments"]
+        merge = segments[-last:] if last else segments
+        if len(merge) < 2:
+            return 0
+        table = self._read_segments(manifest, merge)
+        if table is None:
+            return 0
+        cursor = self._cursor(manifest)
+        first_row = int(merge[0].split("-")[1])
+        merged = self._write_segment(Layout.of(cursor.fieldnames), table.combine_chunks(), first_row)
+        keep = segments[: len(segments) - len(merge)] + [merged]
+        self._write_manifest(cursor, keep)
+        self._remove_unlisted(keep)
+        return len(merge)
+
+    # ---------- 读 ----------
+
+    def _read_segments(self, manifest: Dict, names: Optional[List[str]] = None) -> Optional["pa.Table"]:
+        """按顺序内存映射读出段文件（默认全部，零拷贝）；段文件缺失 / 损坏时返回 None"""
+        layout = Layout.of(self._cursor(manifest).fieldnames)
+        schema = layout.schema()
+        tables = []
+        try:
+            for name in manifest["segments"] if names is None else names:
+                table = ipc.open_file(pa.memory_map(str(self.dir / name), "r")).read_all()
+                if not table.schema.equals(schema, check_metadata=True):
+                    logger.warning("段文件 schema 与 manifest 不一致: %s", self.dir / name)
+                    return None
+                tables.append(table)
+        except (OSError, pa.ArrowInvalid) as e:
+            logger.warning("读取段文件失败: %s: %s", self.dir, e)
+            return None
+        return pa.concat_tables(tables) if tables else schema.empty_table()
+
+    def read(self) -> Optional[Tuple["pa.Table", List[Dict], CsvCursor]]:
+        """
+        (段文件的表, CSV 在段文件之后新追加的记录, 读到的游标)。
+        pyarrow 没装、还没有段文件、段文件读不了或 CSV 被重写时返回 None，调用方直接读 CSV。
+        """
+        if not AVAILABLE:
+            return None
+        manifest = self.manifest()
+        if manifest is None or not manifest["cursor"]["fieldnames"]:
+            return None
+        # 末尾没有换行的最后一条也读出来，与 read_csv_full 一致
+        tail = read_csv_tail(self._cursor(manifest), final=True)
+        if tail is None:
+            return None
+        table = self._read_segments(manifest)
+        if table is None:
+            return None
+        rows, cursor = tail
+        return table, rows, cursor
+
+
+def read_rows(csv_path: Path) -> Optional[Tuple[List[Dict], CsvCursor]]:
+    """read_csv_full 的段文件版本；不能用段文件时返回 None"""
+    found = SegmentStore(csv_path).read()
+    if found is None:
+        return None
+    table, tail, cursor = found
+    rows = Layout.of(cursor.fieldnames).to_rows(table)
+    rows.extend({name: row.get(name) for name in dict.fromkeys(cursor.fieldnames)} for row in tail)
+    logger.info("读取段文件成功: %s，%d 行（其中 CSV 尾部 %d 行）", csv_path.name, len(rows), len(tail))
+    return rows, cursor
+
+
+def read_frame(csv_path: Path) -> Optional[Tuple["pd.DataFrame", CsvCursor]]:
+    """read_csv_frame 的段文件版本；不能用段文件时返回 None"""
+    found = SegmentStore(csv_path).read()
+    if found is None:
+        return None
+    import pandas as pd
+
+    table, tail, cursor = found
+    layout = Layout.of(cursor.fieldnames)
+    frame = layout.to_frame(table)
+    if tail:
+        # 尾部记录同样只取表头里的列、缺失补空串，与 read_csv_frame 一致
+        names = list(frame.columns)
+        extra = pd.DataFrame([[row.get(name) or "" for name in names] for row in tail], columns=names, dtype=str)
+        frame = pd.concat([frame, extra], ignore_index=True)
+    logger.info("读取段文件成功: %s，%d 行（其中 CSV 尾部 %d 行）", csv_path.name, len(frame), len(tail))
+    return frame, cursor
+
+
+def sync(csv_path: Path) -> int:
+    return SegmentStore(csv_path).sync()
+
+
+def compact(csv_path: Path) -> int:
+    return SegmentStore(csv_path).compact()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description="CSV -> Arrow IPC 段文件：同步 / 合并")
+    parser.add_argument("action", choices=["sync", "compact"])
+    parser.add_argument("csv", nargs="+", type=Path)
+    args = parser.parse_args()
+    for csv_path in args.csv:
+        if args.action == "sync":
+            print(f"{csv_path}: 新写入 {sync(csv_path)} 行")
+        else:
+            print(f"{csv_path}: 合并了 {compact(csv_path)} 个段")
@@ -0,0 +1,240 @@
+"""
+semantic_index.py
+
+phone_index 的可选稠密向量检索（search(..., mode="semantic")）。
+TF-IDF 只能匹配完全相同的词，中英文混杂的评论（"续航" vs "battery"）互相搜不到，这里：
+
+- 向量化（纯 CPU、离线，不依赖预训练模型）：
+  字符 n-gram（char_wb）哈希成稀疏向量 -> 次线性 tf * idf -> L2 归一化
+  -> TruncatedSVD 投影到 dims 维（LSA）-> 再 L2 归一化。
+  经常出现在同一批评论里的 n-gram（不管中文还是英文）会落到相近的方向上；
+- ANN 用 IVF（倒排文件）：KMeans 把文档向量分成 nlist 个簇，向量按簇连续存放；
+  查询只计算离它最近的 nprobe 个簇里的文档（内积即余弦相似度）。
+  nprobe 越大召回越高、越慢，nprobe >= nlist 就是精确检索；
+- 持久化：idf、SVD 投影矩阵、簇中心、按簇排列的向量全是 numpy 数组，
+  复用 index_snapshot 的文件格式（mmap 零拷贝）；源文件指纹或参数变了就重建。
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.cluster import KMeans
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+from index_snapshot import file_fingerprint, fingerprint_matches, read_snapshot, write_snapshot
+
+logger = logging.getLogger("phone_feedback")
+
+SNAPSHOT_KIND = "phone_index_semantic"
+
+_ARRAY_FIELDS = ("features", "idf", "components", "centroids", "list_starts", "ids", "vectors")
+
+
+@dataclass(frozen=True)
+class SemanticParams:
+    dims: int = 128  # LSA 维数
+    ngram_min: int = 2
+    ngram_max: int = 3
+    n_features: int = 1 << 20  # 哈希空间大小（只保留语料里出现过的列，不占内存）
+    min_df: int = 2  # 只在一条评论里出现过的 n-gram 不参与投影
+    nlist: int = 0  # 簇数，0 = 自动（约 sqrt(文档数)）
+    nprobe: int = 8  # 默认每条查询探测的簇数
+    seed: int = 0
+
+    def to_meta(self) -> Dict:
+        return asdict(self)
+
+
+def _hashing_vectorizer(params: SemanticParams) -> HashingVectorizer:
+    return HashingVectorizer(
+        analyzer="char_wb",
+        ngram_range=(params.ngram_min, params.ngram_max),
+        n_features=params.n_features,
+        alternate_sign=False,
+        norm=None,
+    )
+
+
+@dataclass
+class SemanticIndex:
+    params: SemanticParams
+    features: np.ndarray  # int64，保留下来的哈希列（升序）
+    idf: np.ndarray  # float32，与 features 对应
+    components: np.ndarray  # float32 (dims, len(features))，SVD 投影
+    centroids: np.ndarray  # float32 (nlist, dims)，已归一化
+    list_starts: np.ndarray  # int64 (nlist + 1)，第 c 个簇是 vectors[list_starts[c]:list_starts[c + 1]]
+    ids: np.ndarray  # int64，vectors 每一行对应的原始文档行号
+    vectors: np.ndarray  # float32 (n_docs, dims)，按簇排列
+    build_ms: float = 0.0
+    source: str = "build"  # build / snapshot
+    _hasher: HashingVectorizer = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._hasher = _hashing_vectorizer(self.params)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    # ---------- 向量化 ----------
+
+    def _tfidf(self, texts: Sequence[str]) -> sparse.csr_matrix:
+        return _weighted(self._hasher.transform(texts), self.features, self.idf)
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """文本 -> 归一化的 dims 维向量；没有任何已知 n-gram 的文本得到零向量"""
+        dense = np.asarray(self._tfidf(texts) @ self.components.T, dtype=np.float32)
+        return normalize(dense).astype(np.float32, copy=False)
+
+    # ---------- 构建 / 持久化 ----------
+
+    @classmethod
+    def build(cls, texts: Sequence[str], params: SemanticParams = SemanticParams()) -> "SemanticIndex":
+        started = time.perf_counter()
+        counts = _hashing_vectorizer(params).transform(texts).tocsc()
+        n_docs = counts.shape[0]
+        df = np.diff(counts.indptr)
+        features = np.flatnonzero(df >= params.min_df).astype(np.int64)
+        idf = (np.log((1 + n_docs) / (1 + df[features])) + 1).astype(np.float32)
+        tfidf = _weighted(counts.tocsr(), features, idf)
+
+        dims = max(1, min(params.dims, len(features) - 1, n_docs - 1))
+        svd = TruncatedSVD(n_components=dims, random_state=params.seed)
+        doc_vectors = normalize(svd.fit_transform(tfidf)).astype(np.float32)
+        components = svd.components_.astype(np.float32)
+
+        nlist = params.nlist or max(1, int(round(math.sqrt(n_docs))))
+        nlist = max(1, min(nlist, n_docs))
+        kmeans = KMeans(n_clusters=nlist, n_init=1, random_state=params.seed)
+        assign = kmeans.fit_predict(doc_vectors)
+        centroids = normalize(kmeans.cluster_centers_).astype(np.float32)
+
+        ids = np.argsort(assign, kind="stable").astype(np.int64)
+        list_starts = np.searchsorted(assign[ids], np.arange(nlist + 1)).astype(np.int64)
+        return cls(
+            params=params,
+            features=features,
+            idf=idf,
+            components=components,
+            centroids=centroids,
+            list_starts=list_starts,
+            ids=ids,
+            vectors=doc_vectors[ids],
+            build_ms=(time.perf_counter() - started) * 1000,
+        )
+
+    def save(self, path: Path, sources: Sequence[Path]) -> int:
+        return write_snapshot(
+            path,
+            meta={"kind": SNAPSHOT_KIND, "params": self.params.to_meta()},
+            arrays={name: getattr(self, name) for name in _ARRAY_FIELDS},
+            fingerprint=file_fingerprint(sources),
+        )
+
+    @classmethod
+    def load(
+        cls, path: Path, sources: Sequence[Path], params: SemanticParams = SemanticParams()
+    ) -> Optional["SemanticIndex"]:
+        """文件不存在、参数不同或源文件变了时返回 None"""
+        started = time.perf_counter()
+        snapshot = read_snapshot(path)
+        if snapshot is None:
+            return None
+        meta = snapshot.meta
+        if meta.get("kind") != SNAPSHOT_KIND or meta.get("params") != params.to_meta():
+            logger.info("语义索引参数已变化，重新构建: %s", path)
+            return None
+        if not fingerprint_matches(meta["fingerprint"], sources):
+            logger.info("源数据已变化，语义索引失效: %s", path)
+            return None
+        try:
+            arrays = {name: snapshot.arrays[name] for name in _ARRAY_FIELDS}
+        except KeyError as e:
+            logger.warning("语义索引快照不完整，重新构建: %s", e)
+            return None
+        return cls(
+            params=params,
+            build_ms=(time.perf_counter() - started) * 1000,
+            source="snapshot",
+            **arrays,
+        )
+
+    # ---------- 查询 ----------
+
+    def search_many(
+        self, queries: Sequence[str], k: int = 30, nprobe: Optional[int] = None
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        每条查询返回 (行号, 余弦相似度)，按相似度降序（同分按行号），至多 k 个，只含相似度 > 0 的文档。
+        nprobe 不传时用 params.nprobe。
+        """
+        if not len(queries):
+            return []
+        nprobe = max(1, min(nprobe or self.params.nprobe, self.nlist))
+        query_vectors = self.embed(queries)
+        probes = query_vectors @ self.centroids.T
+        if nprobe < self.nlist:
+            probes = np.argpartition(-probes, nprobe - 1, axis=1)[:, :nprobe]
+        else:
+            probes = np.broadcast_to(np.arange(self.nlist), probes.shape)
+
+        results: List[Tuple[np.ndarray, np.ndarray]] = []
+        for query, lists in zip(query_vectors, probes):
+            if not query.any():
+                results.append((np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)))
+                continue
+            slots = np.concatenate(
+                [np.arange(self.list_starts[c], self.list_starts[c + 1]) for c in lists]
+            )
+            scores = self.vectors[slots] @ query
+            positive = scores > 0
+            slots, scores = slots[positive], scores[positive]
+            if k < len(slots):
+                keep = np.argpartition(-scores, k - 1)[:k]
+                slots, scores = slots[keep], scores[keep]
+            rows = self.ids[slots]
+            order = np.lexsort((rows, -scores))
+            results.append((rows[order], scores[order]))
+        return results
+
+    def stats(self) -> Dict:
+        return {
+            "docs": len(self),
+            "dims": int(self.vectors.shape[1]) if self.vectors.ndim == 2 else 0,
+            "features": int(len(self.features)),
+            "nlist": self.nlist,
+            "nprobe": self.params.nprobe,
+            "source": self.source,
+            "build_ms": round(self.build_ms, 1),
+            "nbytes": int(sum(getattr(self, name).nbytes for name in _ARRAY_FIELDS)),
+        }
+
+
+def _weighted(counts: sparse.csr_matrix, features: np.ndarray, idf: np.ndarray) -> sparse.csr_matrix:
+    """
+    哈希计数 -> 只保留 features 里的列（按 features 的顺序重新编号）
+    -> 次线性 tf（1 + log tf）* idf -> 行 L2 归一化
+    """
+    counts = counts.tocoo()
+    pos = np.searchsorted(features, counts.col)
+    pos = np.minimum(pos, max(len(features) - 1, 0))
+    keep = features[pos] == counts.col if len(features) else np.zeros(len(pos), dtype=bool)
+    data = (1 + np.log(counts.data[keep])) * idf[pos[keep]]
+    weighted = sparse.csr_matrix(
+        (data.astype(np.float32), (counts.row[keep], pos[keep])),
+        shape=(counts.shape[0], len(features)),
+    )
+    return normalize(weighted)
@@ -0,0 +1,283 @@
+"""
+sentiment_lexicon.py
+
+规则情感打标共用的关键词引擎：把正向 / 负向关键词（中英文混合）编译成一个
+Aho-Corasick 自动机，一次扫描文本就找出所有命中的关键词，
+不再对每个关键词各做一次 `kw in text`。
+
+计数口径与原来的 `sum(1 for kw in words if kw in text)` 完全一致：
+- 每个极性统计的是「命中了几个不同的关键词」，同一个词出现多次只算一次；
+- 关键词之间可以重叠 / 互相包含（"recommend" 与 "highly recommend"、"差" 与 "差评"），都会各自计数。
+
+main 的清洗（_explicit_sentiment 推断不出的行）和 phone_index.simple_sentiment 各自用自己的词表建一个 SentimentLexicon。
+
+两种扫描方式：
+- counts / label / score：单条文本，逐字符走状态转移表；
+- counts_many / labels_many：整批文本，把状态转移表变成 numpy 矩阵，
+  所有文本按字符位置同步推进（每一步是一次向量化查表），加载 CSV 时整列打标用这个。
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+POSITIVE = 1
+NEGATIVE = 2
+
+# 批量扫描时长文本按这个长度切块（相邻块重叠「最长关键词 - 1」个字符，保证跨块的命中不丢）
+BATCH_CHUNK_CHARS = 128
+
+
+@dataclass(frozen=True)
+class LexiconHit:
+    """一次命中：text[start:end] == keyword（忽略大小写时是 text.lower() 上的位置）"""
+
+    start: int
+    end: int
+    keyword: str
+    polarity: str  # "pos" / "neg"（同时在两个词表里的词会各产生一条）
+
+
+@dataclass
+class SentimentScore:
+    pos: int = 0  # 命中的不同正向关键词个数
+    neg: int = 0  # 命中的不同负向关键词个数
+    hits: List[LexiconHit] = field(default_factory=list)
+
+    @property
+    def label(self) -> str:
+        if self.pos > self.neg:
+            return "pos"
+        if self.neg > self.pos:
+            return "neg"
+        return "neu"
+
+
+class SentimentLexicon:
+    """
+    正负向关键词的多模式匹配器。
+    构建时把 trie + 失败指针展开成完整的状态转移表（DFA），
+    扫描时每个字符只做一次字典查找，与关键词数量无关。
+    """
+
+    def __init__(
+        self,
+        positive: Iterable[str],
+        negative: Iterable[str],
+        ignore_case: bool = True,
+    ) -> None:
+        self.ignore_case = ignore_case
+
+        # 去重后的关键词 -> 极性位（POSITIVE | NEGATIVE）
+        polarity: Dict[str, int] = {}
+        for words, bit in ((positive, POSITIVE), (negative, NEGATIVE)):
+            for word in words:
+                word = word.lower() if ignore_case else word
+                if word:
+                    polarity[word] = polarity.get(word, 0) | bit
+        self.keywords: Tuple[str, ...] = tuple(polarity)
+        self.polarity: Tuple[int, ...] = tuple(polarity.values())
+
+        self._delta, self._out = self._compile(self.keywords)
+        self._steps = [d.get for d in self._delta]
+        self._build_tables()
+
+    @staticmethod
+    def _compile(
+        keywords: Tuple[str, ...],
+    ) -> Tuple[List[Dict[str, int]], Dict[int, Tuple[int, ...]]]:
+        # 1) trie
+        goto: List[Dict[str, int]] = [{}]
+        ends: List[List[int]] = [[]]
+        for kid, word in enumerate(keywords):
+            state = 0
+            for ch in word:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    ends.append([])
+                state = nxt
+            ends[state].append(kid)
+
+        # 2) 按层 BFS 求失败指针，同时把转移表展开成 DFA：
+        #    delta[s] = delta[fail[s]] 再用 s 自己的 trie 边覆盖
+        fail = [0] * len(goto)
+        delta: List[Dict[str, int]] = [dict(goto[0])] + [{} for _ in goto[1:]]
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                fail[nxt] = delta[fail[state]].get(ch, 0) if state else 0
+                ends[nxt].extend(ends[fail[nxt]])
+                queue.append(nxt)
+            if state:
+                delta[state] = {**delta[fail[state]], **goto[state]}
+
+        out = {state: tuple(kids) for state, kids in enumerate(ends) if kids}
+        return delta, out
+
+    def _build_tables(self) -> None:
+        """批量扫描用的 numpy 表：字符 -> 字符类、(状态, 字符类) -> 状态、状态 -> 命中的关键词"""
+        alphabet = sorted({ch for word in self.keywords for ch in word})
+        char_class = {ch: i + 1 for i, ch in enumerate(alphabet)}  # 0 = 不在任何关键词里的字符
+
+        # 码位 -> 字符类的查找表，最后一格留给超出范围的码位（字符类 0）
+        max_code = max((ord(ch) for ch in alphabet), default=0)
+        self._class_of = np.zeros(max_code + 2, dtype=np.int32)
+        for ch, cls in char_class.items():
+            self._class_of[ord(ch)] = cls
+
+        # 展平的转移表：下一个状态 = table[状态 * n_classes + 字符类]
+        self._n_classes = len(alphabet) + 1
+        table = np.zeros((len(self._delta), self._n_classes), dtype=np.int32)
+        for state, moves in enumerate(self._delta):
+            for ch, nxt in moves.items():
+                table[state, char_class[ch]] = nxt
+        self._table = table.ravel()
+
+        self._is_out = np.zeros(len(self._delta), dtype=bool)
+        out_ptr = np.zeros(len(self._delta) + 1, dtype=np.int64)
+        for state, kids in self._out.items():
+            self._is_out[state] = True
+            out_ptr[state + 1] = len(kids)
+        self._out_ptr = np.cumsum(out_ptr)
+        self._out_kids = np.array(
+            [kid for state in range(len(self._delta)) for kid in self._out.get(state, ())],
+            dtype=np.int64,
+        )
+        self._polarity_arr = np.array(self.polarity, dtype=np.int64)
+        self._max_keyword = max((len(w) for w in self.keywords), default=1)
+
+    def _prepare(self, text: str) -> str:
+        text = str(text or "")
+        return text.lower() if self.ignore_case else text
+
+    def counts(self, text: str) -> Tuple[int, int]:
+        """(命中的不同正向关键词数, 不同负向关键词数)；打标只需要这个，不收集位置"""
+        steps, out = self._steps, self._out
+        state = 0
+        found = set()
+        for ch in self._prepare(text):
+            state = steps[state](ch, 0)
+            if state in out:
+                found.update(out[state])
+        pos = neg = 0
+        for kid in found:
+            bits = self.polarity[kid]
+            pos += bits & POSITIVE
+            neg += (bits & NEGATIVE) >> 1
+        return pos, neg
+
+    def label(self, text: str) -> str:
+        """按命中数打标：pos / neg / neu"""
+        pos, neg = self.counts(text)
+        if pos > neg:
+            return "pos"
+        if neg > pos:
+            return "neg"
+        return "neu"
+
+    def counts_many(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        批量版 counts，返回 shape=(n, 2) 的数组：每行 (正向命中数, 负向命中数)。
+        结果与逐条调用 counts 完全一致。
+        """
+        result = np.zeros((len(texts), 2), dtype=np.int64)
+        if not len(texts) or not self.keywords:
+            return result
+
+        # 1) 切块：短文本整条一块，长文本切成重叠的块，owners 记录每块属于哪条文本
+        overlap = self._max_keyword - 1
+        stride = BATCH_CHUNK_CHARS - overlap
+        owners: List[int] = []
+        pieces: List[str] = []
+        for i, text in enumerate(texts):
+            text = self._prepare(text)
+            if len(text) <= BATCH_CHUNK_CHARS:
+                owners.append(i)
+                pieces.append(text)
+            else:
+                for start in range(0, len(text) - overlap, stride):
+                    owners.append(i)
+                    pieces.append(text[start:start + BATCH_CHUNK_CHARS])
+
+        # 2) 按长度倒序排好，第 p 步只推进长度 > p 的前 active[p] 块
+        lengths = np.fromiter((len(t) for t in pieces), dtype=np.int64, count=len(pieces))
+        order = np.argsort(-lengths, kind="stable")
+        owners_arr = np.asarray(owners, dtype=np.int64)[order]
+        lengths = lengths[order]
+        starts = np.zeros(len(pieces), dtype=np.int64)
+        np.cumsum(lengths[:-1], out=starts[1:])
+        joined = "".join(pieces[i] for i in order)
+        max_len = int(lengths[0]) if len(lengths) else 0
+        active = np.searchsorted(-lengths, -np.arange(max_len), side="left")
+
+        # 3) 字符 -> 字符类
+        codes = np.frombuffer(joined.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+        classes = self._class_of[np.minimum(codes, len(self._class_of) - 1)]
+
+        # 4) 所有块同步走自动机，记录落在输出状态上的 (块, 状态)
+        state = np.zeros(len(pieces), dtype=np.int32)
+        hit_pieces: List[np.ndarray] = []
+        hit_states: List[np.ndarray] = []
+        for p in range(max_len):
+            k = int(active[p])
+            moved = self._table[state[:k] * self._n_classes + classes[starts[:k] + p]]
+            state[:k] = moved
+            hits = np.flatnonzero(self._is_out[moved])
+            if len(hits):
+                hit_pieces.append(hits)
+                hit_states.append(moved[hits])
+        if not hit_pieces:
+            return result
+
+        # 5) 输出状态展开成关键词，按 (文本, 关键词) 去重后分极性计数
+        rows = owners_arr[np.concatenate(hit_pieces)]
+        states = np.concatenate(hit_states)
+        n_kids = self._out_ptr[states + 1] - self._out_ptr[states]
+        first = np.repeat(self._out_ptr[states], n_kids)
+        within = np.arange(int(n_kids.sum())) - np.repeat(np.cumsum(n_kids) - n_kids, n_kids)
+        kids = self._out_kids[first + within]
+        pairs = np.unique(np.repeat(rows, n_kids) * len(self.keywords) + kids)
+        rows, kids = np.divmod(pairs, len(self.keywords))
+        bits = self._polarity_arr[kids]
+        result[:, 0] = np.bincount(rows, weights=bits & POSITIVE, minlength=len(texts))
+        result[:, 1] = np.bincount(rows, weights=(bits & NEGATIVE) >> 1, minlength=len(texts))
+        return result
+
+    def labels_many(self, texts: Sequence[str]) -> List[str]:
+        """批量打标，结果与逐条调用 label 一致"""
+        counts = self.counts_many(texts)
+        labels = np.where(
+            counts[:, 0] > counts[:, 1], "pos", np.where(counts[:, 1] > counts[:, 0], "neg", "neu")
+        )
+        return labels.tolist()
+
+    def score(self, text: str) -> SentimentScore:
+        """完整结果：两个极性的命中数 + 每次命中的位置"""
+        delta, out = self._delta, self._out
+        keywords, polarity = self.keywords, self.polarity
+        result = SentimentScore()
+        found = set()
+        state = 0
+        for i, ch in enumerate(self._prepare(text)):
+            state = delta[state].get(ch, 0)
+            if state not in out:
+                continue
+            for kid in out[state]:
+                word = keywords[kid]
+                for bit, name in ((POSITIVE, "pos"), (NEGATIVE, "neg")):
+                    if polarity[kid] & bit:
+                        result.hits.append(LexiconHit(i + 1 - len(word), i + 1, word, name))
+                found.add(kid)
+        for kid in found:
+            result.pos += polarity[kid] & POSITIVE
+            result.neg += (polarity[kid] & NEGATIVE) >> 1
+        result.hits.sort(key=lambda h: (h.start, h.end))
+        return result
@@ -0,0 +1,148 @@
+"""
+shared_index.py
+
+多个 worker 共享同一份索引（main.py 里 PHONE_INDEX_SHARED=1 开启）：
+uvicorn --workers N / gunicorn 起多个 worker 时，每个 worker 各自 build_index 会让内存随 worker 数线性增长。
+共享模式下所有 worker 用同一个索引快照（index_snapshot）：
+- 快照旁边的锁文件（flock）选出一个 loader：只有它读 CSV、建索引、做热更新，
+  每建好一代就写快照（先写临时文件再原子替换），然后把代数写进计数器文件；
+- 其余 worker（follower）不读 CSV，直接 mmap 快照：数组都指向同一份页缓存，
+  N 个 worker 共用一份物理内存。后台线程轮询计数器，代数变了就映射新的快照；
+- loader 进程退出时锁随之释放，下一次轮询时由某个 follower 接手。
+
+计数器文件只有 8 字节（小端 u64），也是 mmap 进来的，轮询一次只是读一次内存。
+follower 启动时直接映射现有快照（可能是上一次运行留下的），loader 建好新一代后会自动切过去。
+flock 只在 Unix 上有：没有 fcntl 时 AVAILABLE 为 False，main.py 退回每个 worker 各建一份。
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, Optional
+
+from index_snapshot import Snapshot, read_snapshot
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 flock：不支持共享模式
+    fcntl = None
+
+AVAILABLE = fcntl is not None
+
+_COUNTER = struct.Struct("<Q")
+
+
+class GenerationCounter:
+    """
+    快照的代数计数器：所有进程 mmap 同一个 8 字节文件，只有 loader 写。
+    8 字节对齐的写入在常见平台上不会被读到一半；真读到了也只是 follower 多映射一次快照。
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size < _COUNTER.size:
+                os.ftruncate(fd, _COUNTER.size)
+            self._mm = mmap.mmap(fd, _COUNTER.size)
+        finally:
+            os.close(fd)
+
+    def read(self) -> int:
+        return _COUNTER.unpack_from(self._mm, 0)[0]
+
+    def write(self, generation: int) -> None:
+        _COUNTER.pack_into(self._mm, 0, generation)
+
+
+class LoaderLock:
+    """
+    非阻塞的 flock 排他锁，拿到就一直持有到进程退出。
+    fork 出来的子进程会继承父进程已加锁的文件描述符（同一个打开的文件，flock 认为是同一把锁），
+    所以按 pid 区分：子进程里重新打开一次再抢
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._fd: Optional[int] = None
+        self._pid = 0
+        self._held = False
+
+    @property
+    def held(self) -> bool:
+        return self._held and self._pid == os.getpid()
+
+    def try_acquire(self) -> bool:
+        if self.held:
+            return True
+        if self._fd is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._pid = os.getpid()
+            self._held = False
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        self._held = True
+        return True
+
+
+class SharedIndex:
+    """
+    共享模式下本进程的角色和状态：
+    is_loader 为 True 时本进程负责建索引、写快照、发布新一代（publish）；
+    否则在 changed() 为 True 时调用 attach() 映射最新的快照
+    """
+
+    def __init__(self, snapshot_path: Path) -> None:
+        self.snapshot_path = snapshot_path
+        self.lock = LoaderLock(snapshot_path.with_name(snapshot_path.name + ".lock"))
+        self.counter = GenerationCounter(snapshot_path.with_name(snapshot_path.name + ".gen"))
+        self.attached = 0  # 当前映射的快照对应的代数
+        self.attach_count = 0
+
+    @property
+    def is_loader(self) -> bool:
+        return self.lock.held
+
+    def try_become_loader(self) -> bool:
+        return self.lock.try_acquire()
+
+    def next_generation(self) -> int:
+        return self.counter.read() + 1
+
+    def publish(self, generation: int) -> None:
+        """loader：新一代快照已经原子替换到位之后调用；loader 自己用的就是这一代"""
+        self.counter.write(generation)
+        self.attached = generation
+
+    def changed(self) -> bool:
+        return self.counter.read() != self.attached
+
+    def attach(self) -> Optional[Snapshot]:
+        """
+        映射当前的快照；先读代数再读快照，两次之间 loader 又发布了新一代的话，
+        映射到的已经是更新的快照，下一次 changed() 仍为 True，多映射一次而已
+        """
+        generation = self.counter.read()
+        snapshot = read_snapshot(self.snapshot_path)
+        if snapshot is None:
+            return None
+        self.attached = generation
+        self.attach_count += 1
+        return snapshot
+
+    def status(self) -> Dict:
+        return {
+            "role": "loader" if self.is_loader else "follower",
+            "pid": os.getpid(),
+            "snapshot": self.snapshot_path.name,  # 只给文件名，不暴露服务器上的目录
+            "published_generation": self.counter.read(),
+            "attached_generation": self.attached,
+            "attach_count": self.attach_count,
+        }
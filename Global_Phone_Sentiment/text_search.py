@@ -0,0 +1,321 @@
+"""
+text_search.py
+
+/copilot 用的全文检索：对 OpinionStore 每一行的文本建 BM25 倒排索引。
+
+分词（tokenize）：
+- 英文按字母串、数字串切开并转小写（"iPhone16Pro" -> iphone / 16 / pro），去掉少量停用词；
+- 中日韩文字按连续片段切成字符二元组（"续航很好" -> 续航 / 航很 / 很好），单字片段保留单字；
+- 其余字符（标点、emoji 等）丢弃。查询用同一套分词。
+
+倒排表是 CSR 形式的几个 numpy 数组（term_starts / doc_ids / tfs），文档编号就是 store 的行号：
+- 查询时把命中词项的倒排表段拼起来，np.bincount 一次累加出所有行的 BM25 分数，
+  np.argpartition 取 top-k，不逐行遍历；
+- 数组直接写进索引快照（见 main._save_snapshot），加载后仍是 mmap 视图；
+- 热更新只追加了尾部时，旧行的倒排表按 seq 映射到新行号，只对新增的行分词（见 extended）。
+"""
+
+from __future__ import annotations
+
+import re
+import time
+from array import array
+from dataclasses import dataclass
+from itertools import islice, repeat
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from opinion_store import OpinionStore, Vocab
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 建索引时分词统计的每批文档数
+COUNT_BATCH_DOCS = 8192
+
+# 摘要的长度（字符），命中位置前保留四分之一的上下文
+SNIPPET_CHARS = 80
+
+# 平假名 / 片假名、CJK 扩展 A、CJK 统一汉字、谚文音节、CJK 兼容汉字
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+_TOKEN_RE = re.compile(rf"[a-z]+|[0-9]+|[{_CJK}]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have i in is it its of on or "
+    "so that the this to was were with".split()
+)
+
+# 快照里的数组名（与 OpinionStore 的数组放在同一个快照文件里，加前缀区分）
+_SNAPSHOT_FIELDS = ("term_starts", "doc_ids", "tfs", "doc_len")
+_SNAPSHOT_PREFIX = "search_"
+# 预先算好的 BM25 权重也写进快照：多个 worker 映射同一个快照时不用各自再算一份
+_SNAPSHOT_WEIGHTS = ("idf", "weights")
+
+
+def tokenize(text: str) -> List[str]:
+    tokens: List[str] = []
+    for piece in _TOKEN_RE.findall(text.lower()):
+        if piece[0].isascii():
+            if piece not in STOPWORDS:
+                tokens.append(piece)
+        elif len(piece) == 1:
+            tokens.append(piece)
+        else:
+            tokens.extend(piece[i:i + 2] for i in range(len(piece) - 1))
+    return tokens
+
+
+def query_terms(query: str) -> List[str]:
+    """查询分词后去重（保留先后顺序）"""
+    return list(dict.fromkeys(tokenize(query)))
+
+
+def snippet(text: str, terms: Sequence[str], width: int = SNIPPET_CHARS) -> str:
+    """截取包含最早命中词的一段文本，空白压成单个空格，截断处加省略号"""
+    text = " ".join(text.split())
+    if len(text) <= width:
+        return text
+    low = text.lower()
+    positions = [pos for pos in (low.find(term) for term in terms) if pos >= 0]
+    start = max(0, min(positions) - width // 4) if positions else 0
+    start = min(start, len(text) - width)
+    piece = text[start:start + width]
+    return ("…" if start > 0 else "") + piece + ("…" if start + width < len(text) else "")
+
+
+@dataclass
+class SearchResult:
+    rows: np.ndarray  # top-k 行号，按分数降序（同分按行号，即日期倒序）
+    scores: np.ndarray  # 与 rows 对应的 BM25 分数
+    matched: np.ndarray  # 所有命中（分数 > 0）的行号，升序，用于分面统计
+    terms: List[str]  # 实际参与检索的查询词（索引里存在的）
+
+
+def _count_tokens(
+    terms: Vocab, rows: Iterable[int], texts: Iterable[str], n_docs: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    分词并统计词频，返回 (term_ids, doc_ids, tfs, doc_len)，前三个按 (词项, 行号) 排好序。
+    每 COUNT_BATCH_DOCS 个文档先在批内合并成 (词项, 行号) -> 词频，逐词的中间数组只有一批大小；
+    各批的行号互不相同，合并后整体排一次序，结果与一次性统计完全一致
+    """
+    stride = max(n_docs, 1)
+    doc_len = np.zeros(n_docs, dtype=np.int32)
+    key_parts: List[np.ndarray] = [np.empty(0, dtype=np.int64)]
+    tf_parts: List[np.ndarray] = [np.empty(0, dtype=np.int32)]
+    docs = zip(rows, texts)
+    while True:
+        batch = list(islice(docs, COUNT_BATCH_DOCS))
+        if not batch:
+            break
+        term_codes = array("q")
+        token_rows = array("q")
+        for row, text in batch:
+            tokens = tokenize(text)
+            term_codes.extend(terms.encode(t) for t in tokens)
+            token_rows.extend(repeat(row, len(tokens)))
+        token_rows_arr = np.frombuffer(token_rows, dtype=np.int64)
+        doc_len += np.bincount(token_rows_arr, minlength=n_docs).astype(np.int32)
+        keys, tfs = np.unique(
+            np.frombuffer(term_codes, dtype=np.int64) * stride + token_rows_arr, return_counts=True
+        )
+        key_parts.append(keys)
+        tf_parts.append(tfs.astype(np.int32))
+
+    keys = np.concatenate(key_parts)
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    return keys // stride, keys % stride, np.concatenate(tf_parts)[order], doc_len
+
+
+class SearchIndex:
+    """只读的 BM25 倒排索引，由 build / extended / from_snapshot 构造"""
+
+    def __init__(
+        self,
+        terms: Vocab,
+        term_starts: np.ndarray,
+        doc_ids: np.ndarray,
+        tfs: np.ndarray,
+        doc_len: np.ndarray,
+        build_ms: float = 0.0,
+        mode: str = "full",
+        idf: Optional[np.ndarray] = None,
+        weights: Optional[np.ndarray] = None,
+    ) -> None:
+        self.terms = terms
+        self.term_starts = term_starts  # int64，len(terms) + 1 个
+        self.doc_ids = doc_ids  # int32，每个词项一段，段内行号升序
+        self.tfs = tfs  # int32，与 doc_ids 对应的词频
+        self.doc_len = doc_len  # int32，每行的词数
+        self.build_ms = build_ms
+        self.mode = mode  # full / incremental / snapshot
+
+        # BM25 里只和查询无关的部分都预先算好：每个词项的 idf、每条倒排记录的 tf 归一化值
+        if idf is not None and weights is not None:
+            self._idf, self._weights = idf, weights
+            return
+        n_docs = len(doc_len)
+        df = np.diff(term_starts).astype(np.float64)
+        self._idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        avgdl = float(doc_len.mean()) if n_docs and doc_len.any() else 1.0
+        tf = tfs.astype(np.float32)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_len[doc_ids].astype(np.float32) / avgdl)
+        self._weights = tf * (BM25_K1 + 1) / (tf + norm)
+
+    def __len__(self) -> int:
+        return len(self.doc_len)
+
+    @classmethod
+    def _from_postings(
+        cls,
+        terms: Vocab,
+        term_ids: np.ndarray,
+        doc_ids: np.ndarray,
+        tfs: np.ndarray,
+        doc_len: np.ndarray,
+        started: float,
+        mode: str,
+    ) -> "SearchIndex":
+        """按 (词项, 行号) 排好序的倒排记录 -> CSR"""
+        term_starts = np.searchsorted(term_ids, np.arange(len(terms) + 1)).astype(np.int64)
+        return cls(
+            terms=terms,
+            term_starts=term_starts,
+            doc_ids=doc_ids.astype(np.int32),
+            tfs=tfs.astype(np.int32),
+            doc_len=doc_len,
+            build_ms=(time.perf_counter() - started) * 1000,
+            mode=mode,
+        )
+
+    @classmethod
+    def build(cls, store: OpinionStore) -> "SearchIndex":
+        """对 store 的每一行分词建索引"""
+        started = time.perf_counter()
+        terms = Vocab()
+        n_docs = len(store)
+        term_ids, doc_ids, tfs, doc_len = _count_tokens(
+            terms, range(n_docs), (store.text(row) for row in range(n_docs)), n_docs
+        )
+        return cls._from_postings(terms, term_ids, doc_ids, tfs, doc_len, started, "full")
+
+    def extended(self, base: OpinionStore, store: OpinionStore) -> "SearchIndex":
+        """
+        热更新用：store 是在 base（本索引对应的 store）基础上追加行后重建的新 store。
+        base 的每一行按 seq 找到它在 store 里的新行号，倒排表整体平移过去，
+        只对新增的行分词；base 有行在 store 里找不到时退回完整重建。
+        """
+        started = time.perf_counter()
+        n_docs = len(store)
+        by_seq = np.argsort(store.seq, kind="stable")
+        pos = np.searchsorted(store.seq[by_seq], base.seq)
+        pos = np.minimum(pos, max(n_docs - 1, 0))
+        if len(base) and (not n_docs or not np.array_equal(store.seq[by_seq][pos], base.seq)):
+            return SearchIndex.build(store)
+        new_row_of_base = by_seq[pos].astype(np.int64)
+
+        is_new = np.ones(n_docs, dtype=bool)
+        is_new[new_row_of_base] = False
+        new_rows = np.flatnonzero(is_new)
+
+        terms = Vocab(self.terms.values)
+        added_terms, added_docs, added_tfs, added_len = _count_tokens(
+            terms, new_rows.tolist(), (store.text(int(row)) for row in new_rows), n_docs
+        )
+
+        base_terms = np.repeat(
+            np.arange(len(self.terms), dtype=np.int64), np.diff(self.term_starts)
+        )
+        term_ids = np.concatenate([base_terms, added_terms])
+        doc_ids = np.concatenate([new_row_of_base[self.doc_ids], added_docs])
+        order = np.argsort(term_ids * max(n_docs, 1) + doc_ids, kind="stable")
+
+        doc_len = added_len
+        doc_len[new_row_of_base] = self.doc_len
+        return SearchIndex._from_postings(
+            terms,
+            term_ids[order],
+            doc_ids[order],
+            np.concatenate([self.tfs, added_tfs])[order],
+            doc_len,
+            started,
+            "incremental",
+        )
+
+    # ---------- 快照 ----------
+
+    def to_snapshot(self) -> Dict[str, np.ndarray]:
+        """词表拼成一段 UTF-8（词项里不会有换行），和倒排数组一起写进快照"""
+        arrays = {_SNAPSHOT_PREFIX + name: getattr(self, name) for name in _SNAPSHOT_FIELDS}
+        arrays.update({_SNAPSHOT_PREFIX + name: getattr(self, "_" + name) for name in _SNAPSHOT_WEIGHTS})
+        arrays[_SNAPSHOT_PREFIX + "terms"] = np.frombuffer(
+            "\n".join(self.terms.values).encode("utf-8"), dtype=np.uint8
+        )
+        return arrays
+
+    @classmethod
+    def from_snapshot(cls, arrays: Dict[str, np.ndarray]) -> "SearchIndex":
+        """快照里没有检索索引（KeyError）时由调用方决定是否重建"""
+        started = time.perf_counter()
+        raw = arrays[_SNAPSHOT_PREFIX + "terms"].tobytes().decode("utf-8")
+        index = cls(
+            terms=Vocab(raw.split("\n") if raw else ()),
+            **{name: arrays[_SNAPSHOT_PREFIX + name] for name in _SNAPSHOT_FIELDS + _SNAPSHOT_WEIGHTS},
+            mode="snapshot",
+        )
+        index.build_ms = (time.perf_counter() - started) * 1000
+        return index
+
+    # ---------- 查询 ----------
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 5,
+        allowed: Optional[np.ndarray] = None,
+    ) -> SearchResult:
+        """
+        BM25 检索。allowed 是按行的布尔掩码（比如只看某几个品牌），
+        为 None 时检索全部行。
+        """
+        terms = [t for t in query_terms(query) if self.terms.lookup(t) is not None]
+        if not terms:
+            empty = np.empty(0, dtype=np.int64)
+            return SearchResult(empty, np.empty(0, dtype=np.float32), empty, [])
+
+        docs: List[np.ndarray] = []
+        weights: List[np.ndarray] = []
+        for term in terms:
+            code = self.terms.lookup(term)
+            start, end = self.term_starts[code], self.term_starts[code + 1]
+            docs.append(self.doc_ids[start:end])
+            weights.append(self._weights[start:end] * self._idf[code])
+        scores = np.bincount(
+            np.concatenate(docs), weights=np.concatenate(weights), minlength=len(self)
+        )
+        if allowed is not None:
+            scores[~allowed] = 0.0
+
+        matched = np.flatnonzero(scores > 0)
+        k = min(top_k, len(matched))
+        top = matched
+        if k < len(matched):
+            top = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        top = top[np.lexsort((top, -scores[top]))][:k]
+        return SearchResult(rows=top, scores=scores[top], matched=matched, terms=terms)
+
+    def stats(self) -> Dict:
+        return {
+            "docs": len(self),
+            "terms": len(self.terms),
+            "postings": int(len(self.doc_ids)),
+            "mode": self.mode,
+            "build_ms": round(self.build_ms, 1),
+            "nbytes": int(
+                sum(getattr(self, name).nbytes for name in _SNAPSHOT_FIELDS)
+                + self._weights.nbytes
+                + self._idf.nbytes
+            ),
+        }
@@ -0,0 +1,215 @@
+"""
+品牌解析基准：BrandResolver（前缀树 + 按原始字符串缓存） vs 原来 main.py 里的 if 链
+（_extract_brand_from_model_id / device_name 判断 / 每次调用都重建映射字典的 _normalize_brand_*）
+
+输入：所有 CSV（含根目录 Reddit 和 smzdm）里出现过的不同 (phone_model_id, device_name, 品牌字段) 组合。
+
+运行方式（项目根目录）：
+    python benchmarks/bench_brand.py [--repeat 20]
+
+输出每种实现解析一轮的每条耗时（微秒），以及两者结果不一致的组合（规则统一后预期的差异）。
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+BACKEND_DIR = ROOT_DIR / "Global_Phone_Sentiment"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from model_catalog import BrandResolver, get_model_catalog  # noqa: E402
+
+BRAND_FIELDS = ["brand", "brand_name", "phone_brand"]
+
+Triple = Tuple[str, str, str]
+
+
+def first_non_empty(row: dict, keys: List[str]) -> str:
+    for k in keys:
+        val = str(row.get(k) or "").strip()
+        if val:
+            return val
+    return ""
+
+
+def load_triples() -> List[Triple]:
+    paths = sorted(BACKEND_DIR.glob("*.csv")) + sorted(ROOT_DIR.glob("*.csv"))
+    seen = {}
+    for path in paths:
+        with path.open("r", encoding="utf-8", errors="ignore") as f:
+            for row in csv.DictReader(f):
+                key = (
+                    first_non_empty(row, ["phone_model_id"]),
+                    first_non_empty(row, ["device_name"]),
+                    first_non_empty(row, BRAND_FIELDS),
+                )
+                seen.setdefault(key, None)
+    return list(seen)
+
+
+def is_url(s: str) -> bool:
+    s_lower = s.lower().strip()
+    return (
+        s_lower.startswith("http://")
+        or s_lower.startswith("https://")
+        or s_lower.startswith("www.")
+        or "://" in s_lower
+    )
+
+
+# ---------- 原实现（逐字搬过来做对照） ----------
+
+
+def legacy_from_model_id(model_id: str) -> Optional[str]:
+    model_lower = model_id.lower().strip()
+    if model_lower.startswith("iphone") or "apple" in model_lower:
+        return "Apple"
+    if model_lower.startswith("xiaomi") or model_lower.startswith("redmi") or model_lower.startswith("mi"):
+        return "Xiaomi"
+    if model_lower.startswith("huawei") or model_lower.startswith("mate") or model_lower.startswith("pura"):
+        return "Huawei"
+    if model_lower.startswith("samsung") or "galaxy" in model_lower:
+        return "Samsung"
+    if model_lower.startswith("vivo") or model_lower.startswith("iqoo"):
+        return "Vivo"
+    if model_lower.startswith("oppo"):
+        return "OPPO"
+    if model_lower.startswith("honor"):
+        return "Honor"
+    return None
+
+
+def legacy_from_device(device_name: str) -> Optional[str]:
+    device_lower = device_name.lower()
+    if "iphone" in device_lower or "apple" in device_lower:
+        return "Apple"
+    if "samsung" in device_lower or "galaxy" in device_lower:
+        return "Samsung"
+    if "xiaomi" in device_lower or "redmi" in device_lower:
+        return "Xiaomi"
+    if "huawei" in device_lower or "mate" in device_lower or "pura" in device_lower:
+        return "Huawei"
+    if "vivo" in device_lower or "iqoo" in device_lower:
+        return "Vivo"
+    if "oppo" in device_lower:
+        return "OPPO"
+    return None
+
+
+def legacy_brand_id(brand_raw: str) -> str:
+    low = str(brand_raw).strip().lower().replace(" ", "").replace("_", "")
+    mapping = {
+        "apple": "apple", "iphone": "apple", "xiaomi": "xiaomi", "mi": "xiaomi", "redmi": "xiaomi",
+        "华为": "huawei", "huawei": "huawei", "honor": "honor", "荣耀": "honor", "samsung": "samsung",
+        "vivo": "vivo", "iqoo": "vivo", "oppo": "oppo", "oneplus": "oneplus", "一加": "oneplus",
+        "realme": "realme",
+    }
+    for k, v in mapping.items():
+        if low == k or low.startswith(k):
+            return v
+    return low if low else "other"
+
+
+def legacy_brand_name(brand_raw: str) -> str:
+    b = str(brand_raw).strip()
+    low = b.lower()
+    mapping = {
+        "apple": "Apple", "iphone": "Apple", "xiaomi": "Xiaomi", "mi": "Xiaomi", "redmi": "Xiaomi",
+        "华为": "Huawei", "huawei": "Huawei", "honor": "Honor", "荣耀": "Honor", "samsung": "Samsung",
+        "vivo": "Vivo", "iqoo": "Vivo", "oppo": "OPPO", "oneplus": "OnePlus", "一加": "OnePlus",
+        "realme": "Realme",
+    }
+    for k, v in mapping.items():
+        if low == k or low.startswith(k + " ") or low.startswith(k):
+            return v
+    return b.capitalize() if b else "Other"
+
+
+def legacy_resolve(triple: Triple) -> Tuple[str, str]:
+    model_id, device_name, brand_field = triple
+    brand_raw = None
+    if model_id and not is_url(model_id):
+        brand_raw = legacy_from_model_id(model_id)
+    if not brand_raw and device_name and not is_url(device_name):
+        brand_raw = legacy_from_device(device_name)
+    if not brand_raw and brand_field and not is_url(brand_field):
+        brand_raw = brand_field
+    brand_raw = brand_raw or "Other"
+    return legacy_brand_id(brand_raw), legacy_brand_name(brand_raw)
+
+
+# ---------- 新实现（与 main._resolve_brand 相同的先后顺序） ----------
+
+
+def resolver_chain(resolver: BrandResolver) -> Callable[[Triple], Tuple[str, str]]:
+    def resolve(triple: Triple) -> Tuple[str, str]:
+        model_id, device_name, brand_field = triple
+        for raw in (model_id, device_name):
+            if raw and not is_url(raw):
+                match = resolver.resolve(raw)
+                if match is not None:
+                    return match.brand_id, match.brand_name
+        if brand_field and not is_url(brand_field):
+            return resolver.normalize(brand_field)[:2]
+        return resolver.normalize("Other")[:2]
+
+    return resolve
+
+
+def best_of(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main_bench() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    triples = load_triples()
+    catalog = get_model_catalog()
+
+    def fresh() -> BrandResolver:
+        return BrandResolver(catalog.brands, catalog.target_keys, catalog.aliases)
+
+    build_t0 = time.perf_counter()
+    fresh()
+    print(f"不同组合 {len(triples)} 个；解析器构建 {(time.perf_counter() - build_t0) * 1000:.2f} ms")
+
+    per = 1e6 / max(len(triples), 1)
+    t_old = best_of(lambda: [legacy_resolve(t) for t in triples], args.repeat)
+    def first_pass() -> None:
+        chain = resolver_chain(fresh())
+        for t in triples:
+            chain(t)
+
+    t_cold = best_of(first_pass, args.repeat)
+    warm = resolver_chain(fresh())
+    for t in triples:
+        warm(t)
+    t_warm = best_of(lambda: [warm(t) for t in triples], args.repeat)
+
+    print(f"原 if 链                 : {t_old * per:8.2f} us/条")
+    print(f"BrandResolver（首次解析） : {t_cold * per:8.2f} us/条（含构建解析器）")
+    print(f"BrandResolver（缓存命中） : {t_warm * per:8.2f} us/条")
+
+    new = [warm(t) for t in triples]
+
+    diffs = [(t, legacy_resolve(t), n) for t, n in zip(triples, new) if legacy_resolve(t) != n]
+    print(f"结果不同的组合: {len(diffs)}")
+    for triple, old, n in diffs[:20]:
+        print(f"  {triple}: {old} -> {n}")
+
+
+if __name__ == "__main__":
+    main_bench()
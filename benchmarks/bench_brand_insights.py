@@ -0,0 +1,118 @@
+"""
+phone_index.get_brand_insights 基准：单次 groupby 汇总 vs 原来的「整表复制 + 每个品牌筛一遍全表」
+
+语料：CSV_FILES（Reddit 的几个文件取项目根目录下的）全部加载，
+再把同一份数据复制 10 倍、100 倍并打乱行序（固定随机种子）模拟更大的语料。
+原实现跑在 object 列的副本上，新实现跑在 PhoneFeedbackIndex.df（category 列）上。
+每个规模下校验新旧结果完全一致，并分别统计原实现、新实现首次计算和命中缓存的耗时。
+
+运行方式（项目根目录，需要 scikit-learn）：
+    python benchmarks/bench_brand_insights.py [--scales 1 10 100] [--repeat 3]
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+BACKEND_DIR = ROOT_DIR / "Global_Phone_Sentiment"
+sys.path.insert(0, str(BACKEND_DIR))
+
+import phone_index  # noqa: E402
+from phone_index import CATEGORICAL_COLS, PLATFORM_LABELS  # noqa: E402
+
+
+def legacy_brand_insights(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """原 get_brand_insights() 的实现"""
+    df = df.copy()
+    grouped = df.groupby("brand_id")["sentiment"].value_counts().unstack(fill_value=0)
+    results: List[Dict[str, Any]] = []
+    for brand in grouped.index:
+        brand_df = df[df["brand_id"] == brand]
+        pos = int(grouped.loc[brand].get("pos", 0))
+        neg = int(grouped.loc[brand].get("neg", 0))
+        neu = int(grouped.loc[brand].get("neu", 0))
+        total = pos + neg + neu
+        if total == 0:
+            continue
+        platform_ids = brand_df["source"].dropna().unique().tolist()
+        results.append(
+            {
+                "brand_id": brand,
+                "brand_name": brand,
+                "total": int(total),
+                "pos": pos,
+                "neg": neg,
+                "neu": neu,
+                "positive_rate": float(pos / total),
+                "top_models": brand_df["model_std"].value_counts().head(3).index.tolist(),
+                "platforms": sorted(
+                    {PLATFORM_LABELS.get(pid, PLATFORM_LABELS["unknown"]) for pid in platform_ids}
+                ),
+            }
+        )
+    results.sort(key=lambda x: x["total"], reverse=True)
+    return results
+
+
+def best_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1e3
+
+
+def main_bench() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in phone_index.CSV_FILES:
+            for folder in (BACKEND_DIR, ROOT_DIR):
+                if (folder / name).exists():
+                    (Path(tmp) / name).symlink_to(folder / name)
+                    break
+        phone_index.DATA_DIR = Path(tmp)
+        with contextlib.redirect_stdout(io.StringIO()):
+            idx = phone_index.PhoneFeedbackIndex()
+    base = idx.df
+
+    print(f"{'规模':>6} {'行数':>9} {'品牌':>5} | {'原实现':>10} {'groupby':>10} {'缓存命中':>10} | 加速  一致")
+    for scale in args.scales:
+        df = base if scale == 1 else pd.concat([base] * scale, ignore_index=True)
+        df = df.sample(frac=1.0, random_state=0).reset_index(drop=True) if scale > 1 else df
+        idx.df = idx._categorize(df)
+        idx.generation += 1
+        # 原实现跑在 object 列的副本上（即改成 category 之前的数据）
+        plain = df.astype({col: object for col in CATEGORICAL_COLS})
+
+        t_old = best_ms(lambda: legacy_brand_insights(plain), args.repeat)
+
+        def cold() -> None:
+            idx.generation += 1
+            idx.get_brand_insights()
+
+        t_new = best_ms(cold, args.repeat)
+        t_hit = best_ms(idx.get_brand_insights, args.repeat)
+        same = idx.get_brand_insights() == legacy_brand_insights(plain)
+        print(
+            f"{scale:>5}x {len(df):>9} {df['brand_id'].nunique():>5} | "
+            f"{t_old:8.1f}ms {t_new:8.1f}ms {t_hit:8.3f}ms | {t_old / t_new:4.1f}x  {same}"
+        )
+
+
+if __name__ == "__main__":
+    main_bench()
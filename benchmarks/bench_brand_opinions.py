@@ -0,0 +1,158 @@
+"""
+phone_index.get_brand_opinions / get_global_stats 基准
+
+- get_brand_opinions：原来「整表筛出品牌并复制 + iterrows」vs 预先算好的品牌行号数组 + 只取命中的几行；
+- get_global_stats：原来每个平台重新筛一遍全表 vs 一次分组（按数据代数缓存）。
+
+原实现跑在 object 列的副本上（即改成 category 之前的数据），新实现跑在 PhoneFeedbackIndex.df 上，
+每个品牌 x 平台组合都校验结果完全一致。语料与 bench_brand_insights 相同：CSV_FILES 全部加载，
+再复制 10 倍、100 倍并打乱行序。
+
+运行方式（项目根目录，需要 scikit-learn）：
+    python benchmarks/bench_brand_opinions.py [--scales 1 10 100] [--limit 30]
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+BACKEND_DIR = ROOT_DIR / "Global_Phone_Sentiment"
+sys.path.insert(0, str(BACKEND_DIR))
+
+import phone_index  # noqa: E402
+from phone_index import CANDIDATE_TIME_COLS, CATEGORICAL_COLS, PLATFORM_LABELS  # noqa: E402
+
+
+def legacy_brand_opinions(
+    df: pd.DataFrame, brand_id: str, platform: Optional[str] = None, limit: int = 30
+) -> List[Dict[str, Any]]:
+    """原 get_brand_opinions() 的实现"""
+    df = df[df["brand_id"] == brand_id].copy()
+    if df.empty:
+        return []
+    if platform and platform != "all":
+        df = df[df["source"] == platform]
+        if df.empty:
+            return []
+    time_col = next((col for col in CANDIDATE_TIME_COLS if col in df.columns), None)
+    rows = []
+    for _, row in df.head(limit).iterrows():
+        published_at = row.get(time_col) if time_col else None
+        raw_text = row.get("raw_text") or row.get("cleaned_text") or row.get("content") or ""
+        rows.append(
+            {
+                "published_at": str(published_at) if published_at is not None else None,
+                "platform": row.get("platform_std") or PLATFORM_LABELS.get(row.get("source", "unknown"), "其他"),
+                "brand_id": brand_id,
+                "model": row.get("model_std"),
+                "sentiment": row.get("sentiment", "neu"),
+                "raw_text": str(raw_text),
+            }
+        )
+    return rows
+
+
+def legacy_global_stats(df: pd.DataFrame) -> Dict[str, Any]:
+    """原 get_global_stats() 的实现"""
+    platform_ids = sorted({pid for pid in df["source"].dropna().unique().tolist() if pid != "unknown"})
+    original_mask = df["content_type"] == "original"
+    comment_mask = df["content_type"] == "comment"
+
+    def _count_by_platform(mask):
+        if mask.sum() == 0:
+            return {}
+        s = df[mask].groupby("source")["content"].count()
+        return {pid: int(s.get(pid, 0)) for pid in platform_ids}
+
+    bilibili_urls: List[str] = []
+    if "url" in df.columns:
+        bilibili_urls = (
+            df.loc[(df["source"] == "bilibili") & original_mask, "url"].dropna().astype(str).unique().tolist()[:10]
+        )
+    brands = sorted(df["brand_id"].dropna().unique().tolist())
+    models = sorted(df["model_std"].dropna().unique().tolist())
+    return {
+        "platform_count": len(platform_ids),
+        "platforms": [{"id": pid, "name": PLATFORM_LABELS.get(pid, PLATFORM_LABELS["unknown"])} for pid in platform_ids],
+        "brand_count": len(brands),
+        "brands": brands,
+        "model_count": len(models),
+        "models": models,
+        "original_count": int(original_mask.sum()),
+        "original_by_platform": _count_by_platform(original_mask),
+        "comment_count": int(comment_mask.sum()),
+        "comment_by_platform": _count_by_platform(comment_mask),
+        "bilibili_sample_urls": bilibili_urls,
+    }
+
+
+def timed_ms(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return (time.perf_counter() - t0) * 1e3
+
+
+def main_bench() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--limit", type=int, default=30)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in phone_index.CSV_FILES:
+            for folder in (BACKEND_DIR, ROOT_DIR):
+                if (folder / name).exists():
+                    (Path(tmp) / name).symlink_to(folder / name)
+                    break
+        phone_index.DATA_DIR = Path(tmp)
+        with contextlib.redirect_stdout(io.StringIO()):
+            idx = phone_index.PhoneFeedbackIndex()
+    base = idx.df
+
+    for scale in args.scales:
+        df = base if scale == 1 else pd.concat([base] * scale, ignore_index=True)
+        df = df.sample(frac=1.0, random_state=0).reset_index(drop=True) if scale > 1 else df
+        idx.df = idx._categorize(df)
+        idx.generation += 1
+        plain = df.astype({col: object for col in CATEGORICAL_COLS})
+
+        calls = [
+            (brand, platform)
+            for brand in sorted(plain["brand_id"].unique()) + ["no_such_brand"]
+            for platform in [None, "all", "no_such_platform"] + sorted(plain["source"].unique())
+        ]
+        old_ms = timed_ms(lambda: [legacy_brand_opinions(plain, b, p, args.limit) for b, p in calls])
+        new_ms = timed_ms(lambda: [idx.get_brand_opinions(b, p, args.limit) for b, p in calls])
+        same = all(
+            legacy_brand_opinions(plain, b, p, args.limit) == idx.get_brand_opinions(b, p, args.limit)
+            for b, p in calls
+        )
+        old_stats_ms = timed_ms(lambda: legacy_global_stats(plain))
+        idx.generation += 1
+        new_stats_ms = timed_ms(idx.get_global_stats)
+        hit_ms = timed_ms(idx.get_global_stats)
+        same_stats = legacy_global_stats(plain) == idx.get_global_stats()
+
+        print(f"{scale}x：{len(df)} 行，{len(calls)} 个 品牌 x 平台 组合")
+        print(
+            f"  get_brand_opinions  原实现 {old_ms / len(calls):8.2f} ms/次 | 新 {new_ms / len(calls):6.2f} ms/次"
+            f"（{old_ms / new_ms:5.1f}x，含首次建品牌行号）| 一致: {same}"
+        )
+        print(
+            f"  get_global_stats    原实现 {old_stats_ms:8.2f} ms   | 新 {new_stats_ms:6.2f} ms"
+            f"（缓存命中 {hit_ms:.3f} ms）| 一致: {same_stats}"
+        )
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,188 @@
+"""
+crawl_http.CrawlerClient 基准 + 行为校验（本地桩服务器，不访问外网）
+
+桩服务器（ThreadingHTTPServer，HTTP/1.1 keep-alive）每个请求固定延迟 --latency 毫秒，统计新建的 TCP 连接数：
+- /page?i=N    正常返回 JSON；
+- /flaky?i=N   每个 N 第一次返回 503，之后返回 200；
+- /busy?i=N    每个 N 第一次返回 429（Retry-After: 0），之后返回 200。
+
+依次测：
+1. 原来的写法：逐个 requests.get（每次新连接）；
+2. CrawlerClient 串行（连接复用）；
+3. CrawlerClient.map 并发（--workers 个线程）；
+4. 限速：令牌桶 --rate 个/秒时实际的请求速率；
+5. 重试：/flaky 和 /busy 全部最终成功；
+6. 缓存：同样的 URL 再请求一遍不再打到服务器。
+
+运行方式（项目根目录）：
+    python benchmarks/bench_crawl_http.py [--requests 200] [--latency 5] [--workers 8] [--rate 50]
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "Global_Phone_Sentiment"))
+
+from crawl_http import CrawlerClient, RetryPolicy  # noqa: E402
+
+
+class StubState:
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+        self.seen: Dict[str, int] = {}
+
+    def reset(self) -> None:
+        with self.lock:
+            self.connections = 0
+            self.requests = 0
+
+
+def make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self) -> None:
+            super().setup()
+            # 表头和正文分两次写，不关 Nagle 的话 keep-alive 连接上每个响应都要多等一个延迟 ACK
+            self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with state.lock:
+                state.connections += 1
+
+        def log_message(self, *args) -> None:  # 不打印访问日志
+            pass
+
+        def do_GET(self) -> None:
+            parts = urlsplit(self.path)
+            i = parse_qs(parts.query).get("i", ["0"])[0]
+            with state.lock:
+                state.requests += 1
+                key = f"{parts.path}?{i}"
+                state.seen[key] = state.seen.get(key, 0) + 1
+                first = state.seen[key] == 1
+            time.sleep(state.latency)
+
+            status, headers = 200, {}
+            if parts.path == "/flaky" and first:
+                status = 503
+            elif parts.path == "/busy" and first:
+                status, headers = 429, {"Retry-After": "0"}
+            body = json.dumps({"path": parts.path, "i": i}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+def main_bench() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=5.0, help="桩服务器每个请求的延迟（毫秒）")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=50.0)
+    args = parser.parse_args()
+
+    state = StubState(args.latency / 1000)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    n = args.requests
+    retry = RetryPolicy(backoff=0.01)
+
+    def report(name: str, elapsed: float, ok: bool) -> None:
+        print(
+            f"{name:34s} {elapsed * 1e3:8.0f} ms  {n / elapsed:7.0f} req/s  "
+            f"新建连接 {state.connections:4d}  服务器收到 {state.requests:4d}  全部成功: {ok}"
+        )
+
+    # 1. 原来的写法
+    state.reset()
+    t0 = time.perf_counter()
+    ok = all(requests.get(f"{base}/page", params={"i": i}, timeout=5).status_code == 200 for i in range(n))
+    bare = time.perf_counter() - t0
+    report("requests.get 逐个（原写法）", bare, ok)
+
+    # 2. 连接复用，串行
+    state.reset()
+    with CrawlerClient(max_workers=1, retry=retry, cache_size=0) as client:
+        t0 = time.perf_counter()
+        ok = all(client.get(f"{base}/page", params={"i": i}).status_code == 200 for i in range(n))
+        report("CrawlerClient 串行（keep-alive）", time.perf_counter() - t0, ok)
+
+    # 3. 连接复用 + 并发
+    state.reset()
+    with CrawlerClient(max_workers=args.workers, retry=retry, cache_size=0) as client:
+        t0 = time.perf_counter()
+        pages = client.map(lambda i: client.get_json(f"{base}/page", params={"i": i}), range(n))
+        ok = [page["i"] for page in pages] == [str(i) for i in range(n)]
+        report(f"CrawlerClient.map {args.workers} 线程", time.perf_counter() - t0, ok)
+
+    # 4. 限速
+    state.reset()
+    with CrawlerClient(
+        max_workers=args.workers, retry=retry, cache_size=0, rate_limits={"127.0.0.1": (args.rate, 1)}
+    ) as client:
+        t0 = time.perf_counter()
+        client.map(lambda i: client.get(f"{base}/page", params={"i": i}), range(n))
+        elapsed = time.perf_counter() - t0
+        observed = (n - 1) / elapsed  # 第一个令牌不用等
+        print(
+            f"限速 {args.rate:.0f} 个/秒（{args.workers} 线程）：实际 {observed:.1f} 个/秒，"
+            f"排队等待合计 {client.stats()['throttled_s']:.1f} s"
+        )
+
+    # 5. 重试（重试提示不打印）
+    state.reset()
+    with CrawlerClient(max_workers=args.workers, retry=retry, cache_size=0) as client:
+        with contextlib.redirect_stdout(io.StringIO()):
+            statuses = client.map(
+                lambda i: client.get(f"{base}/{'flaky' if i % 2 else 'busy'}", params={"i": i}).status_code,
+                range(n),
+            )
+        stats = client.stats()
+        print(
+            f"重试：503 / 429 各 {n // 2} 个，最终 200 的 {statuses.count(200)}/{n}，"
+            f"重试 {stats['retries']} 次，服务器收到 {state.requests} 个请求"
+        )
+
+    # 6. 缓存
+    with CrawlerClient(max_workers=args.workers, retry=retry) as client:
+        client.map(lambda i: client.get(f"{base}/page", params={"i": i}), range(n))
+        state.reset()
+        t0 = time.perf_counter()
+        again = client.map(lambda i: client.get_json(f"{base}/page", params={"i": i}), range(n))
+        elapsed = time.perf_counter() - t0
+        ok = [page["i"] for page in again] == [str(i) for i in range(n)]
+        print(
+            f"缓存：再请求 {n} 个相同 URL 耗时 {elapsed * 1e3:.1f} ms，服务器收到 {state.requests} 个，"
+            f"命中 {client.stats()['cache_hits']} 次，结果正确: {ok}"
+        )
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main_bench()
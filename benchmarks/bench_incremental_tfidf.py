@@ -0,0 +1,105 @@
+"""
+phone_index 增量 TF-IDF 基准 + 一致性校验
+
+模拟爬虫分批追加：把 CSV_FILES（Reddit 的几个文件取项目根目录下的）复制到临时目录，
+每个文件先只写前 --initial 比例的行建索引，剩下的行分 --batches 批追加到 CSV 末尾，
+每批之后调用 refresh()。同样的过程分别跑增量模式（IncrementalTfidf）和原来的整体重新 fit，
+比较每批 refresh() 的耗时；最后做一致性校验（与批量 fit 逐元素比较）并对比两种模式的检索结果。
+
+运行方式（项目根目录，需要 scikit-learn）：
+    python benchmarks/bench_incremental_tfidf.py [--initial 0.5] [--batches 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+BACKEND_DIR = ROOT_DIR / "Global_Phone_Sentiment"
+sys.path.insert(0, str(BACKEND_DIR))
+
+import phone_index  # noqa: E402
+
+
+def read_sources() -> Dict[str, pd.DataFrame]:
+    frames = {}
+    for name in phone_index.CSV_FILES:
+        for folder in (BACKEND_DIR, ROOT_DIR):
+            if (folder / name).exists():
+                frames[name] = pd.read_csv(folder / name, engine="python", on_bad_lines="skip")
+                break
+    return frames
+
+
+def quiet(fn, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+
+def main_bench() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--initial", type=float, default=0.5)
+    parser.add_argument("--batches", type=int, default=5)
+    args = parser.parse_args()
+
+    frames = read_sources()
+    with tempfile.TemporaryDirectory() as tmp:
+        phone_index.DATA_DIR = Path(tmp)
+        cuts = {name: int(len(df) * args.initial) for name, df in frames.items()}
+        for name, df in frames.items():
+            df.iloc[: cuts[name]].to_csv(Path(tmp) / name, index=False)
+
+        t0 = time.perf_counter()
+        inc = quiet(phone_index.PhoneFeedbackIndex, incremental=True)
+        t_inc_build = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        full = quiet(phone_index.PhoneFeedbackIndex)
+        t_full_build = time.perf_counter() - t0
+        print(f"初始 {len(inc.df)} 行：增量模式建索引 {t_inc_build * 1e3:.0f} ms，整体 fit {t_full_build * 1e3:.0f} ms")
+
+        inc_ms: List[float] = []
+        full_ms: List[float] = []
+        for batch in range(args.batches):
+            for name, df in frames.items():
+                rest = df.iloc[cuts[name]:]
+                bounds = np.linspace(0, len(rest), args.batches + 1).astype(int)
+                rest.iloc[bounds[batch]:bounds[batch + 1]].to_csv(
+                    Path(tmp) / name, mode="a", header=False, index=False
+                )
+            t0 = time.perf_counter()
+            added = quiet(inc.refresh)
+            inc_ms.append((time.perf_counter() - t0) * 1e3)
+            t0 = time.perf_counter()
+            quiet(full.refresh)
+            full_ms.append((time.perf_counter() - t0) * 1e3)
+            print(
+                f"第 {batch + 1} 批 +{added:5d} 行 -> {len(inc.df):6d} 行："
+                f"增量 refresh {inc_ms[-1]:7.1f} ms | 整体重新 fit {full_ms[-1]:7.1f} ms"
+            )
+        print(f"合计：增量 {sum(inc_ms):.0f} ms，整体重新 fit {sum(full_ms):.0f} ms（{sum(full_ms) / sum(inc_ms):.1f}x）")
+
+        report = inc.check_consistency()
+        print(f"一致性校验：{report}")
+
+        rng = random.Random(0)
+        texts = [t for t in inc.df["content"].tolist() if len(t.split()) >= 3]
+        queries = [" ".join(rng.choice(texts).split()[:4]) for _ in range(200)]
+        same = 0
+        for a, b in zip(inc.search_many(queries, 10), full.search_many(queries, 10)):
+            same += len(a.rows) == len(b.rows) and np.allclose(a.scores, b.scores)
+        print(f"检索结果（top-10 分数序列）两种模式一致的查询：{same}/{len(queries)}")
+
+
+if __name__ == "__main__":
+    main_bench()
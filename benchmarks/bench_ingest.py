@@ -0,0 +1,75 @@
+"""
+CSV 加载 + 清洗基准：向量化路径（read_csv_frame + _clean_csv_frame） vs 逐行路径（DictReader + _clean_csv_rows）
+
+运行方式（项目根目录）：
+    python benchmarks/bench_ingest.py [--repeat 3]
+
+输出每个源文件两种路径的耗时（毫秒），并校验两条路径清洗出的记录逐条一致。
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Tuple
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+logging.disable(logging.INFO)
+import main  # noqa: E402  项目根目录的入口，会加载 Global_Phone_Sentiment/main.py
+
+backend = sys.modules["Global_Phone_Sentiment.main"]
+
+from csv_source import read_csv_full  # noqa: E402
+
+
+def timed(fn: Callable[[], object], repeat: int) -> Tuple[float, object]:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main_bench() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    def by_rows(path: Path, platform: str, force):
+        rows, _ = read_csv_full(path)
+        return backend._clean_csv_rows(rows, platform, force)
+
+    def by_frame(path: Path, platform: str, force):
+        frame, _ = backend.read_csv_frame(path)
+        if frame is None:
+            return None
+        return backend._clean_csv_frame(frame, platform, force).to_dict("records")
+
+    total_rows = total_old = total_new = 0.0
+    for path, platform, force in backend._collect_source_files():
+        t_old, old = timed(lambda: by_rows(path, platform, force), args.repeat)
+        t_new, new = timed(lambda: by_frame(path, platform, force), args.repeat)
+        if new is None:
+            print(f"{path.name:45s} pandas 无法解析，跳过")
+            continue
+        assert old == new, f"{path.name}: 向量化清洗结果与逐行清洗不一致"
+        total_rows += len(old)
+        total_old += t_old
+        total_new += t_new
+        print(f"{path.name:45s} {len(old):6d} 行  逐行 {t_old * 1e3:7.1f} ms  向量化 {t_new * 1e3:7.1f} ms")
+
+    print(
+        f"{'合计':45s} {int(total_rows):6d} 行  逐行 {total_old * 1e3:7.1f} ms  向量化 {total_new * 1e3:7.1f} ms"
+        f"  ({total_old / max(total_new, 1e-9):.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,114 @@
+"""
+/opinions 存储引擎基准：内存引擎（列式存储 + 倒排表） vs SQLite 引擎（opinion_db，索引 + FTS5）
+
+用当前数据建一个 OpinionDB，依次测：
+1. 建库耗时和库文件大小；
+2. 单次查询延迟（第一页，每轮前清空两边的结果缓存，测的是未命中缓存的开销），
+   不带 q 和带 q 分开统计；
+3. 并发：N 个线程同时查 SQLite（每个线程一个连接），看吞吐随线程数的变化。
+两个引擎结果的一致性由 tests/test_opinion_db.py 检查。
+
+运行方式（项目根目录）：
+    python benchmarks/bench_opinion_db.py [--repeat 5] [--limit 50] [--threads 1,2,4,8]
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import logging
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+logging.disable(logging.INFO)
+import main  # noqa: E402  项目根目录的入口，会加载 Global_Phone_Sentiment/main.py
+
+backend = sys.modules["Global_Phone_Sentiment.main"]
+
+from opinion_db import OpinionDB  # noqa: E402
+from opinion_store import query_terms  # noqa: E402
+
+QUERIES = [None, "battery", "camera good", "screen", "续航", "手机 发热", "a"]
+
+
+def memory_query(store, brand_id: str, filters: dict, after: Optional[Tuple[int, int]], limit: int):
+    rows = store.select(brand_id, **filters)
+    page_rows, next_key = store.page(rows, after, limit)
+    return store.records(page_rows), len(rows), next_key
+
+
+def percentiles(samples: List[float]) -> str:
+    arr = np.asarray(samples) * 1e6
+    return f"p50={np.percentile(arr, 50):8.1f}us  p99={np.percentile(arr, 99):8.1f}us"
+
+
+def main_bench() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--threads", default="1,2,4,8")
+    args = parser.parse_args()
+
+    store = backend.INDEX.opinions
+    db = OpinionDB.build(store)
+    stats = db.stats()
+    print(f"评论 {stats['rows']} 条，建库 {stats['build_ms']:.0f} ms，库文件 {stats['bytes'] / 1e6:.1f} MB")
+
+    brands = list(store.brand_ids.values)
+    combos = [
+        (brand_id, dict(platform=platform, model=model, year=year, month=month, terms=query_terms(q)))
+        for brand_id, platform, model, (year, month), q in itertools.product(
+            brands,
+            [None, "reddit", "gsmarena", "bilibili"],
+            [None, "iphone", "pro"],
+            [(None, None), (2025, None), (2025, 12)],
+            QUERIES,
+        )
+    ]
+
+    # 2. 单次查询延迟
+    times = {("memory", False): [], ("memory", True): [], ("sqlite", False): [], ("sqlite", True): []}
+    for _ in range(args.repeat):
+        store.select.cache_clear()
+        db.count.cache_clear()
+        for brand_id, filters in combos:
+            has_q = bool(filters["terms"])
+            t0 = time.perf_counter()
+            memory_query(store, brand_id, filters, None, args.limit)
+            times[("memory", has_q)].append(time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            db.query(brand_id, limit=args.limit, **filters)
+            times[("sqlite", has_q)].append(time.perf_counter() - t0)
+    for (engine, has_q), samples in times.items():
+        print(f"{engine:6s} {'带 q ' if has_q else '不带 q'}: {percentiles(samples)}")
+
+    # 3. 并发吞吐：每个线程把全部组合查一遍（不走 count 缓存）
+    def worker() -> None:
+        for brand_id, filters in combos:
+            db.query(brand_id, limit=args.limit, **filters)
+            db._count(brand_id, **filters)
+
+    print()
+    for n in [int(x) for x in args.threads.split(",")]:
+        threads = [threading.Thread(target=worker) for _ in range(n)]
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - t0
+        print(f"{n} 个线程：{n * len(combos) / elapsed:8.0f} 查询/秒，连接数 {len(db.pool)}")
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main_bench()
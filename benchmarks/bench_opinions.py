@@ -0,0 +1,176 @@
+"""
+/opinions 查询延迟基准：倒排表求交（当前实现） vs 原来的逐行线性过滤 + 全量排序
+
+运行方式（项目根目录）：
+    python benchmarks/bench_opinions.py [--repeat 20]
+
+输出每种实现的 p50 / p99 延迟（微秒）。
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import logging
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+logging.disable(logging.INFO)
+import main  # noqa: E402  项目根目录的入口，会加载 Global_Phone_Sentiment/main.py
+
+backend = sys.modules["Global_Phone_Sentiment.main"]
+
+
+@dataclass
+class OpinionRow:
+    platform: str
+    brand_id: str
+    brand_name: str
+    model: str
+    sentiment: str
+    published_at: str
+    raw_text: str
+    is_original: bool = False
+
+
+def legacy_rows_by_brand(store) -> Dict[str, List[OpinionRow]]:
+    """按原来的结构重建 opinions_by_brand（按加载顺序）"""
+    by_brand: Dict[str, List[OpinionRow]] = defaultdict(list)
+    for row in np.argsort(store.seq, kind="stable"):
+        if not store.is_comment[row]:
+            continue
+        rec = store.records([row])[0]
+        by_brand[rec["brand_id"]].append(
+            OpinionRow(
+                platform=rec["platform"],
+                brand_id=rec["brand_id"],
+                brand_name=rec["brand_id"],
+                model=rec["model"],
+                sentiment=rec["sentiment"],
+                published_at=rec["published_at"],
+                raw_text=rec["raw_text"],
+            )
+        )
+    return by_brand
+
+
+def legacy_get_opinions(
+    by_brand: Dict[str, List[OpinionRow]],
+    brand_id: str,
+    platform: Optional[str],
+    model: Optional[str],
+    year: Optional[int],
+    month: Optional[int],
+    limit: int,
+) -> List[Dict]:
+    """原 get_opinions 的过滤 / 排序逻辑"""
+    rows = by_brand.get(brand_id, [])
+    if platform and platform.lower() != "all":
+        rows = [r for r in rows if r.platform == platform.lower()]
+    if model and model.strip():
+        model_lower = model.lower().strip()
+        filtered = []
+        for r in rows:
+            if r.model:
+                row_model_lower = str(r.model).lower().strip()
+                if (
+                    row_model_lower == model_lower
+                    or model_lower in row_model_lower
+                    or row_model_lower in model_lower
+                ):
+                    filtered.append(r)
+        rows = filtered
+    if year is not None and month is not None:
+        filtered = []
+        for r in rows:
+            date_str = r.published_at
+            if date_str and len(date_str) >= 7:
+                try:
+                    parts = date_str.split("-")
+                    if len(parts) >= 2 and int(parts[0]) == year and int(parts[1]) == month:
+                        filtered.append(r)
+                except (ValueError, IndexError):
+                    continue
+        rows = filtered
+    elif year is not None:
+        filtered = []
+        for r in rows:
+            date_str = r.published_at
+            if date_str and len(date_str) >= 4:
+                try:
+                    if int(date_str[:4]) == year:
+                        filtered.append(r)
+                except (ValueError, IndexError):
+                    continue
+        rows = filtered
+    rows.sort(
+        key=lambda r: r.published_at[:10] if len(r.published_at or "") >= 10 else "0000-01-01",
+        reverse=True,
+    )
+    return [
+        {
+            "published_at": r.published_at,
+            "platform": r.platform,
+            "brand_id": r.brand_id,
+            "model": r.model or "",
+            "sentiment": r.sentiment,
+            "raw_text": r.raw_text,
+        }
+        for r in rows[:limit]
+    ]
+
+
+def percentiles(samples: List[float]) -> str:
+    arr = np.asarray(samples) * 1e6
+    return f"p50={np.percentile(arr, 50):9.1f}us  p99={np.percentile(arr, 99):9.1f}us"
+
+
+def main_bench() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    index = backend.INDEX
+    store = index.opinions
+    by_brand = legacy_rows_by_brand(store)
+
+    brands = sorted(by_brand, key=lambda b: -len(by_brand[b]))
+    queries = list(
+        itertools.product(
+            brands,
+            [None, "reddit", "gsmarena", "bilibili"],
+            [None, "iphone", "vivo_x100", "pro"],
+            [(None, None), (2025, None), (2025, 12)],
+        )
+    )
+    print(f"评论 {index.comment_count} 条，品牌 {len(brands)} 个，查询组合 {len(queries)} 个，每个重复 {args.repeat} 次")
+
+    new_times: List[float] = []
+    old_times: List[float] = []
+    for _ in range(args.repeat):
+        for brand_id, platform, model, (year, month) in queries:
+            t0 = time.perf_counter()
+            rows = store.select(brand_id, platform=platform, model=model, year=year, month=month)
+            store.records(rows[: args.limit])
+            new_times.append(time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            legacy_get_opinions(by_brand, brand_id, platform, model, year, month, args.limit)
+            old_times.append(time.perf_counter() - t0)
+
+    print(f"倒排表求交（当前）: {percentiles(new_times)}")
+    print(f"线性过滤 + 全量排序: {percentiles(old_times)}")
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,102 @@
+"""
+phone_index 检索吞吐基准：倒排 + argpartition top-k（search_ids / search_many）
+vs 原来的 cosine_similarity 全量打分 + argsort + DataFrame 复制
+
+查询集：语料里随机抽的评论片段（前若干个词）加上每个品牌名，固定随机种子。
+
+运行方式（项目根目录，需要 scikit-learn）：
+    python benchmarks/bench_phone_index.py [--queries 500] [--k 30] [--batch 64]
+
+输出每种方式的 queries/sec，并校验新旧两种方式的 top-k 分数一致
+（同分的文档先后可能不同，所以比较的是分数序列和命中行集合）。
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "Global_Phone_Sentiment"))
+
+from sklearn.metrics.pairwise import cosine_similarity  # noqa: E402
+
+import phone_index  # noqa: E402
+
+
+def legacy_search(idx: "phone_index.PhoneFeedbackIndex", query: str, k: int):
+    """原 search() 的实现"""
+    q_vec = idx.vectorizer.transform([query])
+    sims = cosine_similarity(q_vec, idx.matrix)[0]
+    top = sims.argsort()[::-1][:k]
+    results = idx.df.iloc[top].copy()
+    results["score"] = sims[top]
+    return results
+
+
+def make_queries(idx: "phone_index.PhoneFeedbackIndex", n: int) -> List[str]:
+    rng = random.Random(0)
+    texts = [t for t in idx.df["content"].tolist() if len(t.split()) >= 3]
+    queries = [" ".join(rng.choice(texts).split()[:rng.randint(2, 6)]) for _ in range(n)]
+    return queries + sorted(idx.df["brand_id"].unique().tolist())
+
+
+def qps(fn: Callable[[], object], n_queries: int) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return n_queries / (time.perf_counter() - t0)
+
+
+def main_bench() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=30)
+    parser.add_argument("--batch", type=int, default=64)
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        idx = phone_index.PhoneFeedbackIndex()
+    queries = make_queries(idx, args.queries)
+    print(f"{len(idx.df)} 条文档，{idx.matrix.shape[1]} 个词项，{len(queries)} 条查询，k={args.k}")
+
+    mismatches = 0
+    for q in queries:
+        old = legacy_search(idx, q, args.k)
+        old = old[old["score"] > 0]
+        new = idx.search_ids(q, args.k)
+        old_scores = old["score"].to_numpy()
+        same_scores = len(old_scores) == len(new.scores) and np.allclose(old_scores, new.scores)
+        # 分数严格大于第 k 名的行必须完全相同；并列第 k 名的可以任选
+        if same_scores and len(new.scores):
+            cut = new.scores[-1]
+            strict_old = set(old.index[old["score"].to_numpy() > cut + 1e-12])
+            strict_new = set(idx.df.index[new.rows[new.scores > cut + 1e-12]])
+            same_scores = strict_old == strict_new
+        mismatches += not same_scores
+    print(f"与原实现不一致的查询: {mismatches}")
+
+    def batched() -> None:
+        for i in range(0, len(queries), args.batch):
+            idx.search_many(queries[i:i + args.batch], args.k)
+
+    results = [
+        ("原 search()（全量打分 + argsort + 复制）", qps(lambda: [legacy_search(idx, q, args.k) for q in queries], len(queries))),
+        ("search()（新，仍返回 DataFrame）", qps(lambda: [idx.search(q, args.k) for q in queries], len(queries))),
+        ("search_ids() 逐条", qps(lambda: [idx.search_ids(q, args.k) for q in queries], len(queries))),
+        (f"search_many() 每批 {args.batch} 条", qps(batched, len(queries))),
+    ]
+    base = results[0][1]
+    for name, value in results:
+        print(f"{name:40s} {value:9.0f} queries/sec  ({value / base:.1f}x)")
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,246 @@
+"""
+crawl_reddit_async 基准 + 行为校验（本地假 Reddit JSON 服务器，不访问外网）
+
+假服务器（ThreadingHTTPServer，HTTP/1.1 keep-alive）每个请求固定延迟 --latency 毫秒：
+- /search.json?q=...&after=...  每个搜索词 --pages 页、每页 --per-page 个帖子，
+  after 标记翻页；每页有几个帖子是所有型号共用的 ID（检验 seen_ids 去重）；
+- /comments/{id}.json           [帖子, 评论树]，评论树里 --comments 条 t1 评论 + 一个 more。
+
+在临时目录里（进度 JSON 和 CSV 都写在当前目录）依次跑：
+1. 同步版：crawl_reddit.crawl_reddit_by_model + crawl_reddit_comments.main（CrawlerClient，原来的串行 / 分批写法）；
+2. asyncio 版：crawl_posts + crawl_comments；
+3. 续跑：asyncio 版中途取消（帖子、评论各一次）后再跑一遍。
+两边用同一个全局限速（--rate 个/秒，burst 3），校验写出的帖子 / 评论 source_id 集合完全一致、没有重复行。
+
+运行方式（项目根目录，需要 httpx）：
+    python benchmarks/bench_reddit_async.py [--models 8] [--pages 3] [--latency 300] [--rate 20] [--concurrency 8]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import re
+import socket
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "Global_Phone_Sentiment"))
+
+import config  # noqa: E402
+import crawl_reddit  # noqa: E402
+import crawl_reddit_async  # noqa: E402
+import crawl_reddit_comments  # noqa: E402
+from crawl_http import CrawlerClient, RetryPolicy  # noqa: E402
+
+SHARED_PER_PAGE = 3  # 每页几个所有搜索词共用的帖子
+
+
+class QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address) -> None:
+        # 续跑测试中途取消时客户端会直接断开连接，不打印 BrokenPipe
+        pass
+
+
+def make_handler(latency: float, pages: int, per_page: int, comments: int, counter: dict):
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self) -> None:
+            super().setup()
+            self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        def log_message(self, *args) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            parts = urlsplit(self.path)
+            query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+            with lock:
+                counter["requests"] += 1
+            time.sleep(latency)
+
+            match = re.fullmatch(r"/comments/(\w+)\.json", parts.path)
+            if parts.path == "/search.json":
+                body = self.search(query["q"], int(query.get("after", "0")))
+            elif match:
+                body = self.comments(match.group(1))
+            else:
+                self.send_error(404)
+                return
+            data = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        @staticmethod
+        def search(q: str, page: int) -> dict:
+            slug = re.sub(r"\W", "", q.lower())
+            children = []
+            for i in range(per_page):
+                post_id = f"s{page}x{i}" if i < SHARED_PER_PAGE else f"{slug}p{page}x{i}"
+                children.append({
+                    "kind": "t3",
+                    "data": {
+                        "id": post_id,
+                        "title": f"{q} thoughts #{i}",
+                        "selftext": "battery and camera",
+                        "permalink": f"/r/phones/comments/{post_id}/",
+                        "created_utc": 1735689600 + page * 1000 + i,
+                    },
+                })
+            after = str(page + 1) if page + 1 < pages else None
+            return {"data": {"children": children, "after": after}}
+
+        @staticmethod
+        def comments(post_id: str) -> list:
+            tree = [
+                {"kind": "t1", "data": {
+                    "id": f"{post_id}c{j}",
+                    "body": f"comment {j} on {post_id}",
+                    "permalink": f"/r/phones/comments/{post_id}/c{j}/",
+                    "created_utc": 1735689600 + j,
+                }}
+                for j in range(comments)
+            ]
+            tree.append({"kind": "more", "data": {}})
+            return [{"data": {"children": []}}, {"data": {"children": tree}}]
+
+    return Handler
+
+
+def source_ids(path: str) -> Tuple[int, set]:
+    ids = pd.read_csv(path, usecols=["source_id"])["source_id"].astype(str)
+    return len(ids), set(ids)
+
+
+def use_workdir(tag: str, tmp: str) -> None:
+    """每种跑法一个空目录，进度 JSON / CSV 都写在里面"""
+    workdir = Path(tmp) / tag
+    workdir.mkdir()
+    os.chdir(workdir)
+    crawl_reddit.CSV_FILENAME = None
+    crawl_reddit_comments.COMMENTS_CSV = "comments.csv"
+
+
+async def crawl_async(base: str, rate: tuple, concurrency: int, stop_after: float = None, phase: str = "all") -> dict:
+    client = crawl_reddit_async.AsyncRedditClient(
+        base=base, rate=rate, max_in_flight=concurrency, retry=RetryPolicy(backoff=0.01), proxy=None
+    )
+    try:
+        if phase in ("posts", "all"):
+            coro = crawl_reddit_async.crawl_posts(client, concurrency)
+            await (asyncio.wait_for(coro, stop_after) if phase == "posts" and stop_after else coro)
+        crawl_reddit_comments.POSTS_CSV = crawl_reddit.CSV_FILENAME
+        if phase in ("comments", "all"):
+            coro = crawl_reddit_async.crawl_comments(client, concurrency)
+            await (asyncio.wait_for(coro, stop_after) if phase == "comments" and stop_after else coro)
+    finally:
+        await client.aclose()
+    return client.stats
+
+
+def main_bench() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--models", type=int, default=8)
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--per-page", type=int, default=10)
+    parser.add_argument("--comments", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=300.0, help="假服务器每个请求的延迟（毫秒）")
+    parser.add_argument("--rate", type=float, default=20.0, help="全局限速（个/秒）")
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    counter = {"requests": 0}
+    server = QuietServer(
+        ("127.0.0.1", 0), make_handler(args.latency / 1000, args.pages, args.per_page, args.comments, counter)
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    rate = (args.rate, 3)
+
+    config.TARGET_MODELS = dict(list(config.TARGET_MODELS.items())[: args.models])
+    crawl_reddit.SEARCH_API = f"{base}/search.json"
+    crawl_reddit_comments.COMMENTS_API = base + "/comments/{post_id}.json"
+    crawl_reddit.HTTP = CrawlerClient(headers=crawl_reddit.HEADERS, rate_limits={"127.0.0.1": rate})
+    crawl_reddit_comments.HTTP = CrawlerClient(
+        headers=crawl_reddit.HEADERS, rate_limits={"127.0.0.1": rate}, max_workers=4
+    )
+    cwd = os.getcwd()
+    results = {}
+
+    print(f"{len(config.TARGET_MODELS)} 个型号 x {args.pages} 页 x {args.per_page} 帖，每帖 {args.comments} 条评论，"
+          f"延迟 {args.latency:.0f} ms，全局限速 {args.rate:.0f} 个/秒")
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            # 1. 同步版
+            use_workdir("sync", tmp)
+            counter["requests"] = 0
+            t0 = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                crawl_reddit.crawl_reddit_by_model()
+                t_posts = time.perf_counter() - t0
+                crawl_reddit_comments.POSTS_CSV = crawl_reddit.CSV_FILENAME
+                crawl_reddit_comments.main()
+            results["sync"] = (t_posts, time.perf_counter() - t0, counter["requests"],
+                               source_ids(crawl_reddit.CSV_FILENAME), source_ids("comments.csv"))
+
+            # 2. asyncio 版
+            use_workdir("async", tmp)
+            counter["requests"] = 0
+            t0 = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                asyncio.run(crawl_async(base, rate, args.concurrency, phase="posts"))
+                t_posts = time.perf_counter() - t0
+                asyncio.run(crawl_async(base, rate, args.concurrency, phase="comments"))
+            results["async"] = (t_posts, time.perf_counter() - t0, counter["requests"],
+                                source_ids(crawl_reddit.CSV_FILENAME), source_ids("comments.csv"))
+
+            # 3. 续跑：帖子、评论各在跑到约一半时取消，然后重跑
+            use_workdir("resume", tmp)
+            counter["requests"] = 0
+            half = results["async"][0] / 2, (results["async"][1] - results["async"][0]) / 2
+            t0 = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                for phase, stop_after in (("posts", half[0]), ("posts", None), ("comments", half[1]), ("comments", None)):
+                    try:
+                        asyncio.run(crawl_async(base, rate, args.concurrency, stop_after, phase))
+                    except asyncio.TimeoutError:
+                        pass
+            results["resume"] = (None, time.perf_counter() - t0, counter["requests"],
+                                 source_ids(crawl_reddit.CSV_FILENAME), source_ids("comments.csv"))
+    finally:
+        os.chdir(cwd)
+        server.shutdown()
+
+    expected_posts, expected_comments = results["sync"][3][1], results["sync"][4][1]
+    print(f"{'':8s} {'帖子阶段':>9s} {'合计':>9s} {'请求数':>7s} {'帖子行':>7s} {'评论行':>7s}  与同步版一致  无重复")
+    for name, (t_posts, total, requests, (n_posts, posts), (n_comments, comments)) in results.items():
+        posts_col = f"{t_posts:8.2f}s" if t_posts is not None else f"{'-':>9s}"
+        same = posts == expected_posts and comments == expected_comments
+        no_dup = n_posts == len(posts) and n_comments == len(comments)
+        print(f"{name:8s} {posts_col} {total:8.2f}s {requests:7d} {n_posts:7d} {n_comments:7d}  {str(same):12s}  {no_dup}")
+    print(f"asyncio 版加速：{results['sync'][1] / results['async'][1]:.1f}x")
+
+
+if __name__ == "__main__":
+    main_bench()
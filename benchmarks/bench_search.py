@@ -0,0 +1,136 @@
+"""
+/copilot 检索基准：BM25 倒排索引的构建耗时和查询延迟
+
+查询集：每个品牌名 / 每个目标型号各一条，加上一组中英文常见问题；
+每条查询都带一次「只看问题里提到的品牌」的掩码（与 /copilot 的做法相同）。
+
+运行方式（项目根目录）：
+    python benchmarks/bench_search.py [--repeat 20] [--top-k 5]
+
+输出构建 / 增量扩展 / 快照还原的耗时，以及 search() 和整个 /copilot 请求的 p50 / p99 / max 延迟（毫秒）。
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+logging.disable(logging.INFO)
+import main  # noqa: E402  项目根目录的入口，会加载 Global_Phone_Sentiment/main.py
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+backend = sys.modules["Global_Phone_Sentiment.main"]
+SearchIndex = backend.SearchIndex
+
+QUESTIONS = [
+    "续航怎么样",
+    "拍照 发热 掉帧",
+    "屏幕 护眼",
+    "信号差",
+    "值得买吗 性价比",
+    "battery life",
+    "camera quality low light",
+    "overheating while gaming",
+    "is it worth upgrading",
+    "iPhone 电池 续航 battery",
+    "小米15 拍照",
+]
+
+
+def percentiles(samples: List[float]) -> str:
+    arr = np.asarray(samples) * 1000
+    return f"p50 {np.percentile(arr, 50):6.2f} ms  p99 {np.percentile(arr, 99):6.2f} ms  max {arr.max():6.2f} ms"
+
+
+def timed(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main_bench() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    index = backend.INDEX
+    store = index.opinions
+    resolver = backend.get_model_catalog().resolver
+    questions = QUESTIONS + list(index.brands) + list(index.models)
+
+    t_build = timed(lambda: SearchIndex.build(store), 3)
+    # 增量扩展：去掉最新加载的 1% 行当作「旧索引」，再把它们追加回来
+    cutoff = np.sort(store.seq)[int(len(store) * 0.99)]
+    base_builder = backend.OpinionStoreBuilder()
+    keep = np.flatnonzero(store.seq < cutoff)
+    base_store = _substore(store, keep, base_builder)
+    base_search = SearchIndex.build(base_store)
+    t_extend = timed(lambda: base_search.extended(base_store, store), 3)
+    arrays = index.search.to_snapshot()
+    t_restore = timed(lambda: SearchIndex.from_snapshot(arrays), 3)
+
+    stats = index.search.stats()
+    print(
+        f"{stats['docs']} 行，{stats['terms']} 个词项，{stats['postings']} 条倒排记录，"
+        f"{stats['nbytes'] / 1e6:.1f} MB"
+    )
+    print(f"完整构建 {t_build * 1e3:7.1f} ms | 增量扩展 1% {t_extend * 1e3:7.1f} ms | 快照还原 {t_restore * 1e3:7.1f} ms")
+
+    search_samples: List[float] = []
+    for _ in range(args.repeat):
+        for q in questions:
+            brands = [store.brand_ids.lookup(b) for b in resolver.mentions(q.lower())]
+            brands = [code for code in brands if code is not None]
+            t0 = time.perf_counter()
+            allowed = np.isin(store.brand, brands) if brands else None
+            index.search.search(q, top_k=args.top_k, allowed=allowed)
+            search_samples.append(time.perf_counter() - t0)
+    print(f"search()  {len(questions)} 条查询 x {args.repeat}: {percentiles(search_samples)}")
+
+    client = TestClient(backend.app)
+    copilot_samples: List[float] = []
+    for _ in range(max(args.repeat // 4, 1)):
+        for q in questions:
+            t0 = time.perf_counter()
+            resp = client.post("/copilot", json={"question": q, "top_k": args.top_k})
+            copilot_samples.append(time.perf_counter() - t0)
+            assert resp.status_code == 200, resp.text
+    print(f"/copilot（含 HTTP 往返）: {percentiles(copilot_samples)}")
+
+
+def _substore(store, rows: np.ndarray, builder):
+    """store 里的部分行（保留原 seq）重新建一个 store"""
+    for row in sorted(rows.tolist(), key=lambda r: int(store.seq[r])):
+        record = store.records([row])[0]
+        builder.add(
+            {
+                "platform": record["platform"],
+                "brand_id": record["brand_id"],
+                "brand": store.brand_names[store.brand_name[row]],
+                "model": record["model"],
+                "sentiment": record["sentiment"],
+                "is_comment": bool(store.is_comment[row]),
+                "day": int(store.day[row]),
+                "text": record["raw_text"],
+            },
+            seq=int(store.seq[row]),
+        )
+    return builder.build()
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,151 @@
+"""
+segment_store 基准 + 行为校验：Arrow IPC 段文件（内存映射）vs 解析 CSV
+
+源文件取 _collect_source_files() 的全部 CSV，复制到临时目录后 sync 成段文件，依次测：
+1. 读取：read_csv_full vs segment_store.read_rows（逐行路径）、
+   read_csv_frame vs segment_store.read_frame（向量化路径），校验读出的记录 / DataFrame 逐格一致、
+   清洗结果（_clean_csv_rows）一致；
+2. 追加：CsvSink(segments=True) 每 --unit 行 checkpoint 一次，追加 --append 行，
+   看段数（自动合并）、再手动 compact，每一步都校验与 CSV 一致；
+   段文件落后于 CSV（不写段文件的 sink 又追加了一批）时，尾部从 CSV 补上，结果仍然一致；
+3. CSV 被重写：段文件不再使用（返回 None，调用方读 CSV），sync 后整体重建。
+
+运行方式（项目根目录，需要 pyarrow）：
+    python benchmarks/bench_segments.py [--repeat 5] [--append 2000] [--unit 10]
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import logging
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+logging.disable(logging.INFO)
+import main  # noqa: E402  项目根目录的入口，会加载 Global_Phone_Sentiment/main.py
+
+backend = sys.modules["Global_Phone_Sentiment.main"]
+
+import segment_store  # noqa: E402
+from csv_sink import CsvSink  # noqa: E402
+from csv_source import read_csv_full  # noqa: E402
+
+
+def timed(fn: Callable[[], object], repeat: int) -> Tuple[float, object]:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def without_restkey(rows: List[Dict]) -> List[Dict]:
+    """DictReader 把多出来的字段放在 None 键下，段文件不保留（清洗用不到）"""
+    return [{k: v for k, v in row.items() if k is not None} for row in rows]
+
+
+def same_as_csv(path: Path) -> bool:
+    rows, _ = read_csv_full(path)
+    found = segment_store.read_rows(path)
+    frame, _ = backend.read_csv_frame(path)
+    seg_frame = segment_store.read_frame(path)
+    return (
+        found is not None
+        and found[0] == without_restkey(rows)
+        and (frame is None or (seg_frame is not None and seg_frame[0].equals(frame)))
+    )
+
+
+def main_bench() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--append", type=int, default=2000)
+    parser.add_argument("--unit", type=int, default=10, help="追加时每多少行 checkpoint 一次")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sources = []
+        for path, platform, force in backend._collect_source_files():
+            copy = Path(tmp) / path.name
+            shutil.copyfile(path, copy)
+            segment_store.sync(copy)
+            sources.append((copy, platform, force))
+
+        # 1. 读取
+        print(f"{'文件':42s} {'行数':>6s} | {'DictReader':>10s} {'段文件':>8s} | {'pandas C':>9s} {'段文件':>8s} | 一致")
+        totals = [0.0] * 4
+        for path, platform, force in sources:
+            t_rows, (rows, _) = timed(lambda: read_csv_full(path), args.repeat)
+            t_seg_rows, (seg_rows, _) = timed(lambda: segment_store.read_rows(path), args.repeat)
+            t_frame, (frame, _) = timed(lambda: backend.read_csv_frame(path), args.repeat)
+            t_seg_frame, (seg_frame, _) = timed(lambda: segment_store.read_frame(path), args.repeat)
+            same = (
+                seg_rows == without_restkey(rows)
+                and (frame is None or seg_frame.equals(frame))
+                and backend._clean_csv_rows(seg_rows, platform, force, source=path.name)
+                == backend._clean_csv_rows(rows, platform, force, source=path.name)
+            )
+            for i, t in enumerate((t_rows, t_seg_rows, t_frame, t_seg_frame)):
+                totals[i] += t
+            print(
+                f"{path.name:42s} {len(rows):6d} | {t_rows * 1e3:8.1f}ms {t_seg_rows * 1e3:6.1f}ms | "
+                f"{t_frame * 1e3:7.1f}ms {t_seg_frame * 1e3:6.1f}ms | {same}"
+            )
+        print(
+            f"{'合计':42s} {'':6s} | {totals[0] * 1e3:8.1f}ms {totals[1] * 1e3:6.1f}ms | "
+            f"{totals[2] * 1e3:7.1f}ms {totals[3] * 1e3:6.1f}ms | "
+            f"逐行 {totals[0] / totals[1]:.1f}x，向量化 {totals[2] / totals[3]:.1f}x"
+        )
+
+        # 2. 追加 + 合并（用 Reddit 评论文件，行取自它自己）
+        path = next(p for p, _, _ in sources if p.name.startswith("data_reddit_comments"))
+        store = segment_store.SegmentStore(path)
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            template = list(csv.DictReader(f))
+        rows = [{**template[i % len(template)], "source_id": f"bench_{i}"} for i in range(args.append)]
+
+        t0 = time.perf_counter()
+        with CsvSink(str(path), segments=True) as sink:
+            for i, row in enumerate(rows, start=1):
+                sink.write(row)
+                if i % args.unit == 0:
+                    sink.checkpoint()
+        elapsed = time.perf_counter() - t0
+        print(
+            f"\n追加 {args.append} 行（每 {args.unit} 行一个检查点 + 段文件）：{elapsed * 1e3:.0f} ms，"
+            f"段数 {len(store.manifest()['segments'])}（自动合并阈值 {segment_store.COMPACT_THRESHOLD}），"
+            f"与 CSV 一致: {same_as_csv(path)}"
+        )
+        merged = store.compact()
+        print(f"compact：合并 {merged} 个段 -> {len(store.manifest()['segments'])} 个，与 CSV 一致: {same_as_csv(path)}")
+
+        with CsvSink(str(path), segments=False) as sink:
+            for row in rows[: args.unit * 3]:
+                sink.write({**row, "source_id": row["source_id"] + "_tail"})
+        found = store.read()
+        print(
+            f"段文件落后于 CSV：尾部 {len(found[1])} 行从 CSV 补上，与 CSV 一致: {same_as_csv(path)}；"
+            f"sync 补写 {store.sync()} 行"
+        )
+
+        # 3. CSV 被重写
+        data = path.read_bytes()
+        path.write_bytes(data[: len(data) // 2][: data[: len(data) // 2].rfind(b"\n") + 1])
+        print(
+            f"CSV 被截断：段文件{'不再使用' if store.read() is None else '仍被使用（错误）'}，"
+            f"sync 整体重建 {store.sync()} 行，与 CSV 一致: {same_as_csv(path)}"
+        )
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,99 @@
+"""
+语义索引（semantic_index，LSA + IVF）基准：构建 / 落盘 / 加载耗时，以及不同 nprobe 下的召回率和延迟
+
+语料用 main 的全量索引文本（中英文混合，比 phone_index 自己加载的 CSV 多），
+召回率 = 近似检索的 top-k 与精确检索（nprobe = nlist）top-k 的重合比例。
+
+运行方式（项目根目录，需要 scikit-learn）：
+    python benchmarks/bench_semantic.py [--queries 300] [--k 10] [--dims 128]
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+logging.disable(logging.INFO)
+import main  # noqa: E402  项目根目录的入口，会加载 Global_Phone_Sentiment/main.py
+
+from semantic_index import SemanticIndex, SemanticParams  # noqa: E402
+
+backend = sys.modules["Global_Phone_Sentiment.main"]
+
+QUESTIONS = ["续航", "battery life", "发热 烫", "overheating", "拍照 夜景", "camera at night", "信号", "signal"]
+
+
+def main_bench() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--dims", type=int, default=128)
+    args = parser.parse_args()
+
+    store = backend.INDEX.opinions
+    texts = [store.text(row) for row in range(len(store))]
+    sources = [path for path, _, _ in backend._collect_source_files()]
+    params = SemanticParams(dims=args.dims)
+
+    semantic = SemanticIndex.build(texts, params)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "semantic.snap"
+        t0 = time.perf_counter()
+        size = semantic.save(path, sources)
+        t_save = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        loaded = SemanticIndex.load(path, sources, params)
+        t_load = time.perf_counter() - t0
+        assert loaded is not None
+        same = [a[0].tolist() for a in loaded.search_many(QUESTIONS, args.k)] == [
+            b[0].tolist() for b in semantic.search_many(QUESTIONS, args.k)
+        ]
+
+    stats = semantic.stats()
+    print(
+        f"{stats['docs']} 条文档，{stats['features']} 个 n-gram 特征，{stats['dims']} 维，nlist={stats['nlist']}，"
+        f"{stats['nbytes'] / 1e6:.1f} MB"
+    )
+    print(
+        f"构建 {semantic.build_ms:8.1f} ms | 写盘 {t_save * 1e3:6.1f} ms（{size / 1e6:.1f} MB）"
+        f" | mmap 加载 {t_load * 1e3:6.1f} ms | 加载后结果一致: {same}"
+    )
+
+    rng = random.Random(0)
+    queries = QUESTIONS + [
+        " ".join(t.split())[:rng.randint(4, 24)] for t in rng.sample(texts, args.queries)
+    ]
+    exact = semantic.search_many(queries, args.k, nprobe=semantic.nlist)
+
+    nprobes = sorted({n for n in (1, 2, 4, 8, 16, 32) if n < semantic.nlist} | {semantic.nlist})
+    for nprobe in nprobes:
+        t0 = time.perf_counter()
+        approx = semantic.search_many(queries, args.k, nprobe=nprobe)
+        elapsed = time.perf_counter() - t0
+        recalls = [
+            len(set(a[0].tolist()) & set(e[0].tolist())) / len(e[0])
+            for a, e in zip(approx, exact)
+            if len(e[0])
+        ]
+        print(
+            f"nprobe={nprobe:4d}  recall@{args.k} {np.mean(recalls):.3f}"
+            f"  {elapsed / len(queries) * 1e3:6.2f} ms/查询  {len(queries) / elapsed:8.0f} queries/sec"
+        )
+
+    print("\n示例（nprobe 默认值）：")
+    for q, (rows, scores) in zip(QUESTIONS, semantic.search_many(QUESTIONS, 3)):
+        print(f"  {q}: " + " | ".join(" ".join(texts[r].split())[:30] for r in rows))
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,124 @@
+"""
+规则情感打标基准：Aho-Corasick 词典引擎（单条 / 整批） vs 原来的逐个关键词 `kw in text`
+
+语料：Global_Phone_Sentiment/data_bilibili.csv + 根目录的 Reddit 评论 / 帖子 CSV。
+
+运行方式（项目根目录）：
+    python benchmarks/bench_sentiment.py [--repeat 3] [--extra-keywords 0]
+
+--extra-keywords N：从语料里再抽 N 个词加进词表，看关键词变多时各实现的变化。
+输出每种实现的每条耗时（微秒），并校验三种实现的计数完全一致。
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Sequence, Tuple
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+BACKEND_DIR = ROOT_DIR / "Global_Phone_Sentiment"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from sentiment_lexicon import SentimentLexicon  # noqa: E402
+
+CORPUS_FILES = [
+    BACKEND_DIR / "data_bilibili.csv",
+    ROOT_DIR / "data_reddit_comments_20251206_105256.csv",
+    ROOT_DIR / "data_reddit_20251206_103022.csv",
+    ROOT_DIR / "data_reddit_2111.csv",
+]
+TEXT_COLUMNS = ["raw_text", "cleaned_text", "content", "text", "comment", "body"]
+
+
+def load_texts() -> List[str]:
+    texts: List[str] = []
+    for path in CORPUS_FILES:
+        if not path.exists():
+            continue
+        with path.open("r", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                for col in TEXT_COLUMNS:
+                    if row.get(col):
+                        texts.append(row[col])
+                        break
+    return texts
+
+
+def main_lexicon_words() -> Tuple[List[str], List[str]]:
+    """main.py 的词表（不导入 main，避免加载整个索引）"""
+    source = (BACKEND_DIR / "main.py").read_text(encoding="utf-8")
+    lists = []
+    for name in ("POSITIVE_KEYWORDS", "NEGATIVE_KEYWORDS"):
+        block = re.search(rf"^{name} = \[(.*?)^\]", source, re.S | re.M).group(1)
+        lists.append(re.findall(r'"([^"]+)"', block))
+    return lists[0], lists[1]
+
+
+def legacy_counts(positive: Sequence[str], negative: Sequence[str]) -> Callable[[str], Tuple[int, int]]:
+    """原实现：每个关键词各做一次子串判断"""
+
+    def counts(text: str) -> Tuple[int, int]:
+        text_lower = text.lower()
+        pos = sum(1 for kw in positive if kw in text_lower)
+        neg = sum(1 for kw in negative if kw in text_lower)
+        return pos, neg
+
+    return counts
+
+
+def timed(fn: Callable[[], object], repeat: int) -> Tuple[float, object]:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main_bench() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--extra-keywords", type=int, default=0)
+    args = parser.parse_args()
+
+    texts = load_texts()
+    positive, negative = main_lexicon_words()
+    if args.extra_keywords:
+        vocab = sorted({w.lower() for t in texts for w in re.findall(r"[A-Za-z]{4,}", t)})
+        extra = random.Random(0).sample(vocab, min(args.extra_keywords, len(vocab)))
+        half = len(extra) // 2
+        positive = positive + extra[:half]
+        negative = negative + extra[half:]
+
+    print(
+        f"语料 {len(texts)} 条（平均 {sum(map(len, texts)) / max(len(texts), 1):.0f} 字符），"
+        f"关键词 {len(positive) + len(negative)} 个"
+    )
+
+    legacy = legacy_counts([w.lower() for w in positive], [w.lower() for w in negative])
+    build_t0 = time.perf_counter()
+    lexicon = SentimentLexicon(positive, negative)
+    print(f"自动机编译: {(time.perf_counter() - build_t0) * 1000:.1f} ms")
+
+    per_text = 1e6 / max(len(texts), 1)
+    t_old, old = timed(lambda: [legacy(t) for t in texts], args.repeat)
+    t_one, one = timed(lambda: [lexicon.counts(t) for t in texts], args.repeat)
+    t_many, many = timed(lambda: lexicon.counts_many(texts), args.repeat)
+
+    assert old == one, "单条扫描结果与原实现不一致"
+    assert [tuple(r) for r in many.tolist()] == old, "整批扫描结果与原实现不一致"
+
+    print(f"逐个关键词 kw in text : {t_old * per_text:8.2f} us/条")
+    print(f"自动机单条 counts     : {t_one * per_text:8.2f} us/条")
+    print(f"自动机整批 counts_many: {t_many * per_text:8.2f} us/条")
+
+
+if __name__ == "__main__":
+    main_bench()
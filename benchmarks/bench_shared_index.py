@@ -0,0 +1,169 @@
+"""
+多 worker 内存基准：每个 worker 各建一份索引（原来的做法） vs 共享模式（shared_index，一个 loader 建、其余映射快照）
+
+起 N 个子进程模拟 N 个 worker，每个子进程：
+1. 导入 main（PHONE_INDEX_SNAPSHOT=off，导入时建的自带数据索引随后丢掉），记下此时的内存作为基线；
+2. 加载 --scale 倍的合成语料（与 bench_stream_ingest 相同的做法）：
+   private = load_index(snapshot_path=None)；shared = load_shared_index(SharedIndex(临时目录里的快照))；
+3. 把索引的所有数组都读一遍（相当于服务一段时间之后，页面都已经换进来了），报告匿名内存（私有）的增量。
+N 个子进程都就绪后，父进程从 /proc/<pid>/smaps 读每个进程映射的快照文件的 PSS（共享页按进程数均摊），
+索引占用的物理内存 ≈ 各进程匿名内存增量之和 + 快照映射的 PSS 之和。
+共享模式下 loader 建完索引后也换成映射快照，私有数组释放，但 Python 堆里释放掉的小对象不一定还给系统，
+所以 loader 的匿名内存增量会比 follower 大一些。
+
+运行方式（项目根目录，Linux）：
+    python benchmarks/bench_shared_index.py [--scale 10] [--workers 1,2,4]
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "benchmarks"))
+
+from bench_stream_ingest import make_corpus  # noqa: E402
+
+SNAPSHOT_NAME = "shared_index.snap"
+
+
+def rollup_kb(field: str, pid: str = "self") -> int:
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def snapshot_pss_kb(pid: int) -> int:
+    """进程里所有映射了快照文件（包括已被替换、标成 deleted 的旧快照）的区域的 PSS 之和"""
+    total, inside = 0, False
+    with open(f"/proc/{pid}/smaps") as f:
+        for line in f:
+            head = line.split(maxsplit=1)[0]
+            if "-" in head and not head.endswith(":"):
+                inside = SNAPSHOT_NAME in line
+            elif inside and head == "Pss:":
+                total += int(line.split()[1])
+    return total
+
+
+def touch(index) -> None:
+    """把列式存储和检索索引的所有数组都读一遍"""
+    store, search = index.opinions, index.search
+    for name in store._ARRAY_FIELDS:
+        getattr(store, name).sum()
+    np.frombuffer(store.text_buffer, dtype=np.uint8).sum()
+    for arr in (search.term_starts, search.doc_ids, search.tfs, search.doc_len, search._weights, search._idf):
+        arr.sum()
+
+
+def child(mode: str, data_dir: str, snapshot_dir: str) -> None:
+    """子进程：加载语料、报告内存，然后等父进程关掉 stdin 再退出"""
+    import logging
+
+    sys.path.insert(0, str(ROOT_DIR))
+    logging.disable(logging.INFO)
+    import main  # noqa: F401  项目根目录的入口，会加载 Global_Phone_Sentiment/main.py
+
+    backend = sys.modules["Global_Phone_Sentiment.main"]
+    from shared_index import SharedIndex
+
+    source_files = [
+        (Path(data_dir) / path.name, platform, force) for path, platform, force in backend._collect_source_files()
+    ]
+    backend._collect_source_files = lambda: source_files
+    backend.INDEX = None
+    gc.collect()
+    anon_before = rollup_kb("Anonymous")
+
+    t0 = time.perf_counter()
+    if mode == "shared":
+        shared = SharedIndex(Path(snapshot_dir) / SNAPSHOT_NAME)
+        index = backend.load_shared_index(shared)
+        role = "loader" if shared.is_loader else "follower"
+    else:
+        index = backend.load_index(snapshot_path=None)
+        role = "private"
+    elapsed = time.perf_counter() - t0
+    gc.collect()
+    touch(index)
+    print(json.dumps({
+        "pid": os.getpid(),
+        "role": role,
+        "rows": len(index.opinions),
+        "seconds": elapsed,
+        "anon_mb": (rollup_kb("Anonymous") - anon_before) / 1024,
+    }), flush=True)
+    sys.stdin.readline()
+
+
+def run_workers(mode: str, n: int, data_dir: str) -> List[Dict]:
+    """同时起 n 个子进程，全部就绪后读各自映射快照的 PSS，再让它们退出"""
+    env = dict(os.environ, PHONE_INDEX_SNAPSHOT="off", PHONE_INDEX_WORKERS="1", PHONE_INDEX_RELOAD_INTERVAL="0")
+    env.pop("PHONE_INDEX_SHARED", None)
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        procs = [
+            subprocess.Popen(
+                [sys.executable, __file__, "--child", mode, "--data-dir", data_dir, "--snapshot-dir", snapshot_dir],
+                env=env,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+            )
+            for _ in range(n)
+        ]
+        results = [json.loads(p.stdout.readline()) for p in procs]
+        for r in results:
+            r["snapshot_mb"] = snapshot_pss_kb(r["pid"]) / 1024
+        for p in procs:
+            p.stdin.close()
+            p.wait()
+    return results
+
+
+def main_bench() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", type=int, default=10)
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--child", choices=["private", "shared"], help=argparse.SUPPRESS)
+    parser.add_argument("--data-dir", help=argparse.SUPPRESS)
+    parser.add_argument("--snapshot-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.data_dir, args.snapshot_dir)
+        return
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        size = make_corpus(args.scale, Path(data_dir))
+        print(f"{args.scale}x 合成语料 {size / 1e6:.0f} MB")
+        print(f"{'worker 数':10s} {'模式':8s} {'记录数':>9s} {'最慢启动':>9s} {'匿名内存':>10s} {'快照 PSS':>10s} {'合计':>10s}")
+        for n in [int(x) for x in args.workers.split(",")]:
+            for mode, name in (("private", "各建一份"), ("shared", "共享")):
+                results = run_workers(mode, n, data_dir)
+                anon = sum(r["anon_mb"] for r in results)
+                mapped = sum(r["snapshot_mb"] for r in results)
+                print(
+                    f"{n:<10d} {name:8s} {results[0]['rows']:9d} {max(r['seconds'] for r in results):8.1f}s "
+                    f"{anon:8.1f}MB {mapped:8.1f}MB {anon + mapped:8.1f}MB"
+                )
+                if mode == "shared":
+                    roles = ", ".join(f"{r['role']} {r['anon_mb']:.0f}MB" for r in results)
+                    print(f"{'':10s} 每个进程的匿名内存增量：{roles}")
+
+
+if __name__ == "__main__":
+    main_bench()
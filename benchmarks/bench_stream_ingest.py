@@ -0,0 +1,197 @@
+"""
+流式加载基准：build_index 的峰值内存（RSS），流式（CsvStream 逐批读取 + 逐批清洗）vs 原来的整文件读取
+
+两份数据各跑一遍：
+- 项目自带的源 CSV；
+- --scale 倍的合成语料：每个源 CSV 的数据部分重复 --scale 遍（表头只留一行），写在临时目录。
+每种组合在单独的子进程里跑 build_index（单进程加载、不写快照）：
+子进程先导入 main（导入时会建一次项目自带数据的索引），然后重置峰值 RSS（/proc/self/clear_refs），
+只统计 build_index 期间的峰值相对开始时的增量，以及建完后常驻的增量（索引本身）。
+「原写法」把 _load_source 换回改动前的整文件读取：read_bytes 一次读完、UTF-8 解码失败再整个按 GBK 重解，
+整文件的记录列表 + 清洗后的字典列表 + 整列的列表同时在内存里。
+只换了 _load_source：之后的建列式存储（文本按块重排）和建检索索引（分批统计词频）两种写法共用，
+大语料下整个 build_index 的峰值出现在建检索索引时，加载阶段的差别主要体现在「常驻增量」上。
+两种写法建出来的 OpinionStore 逐字节一致（比较摘要）。
+
+运行方式（项目根目录，Linux）：
+    python benchmarks/bench_stream_ingest.py [--scale 50]
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+
+def rss_kb(field: str) -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def reset_peak() -> None:
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+
+
+def store_digest(store) -> str:
+    h = hashlib.sha1()
+    for name in ("platforms", "brand_ids", "brand_names", "models"):
+        h.update(json.dumps(getattr(store, name).values, ensure_ascii=False).encode())
+    vocabs, arrays = store.to_snapshot()
+    for name in sorted(arrays):
+        h.update(arrays[name].tobytes())
+    return h.hexdigest()
+
+
+def child(mode: str, data_dir: Optional[str]) -> None:
+    """子进程：导入 main，按 mode 跑一次 build_index，结果以 JSON 打印到 stdout"""
+    import logging
+
+    sys.path.insert(0, str(ROOT_DIR))
+    logging.disable(logging.INFO)
+    import main  # noqa: F401  项目根目录的入口，会加载 Global_Phone_Sentiment/main.py
+
+    backend = sys.modules["Global_Phone_Sentiment.main"]
+    if mode == "legacy":
+        backend._load_source = _legacy_load_source(backend)
+
+    source_files = backend._collect_source_files()
+    if data_dir:
+        source_files = [(Path(data_dir) / path.name, platform, force) for path, platform, force in source_files]
+
+    backend.INDEX = None
+    gc.collect()
+    before = rss_kb("VmRSS")
+    reset_peak()
+    t0 = time.perf_counter()
+    index = backend.build_index(source_files, snapshot_path=None)
+    elapsed = time.perf_counter() - t0
+    peak = rss_kb("VmHWM")
+    gc.collect()
+    after = rss_kb("VmRSS")
+    print(json.dumps({
+        "rows": len(index.opinions),
+        "seconds": elapsed,
+        "peak_mb": (peak - before) / 1024,
+        "resident_mb": (after - before) / 1024,
+        "digest": store_digest(index.opinions),
+    }))
+
+
+def _legacy_load_source(backend):
+    """改动前的 _load_source 逐行路径（读文件的部分照搬原来的 read_csv_full）"""
+    from csv_source import CsvCursor, _decode_rows
+    from opinion_store import ColumnChunk
+
+    def legacy_read_csv_full(path: Path):
+        data = path.read_bytes()
+        for encoding in ("utf-8", "gbk"):
+            try:
+                rows, fieldnames = _decode_rows(data, encoding)
+            except UnicodeDecodeError:
+                continue
+            header_end = data.find(b"\n") + 1 or len(data)
+            return rows, CsvCursor(
+                path=path, encoding=encoding, fieldnames=fieldnames,
+                offset=len(data), rows=len(rows), header_bytes=data[:header_end],
+            )
+        return [], None
+
+    def load_source(path: Path, platform: str, force_is_comment):
+        started = time.perf_counter()
+        date_before = backend.DATE_NORMALIZER.export()
+        raw_rows, cursor = legacy_read_csv_full(path)
+        rows = backend._clean_csv_rows(raw_rows, platform, force_is_comment, source=path.name)
+        columns = {col: [row.get(col) for row in rows] for col in backend._CHUNK_COLUMNS}
+        urls = backend._bilibili_urls(rows, 3)
+        date_after = backend.DATE_NORMALIZER.export(source=path.name)
+        return backend.LoadedSource(
+            cursor=cursor,
+            chunk=ColumnChunk.from_columns(columns),
+            bilibili_urls=urls,
+            elapsed_ms=(time.perf_counter() - started) * 1000,
+            date_stats=backend.DateStats(
+                hits=date_after.hits - date_before.hits,
+                misses=date_after.misses - date_before.misses,
+                formats=date_after.formats,
+            ),
+        )
+
+    return load_source
+
+
+def make_corpus(scale: int, out_dir: Path) -> int:
+    """每个源 CSV 的数据部分重复 scale 遍，返回合成语料的总字节数"""
+    sys.path.insert(0, str(ROOT_DIR / "Global_Phone_Sentiment"))
+    total = 0
+    sources = [
+        *(ROOT_DIR / "Global_Phone_Sentiment").glob("data_*.csv"),
+        *ROOT_DIR.glob("data_reddit*.csv"),
+    ]
+    for path in sources:
+        data = path.read_bytes()
+        header_end = data.find(b"\n") + 1
+        body = data[header_end:]
+        if body and not body.endswith(b"\n"):
+            body += b"\n"
+        with open(out_dir / path.name, "wb") as f:
+            f.write(data[:header_end])
+            for _ in range(scale):
+                f.write(body)
+        total += (out_dir / path.name).stat().st_size
+    return total
+
+
+def run_child(mode: str, data_dir: Optional[str]) -> Dict:
+    cmd = [sys.executable, __file__, "--child", mode]
+    if data_dir:
+        cmd += ["--data-dir", data_dir]
+    env = dict(os.environ, PHONE_INDEX_WORKERS="1", PHONE_INDEX_RELOAD_INTERVAL="0")
+    out = subprocess.run(cmd, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main_bench() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", type=int, default=50)
+    parser.add_argument("--child", choices=["legacy", "stream"], help=argparse.SUPPRESS)
+    parser.add_argument("--data-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.data_dir)
+        return
+
+    print(f"{'数据':18s} {'写法':8s} {'记录数':>9s} {'耗时':>8s} {'峰值增量':>10s} {'常驻增量':>10s}")
+    with tempfile.TemporaryDirectory() as tmp:
+        size = make_corpus(args.scale, Path(tmp))
+        corpora: List = [("自带数据", None), (f"{args.scale}x 合成 {size / 1e6:.0f} MB", tmp)]
+        for label, data_dir in corpora:
+            results = {mode: run_child(mode, data_dir) for mode in ("legacy", "stream")}
+            for mode, name in (("legacy", "原写法"), ("stream", "流式")):
+                r = results[mode]
+                print(
+                    f"{label:18s} {name:8s} {r['rows']:9d} {r['seconds']:7.2f}s "
+                    f"{r['peak_mb']:8.1f}MB {r['resident_mb']:8.1f}MB"
+                )
+            same = results["legacy"]["digest"] == results["stream"]["digest"]
+            ratio = results["legacy"]["peak_mb"] / max(results["stream"]["peak_mb"], 1e-9)
+            print(f"{'':18s} 峰值内存降到原来的 1/{ratio:.1f}，两种写法的 OpinionStore 一致: {same}")
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,97 @@
+"""
+测试公用的 fixture：导入后端 main（Global_Phone_Sentiment/main.py）。
+
+导入 main 时会用仓库自带的数据建一次索引；这里先关掉索引快照、段文件、后台热更新和进程池，
+测试不在仓库里写文件，也不起后台线程 / 子进程。
+small_index 用临时目录里的一个 Reddit 评论 CSV 建一个小索引，替换掉全局 INDEX（测试结束后还原）。
+"""
+
+import csv
+import importlib.util
+import logging
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+# 测试里直接导入后端的模块（csv_source、opinion_store 等）
+sys.path.insert(0, str(ROOT_DIR / "Global_Phone_Sentiment"))
+
+_TEST_ENV = {
+    "PHONE_INDEX_SNAPSHOT": "off",
+    "PHONE_INDEX_SEGMENTS": "off",
+    "PHONE_INDEX_RELOAD_INTERVAL": "0",
+    "PHONE_INDEX_WORKERS": "1",
+}
+
+
+@pytest.fixture(scope="session")
+def backend():
+    """后端模块（不是根目录的入口 main），INDEX / app 等都从这里取"""
+    for key, value in _TEST_ENV.items():
+        os.environ.setdefault(key, value)
+    os.environ.pop("PHONE_INDEX_SHARED", None)
+    logging.disable(logging.INFO)
+    if "Global_Phone_Sentiment.main" not in sys.modules:
+        # 按路径执行根目录的入口（它会加载 Global_Phone_Sentiment/main.py）：
+        # 别的测试把 Global_Phone_Sentiment 加进了 sys.path，import main 可能拿到后端文件本身
+        spec = importlib.util.spec_from_file_location("phone_sentiment_entry", ROOT_DIR / "main.py")
+        spec.loader.exec_module(importlib.util.module_from_spec(spec))
+    return sys.modules["Global_Phone_Sentiment.main"]
+
+
+@pytest.fixture
+def client(backend):
+    from fastapi.testclient import TestClient
+
+    return TestClient(backend.app)
+
+
+# 与 data_reddit_comments_*.csv 相同的列
+_REDDIT_COLUMNS = [
+    "platform", "source_id", "source_type", "parent_source_id", "url", "brand_id",
+    "phone_model_id", "lang", "published_at", "raw_text", "cleaned_text",
+]
+
+
+class CommentCsv:
+    """临时的 Reddit 评论 CSV，append 的每一项是 (published_at, 文本)，published_at 可以为空"""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.count = 0
+        with path.open("w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerow(_REDDIT_COLUMNS)
+
+    def append(self, rows) -> None:
+        with self.path.open("a", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            for published_at, text in rows:
+                self.count += 1
+                writer.writerow([
+                    "reddit", f"reddit_comment_{self.count}", "comment", "reddit_post", "",
+                    "Apple", "iphone_16_pro", "en", published_at, text, text,
+                ])
+
+    @property
+    def source_files(self):
+        return [(self.path, "reddit", True)]
+
+
+@pytest.fixture
+def small_index(backend, tmp_path, monkeypatch):
+    """
+    返回 (CommentCsv, 装好索引的函数)：先往 CSV 里 append，再调用后者用它建索引并装成全局 INDEX。
+    热更新（refresh_index）也只会看到这个 CSV
+    """
+    source = CommentCsv(tmp_path / "data_reddit_comments_test.csv")
+    monkeypatch.setattr(backend, "_collect_source_files", lambda: source.source_files)
+
+    def install():
+        index = backend.build_index(source.source_files)
+        monkeypatch.setattr(backend, "INDEX", index)
+        return index
+
+    return source, install
@@ -0,0 +1,65 @@
+"""
+/stats、/insights 的响应缓存：If-None-Match 命中返回 304；
+热更新发布新一代索引后 ETag 和响应体都要跟着变，不能继续用上一代序列化好的结果。
+
+运行方式（项目根目录）：
+    python -m pytest -q tests
+"""
+
+import pytest
+
+ROWS = [
+    ("2025-03-01 10:00:00", "great battery, love it"),
+    ("2025-03-02 10:00:00", "screen is bad"),
+]
+APPENDED = [
+    ("2025-03-03 10:00:00", "camera is excellent"),
+    ("2025-03-04 10:00:00", "overheating problem"),
+    ("", "just ok"),
+]
+
+
+@pytest.fixture
+def installed(small_index):
+    source, install = small_index
+    source.append(ROWS)
+    install()
+    return source
+
+
+@pytest.mark.parametrize("path", ["/stats", "/insights"])
+def test_if_none_match_returns_304(installed, client, path):
+    first = client.get(path)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    for header in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        resp = client.get(path, headers={"If-None-Match": header})
+        assert resp.status_code == 304
+        assert resp.headers["ETag"] == etag
+        assert resp.content == b""
+
+    resp = client.get(path, headers={"If-None-Match": '"other"'})
+    assert resp.status_code == 200
+    assert resp.content == first.content
+
+
+def test_etag_changes_after_reload(installed, client, backend):
+    first = client.get("/stats")
+    etag = first.headers["ETag"]
+    assert first.json()["comment_count"] == len(ROWS)
+    generation = backend.INDEX.generation
+
+    installed.append(APPENDED)
+    assert backend.RELOADER.check()
+    assert backend.INDEX.generation == generation + 1
+
+    resp = client.get("/stats", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] != etag
+    assert resp.json()["comment_count"] == len(ROWS) + len(APPENDED)
+    assert resp.json() == backend.build_index(installed.source_files).stats_payload
+
+    # 新的 ETag 同样可以拿来做条件请求
+    again = client.get("/stats", headers={"If-None-Match": resp.headers["ETag"]})
+    assert again.status_code == 304
@@ -0,0 +1,57 @@
+"""
+csv_source 的续读回归测试：启动时文件末尾有写了一半的记录，之后爬虫补完并继续追加。
+
+运行方式（项目根目录）：
+    python -m pytest -q tests
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "Global_Phone_Sentiment"))
+
+from csv_source import read_csv_frame, read_csv_full, read_csv_tail  # noqa: E402
+
+
+def _texts(rows):
+    return [row["text"] for row in rows]
+
+
+def test_half_written_record_then_append(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_bytes(b'id,text\n1,hello\n2,"half wri')
+
+    rows, cursor = read_csv_full(path)
+    assert _texts(rows) == ["hello"]
+    assert cursor.offset == len(b"id,text\n1,hello\n")
+    frame, frame_cursor = read_csv_frame(path)
+    assert list(frame["text"]) == ["hello"]
+    assert frame_cursor.to_dict() == cursor.to_dict()
+
+    with path.open("ab") as f:
+        f.write(b'tten row"\n3,next\n')
+    rows, cursor = read_csv_tail(cursor)
+    assert _texts(rows) == ["half written row", "next"]
+    assert cursor.offset == path.stat().st_size
+    assert cursor.rows == 3
+
+    with path.open("ab") as f:
+        f.write(b"4,more\n")
+    rows, cursor = read_csv_tail(cursor)
+    assert _texts(rows) == ["more"]
+
+
+def test_last_record_without_newline_is_read_once(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_bytes(b"id,text\n1,a\n2,b")
+
+    rows, cursor = read_csv_full(path)
+    assert _texts(rows) == ["a", "b"]
+    assert (cursor.rows, cursor.pending) == (2, 1)
+    assert read_csv_tail(cursor) == ([], cursor)
+
+    with path.open("ab") as f:
+        f.write(b"\n3,c\n")
+    rows, cursor = read_csv_tail(cursor)
+    assert _texts(rows) == ["c"]
+    assert (cursor.rows, cursor.pending, cursor.offset) == (3, 0, path.stat().st_size)
@@ -0,0 +1,58 @@
+"""
+main._load_sources：进程池并行加载与逐个加载的结果必须一致，
+包括并回 DATE_NORMALIZER 的日期计数器和嗅探出的格式。
+
+运行方式（项目根目录）：
+    python -m pytest -q tests
+"""
+
+import dataclasses
+import multiprocessing
+
+import numpy as np
+import pytest
+
+
+def _load(backend, monkeypatch, workers):
+    """按指定进程数加载一遍，返回 (结果, 实际进程数, 本次加载后 DATE_NORMALIZER 的增量)"""
+    monkeypatch.setattr(backend, "LOAD_WORKERS", workers)
+    normalizer = backend.DATE_NORMALIZER
+    normalizer.forget()
+    before = normalizer.export()
+    loaded, used = backend._load_sources(backend._collect_source_files())
+    after = normalizer.export()
+    return loaded, used, (after.hits - before.hits, after.misses - before.misses, after.formats)
+
+
+def _assert_same_chunk(a, b):
+    for f in dataclasses.fields(a):
+        x, y = getattr(a, f.name), getattr(b, f.name)
+        if isinstance(x, np.ndarray):
+            assert x.dtype == y.dtype and np.array_equal(x, y), f.name
+        else:
+            assert x == y, f.name
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(), reason="进程池加载需要 fork"
+)
+def test_pooled_load_matches_sequential(backend, monkeypatch):
+    sequential, used, seq_dates = _load(backend, monkeypatch, 1)
+    assert used == 1
+    pooled, used, pool_dates = _load(backend, monkeypatch, 2)
+    assert used == 2
+
+    assert len(pooled) == len(sequential)
+    for a, b in zip(sequential, pooled):
+        assert a.cursor.to_dict() == b.cursor.to_dict()
+        assert a.bilibili_urls == b.bilibili_urls
+        assert (a.date_stats.hits, a.date_stats.misses, a.date_stats.formats) == (
+            b.date_stats.hits,
+            b.date_stats.misses,
+            b.date_stats.formats,
+        )
+        _assert_same_chunk(a.chunk, b.chunk)
+
+    assert seq_dates == pool_dates
+    assert seq_dates[0] > 0
+
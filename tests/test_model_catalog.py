@@ -0,0 +1,32 @@
+"""
+model_catalog：别名索引经 BrandResolver 参与品牌解析（机型名里没有品牌词时按型号反查）。
+
+运行方式（项目根目录）：
+    python -m pytest -q tests
+"""
+
+from model_catalog import compile_catalog
+
+TARGET_MODELS = {
+    "redmi_k70_pro": ["Redmi K70 Pro", "K70 Pro"],
+    "mate_60": ["Mate 60", "华为Mate60"],
+}
+BRANDS = {"redmi": "Xiaomi"}
+
+
+def test_aliases_resolve_brand_and_model():
+    resolver = compile_catalog(TARGET_MODELS, BRANDS).resolver
+    # 没有品牌词，只能靠别名 -> 型号 ID -> 品牌
+    match = resolver.resolve("K70 Pro")
+    assert (match.brand_id, match.model_id) == ("xiaomi", "redmi_k70_pro")
+    # 紧凑写法同样命中
+    assert resolver.resolve("k70pro").model_id == "redmi_k70_pro"
+    assert resolver.resolve("华为Mate60").model_id == "mate_60"
+    assert resolver.resolve("some phone") is None
+
+
+def test_main_resolve_brand_uses_aliases(backend, monkeypatch):
+    catalog = compile_catalog(TARGET_MODELS, BRANDS)
+    monkeypatch.setattr(backend, "get_model_catalog", lambda: catalog)
+    assert backend._resolve_brand("", "K70 Pro", "").brand_id == "xiaomi"
+    assert backend._resolve_brand("", "unknown device", "").brand_id == "other"
@@ -0,0 +1,114 @@
+"""
+/opinions 的 keyset 翻页：游标（base64 的 "day:seq"）往返、X-Total-Count / X-Next-Cursor 响应头、
+没有日期（NO_DATE）的行排在最后也能翻过去，以及无效游标返回 400。
+
+运行方式（项目根目录）：
+    python -m pytest -q tests
+"""
+
+import base64
+
+import pytest
+
+from opinion_store import NO_DATE
+
+# 7 条有日期（有同一天的）+ 3 条没有日期；CSV 里的顺序就是 seq 的顺序
+ROWS = [
+    ("2025-03-01 10:00:00", "r1"),
+    ("", "r2"),
+    ("2025-05-20 08:00:00", "r3"),
+    ("2025-03-01 23:00:00", "r4"),
+    ("2025-04-02 12:00:00", "r5"),
+    ("", "r6"),
+    ("2025-05-20 09:00:00", "r7"),
+    ("2024-12-31 00:00:00", "r8"),
+    ("2025-04-02 01:00:00", "r9"),
+    ("", "r10"),
+]
+# 按日期倒序、同一天按 seq 顺序，没有日期的排在最后
+EXPECTED = ["r3", "r7", "r5", "r9", "r1", "r4", "r8", "r2", "r6", "r10"]
+
+
+@pytest.fixture
+def opinions_client(small_index, client):
+    source, install = small_index
+    source.append(ROWS)
+    install()
+    return client
+
+
+def _pages(client, limit, **params):
+    """顺着 X-Next-Cursor 翻到底，返回 (每页的文本, 每页的 X-Total-Count, 用过的游标)"""
+    pages, totals, cursors = [], [], []
+    cursor = None
+    while True:
+        query = dict(params, brand_id="apple", limit=limit)
+        if cursor is not None:
+            query["cursor"] = cursor
+        resp = client.get("/opinions", params=query)
+        assert resp.status_code == 200
+        pages.append([r["raw_text"] for r in resp.json()])
+        totals.append(int(resp.headers["X-Total-Count"]))
+        cursor = resp.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return pages, totals, cursors
+        cursors.append(cursor)
+
+
+def test_cursor_round_trip(backend):
+    for key in [(20000, 0), (NO_DATE, (4 << 32) | 17), (-1, 5)]:
+        cursor = backend._encode_cursor(key)
+        assert "=" not in cursor
+        assert backend._decode_cursor(cursor) == key
+
+
+def test_pages_follow_next_cursor(opinions_client):
+    pages, totals, cursors = _pages(opinions_client, limit=3)
+    assert pages == [EXPECTED[0:3], EXPECTED[3:6], EXPECTED[6:9], EXPECTED[9:]]
+    assert totals == [len(ROWS)] * 4
+    assert len(cursors) == 3
+
+    # 一次取完时没有下一页
+    resp = opinions_client.get("/opinions", params={"brand_id": "apple", "limit": len(ROWS)})
+    assert [r["raw_text"] for r in resp.json()] == EXPECTED
+    assert "X-Next-Cursor" not in resp.headers
+
+
+def test_no_date_rows_page_through(opinions_client, backend):
+    pages, _, cursors = _pages(opinions_client, limit=4)
+    assert [t for page in pages for t in page] == EXPECTED
+    # 第二页的最后一行 r2 没有日期，游标里是 NO_DATE
+    assert backend._decode_cursor(cursors[1])[0] == NO_DATE
+    assert pages[2] == ["r6", "r10"]
+
+    resp = opinions_client.get("/opinions", params={"brand_id": "apple", "limit": 200})
+    assert [r["published_at"] for r in resp.json()][-3:] == ["", "", ""]
+
+
+def test_filters_keep_total_and_cursor(opinions_client):
+    pages, totals, _ = _pages(opinions_client, limit=1, year=2025, month=4)
+    assert pages == [["r5"], ["r9"]]
+    assert totals == [2, 2]
+
+
+def _b64(text):
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "!!!",
+        "zzzz",
+        "é",
+        _b64("abc"),
+        _b64("1:2:3"),
+        _b64("1.5:2"),
+        _b64("99999999999999999999:1"),
+        _b64("1:-7"),
+        _b64(f"1:{1 << 63}"),
+    ],
+)
+def test_invalid_cursor_is_400(opinions_client, cursor):
+    resp = opinions_client.get("/opinions", params={"brand_id": "apple", "cursor": cursor})
+    assert resp.status_code == 400
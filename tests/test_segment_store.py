@@ -0,0 +1,38 @@
+"""
+segment_store 的回归测试：sync 时 CSV 末尾有写了一半的记录，不能冻结进段文件。
+
+运行方式（项目根目录）：
+    python -m pytest -q tests
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "Global_Phone_Sentiment"))
+
+pytest.importorskip("pyarrow")
+
+import segment_store  # noqa: E402
+from csv_source import read_csv_full  # noqa: E402
+
+
+def test_sync_skips_half_written_record(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_bytes(b'id,text\n1,hello\n2,"half wri')
+    assert segment_store.sync(path) == 1
+
+    with path.open("ab") as f:
+        f.write(b'tten row"\n3,next\n')
+    assert segment_store.sync(path) == 2
+    rows, cursor = segment_store.read_rows(path)
+    assert [row["text"] for row in rows] == ["hello", "half written row", "next"]
+    assert cursor.offset == path.stat().st_size
+
+
+def test_read_rows_matches_csv_without_trailing_newline(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_bytes(b"id,text\n1,a\n2,b")
+    assert segment_store.sync(path) == 1
+    assert segment_store.read_rows(path)[0] == read_csv_full(path)[0]
@@ -0,0 +1,143 @@
+"""
+SearchIndex.extended（热更新时在旧索引上增量扩展）必须与对新 store 完整 build 的结果一致：
+倒排表（term_starts / doc_ids / tfs）、doc_len、BM25 权重和 top-k 检索结果都相同。
+extended 把新词项追加在旧词表后面，词项编码的顺序可以不同，所以先按 build 的词表顺序重排再比较。
+
+运行方式（项目根目录）：
+    python -m pytest -q tests
+"""
+
+import numpy as np
+import pytest
+
+from opinion_store import NO_DATE, SENTIMENTS, OpinionStoreBuilder, date_to_day
+from text_search import SearchIndex
+
+QUERIES = ["battery", "续航 发热", "camera good", "screen", "iphone 16 pro", "信号", "no_such_term"]
+
+
+def _row(text, day=NO_DATE, brand_id="apple", platform="reddit"):
+    return {
+        "platform": platform,
+        "brand_id": brand_id,
+        "brand": brand_id.capitalize(),
+        "model": "",
+        "sentiment": "neu",
+        "is_comment": True,
+        "day": day,
+        "text": text,
+    }
+
+
+def _store(rows, base=None):
+    """rows 是 (seq, row)；传入 base 时在它的基础上追加"""
+    builder = OpinionStoreBuilder(base)
+    for seq, row in rows:
+        builder.add(row, seq=seq)
+    return builder.build()
+
+
+def _copy_rows(store, rows):
+    """把 store 里的若干行（保留 seq，按 seq 排好）转成 _store 的输入"""
+    result = []
+    for row in rows[np.argsort(store.seq[rows], kind="stable")]:
+        row = int(row)
+        result.append((
+            int(store.seq[row]),
+            {
+                "platform": store.platforms[store.platform[row]],
+                "brand_id": store.brand_ids[store.brand[row]],
+                "brand": store.brand_names[store.brand_name[row]],
+                "model": store.models[store.model[row]],
+                "sentiment": SENTIMENTS[store.sentiment[row]],
+                "is_comment": bool(store.is_comment[row]),
+                "day": int(store.day[row]),
+                "text": store.text(row),
+            },
+        ))
+    return result
+
+
+def _in_term_order(index, terms):
+    """把 index 的倒排表按给定词表的顺序重排，返回 (term_starts, doc_ids, tfs, weights, idf)"""
+    codes = np.array([index.terms.lookup(term) for term in terms], dtype=np.int64)
+    starts, ends = index.term_starts[codes], index.term_starts[codes + 1]
+    picks = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)] or [np.empty(0, np.int64)])
+    term_starts = np.concatenate([[0], np.cumsum(ends - starts)]).astype(np.int64)
+    return term_starts, index.doc_ids[picks], index.tfs[picks], index._weights[picks], index._idf[codes]
+
+
+def _assert_same_index(extended, full):
+    assert len(extended.terms) == len(full.terms)
+    assert all(extended.terms.lookup(term) is not None for term in full.terms.values)
+    term_starts, doc_ids, tfs, weights, idf = _in_term_order(extended, full.terms.values)
+    assert np.array_equal(term_starts, full.term_starts)
+    assert np.array_equal(doc_ids, full.doc_ids)
+    assert np.array_equal(tfs, full.tfs)
+    assert np.array_equal(extended.doc_len, full.doc_len)
+    assert np.allclose(weights, full._weights)
+    assert np.allclose(idf, full._idf)
+    for query in QUERIES:
+        a, b = extended.search(query, top_k=10), full.search(query, top_k=10)
+        assert np.array_equal(a.rows, b.rows), query
+        assert np.allclose(a.scores, b.scores), query
+        assert np.array_equal(a.matched, b.matched), query
+
+
+def test_extended_matches_build_after_append():
+    day = date_to_day
+    base = _store([
+        (0, _row("battery life is great", day("2025-03-01"))),
+        (1, _row("screen too dim, battery ok", day("2025-05-01"))),
+        (2, _row("续航 一般 发热 严重")),
+        (3, _row("camera good camera good", day("2025-04-01"), brand_id="xiaomi")),
+    ])
+    base_index = SearchIndex.build(base)
+
+    # 追加的行日期穿插在旧行之间（新 store 里旧行的行号会变），有新词也有旧词，还有空文本
+    store = _store(
+        [
+            (4, _row("new phone, battery drains fast", day("2025-04-15"))),
+            (5, _row("信号 很差 发热", day("2025-06-01"), brand_id="xiaomi")),
+            (6, _row("")),
+            (7, _row("screen screen screen", day("2025-01-01"))),
+        ],
+        base=base,
+    )
+    extended = base_index.extended(base, store)
+    assert extended.mode == "incremental"
+    _assert_same_index(extended, SearchIndex.build(store))
+
+
+def test_extended_on_real_data(backend):
+    """仓库自带的数据：去掉最新加载的 5% 行当作旧索引，再把它们追加回来"""
+    full_store = backend.INDEX.opinions
+    cutoff = np.sort(full_store.seq)[int(len(full_store) * 0.95)]
+    keep = np.flatnonzero(full_store.seq < cutoff)
+    added = np.flatnonzero(full_store.seq >= cutoff)
+
+    base = _store(_copy_rows(full_store, keep))
+    store = _store(_copy_rows(full_store, added), base=base)
+    assert np.array_equal(store.seq, full_store.seq)
+
+    extended = SearchIndex.build(base).extended(base, store)
+    assert extended.mode == "incremental"
+    _assert_same_index(extended, SearchIndex.build(store))
+
+
+def test_extended_falls_back_when_base_rows_are_missing():
+    base = _store([(0, _row("battery")), (1, _row("screen"))])
+    # seq=1 的行不在新 store 里：不是单纯的追加，整体重建
+    store = _store([(0, _row("battery")), (2, _row("camera battery"))])
+    extended = SearchIndex.build(base).extended(base, store)
+    assert extended.mode == "full"
+    _assert_same_index(extended, SearchIndex.build(store))
+
+
+@pytest.mark.parametrize("n_base", [0, 3])
+def test_extended_from_empty_or_to_same_rows(n_base):
+    rows = [(i, _row(f"battery {i} screen", 20000 + i)) for i in range(3)]
+    base = _store(rows[:n_base])
+    store = _store(rows[n_base:], base=base)
+    extended = SearchIndex.build(base).extended(base, store)
+    _assert_same_index(extended, SearchIndex.build(store))